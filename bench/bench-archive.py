@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""SD-card: Verify + benchmark the delta-archive of adva-sdcard-history.
+
+Round-trip (compress -> decompress, bit-exact) of SMART-dump sequences:
+
+- synthetic: simulated cards of all layouts (see adva-sdcard-sim),
+  sampled hourly over several years
+- real: the fixtures in bench/data/ (dumps of real cards) and files
+  given on the commandline (history files, or lines TIMESTAMP TYPE-HEX
+  as written by `adva-sdcard-history export -r`)
+
+For each sequence, also check random access (record(), range()) and
+a truncated archive (without index), and measure the size compared to
+history files / hex-lines and the time of a full replay. A replay must
+not be slower than parsing hex-lines (checked for sequences of at least
+TIMED dumps; shorter ones are too fast for a meaningful timing).
+
+:Usage:
+    bench/bench-archive.py [-y YEARS] [--min-ratio RATIO] [FILE ...]
+
+:Exit code:
+    0:   all round-trips exact, synthetic ratio >= --min-ratio and
+         replays not slower than hex-lines
+    1:   otherwise
+
+:Author:    Advamation / Roland Freikamp <support@advamation.de>
+:Version:   2026-10-17
+:Copyright: Advamation <info@advamation.de>
+:License:   MIT
+"""
+
+import os
+import sys
+import time
+import glob
+import random
+import argparse
+import tempfile
+import importlib.machinery
+import importlib.util
+
+SRC = os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "src")
+DATA = os.path.join(os.path.dirname(os.path.realpath(__file__)), "data")
+TIMED = 1000
+REPEAT = 5
+
+def load_tool(name):
+    """Load adva-sdcard-* script from src/ as module."""
+    loader = importlib.machinery.SourceFileLoader(name.replace("-", "_"), os.path.join(SRC, name + ".py"))
+    spec = importlib.util.spec_from_loader(loader.name, loader)
+    module = importlib.util.module_from_spec(spec)
+    loader.exec_module(module)
+    return module
+
+def synthetic(sim, layout, years, seed=0):
+    """Hourly dumps of a simulated card: list of (timestamp, type, data)."""
+    index = 0
+    while True:
+        card = sim.SimCard(seed, index, [layout], 0.0)
+        if card.layout == layout:
+            break
+        index += 1
+    t0 = 1.6e9
+    typ = "A" if layout == "A" else "T"
+    return [(t0 + h * 3600.0, typ, card.smart(h / 24.0)) for h in range(int(years * 365 * 24))]
+
+def real(hist, path):
+    """Dumps from a history file or TIMESTAMP TYPE-HEX lines."""
+    with open(path, 'rb') as f:
+        binary = f.read(len(hist.MAGIC)) == hist.MAGIC
+    if binary:
+        with hist.History(path) as h:
+            return [(ts, typ, bytes(data)) for ts, typ, data in h.range()]
+    dumps = []
+    with open(path, 'r', encoding="latin-1") as f:
+        for line in f:
+            if line.strip():
+                ts, raw = line.split()
+                dumps.append((float(ts), raw[0], bytes.fromhex(raw[2:])))
+    return dumps
+
+def check(hist, name, dumps, tmp):
+    """Round-trip + random access + replay-timing of one sequence.
+
+    :Returns:
+        (ok, compression ratio against history files)
+    """
+    dumps = [(round(ts * 1000) / 1000.0, typ, data) for ts, typ, data in dumps]
+    apath, hpath = os.path.join(tmp, "a.hista"), os.path.join(tmp, "a.hist")
+    for path in (apath, hpath):
+        if os.path.exists(path):
+            os.unlink(path)
+    t0 = time.perf_counter()
+    with open(apath, 'wb') as f, hist.ArchiveWriter(f) as w:
+        for ts, typ, data in dumps:
+            w.append(ts, typ, data)
+    t_compress = time.perf_counter() - t0
+    with hist.History(hpath, create=True) as h:
+        for ts, typ, data in dumps:
+            h.append(ts, typ, data)
+
+    errors = []
+    t_archive = None
+    for _ in range(REPEAT):
+        t0 = time.perf_counter()
+        with hist.Archive(apath) as a:
+            replay = list(a.range())
+        t = time.perf_counter() - t0
+        t_archive = t if t_archive is None else min(t_archive, t)
+    with hist.Archive(apath) as a:
+        if replay != dumps:
+            errors.append("round-trip")
+        rnd = random.Random(0)
+        for i in rnd.sample(range(len(dumps)), min(50, len(dumps))):
+            if a.record(i) != dumps[i]:
+                errors.append("record(%d)" % i)
+                break
+        if dumps:
+            t_from, t_to = dumps[len(dumps) // 3][0], dumps[2 * len(dumps) // 3][0]
+            if list(a.range(t_from, t_to)) != [d for d in dumps if t_from <= d[0] < t_to]:
+                errors.append("range()")
+    with open(apath, 'rb') as f:
+        stream = list(hist.archive_read(f))
+    if stream != dumps:
+        errors.append("archive_read()")
+
+    # truncated (no index, last record incomplete)
+    size = os.path.getsize(apath)
+    with open(apath, 'r+b') as f:
+        f.truncate(size * 2 // 3)
+    with hist.Archive(apath) as a:
+        n = len(a)
+        if list(a.range()) != dumps[:n] or n < len(dumps) // 2:
+            errors.append("truncated")
+
+    lines = ["%.3f %s-%s\n" % (ts, typ, data.hex()) for ts, typ, data in dumps]
+    t_hist = t_lines = None
+    for _ in range(REPEAT):
+        t0 = time.perf_counter()
+        with hist.History(hpath) as h:
+            for _ in h.range():
+                pass
+        t = time.perf_counter() - t0
+        t_hist = t if t_hist is None else min(t_hist, t)
+        t0 = time.perf_counter()
+        parsed = []
+        for line in lines:
+            ts, raw = line.split()
+            parsed.append((float(ts), raw[0], bytes.fromhex(raw[2:])))
+        t = time.perf_counter() - t0
+        t_lines = t if t_lines is None else min(t_lines, t)
+    if len(dumps) >= TIMED and t_archive > t_lines:
+        errors.append("replay slower than hex-lines")
+
+    hsize, lsize = os.path.getsize(hpath), sum(len(line) for line in lines)
+    ratio = hsize / size
+    print("%-16s %7d dumps: %9d B (%6.1fx vs. history, %6.1fx vs. hex-lines)  compress %5.2f s  "
+          "replay %5.2f s (history %5.2f s, hex-lines %5.2f s)  %s" % (
+          name, len(dumps), size, ratio, lsize / size, t_compress, t_archive, t_hist, t_lines,
+          "FAIL: " + ", ".join(errors) if errors else "ok"))
+    return not errors, ratio
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify + benchmark the delta-archive of adva-sdcard-history.")
+    parser.add_argument("-y", "--years", type=float, default=3.0, help="years of hourly synthetic dumps per layout, default: 3")
+    parser.add_argument("--min-ratio", type=float, default=10.0, help="minimum compression ratio (synthetic, vs. history files), default: 10")
+    parser.add_argument("files", nargs='*', help="real dumps: history files or TIMESTAMP TYPE-HEX lines")
+    args = parser.parse_args()
+
+    hist = load_tool("adva-sdcard-history")
+    sim = load_tool("adva-sdcard-sim")
+    failed = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        for layout in ("A", "T_2GB_4GB", "T_8GB"):
+            ok, ratio = check(hist, "sim " + layout, synthetic(sim, layout, args.years), tmp)
+            failed += not ok or ratio < args.min_ratio
+        for path in sorted(glob.glob(os.path.join(DATA, "*.txt"))) + args.files:
+            ok, _ = check(hist, os.path.basename(path), real(hist, path), tmp)
+            failed += not ok
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
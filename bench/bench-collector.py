@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""SD-card: Load-test the collector.
+
+Start `adva-sdcard-collector serve` (one process, parsing in the
+event-loop unless -w), connect many simulated agents (asyncio, in this
+process) which push synthetic SMART-reports as text-lines or binary
+frames as fast as possible, and measure the sustained rate until all
+reports are written. Then check that malformed reports (CID-frames not
+16 bytes, cid= not 32 hex digits, unknown SMART-types) are written as
+error-records.
+
+:Usage:
+    bench/bench-collector.py [-a AGENTS] [-n REPORTS] [-w WORKERS] [--min-rate RATE]
+
+:Exit code:
+    0:   rate reached, all reports received, malformed reports as errors
+    1:   too slow, reports lost or malformed reports not rejected
+
+:Author:    Advamation / Roland Freikamp <support@advamation.de>
+:Version:   2026-10-17
+:Copyright: Advamation <info@advamation.de>
+:License:   MIT
+"""
+
+import os
+import sys
+import time
+import json
+import random
+import signal
+import struct
+import asyncio
+import argparse
+import tempfile
+import subprocess
+
+SRC = os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "src")
+
+FRAME_HEAD = struct.Struct(">cH")
+
+def agent_payload(agent, count, binary, seed=0):
+    """Synthetic reports of one agent (4 devices), as bytes."""
+    rnd = random.Random(seed + agent)
+    cards = []
+    for dev in range(4):
+        b = bytearray(rnd.getrandbits(8) for _ in range(512))
+        if dev % 2:
+            b[0:16] = b"Transcend" + bytes(7)
+        cid = bytes.fromhex("744a6055534455312030%08x4c8d" % (agent * 4 + dev))[:16]
+        cards.append(("/dev/mmcblk%d" % dev, cid, "AT"[dev % 2], bytes(b)))
+    parts = [("HELLO agent-%d%s\n" % (agent, " binary" if binary else "")).encode()]
+    for i in range(count):
+        device, cid, typ, b = cards[i % 4]
+        if binary:
+            d = device.encode()
+            parts += [FRAME_HEAD.pack(b"D", len(d)), d, FRAME_HEAD.pack(b"C", 16), cid,
+                      FRAME_HEAD.pack(typ.encode(), len(b)), b]
+        else:
+            parts.append(("device=%s cid=%s %s-%s\n" % (device, cid.hex(), typ, b.hex())).encode())
+    return b"".join(parts)
+
+def invalid_payload(binary):
+    """Malformed reports of one agent, as (bytes, number of reports)."""
+    b = bytes(range(256)) * 2
+    cid = bytes.fromhex("744a6055534455312030000000014c8d")
+    if binary:
+        parts = [b"HELLO agent-invalid binary\n"]
+        for c, typ in ((cid[:15], b"A"), (cid + b"\0", b"A"), (cid, b"X")):
+            parts += [FRAME_HEAD.pack(b"C", len(c)), c, FRAME_HEAD.pack(typ, len(b)), b]
+        return b"".join(parts), 3
+    lines = ["cid=%s A-%s" % (cid.hex()[:30], b.hex()),
+             "cid=%s A-%s" % (cid.hex() + "00", b.hex()),
+             "cid=0x%s A-%s" % (cid.hex()[2:], b.hex()),
+             "cid=%s X-%s" % (cid.hex(), b.hex())]
+    return ("HELLO agent-invalid\n" + "\n".join(lines) + "\n").encode(), len(lines)
+
+async def agents_run(path, payloads):
+    """Push payloads concurrently, one connection per agent."""
+    async def push(payload):
+        reader, writer = await asyncio.open_unix_connection(path)
+        for pos in range(0, len(payload), 65536):
+            writer.write(payload[pos:pos+65536])
+            await writer.drain()
+        writer.close()
+        await writer.wait_closed()
+    await asyncio.gather(*(push(p) for p in payloads))
+
+def lines_wait(path, total, timeout):
+    """Wait until path contains total lines; returns number of lines."""
+    lines = 0
+    t_end = time.monotonic() + timeout
+    with open(path, 'rb') as f:
+        while lines < total and time.monotonic() < t_end:
+            data = f.read()
+            if data:
+                lines += data.count(b"\n")
+            else:
+                time.sleep(0.01)
+    return lines
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test adva-sdcard-collector with simulated agents.")
+    parser.add_argument("-a", "--agents", type=int, default=200, help="number of simulated agents, default: 200")
+    parser.add_argument("-n", "--reports", type=int, default=1000, help="reports per agent, default: 1000")
+    parser.add_argument("-w", "--workers", type=int, default=0, help="worker-processes of the collector, default: 0")
+    parser.add_argument("--min-rate", type=float, default=10000.0, help="minimum sustained reports/s, default: 10000")
+    args = parser.parse_args()
+
+    failed = 0
+    for binary in (False, True):
+        payloads = [agent_payload(a, args.reports, binary) for a in range(args.agents)]
+        total = args.agents * args.reports
+        with tempfile.TemporaryDirectory() as tmp:
+            sock, output = os.path.join(tmp, "collector.sock"), os.path.join(tmp, "reports.ndjson")
+            proc = subprocess.Popen([sys.executable, os.path.join(SRC, "adva-sdcard-collector.py"), "serve",
+                                     "-l", sock, "-o", output, "-w", str(args.workers)], stderr=subprocess.PIPE)
+            while not os.path.exists(sock) or not os.path.exists(output):
+                time.sleep(0.01)
+            try:
+                t0 = time.perf_counter()
+                asyncio.run(agents_run(sock, payloads))
+                t_sent = time.perf_counter() - t0
+                lines = lines_wait(output, total, 60.0)
+                dt = time.perf_counter() - t0
+                payload, invalid = invalid_payload(binary)
+                asyncio.run(agents_run(sock, [payload]))
+                lines_wait(output, total + invalid, 10.0)
+            finally:
+                proc.send_signal(signal.SIGTERM)
+                stats = proc.communicate()[1].decode().strip()
+            with open(output, 'rb') as f:
+                tail = [json.loads(line) for line in f.read().splitlines()[total:]]
+        rate = lines / dt
+        rejected = len(tail) == invalid and all("error" in r and "smart" not in r for r in tail)
+        ok = lines == total and rate >= args.min_rate and rejected
+        failed += not ok
+        print("%-7s %d agents x %d reports: sent in %.2f s, written in %.2f s: %8.0f reports/s  %s" % (
+            "binary" if binary else "text", args.agents, args.reports, t_sent, dt, rate,
+            "ok" if ok else "FAIL: %d/%d reports, %.0f reports/s%s" % (lines, total, rate,
+            "" if rejected else ", malformed reports not rejected")))
+        print("        collector: " + stats)
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
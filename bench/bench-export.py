@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""SD-card: Verify + benchmark the export writers (CSV, NDJSON, MessagePack).
+
+On a synthetic corpus of simulated cards (see adva_sdcard.sim), all
+layouts, as dicts (smart_decode(), cid_parse()) and record types
+(adva_sdcard.records):
+
+- equivalence: CSV (csv-module), NDJSON (json-module) and MessagePack
+  (decoder below, or the msgpack-module if installed) read back equal
+  the schema-rows of the records
+- throughput:  records/s and MB/s per writer, compared with the
+  previous per-record output (print(json.dumps()), -p "key: value");
+  NDJSON must not be slower than print(json.dumps())
+
+:Usage:
+    bench/bench-export.py [-n COUNT]
+
+:Exit code:
+    0:   all writers read back correctly, NDJSON not slower
+    1:   otherwise
+
+:Author:    Advamation / Roland Freikamp <support@advamation.de>
+:Version:   2026-10-17
+:Copyright: Advamation <info@advamation.de>
+:License:   MIT
+"""
+
+import io
+import os
+import csv
+import sys
+import json
+import time
+import random
+import struct
+import argparse
+
+SRC = os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "src")
+sys.path.insert(0, SRC)
+
+from adva_sdcard import info, smart, sim
+from adva_sdcard.export import SCHEMAS, WRITERS
+from adva_sdcard.records import Cid, Smart
+
+def corpus(count, seed=0):
+    """Simulated cards of all layouts: (cid-dicts, smart-dicts, Cid, Smart)."""
+    rnd = random.Random(seed)
+    cids, smarts = [], []
+    for i in range(count):
+        card = sim.SimCard(seed, i, ["A", "T_2GB_4GB", "T_8GB"], 0.0)
+        cids.append(card.cid.hex())
+        smarts.append(("A" if card.layout == "A" else "T", card.smart(rnd.uniform(0.0, 3000.0))))
+    return ([info.cid_parse(cid) for cid in cids], [smart.smart_decode(typ, b) for typ, b in smarts],
+            [Cid.parse(cid) for cid in cids], [Smart.decode(typ, b) for typ, b in smarts])
+
+#=========================================
+# read back
+
+def msgpack_unpack(data):
+    """Decode a stream of MessagePack-values (subset of adva_sdcard.export)."""
+    try:
+        import msgpack
+        return list(msgpack.Unpacker(io.BytesIO(data), raw=False, strict_map_key=False))
+    except ImportError:
+        pass
+    pos = 0
+    def unpack():
+        nonlocal pos
+        c = data[pos]
+        pos += 1
+        if c < 0x80:
+            return c
+        if c >= 0xe0:
+            return c - 0x100
+        if 0x80 <= c <= 0x8f or c in (0xde, 0xdf):
+            n = c & 0x0f if c <= 0x8f else read(">H" if c == 0xde else ">I")
+            return {unpack(): unpack() for _ in range(n)}
+        if 0x90 <= c <= 0x9f or c in (0xdc, 0xdd):
+            n = c & 0x0f if c <= 0x9f else read(">H" if c == 0xdc else ">I")
+            return [unpack() for _ in range(n)]
+        if 0xa0 <= c <= 0xbf or c in (0xd9, 0xda, 0xdb, 0xc4, 0xc5, 0xc6):
+            n = c & 0x1f if c <= 0xbf else read({0xd9: ">B", 0xda: ">H", 0xdb: ">I", 0xc4: ">B", 0xc5: ">H", 0xc6: ">I"}[c])
+            pos += n
+            return data[pos-n:pos] if c in (0xc4, 0xc5, 0xc6) else data[pos-n:pos].decode("utf-8")
+        if c in (0xc0, 0xc2, 0xc3):
+            return {0xc0: None, 0xc2: False, 0xc3: True}[c]
+        return read({0xcc: ">B", 0xcd: ">H", 0xce: ">I", 0xcf: ">Q", 0xd0: ">b", 0xd1: ">h",
+                     0xd2: ">i", 0xd3: ">q", 0xcb: ">d"}[c])
+    def read(fmt):
+        nonlocal pos
+        val = struct.unpack_from(fmt, data, pos)[0]
+        pos += struct.calcsize(fmt)
+        return val
+    values = []
+    while pos < len(data):
+        values.append(unpack())
+    return values
+
+def expected(records, schema, flat):
+    """Schema-rows of the records (reference, without generated code)."""
+    rows = []
+    for record in records:
+        get = (lambda name: getattr(record, name, None)) if isinstance(record, tuple) else record.get
+        row = []
+        for name in schema.fields:
+            val = get(name)
+            if name in schema.widths:
+                val = list(val) if val is not None else [None] * schema.widths[name] if flat else None
+                if flat:
+                    row.extend(val)
+                    continue
+            row.append(val)
+        rows.append(row)
+    return rows
+
+def readback(fmt, data, records, schema):
+    """Compare the written data with the records; returns mismatches."""
+    if fmt == "csv":
+        rows = list(csv.reader(io.StringIO(data.decode("utf-8"))))
+        if tuple(rows[0]) != schema.columns:
+            return 1
+        ref = [["" if val is None else repr(val) if isinstance(val, float) else str(val) for val in row]
+               for row in expected(records, schema, True)]
+        return sum(a != b for a, b in zip(rows[1:], ref)) + abs(len(rows) - 1 - len(ref))
+    if fmt == "ndjson":
+        rows = [json.loads(line) for line in data.decode("utf-8").splitlines()]
+    else:
+        rows = msgpack_unpack(data)
+        for row in rows:        # integers beyond 64 bit are hex-strings
+            for key, val in row.items():
+                if isinstance(val, str) and val.startswith("0x"):
+                    row[key] = int(val, 16)
+    ref = [dict(zip(schema.fields, row)) for row in expected(records, schema, False)]
+    if fmt == "ndjson":     # without null-fields
+        ref = [{key: val for key, val in row.items() if val is not None} for row in ref]
+    return sum(list(a) != list(b) or a != b for a, b in zip(rows, ref)) + abs(len(rows) - len(ref))
+
+#=========================================
+# throughput
+
+def rate(func, count, repeat=5):
+    """Best records/s of func() (writes count records), and output size."""
+    best, size = None, 0
+    for _ in range(repeat):
+        f = io.BytesIO()
+        t0 = time.perf_counter()
+        func(f)
+        t = time.perf_counter() - t0
+        best = t if best is None else min(best, t)
+        size = f.tell()
+    return count / best, size / best / 1e6
+
+def print_json(records):
+    """Previous output: one json.dumps() + print() per record (-j, --batch)."""
+    def func(f):
+        out = io.TextIOWrapper(f, encoding="utf-8")
+        for record in records:
+            print(json.dumps(record), file=out)
+        out.flush()
+        out.detach()
+    return func
+
+def print_parsable(records):
+    """Previous output: one print() per field (-p)."""
+    def func(f):
+        out = io.TextIOWrapper(f, encoding="utf-8")
+        for record in records:
+            for key, val in record.items():
+                print("%s: %s" % (key, val), file=out)
+        out.flush()
+        out.detach()
+    return func
+
+def write(fmt, schema, records):
+    def func(f):
+        with WRITERS[fmt](f, schema) as writer:
+            writer.write_many(records)
+    return func
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify + benchmark the export writers.")
+    parser.add_argument("-n", "--count", type=int, default=100000, help="number of simulated cards, default: 100000")
+    args = parser.parse_args()
+
+    cid_dicts, smart_dicts, cid_records, smart_records = corpus(args.count)
+    failed = 0
+    for kind, records in (("cid", cid_dicts), ("cid", cid_records), ("smart", smart_dicts), ("smart", smart_records)):
+        for fmt in WRITERS:
+            f = io.BytesIO()
+            with WRITERS[fmt](f, SCHEMAS[kind], buffer_size=4096) as writer:
+                writer.write_many(records[:3000])
+            mismatches = readback(fmt, f.getvalue(), records[:3000], SCHEMAS[kind])
+            if mismatches:
+                print("FAIL: %s %s (%s): %d mismatches" % (fmt, kind, type(records[0]).__name__, mismatches))
+                failed += 1
+    print("equivalence: %d mismatching writers" % failed)
+
+    print("%-6s %-26s %12s %8s" % ("", "", "records/s", "MB/s"))
+    for kind, dicts, records in (("cid", cid_dicts, cid_records), ("smart", smart_dicts, smart_records)):
+        rates = {}
+        for name, func in (("print(json.dumps()) (-j)", print_json(dicts)),
+                           ("print() per field (-p)", print_parsable(dicts))):
+            rates[name] = rate(func, len(dicts))
+            print("%-6s %-26s %12.0f %8.1f" % ((kind, name) + rates[name]))
+        for fmt in WRITERS:
+            rates[fmt] = rate(write(fmt, SCHEMAS[kind], dicts), len(dicts))
+            print("%-6s %-26s %12.0f %8.1f" % ((kind, fmt) + rates[fmt]))
+            print("%-6s %-26s %12.0f %8.1f" % ((kind, fmt + " (records)") + rate(write(fmt, SCHEMAS[kind], records), len(records))))
+        if rates["ndjson"][0] < rates["print(json.dumps()) (-j)"][0]:
+            print("FAIL: %s: ndjson slower than print(json.dumps())" % kind)
+            failed += 1
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
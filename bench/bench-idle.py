@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""SD-card: Benchmark the idle-aware SMART-read scheduler.
+
+Run SMART-reads (SmartScheduler of adva-sdcard-smart) against a
+simulated card (see adva-sdcard-sim), while a synthetic foreground
+workload produces bursts of I/O (updates /sys/block/mmcblk0/stat of the
+simulation: in_flight, completed I/Os, io_ticks, time_in_queue), and
+compare reading immediately (--idle 0) with waiting for idle windows:
+
+- overlap: reads (and seconds) which overlapped foreground bursts,
+  i.e. which delayed foreground I/O
+- wait:    delay of the reads (staleness), must stay below --max-delay
+- io_wait: foreground I/O-time during the reads, as recorded by the
+  scheduler
+
+:Usage:
+    bench/bench-idle.py [-n READS] [--idle SECONDS] [--max-delay SECONDS] [--latency MS]
+
+:Exit code:
+    0:   fewer overlapping reads with idle-windows, delays within --max-delay
+    1:   otherwise
+
+:Author:    Advamation / Roland Freikamp <support@advamation.de>
+:Version:   2026-10-17
+:Copyright: Advamation <info@advamation.de>
+:License:   MIT
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import threading
+import importlib.machinery
+import importlib.util
+
+SRC = os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "src")
+
+def load_tool(name):
+    """Load adva-sdcard-* script from src/ as module."""
+    loader = importlib.machinery.SourceFileLoader(name.replace("-", "_"), os.path.join(SRC, name + ".py"))
+    spec = importlib.util.spec_from_loader(loader.name, loader)
+    module = importlib.util.module_from_spec(spec)
+    loader.exec_module(module)
+    return module
+
+class Workload(threading.Thread):
+    """Bursty foreground I/O, written to a simulated /sys/block/DEV/stat."""
+    def __init__(self, path, busy=(0.05, 0.5), gap=(0.2, 2.0), seed=0):
+        super().__init__(daemon=True)
+        self.path, self.busy, self.gap = path, busy, gap
+        self.random = random.Random(seed)
+        self.bursts = []            # (start, end), monotonic
+        self.stop = threading.Event()
+        self.ios = self.ticks = 0
+
+    def _write(self, in_flight):
+        tmp = self.path + ".tmp"
+        with open(tmp, 'w', encoding="ascii") as f:
+            f.write("%8d %8d %8d %8d %8d %8d %8d %8d %8d %8d %8d\n" % (
+                self.ios, 0, self.ios * 8, self.ticks, 0, 0, 0, 0, in_flight, self.ticks, self.ticks))
+        os.replace(tmp, self.path)
+
+    def run(self):
+        while not self.stop.is_set():
+            t_start = time.monotonic()
+            t_end = t_start + self.random.uniform(*self.busy)
+            while time.monotonic() < t_end:
+                self.ios += 1
+                self.ticks += 10
+                self._write(1)
+                time.sleep(0.01)
+            self._write(0)
+            self.bursts.append((t_start, time.monotonic()))
+            self.stop.wait(self.random.uniform(*self.gap))
+
+def overlap(intervals, bursts):
+    """Number of intervals overlapping bursts, and overlapping seconds."""
+    count, seconds = 0, 0.0
+    for t0, t1 in intervals:
+        o = sum(max(0.0, min(t1, b1) - max(t0, b0)) for b0, b1 in bursts)
+        count += o > 0
+        seconds += o
+    return count, seconds
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the idle-aware SMART-read scheduler with a simulated card.")
+    parser.add_argument("-n", "--reads", type=int, default=40, help="SMART-reads per mode, default: 40")
+    parser.add_argument("--idle", type=float, default=0.3, help="idle-time before a read in seconds, default: 0.3")
+    parser.add_argument("--max-delay", type=float, default=5.0, help="maximum delay of a read in seconds, default: 5")
+    parser.add_argument("--latency", type=float, default=20.0, help="latency per CMD56 in ms, default: 20")
+    args = parser.parse_args()
+
+    failed = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        simtool = load_tool("adva-sdcard-sim")
+        simtool.sim_create(tmp, cards=1, layouts=["A"], unsupported=0.0, latency=args.latency)
+        simtool.install(tmp)
+        from adva_sdcard import smart   # the module itself, for replacing smart_get_any()
+        reads = []
+        smart_get_any = smart.smart_get_any
+        def smart_get_timed(dev, backend="auto"):
+            t0 = time.monotonic()
+            try:
+                return smart_get_any(dev, backend)
+            finally:
+                reads.append((t0, time.monotonic()))
+        smart.smart_get_any = smart_get_timed
+
+        results = {}
+        for idle in (0.0, args.idle):
+            workload = Workload(os.path.join(tmp, "sys", "block", "mmcblk0", "stat"))
+            workload.start()
+            scheduler = smart.SmartScheduler(idle=idle, max_delay=args.max_delay, backend="ioctl")
+            del reads[:]
+            rnd = random.Random(1)
+            waits = []
+            for _ in range(args.reads):
+                time.sleep(rnd.uniform(0.0, 0.5))
+                scheduler.read("/dev/mmcblk0")
+                waits.append(scheduler.stats["/dev/mmcblk0"]["last"]["wait"])
+            workload.stop.set()
+            workload.join()
+            stats = scheduler.stats["/dev/mmcblk0"]
+            count, seconds = overlap(reads, workload.bursts)
+            results[idle] = count
+            print("idle=%.2f s: %3d reads, %3d forced, wait avg %5.2f s / max %5.2f s, read %5.1f ms, "
+                  "overlapping %3d reads / %7.1f ms, io_wait %7.1f ms" % (
+                  idle, stats["reads"], stats["forced"], stats["wait"] / stats["reads"], max(waits),
+                  stats["duration"] / stats["reads"] * 1e3, count, seconds * 1e3, stats["io_wait"] * 1e3))
+            if max(waits) > args.max_delay + 2 * scheduler.poll:
+                print("FAIL: delay above --max-delay")
+                failed += 1
+    if results[args.idle] > results[0.0] or (results[0.0] and results[args.idle] == results[0.0]):
+        print("FAIL: idle-windows did not reduce overlapping reads")
+        failed += 1
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""SD-card: Benchmark the fleet inventory.
+
+Ingest synthetic records (a fleet of cards, sampled daily, some moving
+between hosts and growing bad blocks) into a temporary inventory, and
+time the ingest and the common reports against a budget, and check
+that re-ingesting records adds no samples and that records of the
+wrong shape are reported via the error-callback.
+
+:Usage:
+    bench/bench-inventory.py [-n COUNT] [-c CARDS] [--ingest-budget S] [--query-budget MS]
+
+:Exit code:
+    0:   within budget, checks ok
+    1:   budget exceeded or check failed
+
+:Author:    Advamation / Roland Freikamp <support@advamation.de>
+:Version:   2026-10-17
+:Copyright: Advamation <info@advamation.de>
+:License:   MIT
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import importlib.machinery
+import importlib.util
+
+SRC = os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "src")
+
+def load_tool(name):
+    """Load adva-sdcard-* script from src/ as module."""
+    loader = importlib.machinery.SourceFileLoader(name.replace("-", "_"), os.path.join(SRC, name + ".py"))
+    spec = importlib.util.spec_from_loader(loader.name, loader)
+    module = importlib.util.module_from_spec(spec)
+    loader.exec_module(module)
+    return module
+
+def synthetic(count, cards, seed=0):
+    """Generate records: cards sampled round-robin, one round per day."""
+    rnd = random.Random(seed)
+    products = ("USDU1", "SDU1 ", "AP-MS", "SA08G")
+    fleet = []
+    for i in range(cards):
+        cid = {"manfid": 0x74 + i % 3, "oemid": "J`", "name": products[i % len(products)], "rev": "2.0",
+               "serial": i, "date": "2019-%02d" % (1 + i % 12)}
+        fleet.append([cid, "host-%04d" % (i // 2), 100.0, 0])
+    t0 = time.time() - (count // cards + 1) * 86400
+    for n in range(count):
+        card = fleet[n % cards]
+        if rnd.random() < 0.001:
+            card[1] = "host-%04d" % rnd.randrange(cards // 2)
+        if rnd.random() < 0.002:
+            card[3] += 1
+        card[2] = max(0.0, card[2] - rnd.random() * 1.6)
+        yield {"cid": card[0], "host": card[1], "time": t0 + (n // cards) * 86400 + n % cards,
+               "device": "/dev/mmcblk0",
+               "smart": {"endurance": card[2], "erase_count_avg": n // cards, "erase_count_max": n // cards + 5,
+                         "blocks_bad": card[3], "power_on_count": n // cards, "power_off_abnormal_count": 0}}
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark adva-sdcard-inventory ingest and reports.")
+    parser.add_argument("-n", "--count", type=int, default=1000000, help="number of records, default: 1000000")
+    parser.add_argument("-c", "--cards", type=int, default=10000, help="number of cards, default: 10000")
+    parser.add_argument("--ingest-budget", type=float, default=20.0, help="maximum ingest-time in s, default: 20")
+    parser.add_argument("--query-budget", type=float, default=50.0, help="maximum time per report in ms, default: 50")
+    args = parser.parse_args()
+
+    inv = load_tool("adva-sdcard-inventory")
+    failed = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        with inv.Inventory(os.path.join(tmp, "inventory.sqlite")) as inventory:
+            records = list(synthetic(args.count, args.cards))
+            t0 = time.perf_counter()
+            n = inventory.ingest(records)
+            dt = time.perf_counter() - t0
+            ok = dt <= args.ingest_budget
+            failed += not ok
+            print("%-28s %8.2f s  (%d records, %.0f records/s)  %s" % ("ingest", dt, n, n / dt, "ok" if ok else "FAIL: over budget"))
+
+            since = time.time() - 7 * 86400
+            for name, query in (
+                    ("endurance --below 20",  lambda: inventory.endurance_below(20.0)),
+                    ("badblocks --since 7d",  lambda: inventory.events("blocks_bad", since)),
+                    ("moved --since 7d",      lambda: inventory.events("host", since)),
+                    ("product USDU1",         lambda: inventory.product("USDU1")),
+                    ("host host-0042",        lambda: inventory.host("host-0042")),
+                    ("history 74-00000000",   lambda: inventory.history("74-00000000"))):
+                t0 = time.perf_counter()
+                result = query()
+                dt = time.perf_counter() - t0
+                ok = dt * 1e3 <= args.query_budget
+                failed += not ok
+                count = len(result[1]) if isinstance(result, tuple) else len(result)
+                print("%-28s %8.2f ms (%d rows)  %s" % (name, dt * 1e3, count, "ok" if ok else "FAIL: over budget"))
+
+            # re-ingest (re-collected files): no duplicate samples
+            nsamples = inventory.db.execute("SELECT count(*) FROM samples").fetchone()[0]
+            inventory.ingest(records[:args.count // 10])
+            ok = inventory.db.execute("SELECT count(*) FROM samples").fetchone()[0] == nsamples
+            failed += not ok
+            print("%-28s %8d samples  %s" % ("re-ingest", nsamples, "ok" if ok else "FAIL: duplicate samples"))
+
+            # records of the wrong shape: errors, not exceptions
+            cid = records[0]["cid"]
+            bad = [{"cid": cid, "smart": [1]}, {"cid": cid, "time": "x"}, {"devices": [1]},
+                   {"cid": cid, "smart": {"endurance": [1]}}, {"cid": {"manfid": 1}}, [1]]
+            errors = []
+            inventory.ingest(bad + records[:1], errors=lambda i, msg: errors.append(i))
+            ok = errors == list(range(len(bad)))
+            failed += not ok
+            print("%-28s %8d errors   %s" % ("invalid records", len(errors), "ok" if ok else "FAIL: %s" % errors))
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""SD-card: Verify + benchmark the compiled SMART-layouts.
+
+Compare the decoders compiled from SMART_LAYOUT_TABLE (smart_decode(),
+per-field decoders of SMART_FIELDS / SmartRecord) with the previous
+slice-based decoders (REFERENCE below, one lambda per field), on
+simulated cards of all layouts (see adva_sdcard.sim) and random
+SMART-data:
+
+- equivalence: identical values, types and field-order
+- throughput:  whole records and single fields per second
+
+:Usage:
+    bench/bench-layouts.py [-n COUNT]
+
+:Exit code:
+    0:   compiled decoders identical to the reference
+    1:   otherwise
+
+:Author:    Advamation / Roland Freikamp <support@advamation.de>
+:Version:   2026-10-17
+:Copyright: Advamation <info@advamation.de>
+:License:   MIT
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+SRC = os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "src")
+sys.path.insert(0, SRC)
+
+from adva_sdcard import smart, sim
+
+#=========================================
+# reference: slice-based decoders (adva-sdcard-smart before SMART_LAYOUT_TABLE)
+
+_be16 = lambda start: (lambda b: int.from_bytes(b[start:start+2], "big"))
+_be32 = lambda start: (lambda b: int.from_bytes(b[start:start+4], "big"))
+
+_REFERENCE_A_T_2GB_4GB = {
+    "type":                     None,
+    "flash_id":                 lambda b: int.from_bytes(b[0:9], "big"),
+    "ic_version":               lambda b: "%02d.%02d" % (b[9], b[10]),
+    "fw_version":               lambda b: "%02d.%02d" % (b[11], b[12]),
+    "ce_number":                lambda b: b[14],
+    "product_marker":           None,
+    "power_on_count":           _be32(112),
+    "power_off_abnormal_count": _be16(128),
+    "endurance":                lambda b: int.from_bytes(b[96:98], "big") / 100.0,
+    "erase_count_min":          lambda b: int.from_bytes(b[106:108] + b[100:102], "big"),
+    "erase_count_avg":          lambda b: int.from_bytes(b[104:106] + b[ 98:100], "big"),
+    "erase_count_max":          lambda b: int.from_bytes(b[108:110] + b[102:104], "big"),
+    "erase_count_total":        _be32(80),
+}
+
+REFERENCE = {
+    "A": dict(_REFERENCE_A_T_2GB_4GB, **{
+        "type":                       lambda b: 'A',
+        "product_marker":             lambda b: int.from_bytes(b[176:184], "big"),
+        "refresh_count_total":        _be16(160),
+        "blocks_bad":                 lambda b: sum(b[184:216]),
+        "blocks_good_rate":           lambda b: int.from_bytes(b[64:66], "big") / 100.0,
+        "blocks_spare":               _be16(16),
+        "blocks_bad_later_per_die":   lambda b: list(b[184:216]),
+        "blocks_bad_initial_per_die": lambda b: list(b[32:64]),
+        "blocks_bad_initial":         lambda b: sum(b[32:64]),
+    }),
+    "T_2GB_4GB": dict(_REFERENCE_A_T_2GB_4GB, **{
+        "type":                       lambda b: 'T',
+        "product_marker":             lambda b: b[176:185].decode("latin-1"),
+        "blocks_bad":                 _be32(32),
+        "blocks_spare_rate":          lambda b: int.from_bytes(b[64:66], "big") / 100.0,
+    }),
+    "T_8GB": {
+        "type":                       lambda b: 'T',
+        "flash_id":                   lambda b: int.from_bytes(b[80:86], "big"),
+        "ic_version":                 lambda b: b[88:96].decode("latin-1").strip(),
+        "fw_version":                 lambda b: b[128:134].decode("latin-1").strip(),
+        "product_marker":             lambda b: b[0:16].decode("latin-1").rstrip('\x00'),
+        "power_on_count":             _be32(76),
+        "power_off_abnormal_count":   _be32(28),
+        "endurance":                  lambda b: b[70],
+        "erase_count_min":            _be32(32),
+        "erase_count_avg":            _be32(44),
+        "erase_count_max":            _be32(36),
+        "blocks_bad":                 lambda b: b[26],
+    },
+}
+
+def reference_layout(typ, b):
+    if typ == 'A':
+        return "A"
+    if typ == 'T':
+        return "T_8GB" if b[0:9] == b'Transcend' else "T_2GB_4GB"
+    return None
+
+def reference_decode(typ, b):
+    fields = REFERENCE.get(reference_layout(typ, b), {})
+    return {name: decode(b) for name, decode in fields.items()}
+
+#=========================================
+
+def samples(count, seed=0):
+    """Raw SMART-data of simulated cards and random data: list of (typ, b)."""
+    rnd = random.Random(seed)
+    data = []
+    for i in range(count):
+        card = sim.SimCard(seed, i, ["A", "T_2GB_4GB", "T_8GB"], 0.0)
+        data.append(("A" if card.layout == "A" else "T", card.smart(rnd.uniform(0.0, 3000.0))))
+    for i in range(count):
+        b = bytearray(rnd.getrandbits(8) for _ in range(512))
+        if i % 3 == 2:
+            b[0:16] = b"Transcend" + bytes(7)
+        if i % 7 == 0:
+            b[88:96] = b" SM 27\t "
+        data.append(("ATX"[i % 5 // 2], bytes(b)))
+    return data
+
+def identical(a, b):
+    """Compare dicts incl. field-order and value-types."""
+    return a == b and list(a) == list(b) and [type(v) for v in a.values()] == [type(v) for v in b.values()]
+
+def rate(func, items, repeat=3):
+    """Best calls per second of func(*item)."""
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for item in items:
+            func(*item)
+        t = time.perf_counter() - t0
+        best = t if best is None else min(best, t)
+    return len(items) / best
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify + benchmark the compiled SMART-layouts against the slice-based reference.")
+    parser.add_argument("-n", "--count", type=int, default=20000, help="number of simulated cards (and random dumps), default: 20000")
+    args = parser.parse_args()
+
+    data = samples(args.count)
+    failed = 0
+    for typ, b in data:
+        layout = reference_layout(typ, b)
+        if smart.smart_layout(typ, b) != layout:
+            failed += 1
+            continue
+        if not identical(smart.smart_decode(typ, b), reference_decode(typ, b)):
+            failed += 1
+        if layout is not None and not identical(
+                {name: decode(b) for name, decode in smart.SMART_FIELDS[layout].items()}, reference_decode(typ, b)):
+            failed += 1
+        if dict(smart.SmartRecord(typ, b).items()) != reference_decode(typ, b):
+            failed += 1
+    print("equivalence: %d records, %d mismatches" % (len(data), failed))
+
+    single_new = lambda typ, b: smart.SMART_FIELDS[smart.smart_layout(typ, b)]["endurance"](b)
+    single_old = lambda typ, b: REFERENCE[reference_layout(typ, b)]["endurance"](b)
+    known = [(typ, b) for typ, b in data if typ != "X"]
+    for what, old, new in (("record", reference_decode, smart.smart_decode),
+                           ("field", single_old, single_new)):
+        r_old, r_new = rate(old, known), rate(new, known)
+        print("%-7s reference %9.0f/s  compiled %9.0f/s  (%.2fx)" % (what, r_old, r_new, r_new / r_old))
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
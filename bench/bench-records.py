@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""SD-card: Benchmark the record types of adva_sdcard.records.
+
+Compare the dicts of cid_parse() / csd_parse() / smart_decode() with the
+slotted record types (Cid, Csd, Smart*) on simulated cards of all
+layouts (see adva_sdcard.sim) and random SMART-data:
+
+- equivalence: to_dict() of the records equals the dicts (values and
+  field-order), pickle round-trip
+- memory:      traced memory (tracemalloc) of N parsed records, kept in
+  a list (like an inventory/history)
+- throughput:  parse/decode per second (dict, SmartRecord, records)
+
+:Usage:
+    bench/bench-records.py [-n COUNT]
+
+:Exit code:
+    0:   records equal the dicts and need less memory
+    1:   otherwise
+
+:Author:    Advamation / Roland Freikamp <support@advamation.de>
+:Version:   2026-10-17
+:Copyright: Advamation <info@advamation.de>
+:License:   MIT
+"""
+
+import os
+import sys
+import time
+import random
+import pickle
+import argparse
+import tracemalloc
+
+SRC = os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "src")
+sys.path.insert(0, SRC)
+
+from adva_sdcard import info, smart, sim
+from adva_sdcard.records import Cid, Csd, Smart
+
+def cards(count, seed=0):
+    """Simulated cards of all layouts: list of (cid, csd, typ, b)."""
+    data = []
+    for i in range(count):
+        card = sim.SimCard(seed, i, ["A", "T_2GB_4GB", "T_8GB"], 0.0)
+        data.append((card.cid.hex(), card.csd.hex(), "A" if card.layout == "A" else "T",
+                     card.smart(random.Random(i).uniform(0.0, 3000.0))))
+    return data
+
+def random_smart(count, seed=1):
+    """Random SMART-data of all layouts: list of (typ, b)."""
+    rnd = random.Random(seed)
+    data = []
+    for i in range(count):
+        b = bytearray(rnd.getrandbits(8) for _ in range(512))
+        if i % 3 == 2:
+            b[0:16] = b"Transcend" + bytes(7)
+        data.append(("AT"[i % 3 != 0], bytes(b)))
+    return data
+
+def equivalence(data, rnd):
+    """Compare records with dicts; returns the number of mismatches."""
+    failed = 0
+    for cid, csd, typ, b in data:
+        for record, parsed in ((Cid.parse(cid), info.cid_parse(cid)),
+                               (Csd.parse(csd), info.csd_parse(csd)),
+                               (Smart.decode(typ, b), smart.smart_decode(typ, b))):
+            d = record.to_dict()
+            if d != parsed or list(d) != list(parsed) or pickle.loads(pickle.dumps(record)) != record:
+                print("FAIL: %s differs: %r != %r" % (type(record).__name__, d, parsed))
+                failed += 1
+    for typ, b in rnd:
+        d = Smart.decode(typ, b).to_dict()
+        if d != smart.smart_decode(typ, b) or list(d) != list(smart.smart_decode(typ, b)):
+            print("FAIL: random SMART-data differs: %s-%s" % (typ, b.hex()))
+            failed += 1
+    if Smart.decode("X", bytes(512)) is not None or smart.smart_decode("X", bytes(512)) != {}:
+        print("FAIL: unknown SMART-type")
+        failed += 1
+    return failed
+
+def memory(func, items):
+    """Traced memory of [func(*item) for item in items], in bytes."""
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    result = [func(*item) for item in items]
+    size = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    del result
+    return size
+
+def throughput(func, items, repeat=3):
+    """Best calls per second of func(*item)."""
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for item in items:
+            func(*item)
+        t = time.perf_counter() - t0
+        best = t if best is None else min(best, t)
+    return len(items) / best
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark + verify the record types against the dicts.")
+    parser.add_argument("-n", "--count", type=int, default=20000, help="number of simulated cards, default: 20000")
+    args = parser.parse_args()
+
+    data = cards(args.count)
+    failed = equivalence(data, random_smart(min(args.count, 3000)))
+    print("equivalence: %d cards + random SMART-data, %d mismatches" % (len(data), failed))
+
+    cids = [(cid,) for cid, _, _, _ in data]
+    smarts = [(typ, b) for _, _, typ, b in data]
+    lazy = lambda typ, b: smart.SmartRecord(typ, b)["endurance"]
+    print("%-8s %-22s %10s %12s" % ("", "", "bytes/rec", "rec/s"))
+    for what, items, old, name, new in (("CID", cids, info.cid_parse, "Cid.parse()", Cid.parse),
+                                        ("SMART", smarts, smart.smart_decode, "Smart.decode()", Smart.decode)):
+        mem_old, mem_new = memory(old, items) / len(items), memory(new, items) / len(items)
+        print("%-8s %-22s %10.0f %12.0f" % (what, old.__name__ + "()", mem_old, throughput(old, items)))
+        if what == "SMART":
+            print("%-8s %-22s %10s %12.0f" % (what, "SmartRecord (1 field)", "-", throughput(lazy, items)))
+        print("%-8s %-22s %10.0f %12.0f  (memory %.1fx less)" % (
+              what, name, mem_new,
+              throughput(new, items), mem_old / mem_new))
+        if mem_new >= mem_old:
+            print("FAIL: records do not need less memory than dicts")
+            failed += 1
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""SD-card: Verify + benchmark the health-rule engine (adva_sdcard.rules).
+
+On a synthetic stream of SMART-samples of many cards (hourly samples,
+wearing out, with bursts of bad blocks and abnormal power-offs):
+
+- equivalence: events of the compiled, incremental RuleEngine vs. a
+               straightforward reference (full history per card,
+               windows re-scanned for every sample), also with `every`
+- throughput:  samples/s of RuleEngine.feed() for millions of samples,
+               and of the commandline-filter on raw SMART-lines of
+               simulated cards (see adva_sdcard.sim)
+- commandline: python3 -m adva_sdcard.rules on raw SMART-lines and
+               JSON-lines emits the same events as the engine
+
+:Usage:
+    bench/bench-rules.py [-n SAMPLES] [-c CARDS]
+
+:Exit code:
+    0:   events identical to the reference
+    1:   otherwise
+
+:Author:    Advamation / Roland Freikamp <support@advamation.de>
+:Version:   2026-10-17
+:Copyright: Advamation <info@advamation.de>
+:License:   MIT
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import subprocess
+import operator
+
+SRC = os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "src")
+sys.path.insert(0, SRC)
+
+from adva_sdcard import info, smart, sim
+from adva_sdcard.rules import RuleEngine, Rule, samples_parse_lines
+
+RULES = (
+    "endurance < 20",
+    "blocks_bad grew by > 5 in 24h",
+    "power_off_abnormal_count delta > 0",
+    "erase wave: erase_count_avg grew by >= 40 in 6h",
+    "endurance dropped by > 2 in 2d",
+    "blocks_bad >= 30",
+)
+
+def stream(cards, count, seed=0):
+    """Synthetic samples (smart, card, t, device, host), hourly, in time order.
+
+    Generated on the fly (millions of dicts would not fit into memory).
+    """
+    rnd = random.Random(seed)
+    state = [[rnd.uniform(30.0, 100.0), rnd.randrange(10), rnd.randrange(100), rnd.randrange(3000)] for _ in range(cards)]
+    names = ["%02x-%08x" % (0x74 if i % 3 else 0x27, i) for i in range(cards)]
+    t = 1.7e9
+    for n in range(count):
+        i = n % cards
+        if i == 0:
+            t += 3600.0
+        st = state[i]
+        st[0] = max(0.0, st[0] - rnd.expovariate(20.0))
+        if rnd.random() < 0.02:
+            st[1] += rnd.randrange(1, 5)
+        if rnd.random() < 0.01:
+            st[2] += 1
+        st[3] += rnd.randrange(0, 12)
+        sample = {"endurance": round(st[0], 2), "blocks_bad": st[1], "power_off_abnormal_count": st[2],
+                  "erase_count_avg": st[3], "power_on_count": n}
+        if n % 97 == 0:
+            del sample["blocks_bad"]        # field missing (e.g. read of another layout)
+        yield sample, names[i], t, "/dev/mmcblk%d" % (i % 4), "node-%d" % (i // 4)
+
+#=========================================
+# reference: full history, windows re-scanned
+
+_OPS = {"<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge, "==": operator.eq, "!=": operator.ne}
+
+def reference(rules, samples, every=False):
+    """Events of the rules, without compiled code / incremental state."""
+    history = {}
+    firing = {}
+    events = []
+    for smart_, card, t, device, host in samples:
+        for i, rule in enumerate(rules):
+            v = smart_.get(rule.field)
+            if v is None:
+                continue
+            hist = history.setdefault((card, i), [])
+            hist.append((t, v))
+            if len(hist) > 200:     # keep the histories short (only the windows are needed)
+                del hist[:100]
+            change = None
+            if rule.kind == "value":
+                f = _OPS[rule.op](v, rule.limit)
+            elif rule.kind == "delta":
+                if len(hist) < 2:
+                    continue
+                change = v - hist[-2][1]
+                f = _OPS[rule.op](change, rule.limit)
+            else:
+                window = [val for ts, val in hist if ts >= t - rule.window]
+                change = v - min(window) if rule.kind == "grew" else max(window) - v
+                f = _OPS[rule.op](change, rule.limit)
+            since = firing.get((card, i))
+            event = {"time": t, "host": host, "card": card, "device": device, "rule": rule.name,
+                     "field": rule.field, "value": v, "change": change}
+            if f:
+                if since is None:
+                    since = firing[(card, i)] = t
+                elif not every:
+                    continue
+                events.append(dict(event, state="firing", since=since))
+            elif since is not None:
+                del firing[(card, i)]
+                events.append(dict(event, state="resolved", since=since))
+    return events
+
+#=========================================
+
+def raw_lines(cards, days, seed=0):
+    """Raw SMART-lines (cid=HEX TIMESTAMP TYPE-HEX) of simulated cards, daily."""
+    simcards = [sim.SimCard(seed, i, ["A", "T_2GB_4GB", "T_8GB"], 0.0) for i in range(cards)]
+    lines = []
+    for day in range(days):
+        for i, card in enumerate(simcards):
+            lines.append("device=/dev/mmcblk%d cid=%s %d %s-%s\n" % (i, card.cid.hex(), 1.7e9 + day * 86400,
+                         "A" if card.layout == "A" else "T", card.smart(day * 5).hex()))
+    return lines
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify + benchmark the health-rule engine.")
+    parser.add_argument("-n", "--samples", type=int, default=2000000, help="number of samples for the throughput, default: 2000000")
+    parser.add_argument("-c", "--cards", type=int, default=1000, help="number of cards, default: 1000")
+    args = parser.parse_args()
+
+    rules = [Rule.parse(rule) for rule in RULES]
+    failed = 0
+
+    # equivalence
+    for every in (False, True):
+        samples = list(stream(200, 100000, seed=1))
+        engine = RuleEngine(rules, every=every)
+        events = list(engine.feed_many(samples))
+        ref = reference(rules, samples, every)
+        mismatches = sum(a != b for a, b in zip(events, ref)) + abs(len(events) - len(ref))
+        print("equivalence%s: %d samples, %d events, %d mismatches" % (" (every)" if every else "", len(samples), len(ref), mismatches))
+        failed += mismatches != 0
+        if not every:
+            t0 = time.perf_counter()
+            reference(rules, samples)
+            r_ref = len(samples) / (time.perf_counter() - t0)
+
+    # throughput: engine
+    engine = RuleEngine(rules)
+    nevents = 0
+    seconds = 0.0
+    chunk = []
+    for sample in stream(args.cards, args.samples):
+        chunk.append(sample)
+        if len(chunk) == 100000:
+            t0 = time.perf_counter()
+            nevents += sum(1 for _ in engine.feed_many(chunk))
+            seconds += time.perf_counter() - t0
+            chunk = []
+    t0 = time.perf_counter()
+    nevents += sum(1 for _ in engine.feed_many(chunk))
+    seconds += time.perf_counter() - t0
+    print("%-34s %10.0f samples/s" % ("reference (re-scan)", r_ref))
+    print("%-34s %10.0f samples/s  (%d samples, %d cards, %d rules, %d events)" % (
+          "RuleEngine.feed()", engine.count / seconds, engine.count, len(engine.cards), len(rules), nevents))
+
+    # throughput: raw SMART-lines (parse + lazy decode + rules)
+    lines = raw_lines(100, 500)
+    engine = RuleEngine(rules)
+    t0 = time.perf_counter()
+    for lineno, samples, error in samples_parse_lines(lines):
+        for sample in samples:
+            engine.feed(*sample)
+    print("%-34s %10.0f samples/s" % ("raw SMART-lines (parse + rules)", len(lines) / (time.perf_counter() - t0)))
+
+    # commandline: raw SMART-lines and JSON-lines
+    expected = []
+    engine = RuleEngine(rules)
+    for lineno, samples, error in samples_parse_lines(lines):
+        for sample in samples:
+            expected += engine.feed(*sample)
+    with tempfile.TemporaryDirectory() as tmp:
+        raw = os.path.join(tmp, "samples.raw")
+        ndjson = os.path.join(tmp, "samples.ndjson")
+        with open(raw, 'w', encoding="utf-8") as f:
+            f.writelines(lines)
+        with open(ndjson, 'w', encoding="utf-8") as f:
+            for line in lines:
+                device, cid, ts, data = line.split()
+                device, cid = device[len("device="):], cid[len("cid="):]
+                f.write(json.dumps({"time": float(ts), "device": device, "cid": info.cid_parse(cid),
+                                    "smart": smart.smart_parse(data), "error": None}) + "\n")
+        cmd = [sys.executable, "-m", "adva_sdcard.rules"] + sum((["-r", rule] for rule in RULES), [])
+        for path in (raw, ndjson):
+            p = subprocess.run(cmd + [path], capture_output=True, encoding="utf-8", env=dict(os.environ, PYTHONPATH=SRC))
+            events = [json.loads(line) for line in p.stdout.splitlines()]
+            ok = p.returncode == 0 and events == expected
+            print("python3 -m adva_sdcard.rules %-6s %d events%s" % (os.path.splitext(path)[1][1:], len(events), "" if ok else "  FAIL"))
+            failed += not ok
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
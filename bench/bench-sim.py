@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""SD-card: Benchmark acquisition with simulated cards.
+
+Create a simulation (see adva-sdcard-sim) with many cards and measure
+the throughput (cards/s) of:
+
+- scan:      devices_scan() (adva-sdcard-info -A), with -j threads
+- monitor:   adva-sdcard-monitor --once
+- collector: adva-sdcard-collector push --once -> serve
+
+:Usage:
+    bench/bench-sim.py [-n CARDS] [--latency MS] [-j JOBS]
+
+:Exit code:
+    0:   all cards read
+    1:   cards missing in the results
+
+:Author:    Advamation / Roland Freikamp <support@advamation.de>
+:Version:   2026-10-17
+:Copyright: Advamation <info@advamation.de>
+:License:   MIT
+"""
+
+import os
+import sys
+import time
+import signal
+import argparse
+import tempfile
+import subprocess
+import importlib.machinery
+import importlib.util
+
+SRC = os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "src")
+
+def load_tool(name):
+    """Load adva-sdcard-* script from src/ as module."""
+    loader = importlib.machinery.SourceFileLoader(name.replace("-", "_"), os.path.join(SRC, name + ".py"))
+    spec = importlib.util.spec_from_loader(loader.name, loader)
+    module = importlib.util.module_from_spec(spec)
+    loader.exec_module(module)
+    return module
+
+def tool(name):
+    return [sys.executable, os.path.join(SRC, name + ".py")]
+
+def tool_sim(simdir, name):
+    """Commandline of a tool, run with the simulation (adva-sdcard-sim run)."""
+    return tool("adva-sdcard-sim") + ["run", simdir, os.path.join(SRC, name + ".py")]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark scan / monitor / collector with simulated cards.")
+    parser.add_argument("-n", "--cards", type=int, default=1000, help="number of simulated cards, default: 1000")
+    parser.add_argument("--latency", type=float, default=1.0, help="latency per CMD56 in ms, default: 1")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="probability of errors per CMD56, default: 0")
+    parser.add_argument("-j", "--jobs", type=int, default=16, help="threads for the scan, default: 16")
+    args = parser.parse_args()
+
+    failed = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        simdir = os.path.join(tmp, "sim")
+        simtool = load_tool("adva-sdcard-sim")
+        simtool.sim_create(simdir, cards=args.cards, latency=args.latency,
+                           error_rate=args.error_rate, speed=86400.0)
+        simtool.install(simdir)
+
+        # scan (in-process)
+        info = load_tool("adva-sdcard-info")
+        t0 = time.perf_counter()
+        results = info.devices_scan(jobs=args.jobs)
+        dt = time.perf_counter() - t0
+        ok = sum(r["smart"] is not None for r in results)
+        print("%-10s %4d cards in %6.2f s: %7.0f cards/s  (%d with SMART)" % ("scan", len(results), dt, len(results) / dt, ok))
+        failed += len(results) != args.cards
+
+        # monitor
+        output = os.path.join(tmp, "monitor.prom")
+        t0 = time.perf_counter()
+        subprocess.run(tool_sim(simdir, "adva-sdcard-monitor") + ["--once", "-o", output], check=False)
+        dt = time.perf_counter() - t0
+        with open(output, 'r', encoding="utf-8") as f:
+            up = sum(1 for line in f if line.startswith("adva_sdcard_smart_up{"))
+        print("%-10s %4d cards in %6.2f s: %7.0f cards/s" % ("monitor", up, dt, up / dt))
+        failed += up != args.cards
+
+        # collector
+        sock, output = os.path.join(tmp, "collector.sock"), os.path.join(tmp, "reports.ndjson")
+        proc = subprocess.Popen(tool("adva-sdcard-collector") + ["serve", "-l", sock, "-o", output], stderr=subprocess.DEVNULL)
+        while not os.path.exists(sock):
+            time.sleep(0.01)
+        t0 = time.perf_counter()
+        subprocess.run(tool_sim(simdir, "adva-sdcard-collector") + ["push", "--once", sock], check=False)
+        lines = 0
+        t_end = time.monotonic() + 60.0
+        while lines < args.cards and time.monotonic() < t_end:
+            with open(output, 'rb') as f:
+                lines = f.read().count(b"\n")
+            time.sleep(0.01)
+        dt = time.perf_counter() - t0
+        proc.send_signal(signal.SIGTERM)
+        proc.wait()
+        print("%-10s %4d cards in %6.2f s: %7.0f cards/s" % ("collector", lines, dt, lines / dt))
+        failed += lines != args.cards
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
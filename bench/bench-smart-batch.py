@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""SD-card: Benchmark batch-decoding of SMART-data.
+
+Compare smart_decode() (one dump at a time) with smart_decode_batch()
+(NumPy-columns) on synthetic raw SMART-data of all layouts, and check
+that both give exactly the same values.
+
+:Usage:
+    bench/bench-smart-batch.py [-n COUNT]
+
+:Author:    Advamation / Roland Freikamp <support@advamation.de>
+:Version:   2026-10-17
+:Copyright: Advamation <info@advamation.de>
+:License:   MIT
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import importlib.machinery
+import importlib.util
+
+SRC = os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "src")
+
+def load_tool(name):
+    """Load adva-sdcard-* script from src/ as module."""
+    loader = importlib.machinery.SourceFileLoader(name.replace("-", "_"), os.path.join(SRC, name + ".py"))
+    spec = importlib.util.spec_from_loader(loader.name, loader)
+    module = importlib.util.module_from_spec(spec)
+    loader.exec_module(module)
+    return module
+
+def synthetic(count, cards=1000, seed=0):
+    """Generate raw SMART-data (TYPE-HEX) of all layouts.
+
+    Like a fleet-archive: random base-data for each card (all layouts),
+    and random counters (bytes 16..135) for each dump.
+    """
+    rnd = random.Random(seed)
+    base = []
+    for i in range(cards):
+        b = bytearray(rnd.getrandbits(8) for _ in range(512))
+        if i % 4 == 3:
+            b[0:16] = b"Transcend" + bytes(7)
+        base.append(("AT"[i % 2], b))
+    lines = []
+    for i in range(count):
+        typ, b = base[i % cards]
+        b = bytearray(b)
+        b[16:136] = bytes(rnd.getrandbits(8) for _ in range(120))
+        lines.append("%s-%s" % (typ, b.hex()))
+    return lines
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark + verify smart_decode_batch() against smart_decode().")
+    parser.add_argument("-n", "--count", type=int, default=100000, help="number of synthetic dumps, default: 100000")
+    args = parser.parse_args()
+
+    smart = load_tool("adva-sdcard-smart")
+    lines = synthetic(args.count)
+    types, data = smart.smart_batch_load(lines)
+    rows = [(t, data[i].tobytes()) for i, t in enumerate(types.tolist())]
+
+    t0 = time.perf_counter()
+    single = [smart.smart_decode(t, b) for t, b in rows]
+    t_single = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    batch = smart.smart_decode_batch(types, data)
+    t_batch = time.perf_counter() - t0
+
+    # verify
+    errors = 0
+    for layout, columns in batch.items():
+        fields = [f for f in columns if f != "index"]
+        values = {f: columns[f].tolist() for f in fields}
+        for j, i in enumerate(columns["index"].tolist()):
+            record = {f: values[f][j] for f in fields}
+            if record != single[i] or list(record) != list(single[i]):
+                errors += 1
+    print("smart_decode():       %8.3f s  (%8.0f dumps/s)" % (t_single, args.count / t_single))
+    print("smart_decode_batch(): %8.3f s  (%8.0f dumps/s), speedup %.1fx" % (t_batch, args.count / t_batch, t_single / t_batch))
+    print("layouts: %s" % ", ".join("%s: %d" % (k, len(v["index"])) for k, v in batch.items()))
+    print("mismatches: %d" % errors)
+    return 1 if errors else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
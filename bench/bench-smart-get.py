@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""SD-card: Benchmark reading SMART-information.
+
+Compare the latency per read of SMART-data via the in-process
+ioctl-backend (smart_get()) and via adva-sdcard-smart-get
+(smart_get_helper()), both including smart_parse()/smart_decode().
+
+:Usage:
+    sudo bench/bench-smart-get.py [-n COUNT] [DEVICE]
+
+:Author:    Advamation / Roland Freikamp <support@advamation.de>
+:Version:   2026-10-17
+:Copyright: Advamation <info@advamation.de>
+:License:   MIT
+"""
+
+import os
+import sys
+import time
+import argparse
+import importlib.machinery
+import importlib.util
+
+SRC = os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "src")
+
+def load_tool(name):
+    """Load adva-sdcard-* script from src/ as module."""
+    loader = importlib.machinery.SourceFileLoader(name.replace("-", "_"), os.path.join(SRC, name + ".py"))
+    spec = importlib.util.spec_from_loader(loader.name, loader)
+    module = importlib.util.module_from_spec(spec)
+    loader.exec_module(module)
+    return module
+
+def bench(func, count):
+    """Call func count times, return list of latencies in seconds."""
+    times = []
+    for _ in range(count):
+        t0 = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - t0)
+    return times
+
+def report(name, times):
+    times = sorted(times)
+    print("%-8s n=%-5d min=%8.3f ms  median=%8.3f ms  mean=%8.3f ms  max=%8.3f ms" % (
+        name, len(times), times[0]*1e3, times[len(times)//2]*1e3,
+        sum(times)/len(times)*1e3, times[-1]*1e3))
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SMART-read latency: in-process ioctl vs. adva-sdcard-smart-get.")
+    parser.add_argument("-n", "--count", type=int, default=20, help="number of reads per backend, default: 20")
+    parser.add_argument("device", nargs='?', default="/dev/mmcblk0", help="device, default: /dev/mmcblk0")
+    args = parser.parse_args()
+
+    smart = load_tool("adva-sdcard-smart")
+    backends = (
+        ("ioctl",  lambda: smart.smart_decode(*smart.smart_get(args.device))),
+        ("helper", lambda: smart.smart_parse(smart.smart_get_helper(args.device))),
+    )
+    for name, func in backends:
+        try:
+            func()  # warm-up
+        except Exception as err:
+            print("%-8s not available (%s)" % (name, err))
+            continue
+        report(name, bench(func, args.count))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
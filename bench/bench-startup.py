@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""SD-card: Benchmark startup-time of the commandline-tools.
+
+For frequent invocations (e.g. health-checks), most of the wall-time
+is interpreter-startup and imports. This measures for each entry-point
+the cold (first) and warm (median) wall-time and the imported modules,
+and checks them against a budget:
+
+- the warm wall-time above the bare interpreter-startup
+  (`python3 -c pass`) must be below --budget milliseconds
+- the fast paths must not import argparse/json/subprocess
+  (unless needed, e.g. json for -j)
+
+:Usage:
+    bench/bench-startup.py [-n COUNT] [--budget MS] [-v]
+
+:Exit code:
+    0:   all entry-points within budget
+    1:   budget exceeded or forbidden module imported
+
+:Author:    Advamation / Roland Freikamp <support@advamation.de>
+:Version:   2026-10-17
+:Copyright: Advamation <info@advamation.de>
+:License:   MIT
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+
+SRC = os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "src")
+
+SMART_RAW = ("T-" + (b"Transcend" + bytes(503)).hex() + "\n").encode()
+CID_RAW = b"744a6055534455312030065689014c8d\n"
+
+# entry-points: (name, tool, arguments, stdin, forbidden modules)
+ENTRY_POINTS = (
+    ("smart -e",            "adva-sdcard-smart", ["-e"],                    SMART_RAW, ("argparse", "json", "subprocess")),
+    ("smart -f FIELD -j",   "adva-sdcard-smart", ["-f", "endurance", "-j"], SMART_RAW, ("argparse", "subprocess")),
+    ("smart -e -d DEVICE",  "adva-sdcard-smart", ["-e", "-d", None],        b"",       ("argparse", "json", "subprocess")),
+    ("smart --on-change",   "adva-sdcard-smart", ["-e", "--on-change", "--state", "{state}"], SMART_RAW, ("argparse", "json", "subprocess", "hashlib")),
+    ("info -p",             "adva-sdcard-info",  ["-p"],                    CID_RAW,   ("argparse", "json", "subprocess")),
+    ("info -d DEVICE",      "adva-sdcard-info",  ["-d", None],              b"",       ("argparse", "json", "subprocess")),
+)
+
+def run(argv, stdin, count):
+    """Run argv count times, return list of wall-times in seconds."""
+    times = []
+    for _ in range(count):
+        t0 = time.perf_counter()
+        subprocess.run(argv, input=stdin, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append(time.perf_counter() - t0)
+    return times
+
+def modules(argv, stdin):
+    """Get modules imported by argv (via python -X importtime)."""
+    p = subprocess.run([argv[0], "-X", "importtime"] + argv[1:], input=stdin,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    return {line.rsplit("|", 1)[1].strip() for line in p.stderr.decode("utf-8", "replace").splitlines()
+            if line.startswith("import time:") and "|" in line} - {"package"}
+
+def median(times):
+    return sorted(times)[len(times)//2]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark startup-time of adva-sdcard-smart / adva-sdcard-info.")
+    parser.add_argument("-n", "--count", type=int, default=20, help="number of warm runs per entry-point, default: 20")
+    parser.add_argument("--budget", type=float, default=30.0, help="maximum warm wall-time above interpreter-startup in ms, default: 30")
+    parser.add_argument("-d", "--device", default="/dev/mmcblk0", help="device for -d, default: /dev/mmcblk0")
+    parser.add_argument("-v", "--verbose", action='store_true', help="list the imported modules")
+    args = parser.parse_args()
+
+    base_argv = [sys.executable, "-c", "pass"]
+    base_cold = run(base_argv, b"", 1)[0]
+    base = median(run(base_argv, b"", args.count))
+    base_modules = modules(base_argv, b"")
+    print("%-20s cold=%7.2f ms  warm=%7.2f ms" % ("python3 -c pass", base_cold*1e3, base*1e3))
+
+    failed = 0
+    state = tempfile.TemporaryDirectory()   # for --on-change (unchanged after the cold run)
+    for name, tool, toolargs, stdin, forbidden in ENTRY_POINTS:
+        argv = [sys.executable, os.path.join(SRC, tool + ".py")] + [args.device if a is None else a.format(state=state.name) for a in toolargs]
+        cold = run(argv, stdin, 1)[0]
+        warm = median(run(argv, stdin, args.count))
+        imported = modules(argv, stdin) - base_modules
+        errors = ["%s imported" % m for m in forbidden if m in imported]
+        if (warm - base) * 1e3 > args.budget:
+            errors.append("over budget")
+        print("%-20s cold=%7.2f ms  warm=%7.2f ms  (+%6.2f ms)  modules=+%-3d %s" % (
+            name, cold*1e3, warm*1e3, (warm - base)*1e3, len(imported), "FAIL: " + ", ".join(errors) if errors else "ok"))
+        if args.verbose:
+            print("    " + " ".join(sorted(imported)))
+        failed += bool(errors)
+    state.cleanup()
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
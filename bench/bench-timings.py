@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""SD-card: Verify + benchmark the per-stage timings (--timings).
+
+On simulated cards (see adva_sdcard.sim) with a fixed CMD56-latency:
+
+- overhead:    cost of the disabled instrumentation (no hooks) per
+               smart_get(), and of enabled hooks (TimingStats)
+- correctness: stages per device, cmd56-quantiles vs. the simulated
+               latency, Histogram-quantiles vs. exact quantiles
+- commandline: adva-sdcard-smart --timings, aggregated by
+               python3 -m adva_sdcard.timing
+
+:Usage:
+    bench/bench-timings.py [-n CARDS] [-r READS] [--latency MS]
+
+:Exit code:
+    0:   timings correct, disabled overhead < 1% of smart_get()
+    1:   otherwise
+
+:Author:    Advamation / Roland Freikamp <support@advamation.de>
+:Version:   2026-10-17
+:Copyright: Advamation <info@advamation.de>
+:License:   MIT
+"""
+
+import os
+import sys
+import math
+import time
+import random
+import timeit
+import argparse
+import tempfile
+import subprocess
+
+SRC = os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "src")
+sys.path.insert(0, SRC)
+
+from adva_sdcard import sim, timing
+
+def read_all(smart, devices, reads):
+    """smart_get() of all devices, `reads` times; returns seconds per read."""
+    t0 = time.perf_counter()
+    for _ in range(reads):
+        for dev in devices:
+            smart.smart_get(dev)
+    return (time.perf_counter() - t0) / (reads * len(devices))
+
+def disabled_cost():
+    """Seconds of the disabled instrumentation of smart_get() (1 check, 3 tests)."""
+    code = "t = clock() if HOOKS else None\nif t is not None: pass\nif t is not None: pass\nif t is not None: pass"
+    n = 1000000
+    return min(timeit.repeat(code, globals={"clock": timing.clock, "HOOKS": []}, number=n, repeat=5)) / n
+
+def histogram_error(count=20000, seed=0):
+    """Maximum relative error of Histogram-quantiles (log-normal samples)."""
+    rnd = random.Random(seed)
+    samples = [rnd.lognormvariate(-6.0, 1.5) for _ in range(count)]
+    hist = timing.Histogram()
+    for val in samples:
+        hist.add(val)
+    samples.sort()
+    error = 0.0
+    for q in (0.01, 0.25, 0.5, 0.9, 0.95, 0.99, 0.999, 1.0):
+        exact = samples[max(1, math.ceil(q * count)) - 1]
+        error = max(error, abs(hist.quantile(q) - exact) / exact)
+    return error
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify + benchmark the per-stage timings.")
+    parser.add_argument("-n", "--cards", type=int, default=8, help="number of simulated cards, default: 8")
+    parser.add_argument("-r", "--reads", type=int, default=50, help="reads per card, default: 50")
+    parser.add_argument("--latency", type=float, default=2.0, help="latency per CMD56 in ms, default: 2")
+    args = parser.parse_args()
+
+    failed = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        # without latency: overhead relative to the pure software-path
+        simdir = os.path.join(tmp, "sim0")
+        sim.sim_create(simdir, cards=args.cards)
+        sim.install(simdir)
+        from adva_sdcard import smart
+        devices = ["/dev/mmcblk%d" % i for i in range(args.cards)]
+        read_all(smart, devices, 2)
+        plain = read_all(smart, devices, args.reads)
+        stats = timing.TimingStats()
+        timing.hook_add(stats)
+        hooked = read_all(smart, devices, args.reads)
+        timing.hook_remove(stats)
+        cost = disabled_cost()
+        print("smart_get() (no latency):  %8.1f us/read" % (plain * 1e6))
+        print("disabled (no hooks):       %8.3f us/read  (%.2f%%)" % (cost * 1e6, cost / plain * 100.0))
+        print("enabled (TimingStats):     %8.1f us/read  (%+.1f%%)" % (hooked * 1e6, (hooked - plain) / plain * 100.0))
+        if cost / plain >= 0.01:
+            print("FAIL: disabled overhead >= 1%")
+            failed += 1
+
+        # with latency: cmd56-quantiles
+        sim.install(sim.sim_create(os.path.join(tmp, "sim"), cards=args.cards, latency=args.latency).root)
+        stats = timing.TimingStats()
+        timing.hook_add(stats)
+        read_all(smart, devices, args.reads)
+        timing.hook_remove(stats)
+        summary = stats.summary()
+        for dev in devices:
+            stages = [entry["stage"] for entry in summary if entry["device"] == dev]
+            if stages != ["manfid", "open", "cmd56"]:
+                print("FAIL: %s: stages %s" % (dev, stages))
+                failed += 1
+        for entry in summary:
+            if entry["stage"] != "cmd56":
+                continue
+            layout = sim.Simulation(os.path.join(tmp, "sim")).card(int(entry["device"][11:])).layout
+            expected = (2 if layout == "A" else 1) * args.latency / 1000.0
+            ok = entry["count"] == args.reads and expected * 0.95 <= entry["p50"] <= entry["p99"] <= expected * 2 + 0.005
+            print("%-14s %-10s p50 %7.3f ms  p95 %7.3f ms  p99 %7.3f ms  (sleep %.1f ms)%s" % (
+                  entry["device"], layout, entry["p50"] * 1e3, entry["p95"] * 1e3, entry["p99"] * 1e3,
+                  expected * 1e3, "" if ok else "  FAIL"))
+            failed += not ok
+        error = histogram_error()
+        print("histogram:                 max. relative quantile-error %.1f%%" % (error * 100.0))
+        if error >= 0.06:
+            print("FAIL: histogram-error >= 6%")
+            failed += 1
+
+        # commandline: --timings -> stderr -> python3 -m adva_sdcard.timing
+        log = os.path.join(tmp, "timings.log")
+        with open(log, 'w', encoding="utf-8") as f:
+            for _ in range(5):
+                p = subprocess.run([sys.executable, os.path.join(SRC, "adva-sdcard-sim.py"), "run", os.path.join(tmp, "sim"),
+                                    os.path.join(SRC, "adva-sdcard-smart.py"), "--timings", "-e", "-d", devices[0]],
+                                   stdout=subprocess.DEVNULL, stderr=f)
+                failed += p.returncode != 0
+        with open(log, 'r', encoding="utf-8") as f:
+            stages = list(dict.fromkeys(stage for stage, _, _ in timing.timing_parse_lines(f)))
+        print("adva-sdcard-smart --timings: %s" % " ".join(stages))
+        if stages != ["args", "manfid", "open", "cmd56", "read", "decode", "output"]:
+            print("FAIL: unexpected stages")
+            failed += 1
+        p = subprocess.run([sys.executable, "-m", "adva_sdcard.timing", log], capture_output=True, encoding="utf-8",
+                           env=dict(os.environ, PYTHONPATH=SRC))
+        print(p.stdout, end="")
+        if p.returncode != 0 or len(p.stdout.splitlines()) != 1 + len(stages):
+            print("FAIL: python3 -m adva_sdcard.timing")
+            failed += 1
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
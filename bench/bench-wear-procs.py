@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""SD-card: Verify + benchmark the per-process write-attribution of adva-sdcard-wear.
+
+Runs the ProcWriteScanner of `adva-sdcard-wear procs` against a fake
+/proc tree (self/mountinfo, PID/io, PID/comm, PID/cgroup, PID/fd) and
+a fake /sys/block (mmcblkN/dev), and checks:
+
+- per-scan deltas (the first scan is the baseline), processes which
+  are started (counted from 0) or exit between scans
+- the ranking of processes and cgroups, their shares and the
+  attributed erase-count growth
+- card-only (all writes count) vs. other block-devices mounted (only
+  processes with open files on the card count) vs. card not mounted
+  (nothing counts)
+
+and measures the time of a scan of many processes.
+
+:Usage:
+    bench/bench-wear-procs.py [-n PROCESSES] [-s SCANS]
+
+:Exit code:
+    0:   all checks ok
+    1:   otherwise
+
+:Author:    Advamation / Roland Freikamp <support@advamation.de>
+:Version:   2026-10-17
+:Copyright: Advamation <info@advamation.de>
+:License:   MIT
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import importlib.machinery
+import importlib.util
+
+SRC = os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "src")
+
+MOUNTS_CARD = [
+    ("/", "179:2", "ext4", "/dev/mmcblk0p2"),
+    ("/boot", "179:1", "vfat", "/dev/mmcblk0p1"),
+    ("/proc", "0:22", "proc", "proc"),
+    ("/tmp", "0:35", "tmpfs", "tmpfs"),
+]
+MOUNTS_USB = [("/data", "8:1", "ext4", "/dev/sda1")]
+
+def load_tool(name):
+    """Load adva-sdcard-* script from src/ as module."""
+    loader = importlib.machinery.SourceFileLoader(name.replace("-", "_"), os.path.join(SRC, name + ".py"))
+    spec = importlib.util.spec_from_loader(loader.name, loader)
+    module = importlib.util.module_from_spec(spec)
+    loader.exec_module(module)
+    return module
+
+class FakeSystem:
+    """Fake /proc and /sys/block in a directory."""
+    def __init__(self, root, mounts):
+        self.proc = os.path.join(root, "proc")
+        self.sysblock = os.path.join(root, "sys", "block")
+        os.makedirs(os.path.join(self.proc, "self"))
+        with open(os.path.join(self.proc, "self", "mountinfo"), 'w') as f:
+            for i, (mountpoint, number, fstype, source) in enumerate(mounts):
+                f.write("%d 1 %s / %s rw,relatime shared:%d - %s %s rw\n"
+                        % (20 + i, number, mountpoint.replace(" ", "\\040"), i, fstype, source))
+        for name, number in (("", "179:0"), ("mmcblk0p1", "179:1"), ("mmcblk0p2", "179:2")):
+            path = os.path.join(self.sysblock, "mmcblk0", name)
+            os.makedirs(path, exist_ok=True)
+            with open(os.path.join(path, "dev"), 'w') as f:
+                f.write(number + "\n")
+
+    def start(self, pid, comm, cgroup, write_bytes=0, files=()):
+        """Add process, with open files (paths)."""
+        path = os.path.join(self.proc, str(pid))
+        os.makedirs(os.path.join(path, "fd"))
+        with open(os.path.join(path, "comm"), 'w') as f:
+            f.write(comm + "\n")
+        with open(os.path.join(path, "cgroup"), 'w') as f:
+            f.write("0::%s\n" % cgroup)
+        for fd, target in enumerate(files, 3):
+            os.symlink(target, os.path.join(path, "fd", str(fd)))
+        self.write(pid, write_bytes)
+
+    def write(self, pid, write_bytes):
+        """Set write_bytes of a process (in place, the scanner keeps the io-file open)."""
+        with open(os.path.join(self.proc, str(pid), "io"), 'w') as f:
+            f.write("rchar: 0\nwchar: %d\nsyscr: 0\nsyscw: 0\nread_bytes: 0\nwrite_bytes: %d\ncancelled_write_bytes: 0\n"
+                    % (write_bytes, write_bytes))
+
+    def exit(self, pid):
+        path = os.path.join(self.proc, str(pid))
+        for name in os.listdir(os.path.join(path, "fd")):
+            os.unlink(os.path.join(path, "fd", name))
+        os.rmdir(os.path.join(path, "fd"))
+        for name in os.listdir(path):
+            os.unlink(os.path.join(path, name))
+        os.rmdir(path)
+
+def check_card_only(wear, tmp):
+    """Card is the only block-device: all writes count.
+
+    :Returns:
+        list of errors
+    """
+    errors = []
+    system = FakeSystem(os.path.join(tmp, "card"), MOUNTS_CARD)
+    system.start(1, "systemd", "/init.scope", 1 << 30)
+    system.start(100, "systemd-journal", "/system.slice/systemd-journald.service", 5000)
+    system.start(200, "app", "/system.slice/app.service", 0)
+    with wear.ProcWriteScanner("/dev/mmcblk0", system.proc, system.sysblock) as scanner:
+        if not scanner.card_only or len(scanner.card_mounts) != 2:
+            errors.append("card-only not detected")
+        deltas = [scanner.scan()]                       # baseline
+        system.write(100, 5000 + 4096)
+        system.write(200, 12288)
+        deltas.append(scanner.scan())                   # 4096 + 12288
+        system.start(300, "app-worker", "/system.slice/app.service", 5000)
+        system.exit(200)
+        system.write(100, 5000 + 8192)
+        deltas.append(scanner.scan())                   # new process from 0: 5000, + 4096
+        deltas.append(scanner.scan())                   # nothing
+        if deltas != [0, 16384, 9096, 0]:
+            errors.append("scan-deltas %r" % deltas)
+        procs, cgroups = scanner.ranking(erase_delta=10)
+    total = 8192 + 12288 + 5000
+    expect = [(200, "app", 12288), (100, "systemd-journal", 8192), (300, "app-worker", 5000)]
+    if [(d["pid"], d["comm"], d["write_bytes"]) for d in procs] != expect:
+        errors.append("process-ranking %r" % [(d["pid"], d["comm"], d["write_bytes"]) for d in procs])
+    elif any(abs(d["share"] - n / total) > 1e-9 or abs(d["erase_count"] - 10.0 * n / total) > 1e-9
+             for d, (_, _, n) in zip(procs, expect)):
+        errors.append("process-shares")
+    expect = [("/system.slice/app.service", 17288), ("/system.slice/systemd-journald.service", 8192)]
+    if [(d["cgroup"], d["write_bytes"]) for d in cgroups] != expect:
+        errors.append("cgroup-ranking %r" % [(d["cgroup"], d["write_bytes"]) for d in cgroups])
+    elif abs(sum(d["erase_count"] for d in cgroups) - 10.0) > 1e-9 or abs(cgroups[0]["share"] - 17288 / total) > 1e-9:
+        errors.append("cgroup-shares")
+    return errors
+
+def check_mixed(wear, tmp):
+    """Card and USB-stick mounted: only processes with open files on the card count.
+
+    :Returns:
+        list of errors
+    """
+    errors = []
+    system = FakeSystem(os.path.join(tmp, "mixed"), MOUNTS_CARD + MOUNTS_USB)
+    system.start(10, "logger", "/system.slice/logger.service", 0, ["/var/log/syslog", "pipe:[1234]"])
+    system.start(11, "backup", "/system.slice/backup.service", 0, ["/data/backup.tar"])
+    system.start(12, "db", "/system.slice/db.service", 0, ["/data/db/wal (deleted)", "/boot/config.txt"])
+    with wear.ProcWriteScanner("/dev/mmcblk0", system.proc, system.sysblock) as scanner:
+        if scanner.card_only:
+            errors.append("card-only with other block-device")
+        deltas = [scanner.scan()]
+        for pid, nbytes in ((10, 4096), (11, 1 << 20), (12, 8192)):
+            system.write(pid, nbytes)
+        deltas.append(scanner.scan())
+        if deltas != [0, 4096 + 8192]:
+            errors.append("scan-deltas %r" % deltas)
+        procs, cgroups = scanner.ranking()
+    if [(d["pid"], d["write_bytes"], d["erase_count"]) for d in procs] != [(12, 8192, None), (10, 4096, None)]:
+        errors.append("ranking %r" % [(d["pid"], d["write_bytes"]) for d in procs])
+    return errors
+
+def check_unmounted(wear, tmp):
+    """Card not mounted (no block-device, or only others): nothing counts.
+
+    :Returns:
+        list of errors
+    """
+    errors = []
+    for name, mounts in (("none", MOUNTS_CARD[2:]), ("usb", MOUNTS_CARD[2:] + MOUNTS_USB)):
+        system = FakeSystem(os.path.join(tmp, "unmounted-" + name), mounts)
+        system.start(10, "writer", "/system.slice/writer.service", 0, ["/tmp/x"])
+        with wear.ProcWriteScanner("/dev/mmcblk0", system.proc, system.sysblock) as scanner:
+            if scanner.card_only:
+                errors.append("card-only without card-mount (%s)" % name)
+            scanner.scan()
+            system.write(10, 4096)
+            if scanner.scan() != 0 or scanner.written:
+                errors.append("writes attributed without card-mount (%s)" % name)
+    return errors
+
+def bench_scan(wear, tmp, count, scans):
+    """Time scans of count processes.
+
+    :Returns:
+        (seconds per scan, errors)
+    """
+    system = FakeSystem(os.path.join(tmp, "bench"), MOUNTS_CARD)
+    for pid in range(1000, 1000 + count):
+        system.start(pid, "proc-%d" % pid, "/system.slice/s%d.service" % (pid % 50), 0)
+    errors = []
+    with wear.ProcWriteScanner("/dev/mmcblk0", system.proc, system.sysblock) as scanner:
+        scanner.scan()
+        t = 0.0
+        for i in range(1, scans + 1):
+            for pid in range(1000, 1000 + count, 10):
+                system.write(pid, i * 4096)
+            t0 = time.perf_counter()
+            delta = scanner.scan()
+            t += time.perf_counter() - t0
+            if delta != (count + 9) // 10 * 4096:
+                errors.append("scan %d: delta %d" % (i, delta))
+                break
+    return t / scans, errors
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify + benchmark the per-process write-attribution of adva-sdcard-wear.")
+    parser.add_argument("-n", "--processes", type=int, default=1000, help="number of processes for the benchmark, default: 1000")
+    parser.add_argument("-s", "--scans", type=int, default=10, help="number of scans for the benchmark, default: 10")
+    args = parser.parse_args()
+
+    wear = load_tool("adva-sdcard-wear")
+    failed = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, check in (("card only", check_card_only), ("card + usb", check_mixed), ("card unmounted", check_unmounted)):
+            errors = check(wear, tmp)
+            print("%-16s %s" % (name, "FAIL: " + ", ".join(errors) if errors else "ok"))
+            failed += bool(errors)
+        t, errors = bench_scan(wear, tmp, args.processes, args.scans)
+        print("%-16s %d processes: %.2f ms per scan  %s" % ("scan", args.processes, t * 1000,
+              "FAIL: " + ", ".join(errors) if errors else "ok"))
+        failed += bool(errors)
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,594 @@
+#!/usr/bin/env python3
+"""SD-card: Collect SMART-reports of many nodes.
+
+Collector service (asyncio) which receives SMART-reports from many agents
+concurrently via TCP or Unix sockets, parses them (smart_parse(),
+cid_parse()) in batches, optionally on a pool of worker processes, and
+writes them in batches as JSON-lines or into an inventory
+(see adva-sdcard-inventory).
+
+Backpressure: If the parsed batches are not written fast enough, reading
+from all connections is paused (and the agents block in send), until the
+queue is drained.
+
+Protocol (one stream per connection):
+
+- optional hello-line: "HELLO HOST [binary]\\n"; without hello, the
+  connection is a text-connection and the host is the peer-address
+- text: one report per line: "[device=DEV] [cid=HEX] [time=T] TYPE-HEX",
+  i.e. also the plain output of adva-sdcard-smart-get
+- binary: frames like adva-sdcard-smart-get --binary (type, length,
+  data), with the additional frame-types 'D' (device, for the following
+  frames) and 'C' (CID, 16 bytes, for the following frames)
+
+The agent (`push`) reads CID and SMART-data of the local devices
+periodically and pushes them as binary frames, and reconnects if needed.
+
+Output records (JSON-lines): {"host", "time", "device", "cid", "smart"},
+or {"host", "time", "device", "error"} for invalid reports / read-errors.
+
+:Usage:
+    see --help
+
+:Exit code:
+    0:   success / terminated via SIGTERM
+    2:   invalid commandline-parameters
+    5:   cannot listen / connect / write output (EIO)
+    19:  no device found (ENODEV)
+    130: aborted (e.g. via Ctrl-C) (ECONNABORTED)
+
+:Author:    Advamation / Roland Freikamp <support@advamation.de>
+:Version:   2026-10-17
+:Copyright: Advamation <info@advamation.de>
+:License:   MIT
+"""
+
+__version__ = "1.2.0"
+__author__ = "Advamation <support@advamation.de>"
+
+import os
+import sys
+import time
+import stat
+import signal
+import socket
+import struct
+import argparse
+import asyncio
+import concurrent.futures
+import json
+
+# find package adva_sdcard: next to this script (source-tree, build/) or in ../lib/adva-sdcard (installed)
+_dir = os.path.dirname(os.path.realpath(__file__))
+for _path in (_dir, os.path.join(_dir, "..", "lib", "adva-sdcard")):
+    if os.path.isfile(os.path.join(_path, "adva_sdcard", "__init__.py")):
+        if _path not in sys.path:
+            sys.path.insert(0, _path)
+        break
+
+#=========================================
+
+COLLECTOR_PORT = 7340
+
+# binary frame-header, see adva-sdcard-smart-get --binary
+FRAME_HEAD = struct.Struct(">cH")
+
+# maximum length of a line / frame; longer ones close the connection
+REPORT_MAX = 4096
+
+def address_parse(address):
+    """Parse address: Unix socket path (containing '/'), or [HOST]:PORT.
+
+    :Returns:
+        (family, address), address as path or (host, port)
+    :Raises:
+        ValueError for invalid addresses.
+    """
+    if "/" in address:
+        return socket.AF_UNIX, address
+    host, sep, port = address.rpartition(":")
+    if not sep:
+        host, port = address, COLLECTOR_PORT
+    return socket.AF_INET, (host.strip("[]") or None, int(port))
+
+def _inventory_import():
+    """Import adva-sdcard-inventory (installed next to this tool) as module.
+
+    :Raises:
+        ImportError if it cannot be found.
+    """
+    import importlib.machinery
+    import importlib.util
+    base = os.path.join(os.path.dirname(os.path.realpath(__file__)), "adva-sdcard-inventory")
+    for path in (base, base + ".py"):
+        if os.path.isfile(path):
+            loader = importlib.machinery.SourceFileLoader("adva_sdcard_inventory", path)
+            module = importlib.util.module_from_spec(importlib.util.spec_from_loader(loader.name, loader))
+            loader.exec_module(module)
+            return module
+    raise ImportError("Cannot find 'adva-sdcard-inventory'.")
+
+#----------------------
+# parsing (in worker-processes, or inline)
+
+def reports_parse(reports):
+    """Parse raw reports.
+
+    :Parameters:
+        - reports: list of (host, time, device, cid, type, data):
+          cid as hex-string (32 hex digits), bytes (16) or None;
+          type None for text (data: TYPE-HEX), 'E' for errors (data: message),
+          otherwise the SMART-type (data: raw SMART-data)
+    :Returns:
+        list of records (dicts, see module docstring); reports with an
+        invalid CID, unknown SMART-type or invalid SMART-data give error-records
+    """
+    import re
+    from adva_sdcard.info import cid_parse
+    from adva_sdcard.smart import smart_check, smart_parse, smart_decode, SMART_TYPES, SECTOR_SIZE
+    types, size = set(SMART_TYPES.values()), SECTOR_SIZE
+    cid_hex = re.compile(r"[0-9a-fA-F]{32}").fullmatch
+    records = []
+    for host, ts, device, cid, typ, data in reports:
+        record = {"host": host, "time": ts, "device": device}
+        try:
+            if typ == "E":
+                raise ValueError(data)
+            if cid is not None:
+                if not isinstance(cid, str):
+                    cid = cid.hex()
+                if not cid_hex(cid):
+                    raise ValueError("CID must be a 16-byte hex string")
+                cid = cid_parse(cid)
+            record["cid"] = cid
+            if typ is None:
+                raw = smart_check(data)
+                if raw[0] not in types:
+                    raise ValueError("unknown SMART-type %r" % raw[0])
+                record["smart"] = smart_parse(raw)
+            elif typ in types and len(data) == size:
+                record["smart"] = smart_decode(typ, data)
+            else:
+                raise ValueError("invalid type or length")
+        except ValueError as err:
+            record.pop("cid", None)
+            record["error"] = str(err)
+        records.append(record)
+    return records
+
+def reports_ndjson(reports):
+    """Parse raw reports (see reports_parse()) and encode them as JSON-lines (bytes)."""
+    return "".join([json.dumps(record) + "\n" for record in reports_parse(reports)]).encode("utf-8")
+
+#----------------------
+# sinks
+
+class NdjsonSink:
+    """Write records as JSON-lines (to a file or stdout)."""
+    prepare = staticmethod(reports_ndjson)
+
+    def __init__(self, path=None):
+        self.f = open(path, 'ab') if path else sys.stdout.buffer
+
+    def write(self, data):
+        """Write prepared data; returns number of errors (always 0)."""
+        self.f.write(data)
+        self.f.flush()
+        return 0
+
+    def close(self):
+        if self.f is not sys.stdout.buffer:
+            self.f.close()
+
+class InventorySink:
+    """Ingest records into an inventory (see adva-sdcard-inventory).
+
+    The inventory is opened in the writer-thread on first write.
+    """
+    prepare = staticmethod(reports_parse)
+
+    def __init__(self, path):
+        self.path = path
+        self.inventory = None
+
+    def write(self, records):
+        """Ingest records; returns number of errors (e.g. without CID)."""
+        if self.inventory is None:
+            self.inventory = _inventory_import().Inventory(self.path)
+        errors = 0
+        def error(i, msg):
+            nonlocal errors
+            errors += 1
+        self.inventory.ingest([r for r in records if "error" not in r], errors=error)
+        return errors + sum("error" in r for r in records)
+
+    def close(self):
+        if self.inventory is not None:
+            self.inventory.close()
+
+#----------------------
+# collector
+
+class CollectorProtocol(asyncio.Protocol):
+    """One agent-connection: split the stream into raw reports."""
+    def __init__(self, collector):
+        self.collector = collector
+        self.buf = b""
+        self.hello = False
+        self.binary = False
+        self.device = None
+        self.cid = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+        peer = transport.get_extra_info("peername")
+        self.host = peer[0] if isinstance(peer, tuple) else "local"
+        self.collector.connection_add(self)
+
+    def connection_lost(self, exc):
+        if self.buf and not self.binary:    # last line without newline
+            self.data_received(b"\n")
+        self.collector.connection_remove(self)
+
+    def data_received(self, data):
+        buf = self.buf + data if self.buf else data
+        ts = time.time()
+        reports = []
+        if not self.hello:
+            if b"\n" not in buf and len(buf) < REPORT_MAX:
+                self.buf = buf
+                return
+            self.hello = True
+            if buf.startswith(b"HELLO "):
+                line, _, buf = buf.partition(b"\n")
+                words = line.decode("utf-8", "replace").split()
+                if len(words) > 1:
+                    self.host = words[1]
+                self.binary = "binary" in words[2:]
+        pos = self._frames(buf, ts, reports) if self.binary else self._lines(buf, ts, reports)
+        self.buf = buf[pos:]
+        if len(self.buf) > REPORT_MAX:
+            self.collector.log("ERROR: %s: report too long, closing connection." % self.host)
+            self.transport.close()
+        if reports:
+            self.collector.put(reports)
+
+    def _lines(self, buf, ts, reports):
+        """Split text-lines; returns position of the incomplete rest."""
+        end = buf.rfind(b"\n") + 1
+        host = self.host
+        for line in buf[:end].decode("latin-1").split("\n"):
+            words = line.split()
+            if not words:
+                continue
+            device, cid, rts = None, None, ts
+            for word in words[:-1]:
+                key, _, value = word.partition("=")
+                if key == "device":
+                    device = value
+                elif key == "cid":
+                    cid = value
+                elif key == "time":
+                    try:
+                        rts = float(value)
+                    except ValueError:
+                        pass
+            reports.append((host, rts, device, cid, None, words[-1]))
+        return end
+
+    def _frames(self, buf, ts, reports):
+        """Split binary frames; returns position of the incomplete rest."""
+        pos, size, end = 0, FRAME_HEAD.size, len(buf)
+        host = self.host
+        while pos + size <= end:
+            typ, length = FRAME_HEAD.unpack_from(buf, pos)
+            if pos + size + length > end:
+                break
+            data = buf[pos+size:pos+size+length]
+            pos += size + length
+            if typ == b"D":
+                self.device = data.decode("utf-8", "replace")
+            elif typ == b"C":
+                self.cid = data
+            elif typ == b"E":
+                reports.append((host, ts, self.device, self.cid, "E", data.decode("utf-8", "replace")))
+            else:
+                reports.append((host, ts, self.device, self.cid, typ.decode("latin-1"), data))
+        return pos
+
+class Collector:
+    """Receive reports, parse and write them in batches, with backpressure."""
+    def __init__(self, sink, batch=1000, queue=20000, workers=0, log=None):
+        """
+        :Parameters:
+            - sink:    NdjsonSink or InventorySink
+            - batch:   maximum number of reports per batch
+            - queue:   maximum number of queued reports; reading is paused above
+            - workers: number of worker-processes for parsing (0: in the event-loop)
+            - log:     function for error-messages, default: print to stderr
+        """
+        self.sink = sink
+        self.batch = batch
+        self.queue_max = queue
+        self.log = log or (lambda msg: print(msg, file=sys.stderr))
+        self.pending = []
+        self.paused = False
+        self.connections = set()
+        self.stats = {"connections": 0, "reports": 0, "errors": 0, "batches": 0}
+        self.pool = None
+        self._writer = None
+        if workers > 0:
+            import multiprocessing
+            # fork before any thread is started
+            self.pool = concurrent.futures.ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("fork"))
+            self.pool.submit(int).result()
+
+    def connection_add(self, conn):
+        self.connections.add(conn)
+        self.stats["connections"] += 1
+        if self.paused:
+            conn.transport.pause_reading()
+
+    def connection_remove(self, conn):
+        self.connections.discard(conn)
+
+    def put(self, reports):
+        """Queue raw reports (see reports_parse()); pause reading if the queue is full."""
+        self.pending.extend(reports)
+        self.stats["reports"] += len(reports)
+        self._wakeup.set()
+        if len(self.pending) >= self.queue_max and not self.paused:
+            self.paused = True
+            for conn in self.connections:
+                conn.transport.pause_reading()
+
+    def _resume(self):
+        if self.paused and len(self.pending) < self.queue_max // 2:
+            self.paused = False
+            for conn in self.connections:
+                conn.transport.resume_reading()
+
+    async def _batches(self):
+        """Parse + write batches, until stopped; at most one write is in progress."""
+        loop = asyncio.get_running_loop()
+        writer = None
+        prepare = self.sink.prepare
+        while True:
+            if not self.pending:
+                if self._stopping:
+                    break
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            reports, self.pending = self.pending[:self.batch], self.pending[self.batch:]
+            if self.pool is None:
+                data = prepare(reports)
+            else:
+                data = await loop.run_in_executor(self.pool, prepare, reports)
+            if writer is not None:
+                await writer
+            self._resume()
+            writer = loop.run_in_executor(self._writer, self._write, data)
+        if writer is not None:
+            await writer
+
+    def _write(self, data):
+        self.stats["errors"] += self.sink.write(data)
+        self.stats["batches"] += 1
+
+    async def serve(self, addresses, duration=None):
+        """Listen on addresses and collect, until SIGTERM / cancelled (or duration seconds).
+
+        On exit, the queued reports are still written, and the sink is closed.
+
+        :Raises:
+            OSError if an address cannot be used or the sink cannot be written.
+        """
+        loop = asyncio.get_running_loop()
+        main = asyncio.current_task()
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._writer = concurrent.futures.ThreadPoolExecutor(1)     # the sink is only used in this thread
+        servers = []
+        batches = asyncio.ensure_future(self._batches())
+        batches.add_done_callback(lambda task: task.cancelled() or task.exception() is None or main.cancel())
+        loop.add_signal_handler(signal.SIGTERM, main.cancel)
+        try:
+            for family, address in addresses:
+                if family == socket.AF_UNIX:
+                    try:
+                        if stat.S_ISSOCK(os.stat(address).st_mode):
+                            os.unlink(address)  # stale socket
+                    except FileNotFoundError:
+                        pass
+                    servers.append(await loop.create_unix_server(lambda: CollectorProtocol(self), address))
+                else:
+                    servers.append(await loop.create_server(lambda: CollectorProtocol(self), address[0], address[1], reuse_address=True))
+            if duration is None:
+                await asyncio.gather(*(server.serve_forever() for server in servers))
+            else:
+                await asyncio.sleep(duration)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            loop.remove_signal_handler(signal.SIGTERM)
+            for server in servers:
+                server.close()
+            for conn in list(self.connections):
+                conn.transport.close()
+            self._stopping = True
+            self._wakeup.set()
+            try:
+                await batches
+            finally:
+                await loop.run_in_executor(self._writer, self.sink.close)
+                self._writer.shutdown()
+                if self.pool is not None:
+                    self.pool.shutdown()
+
+#----------------------
+# agent
+
+def agent_frames(devices, hostname, infotool, smarttool, backend="auto"):
+    """Read CID and SMART-data of devices, as binary frames (see module docstring).
+
+    :Returns:
+        bytes
+    """
+    frames = []
+    for dev in devices:
+        d = dev.encode("utf-8")
+        frames += [FRAME_HEAD.pack(b"D", len(d)), d]
+        try:
+            cid = bytes.fromhex(infotool.cid_get(dev).strip())
+            frames += [FRAME_HEAD.pack(b"C", len(cid)), cid]
+            typ, data = smarttool.smart_get_any(dev, backend)
+            frames += [FRAME_HEAD.pack(typ.encode("latin-1"), len(data)), data]
+        except Exception as err:
+            msg = ("%s ERROR: %s" % (getattr(err, "errno", None) or 5, (getattr(err, "stderr", None) or str(err)).strip()))
+            msg = msg.encode("utf-8")[:REPORT_MAX]
+            frames += [FRAME_HEAD.pack(b"E", len(msg)), msg]
+    return b"".join(frames)
+
+def agent_connect(address, hostname, timeout=10.0):
+    """Connect to collector and send hello.
+
+    :Raises:
+        OSError
+    """
+    family, addr = address
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(timeout)
+        sock.connect(addr if family == socket.AF_UNIX else (addr[0] or "localhost", addr[1]))
+        sock.sendall(("HELLO %s binary\n" % hostname).encode("utf-8"))
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+#=========================================
+
+def main(arglist=None):
+    """Run collector or agent.
+
+    See module docstring for exit codes.
+    """
+    # parse arguments
+    parser = argparse.ArgumentParser(
+        description="""Collect SMART-reports of industrial microSD-/SD-cards from many nodes.
+Version %s by %s.""" % (__version__, __author__),
+        formatter_class=argparse.RawDescriptionHelpFormatter,   # for keeping newlines in description
+        epilog="""
+Examples:
+    adva-sdcard-collector serve -l :7340 -o /var/lib/adva-sdcard/reports.ndjson
+    adva-sdcard-collector serve -l /run/adva-sdcard.sock --inventory /var/lib/adva-sdcard/inventory.sqlite
+    adva-sdcard-collector push -i 3600 collector.example.com:7340
+    adva-sdcard-smart-get /dev/mmcblk0 | nc -N collector.example.com 7340
+Note that this does not work with USB-cardreaders.\n""")
+    parser.add_argument("--version", action='version', version="%(prog)s " + __version__)
+    sub = parser.add_subparsers(dest="command", metavar="COMMAND")
+    sub.required = True
+
+    p = sub.add_parser("serve", help="Collect reports.")
+    p.add_argument("-l", "--listen", action='append', help="address ([HOST]:PORT or Unix socket path), default: :%d" % COLLECTOR_PORT)
+    group = p.add_mutually_exclusive_group()
+    group.add_argument("-o", "--output", action='store', help="append records (JSON-lines) to file, default: stdout")
+    group.add_argument("--inventory", action='store', help="ingest records into inventory (see adva-sdcard-inventory)")
+    p.add_argument("-w", "--workers", action='store', type=int, default=0, help="number of worker-processes for parsing, default: 0 (in the event-loop)")
+    p.add_argument("--batch", action='store', type=int, default=1000, help="maximum number of reports per batch, default: 1000")
+    p.add_argument("--queue", action='store', type=int, default=20000, help="maximum number of queued reports before pausing the agents, default: 20000")
+    p.add_argument("--duration", action='store', type=float, help=argparse.SUPPRESS)   # for benchmarks
+
+    p = sub.add_parser("push", help="Push reports of the local devices (agent).")
+    p.add_argument("-i", "--interval", action='store', type=float, default=3600.0, help="interval in seconds, default: 3600")
+    p.add_argument("-b", "--backend", choices=("auto", "ioctl", "helper", "serve"), default="auto",
+        help="How to retrieve raw SMART-data: ioctl (in-process, needs root), helper (via adva-sdcard-smart-get), "
+             "serve (via a persistent adva-sdcard-smart-get --serve) or auto (ioctl, falling back to "
+             "adva-sdcard-smart-get without permissions), default: auto")
+    p.add_argument("--host", action='store', default=os.uname().nodename, help="host-name sent to the collector, default: this host")
+    p.add_argument("--once", action='store_true', help="Push only once and exit.")
+    p.add_argument("address", help="collector-address ([HOST]:PORT or Unix socket path)")
+    p.add_argument("device", nargs='*', help="devices, default: all /dev/mmcblk*")
+
+    args = parser.parse_args(arglist)
+
+    #---------------------
+    if args.command == "serve":
+        if args.workers < 0 or args.batch < 1 or args.queue < args.batch:
+            print("ERROR: Invalid arguments, workers/batch/queue.", file=sys.stderr)
+            return 2
+        try:
+            addresses = [address_parse(a) for a in args.listen or [":%d" % COLLECTOR_PORT]]
+        except ValueError as err:
+            print("ERROR: Invalid arguments, invalid address. (%s)" % err, file=sys.stderr)
+            return 2
+        try:
+            sink = InventorySink(args.inventory) if args.inventory else NdjsonSink(args.output)
+        except OSError as err:
+            print("ERROR: Cannot open '%s'. (%s)" % (args.output, err), file=sys.stderr)
+            return 5    # EIO
+        collector = Collector(sink, args.batch, args.queue, args.workers)
+        try:
+            asyncio.run(collector.serve(addresses, args.duration))
+        except OSError as err:
+            print("ERROR: Cannot listen/write. (%s)" % err, file=sys.stderr)
+            return 5    # EIO
+        finally:
+            print("connections: %(connections)d, reports: %(reports)d, errors: %(errors)d, batches: %(batches)d" % collector.stats,
+                  file=sys.stderr)
+        return 0
+
+    #---------------------
+    try:
+        address = address_parse(args.address)
+    except ValueError as err:
+        print("ERROR: Invalid arguments, invalid address. (%s)" % err, file=sys.stderr)
+        return 2
+    from adva_sdcard import info as infotool
+    from adva_sdcard import smart as smarttool
+    devices = args.device or infotool.devices_list()
+    if not devices:
+        print("ERROR: No mmc-device found.", file=sys.stderr)
+        return 19   # ENODEV
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    sock = None
+    t_next = time.monotonic()
+    while True:
+        data = agent_frames(devices, args.host, infotool, smarttool, args.backend)
+        for retry in range(3):
+            try:
+                if sock is None:
+                    sock = agent_connect(address, args.host)
+                sock.sendall(data)
+                break
+            except OSError as err:
+                print("ERROR: Cannot send to '%s'. (%s)" % (args.address, err), file=sys.stderr)
+                if sock is not None:
+                    sock.close()
+                    sock = None
+                time.sleep(min(args.interval, 2 ** retry))
+        else:
+            if args.once:
+                return 5    # EIO
+        if args.once:
+            sock.close()
+            return 0
+
+        t_next += args.interval
+        delay = t_next - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        else:   # too slow: skip missed intervals
+            t_next = time.monotonic()
+
+#=========================================
+if __name__ == '__main__':
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        print("\nAborted.")
+        sys.exit(130)   # ECONNABORTED
+
+#=========================================
@@ -0,0 +1,830 @@
+#!/usr/bin/env python3
+"""SD-card: SMART-history.
+
+Compact append-only history of raw SMART-data, one file per card.
+
+Each card (identified by manufacturer ID + serial number from the CID)
+has its own history file, containing fixed-width records which are
+sorted by time. Files are read via mmap, and time-ranges are found
+by binary search, so even long histories can be queried without
+reading everything into memory.
+
+File format (little-endian):
+
+========= ==================================================
+byte      contents
+========= ==================================================
+0..7      magic "ADVASDH1"
+8..11     record size (RECORD_SIZE)
+12..15    reserved (0)
+16..      records
+========= ==================================================
+
+Record:
+
+========= ==================================================
+byte      contents
+========= ==================================================
+0..7      timestamp (UNIX time, double)
+8         SMART-type ('A', 'T')
+9..15     reserved (0)
+16..527   raw SMART-data (512 bytes)
+========= ==================================================
+
+Delta-archive (see ArchiveWriter, Archive; `compress`/`decompress`):
+
+Successive SMART-dumps of a card differ only in a few counters, so an
+archive stores a keyframe (full dump) every KEYFRAME_INTERVAL records
+(and whenever the type changes), and otherwise the XOR against the
+previous dump, as runs of changed bytes with varint (LEB128) offsets.
+Timestamps have millisecond resolution. The keyframes are indexed at the
+end of the archive, so a time-range or record is found without decoding
+the whole archive; archives without index (e.g. truncated streams) are
+indexed on open.
+
+========= ==================================================
+byte      contents
+========= ==================================================
+0..7      magic "ADVASDA1"
+8..11     keyframe interval
+12..15    reserved (0)
+16..      records, each: kind (1 byte), varint length, payload:
+
+          - 'K' keyframe: timestamp (int64, ms), type (1 byte),
+            raw SMART-data (512 bytes)
+          - 'D' delta: varint time-delta (ms), then runs of
+            varint skip, varint length, XOR-bytes
+          - 'I' index (last record): entries of record-number (uint64),
+            timestamp (int64, ms), file-offset (uint64) of all keyframes
+-24..-1   footer: offset of the index (uint64), number of records
+          (uint64), magic "ADVASDX1"
+========= ==================================================
+
+:Usage:
+    see --help
+
+:Exit code:
+    0:   success
+    2:   invalid commandline-parameters
+    19:  device / history not found (ENODEV)
+    5:   cannot read from device / history (EIO)
+    22:  invalid CID / SMART data / history (EINVAL)
+    130: aborted (e.g. via Ctrl-C) (ECONNABORTED)
+
+:Author:    Advamation / Roland Freikamp <support@advamation.de>
+:Version:   2026-10-17
+:Copyright: Advamation <info@advamation.de>
+:License:   MIT
+"""
+
+__version__ = "1.2.0"
+__author__ = "Advamation <support@advamation.de>"
+
+import os
+import sys
+import time
+import datetime
+import re
+import math
+import struct
+import itertools
+import mmap
+import bisect
+import argparse
+import json
+
+# find package adva_sdcard: next to this script (source-tree, build/) or in ../lib/adva-sdcard (installed)
+_dir = os.path.dirname(os.path.realpath(__file__))
+for _path in (_dir, os.path.join(_dir, "..", "lib", "adva-sdcard")):
+    if os.path.isfile(os.path.join(_path, "adva_sdcard", "__init__.py")):
+        if _path not in sys.path:
+            sys.path.insert(0, _path)
+        break
+
+#=========================================
+
+MAGIC = b"ADVASDH1"
+HEADER = struct.Struct("<8sI4x")
+RECORD_HEAD = struct.Struct("<dc7x")
+SMART_SIZE = 512
+RECORD_SIZE = RECORD_HEAD.size + SMART_SIZE
+
+HISTORY_DIR = "/var/lib/adva-sdcard/history"
+
+def history_key(cid):
+    """Get history-key of a card.
+
+    :Parameters:
+        - cid: CID-info, parsed by cid_parse()
+    :Returns:
+        key as string MANFID-SERIAL, e.g. "74-30065689"
+    """
+    return "%02x-%08x" % (cid["manfid"], cid["serial"])
+
+class History:
+    """SMART-history file of one card.
+
+    Usage::
+
+        with History(path, create=True) as h:
+            h.append(time.time(), "A", data)
+            for ts, typ, data in h.range(t_from, t_to):
+                ...
+    """
+    def __init__(self, path, create=False):
+        """Open history file.
+
+        :Parameters:
+            - path:   filename
+            - create: create file if it does not exist
+        :Raises:
+            FileNotFoundError if the file does not exist (and create is False),
+            ValueError if the file is no valid history file.
+        """
+        self.path = path
+        self._mmap = None
+        if create and not os.path.exists(path):
+            with open(path, 'xb') as f:
+                f.write(HEADER.pack(MAGIC, RECORD_SIZE))
+        self._file = open(path, 'r+b' if create else 'rb')
+        head = self._file.read(HEADER.size)
+        if len(head) != HEADER.size or HEADER.unpack(head) != (MAGIC, RECORD_SIZE):
+            self._file.close()
+            raise ValueError("'%s' is no valid history file." % path)
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _map(self):
+        """(Re-)map file if it was appended to."""
+        size = os.fstat(self._file.fileno()).st_size
+        if self._mmap is None or len(self._mmap) != size:
+            if self._mmap is not None:
+                self._mmap.close()
+                self._mmap = None
+            if size > HEADER.size:
+                self._mmap = mmap.mmap(self._file.fileno(), size, access=mmap.ACCESS_READ)
+        return self._mmap
+
+    def __len__(self):
+        size = os.fstat(self._file.fileno()).st_size
+        return (size - HEADER.size) // RECORD_SIZE
+
+    def _time(self, m, i):
+        return RECORD_HEAD.unpack_from(m, HEADER.size + i * RECORD_SIZE)[0]
+
+    def record(self, i):
+        """Get record i.
+
+        :Returns:
+            (timestamp, type, data)
+        """
+        m = self._map()
+        pos = HEADER.size + i * RECORD_SIZE
+        ts, typ = RECORD_HEAD.unpack_from(m, pos)
+        pos += RECORD_HEAD.size
+        return ts, typ.decode("latin-1"), m[pos:pos+SMART_SIZE]
+
+    def bisect(self, ts):
+        """Get index of the first record with timestamp >= ts."""
+        m = self._map()
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._time(m, mid) < ts:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def range(self, t_from=None, t_to=None):
+        """Iterate over all records with t_from <= timestamp < t_to.
+
+        :Returns:
+            generator of (timestamp, type, data)
+        """
+        start = 0 if t_from is None else self.bisect(t_from)
+        stop = len(self) if t_to is None else self.bisect(t_to)
+        m = self._map()
+        for pos in range(HEADER.size + start * RECORD_SIZE, HEADER.size + stop * RECORD_SIZE, RECORD_SIZE):
+            ts, typ = RECORD_HEAD.unpack_from(m, pos)
+            yield ts, typ.decode("latin-1"), m[pos+RECORD_HEAD.size:pos+RECORD_SIZE]
+
+    def append(self, ts, typ, data):
+        """Append record.
+
+        :Raises:
+            ValueError for invalid data or if ts is older than the last record.
+        """
+        if len(data) != SMART_SIZE or len(typ) != 1:
+            raise ValueError("Invalid SMART-data.")
+        n = len(self)
+        if n and ts < self.record(n - 1)[0]:
+            raise ValueError("Timestamp is older than the last record.")
+        self._file.seek(HEADER.size + n * RECORD_SIZE)  # drop incomplete records
+        self._file.write(RECORD_HEAD.pack(ts, typ.encode("latin-1")) + bytes(data))
+        self._file.truncate()
+        self._file.flush()
+
+#=========================================
+# delta-archive
+
+ARCHIVE_MAGIC = b"ADVASDA1"
+ARCHIVE_HEADER = struct.Struct("<8sI4x")
+ARCHIVE_KEYFRAME = struct.Struct("<qc")
+ARCHIVE_INDEX_ENTRY = struct.Struct("<QqQ")
+ARCHIVE_FOOTER = struct.Struct("<QQ8s")
+ARCHIVE_FOOTER_MAGIC = b"ADVASDX1"
+KEYFRAME_INTERVAL = 64
+DELTA_CACHE = 1024
+
+# runs of changed bytes; gaps of up to 2 unchanged bytes are cheaper inside a run
+_XOR_RUNS = re.compile(rb"[^\x00]+(?:\x00{1,2}[^\x00]+)*")
+_VARINT_SMALL = [bytes((i,)) for i in range(128)]
+_KIND_KEYFRAME, _KIND_DELTA, _KIND_INDEX = b"KDI"
+
+def _varint(n):
+    """Encode unsigned integer as varint (LEB128)."""
+    if n < 128:
+        return _VARINT_SMALL[n]
+    b = bytearray()
+    while n >= 128:
+        b.append((n & 0x7F) | 0x80)
+        n >>= 7
+    b.append(n)
+    return bytes(b)
+
+def _varint_read(buf, pos):
+    """Decode varint at buf[pos].
+
+    :Returns:
+        (value, position after the varint)
+    :Raises:
+        IndexError if buf ends within the varint.
+    """
+    n = shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        n |= (byte & 0x7F) << shift
+        if byte < 128:
+            return n, pos
+        shift += 7
+
+def _archive_records(buf, pos, partial=False):
+    """Parse archive records (after the header) from a buffer.
+
+    :Parameters:
+        - buf:     bytes or mmap
+        - pos:     position of a record in buf
+        - partial: stop at an incomplete last record instead of raising
+                   ValueError (for reading a stream in chunks)
+    :Returns:
+        generator of (position, kind, payload, position after the record),
+        kind as int; ends at the index
+    :Raises:
+        ValueError for truncated records.
+    """
+    size = len(buf)
+    while pos < size:
+        kind = buf[pos]
+        if kind == _KIND_INDEX:
+            return
+        length = buf[pos + 1] if pos + 1 < size else 128
+        if length < 128:
+            start = pos + 2
+        else:
+            try:
+                length, start = _varint_read(buf, pos + 1)
+            except IndexError:
+                length, start = 0, size + 1
+        end = start + length
+        if end > size:
+            if partial:
+                return
+            raise ValueError("truncated archive")
+        yield pos, kind, buf[start:end], end
+        pos = end
+
+def _archive_delta(payload):
+    """Parse the payload of a delta-record.
+
+    :Returns:
+        (time-delta in ms, XOR-mask as int (big-endian))
+    :Raises:
+        ValueError for invalid deltas.
+    """
+    mask = bytearray(SMART_SIZE)
+    try:
+        dt, pos = _varint_read(payload, 0)
+        i, end = 0, len(payload)
+        while pos < end:
+            skip, pos = _varint_read(payload, pos)
+            n, pos = _varint_read(payload, pos)
+            i += skip
+            if i + n > SMART_SIZE or pos + n > end:
+                raise ValueError("invalid delta")
+            mask[i:i+n] = payload[pos:pos+n]
+            pos += n
+            i += n
+    except IndexError:
+        raise ValueError("invalid delta") from None
+    return dt, int.from_bytes(mask, "big")
+
+def _archive_decode(records):
+    """Decode archive records (see _archive_records()) into dumps.
+
+    The current dump is also kept as int, so that a delta needs only one
+    int-XOR. Deltas repeat a lot (same time-delta, same counter-bits
+    flipping), so parsed deltas are cached (up to DELTA_CACHE entries).
+
+    :Returns:
+        generator of (timestamp in ms, type, data)
+    :Raises:
+        ValueError for invalid records (e.g. delta without keyframe).
+    """
+    ts = typ = None
+    cur = None
+    size = ARCHIVE_KEYFRAME.size
+    cache = {}
+    for _, kind, payload, _ in records:
+        if kind == _KIND_DELTA:
+            if cur is None:
+                raise ValueError("delta without keyframe")
+            delta = cache.get(payload)
+            if delta is None:
+                delta = _archive_delta(payload)
+                if len(cache) < DELTA_CACHE:
+                    cache[payload] = delta
+            dt, xor = delta
+            ts += dt
+            if xor:
+                cur ^= xor
+                data = cur.to_bytes(SMART_SIZE, "big")
+        elif kind == _KIND_KEYFRAME:
+            if len(payload) != size + SMART_SIZE:
+                raise ValueError("invalid keyframe")
+            ts, typ = ARCHIVE_KEYFRAME.unpack_from(payload)
+            typ = typ.decode("latin-1")
+            data = payload[size:]
+            cur = int.from_bytes(data, "big")
+        else:
+            raise ValueError("invalid record kind %r" % bytes((kind,)))
+        yield ts, typ, data
+
+class ArchiveWriter:
+    """Write a delta-archive (sequentially, e.g. to a pipe).
+
+    Usage::
+
+        with ArchiveWriter(f) as w:
+            for ts, typ, data in dumps:
+                w.append(ts, typ, data)
+    """
+    def __init__(self, f, interval=KEYFRAME_INTERVAL):
+        """
+        :Parameters:
+            - f:        binary file, opened for writing
+            - interval: maximum number of records between keyframes
+        """
+        if interval < 1:
+            raise ValueError("Invalid keyframe interval.")
+        self.f = f
+        self.interval = interval
+        self.index = []
+        self.count = 0
+        self._prev = None   # (timestamp in ms, type, data as int)
+        self._key = 0
+        self._pos = ARCHIVE_HEADER.size
+        f.write(ARCHIVE_HEADER.pack(ARCHIVE_MAGIC, interval))
+
+    def _write(self, kind, payload):
+        data = kind + _varint(len(payload)) + payload
+        self.f.write(data)
+        self._pos += len(data)
+
+    def append(self, ts, typ, data):
+        """Append SMART-dump.
+
+        :Parameters:
+            - ts:   timestamp (UNIX time)
+            - typ:  SMART-type ('A', 'T')
+            - data: raw SMART-data (512 bytes)
+        :Raises:
+            ValueError for invalid data or if ts is older than the last record.
+        """
+        if len(data) != SMART_SIZE or len(typ) != 1:
+            raise ValueError("Invalid SMART-data.")
+        ts = round(ts * 1000)
+        value = int.from_bytes(data, "big")
+        prev = self._prev
+        if prev is not None and ts < prev[0]:
+            raise ValueError("Timestamp is older than the last record.")
+        if prev is None or typ != prev[1] or self.count - self._key >= self.interval:
+            self.index.append((self.count, ts, self._pos))
+            self._key = self.count
+            self._write(b"K", ARCHIVE_KEYFRAME.pack(ts, typ.encode("latin-1")) + bytes(data))
+        else:
+            xor = (prev[2] ^ value).to_bytes(SMART_SIZE, "big")
+            parts = [_varint(ts - prev[0])]
+            last = 0
+            for m in _XOR_RUNS.finditer(xor):
+                start, end = m.span()
+                parts += [_varint(start - last), _varint(end - start), xor[start:end]]
+                last = end
+            self._write(b"D", b"".join(parts))
+        self._prev = (ts, typ, value)
+        self.count += 1
+
+    def close(self):
+        """Write index and footer, and flush."""
+        offset = self._pos
+        self._write(b"I", b"".join(ARCHIVE_INDEX_ENTRY.pack(*entry) for entry in self.index))
+        self.f.write(ARCHIVE_FOOTER.pack(offset, self.count, ARCHIVE_FOOTER_MAGIC))
+        self.f.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def archive_read(f):
+    """Read a delta-archive sequentially (e.g. from a pipe).
+
+    :Parameters:
+        - f: binary file
+    :Returns:
+        generator of (timestamp, type, data)
+    :Raises:
+        ValueError if f is no (valid) delta-archive.
+    """
+    head = f.read(ARCHIVE_HEADER.size)
+    if len(head) != ARCHIVE_HEADER.size or head[:8] != ARCHIVE_MAGIC:
+        raise ValueError("no valid delta-archive")
+    for ts, typ, data in _archive_decode(_archive_chunks(f)):
+        yield ts / 1000.0, typ, data
+
+def _archive_chunks(f, chunksize=1 << 16):
+    """Read archive records from a stream in chunks (see _archive_records())."""
+    buf, pos = b"", 0
+    while True:
+        chunk = f.read(chunksize)
+        buf = buf[pos:] + chunk
+        pos = 0
+        for record in _archive_records(buf, 0, partial=bool(chunk)):
+            yield record
+            pos = record[3]
+        if not chunk or (pos < len(buf) and buf[pos] == _KIND_INDEX):
+            return
+
+class Archive:
+    """Delta-archive file, with random access via the keyframe-index.
+
+    Usage::
+
+        with Archive(path) as a:
+            for ts, typ, data in a.range(t_from, t_to):
+                ...
+    """
+    def __init__(self, path):
+        """Open archive (and index it, if it has no index).
+
+        :Raises:
+            FileNotFoundError if the file does not exist,
+            ValueError if the file is no valid delta-archive.
+        """
+        self.path = path
+        with open(path, 'rb') as f:
+            head = f.read(ARCHIVE_HEADER.size)
+            if len(head) != ARCHIVE_HEADER.size or head[:8] != ARCHIVE_MAGIC:
+                raise ValueError("'%s' is no valid delta-archive." % path)
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        m = self._mmap
+        self.index, self.count = None, 0
+        if len(m) >= ARCHIVE_HEADER.size + ARCHIVE_FOOTER.size:
+            offset, count, magic = ARCHIVE_FOOTER.unpack_from(m, len(m) - ARCHIVE_FOOTER.size)
+            end = len(m) - ARCHIVE_FOOTER.size
+            if magic == ARCHIVE_FOOTER_MAGIC and ARCHIVE_HEADER.size <= offset < end and m[offset:offset+1] == b"I":
+                _, pos = _varint_read(m, offset + 1)
+                self.index = [ARCHIVE_INDEX_ENTRY.unpack_from(m, p) for p in range(pos, end, ARCHIVE_INDEX_ENTRY.size)]
+                self.count = count
+        if self.index is None:      # no index: index now
+            self.index = []
+            try:
+                for offset, kind, payload, _ in _archive_records(m, ARCHIVE_HEADER.size):
+                    if kind == _KIND_KEYFRAME:
+                        self.index.append((self.count, ARCHIVE_KEYFRAME.unpack_from(payload)[0], offset))
+                    self.count += 1
+            except ValueError:      # truncated: ignore incomplete last record
+                pass
+        self._numbers = [entry[0] for entry in self.index]
+        self._times = [entry[1] for entry in self.index]
+
+    def close(self):
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def _decode(self, k):
+        """Decode records from keyframe k on.
+
+        :Returns:
+            (number of the first record, generator of (timestamp in ms, type, data))
+        """
+        number, _, offset = self.index[k]
+        records = itertools.islice(_archive_records(self._mmap, offset), self.count - number)
+        return number, _archive_decode(records)
+
+    def record(self, i):
+        """Get record i.
+
+        :Returns:
+            (timestamp, type, data)
+        :Raises:
+            IndexError
+        """
+        if not 0 <= i < self.count:
+            raise IndexError("record out of range")
+        number, dumps = self._decode(bisect.bisect_right(self._numbers, i) - 1)
+        for ts, typ, data in itertools.islice(dumps, i - number, None):
+            return ts / 1000.0, typ, data
+        raise IndexError("record out of range")
+
+    def range(self, t_from=None, t_to=None):
+        """Iterate over all records with t_from <= timestamp < t_to.
+
+        :Returns:
+            generator of (timestamp, type, data)
+        """
+        if not self.index:
+            return
+        k = 0 if t_from is None else max(0, bisect.bisect_left(self._times, t_from * 1000.0) - 1)
+        t_from = -math.inf if t_from is None else t_from * 1000.0
+        t_to = math.inf if t_to is None else t_to * 1000.0
+        for ts, typ, data in self._decode(k)[1]:
+            if ts >= t_from:
+                if ts >= t_to:
+                    return
+                yield ts / 1000.0, typ, data
+
+#=========================================
+
+def _time_parse(s):
+    """Parse time as UNIX timestamp or ISO-date/-time (local time)."""
+    try:
+        return float(s)
+    except ValueError:
+        return datetime.datetime.fromisoformat(s).timestamp()
+
+def main(arglist=None):
+    """Add to / export SMART-history.
+
+    See module docstring for exit codes.
+    """
+    # parse arguments
+    parser = argparse.ArgumentParser(
+        description="""Store/export SMART-history of industrial microSD-/SD-cards.
+Version %s by %s.""" % (__version__, __author__),
+        formatter_class=argparse.RawDescriptionHelpFormatter,   # for keeping newlines in description
+        epilog="""
+Examples:
+    adva-sdcard-history add -d /dev/mmcblk0
+    adva-sdcard-smart-get /dev/mmcblk0 | adva-sdcard-history add -c $(cat /sys/block/mmcblk0/device/cid)
+    adva-sdcard-history list
+    adva-sdcard-history export --from 2025-01-01 --to 2026-01-01 74-30065689
+    adva-sdcard-history compress -o 74-30065689.hista 74-30065689
+    adva-sdcard-history decompress --from 2025-01-01 74-30065689.hista
+Note that this does not work with USB-cardreaders.\n""")
+    parser.add_argument("-D", "--directory", action='store', default=HISTORY_DIR, help="history directory, default: %s" % HISTORY_DIR)
+    parser.add_argument("--version", action='version', version="%(prog)s " + __version__)
+    sub = parser.add_subparsers(dest="command", metavar="COMMAND")
+    sub.required = True
+
+    p = sub.add_parser("add", help="Add SMART-data to the history.")
+    p.add_argument("-d", "--device", action='store', help="Retrieve CID and SMART-data directly from SD-card.")
+    p.add_argument("-c", "--cid", action='store', help="CID of the card (as hex string), if not using -d.")
+    p.add_argument("-t", "--time", action='store', help="timestamp (UNIX time or ISO-date), default: now")
+    p.add_argument("smartdata", nargs='?', type=argparse.FileType('r'), default=sys.stdin, help='file containing raw SMART-data, default: stdin')
+
+    p = sub.add_parser("list", help="List cards in the history.")
+    p.add_argument("-j", "--json", action='store_true', help="Print output in JSON format.")
+
+    p = sub.add_parser("export", help="Export a time-range of the history.")
+    p.add_argument("--from", dest="t_from", action='store', help="start time (UNIX time or ISO-date), inclusive")
+    p.add_argument("--to", dest="t_to", action='store', help="end time (UNIX time or ISO-date), exclusive")
+    p.add_argument("-r", "--raw", action='store_true', help="Print raw SMART-data (TIMESTAMP TYPE-HEX) instead of JSON-lines.")
+    p.add_argument("card", help="history-key (MANFID-SERIAL, see 'list') or history file")
+
+    p = sub.add_parser("compress", help="Compress SMART-dumps into a delta-archive (stream).")
+    p.add_argument("-k", "--keyframe", action='store', type=int, default=KEYFRAME_INTERVAL, help="maximum number of records between keyframes, default: %d" % KEYFRAME_INTERVAL)
+    p.add_argument("-o", "--output", action='store', help="archive file, default: stdout")
+    p.add_argument("input", nargs='?', help="history-key, history file or file with raw SMART-data (TIMESTAMP TYPE-HEX per line, see 'export -r'), default: stdin")
+
+    p = sub.add_parser("decompress", help="Decompress a delta-archive (stream).")
+    p.add_argument("--from", dest="t_from", action='store', help="start time (UNIX time or ISO-date), inclusive")
+    p.add_argument("--to", dest="t_to", action='store', help="end time (UNIX time or ISO-date), exclusive")
+    p.add_argument("-r", "--raw", action='store_true', help="Print raw SMART-data (TIMESTAMP TYPE-HEX) instead of JSON-lines.")
+    p.add_argument("archive", nargs='?', help="archive file, default: stdin")
+
+    args = parser.parse_args(arglist)
+
+    #---------------------
+    if args.command == "add":
+        from adva_sdcard import info as infotool
+        from adva_sdcard import smart as smarttool
+        try:
+            ts = time.time() if args.time is None else _time_parse(args.time)
+        except ValueError as err:
+            print("ERROR: Invalid time. (%s)" % err, file=sys.stderr)
+            return 2
+        if args.device:
+            try:
+                cid = infotool.cid_get(args.device)
+                typ, data = smarttool.smart_get_any(args.device)
+            except ValueError as err:
+                print("ERROR: %s" % err, file=sys.stderr)
+                return 2
+            except FileNotFoundError as err:
+                print("ERROR: %s" % err, file=sys.stderr)
+                return 19   # ENODEV
+            except Exception as err:
+                print("ERROR: Cannot get SMART-data from device. (%s)" % (getattr(err, "stderr", None) or err,), file=sys.stderr)
+                return getattr(err, "returncode", None) or getattr(err, "errno", None) or 5
+        elif args.cid:
+            cid = args.cid
+            raw = args.smartdata.read(1500).strip()
+            if len(raw) == 1024:    # for backwards compatibility
+                raw = "A-" + raw
+            try:
+                if len(raw) != 1026 or raw[1] != '-':
+                    raise ValueError("length")
+                typ, data = raw[0], bytes.fromhex(raw[2:])
+            except ValueError as err:
+                print("ERROR: Invalid SMART raw data. (%s)" % err, file=sys.stderr)
+                return 22
+        else:
+            print("ERROR: Invalid arguments, either DEVICE or CID is required.", file=sys.stderr)
+            return 2
+        try:
+            key = history_key(infotool.cid_parse(cid))
+        except ValueError as err:
+            print("ERROR: Invalid CID data. (%s)" % err, file=sys.stderr)
+            return 22
+        try:
+            os.makedirs(args.directory, exist_ok=True)
+            with History(os.path.join(args.directory, key + ".hist"), create=True) as h:
+                h.append(ts, typ, data)
+        except ValueError as err:
+            print("ERROR: %s" % err, file=sys.stderr)
+            return 22
+        except OSError as err:
+            print("ERROR: Cannot write history. (%s)" % err, file=sys.stderr)
+            return 5
+        return 0
+
+    #---------------------
+    if args.command == "list":
+        try:
+            names = sorted(n for n in os.listdir(args.directory) if n.endswith(".hist"))
+        except OSError as err:
+            print("ERROR: Cannot read history directory. (%s)" % err, file=sys.stderr)
+            return 19   # ENODEV
+        cards = []
+        for name in names:
+            try:
+                with History(os.path.join(args.directory, name)) as h:
+                    n = len(h)
+                    span = (h.record(0)[0], h.record(n-1)[0]) if n else (None, None)
+            except (OSError, ValueError) as err:
+                print("ERROR: %s" % err, file=sys.stderr)
+                continue
+            cards.append({"card": name[:-5], "records": n, "first": span[0], "last": span[1]})
+        if args.json:
+            print(json.dumps(cards))
+        else:
+            for c in cards:
+                print("%-12s %8d  %s .. %s" % (c["card"], c["records"],
+                    time.strftime("%Y-%m-%d %H:%M", time.localtime(c["first"])) if c["first"] is not None else "-",
+                    time.strftime("%Y-%m-%d %H:%M", time.localtime(c["last"])) if c["last"] is not None else "-"))
+        return 0
+
+    #---------------------
+    if args.command == "compress":
+        from adva_sdcard import smart as smarttool
+        path = args.input
+        if path is not None and not os.path.isfile(path):
+            path = os.path.join(args.directory, path + ".hist")
+        errors = 0
+        def lines(f):
+            nonlocal errors
+            for lineno, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    ts, raw = line.split()
+                    raw = smarttool.smart_check(raw)
+                    yield float(ts), raw[0], bytes.fromhex(raw[2:])
+                except ValueError as err:
+                    errors += 1
+                    print("ERROR: %d: Invalid SMART raw data. (%s)" % (lineno, err), file=sys.stderr)
+        source = out = None
+        try:
+            binary = False
+            if path:
+                with open(path, 'rb') as f:
+                    binary = f.read(len(MAGIC)) == MAGIC
+            if binary:
+                source = History(path)
+                dumps = source.range()
+            else:
+                source = open(path, 'r', encoding="latin-1") if path else None
+                dumps = lines(source or sys.stdin)
+            out = open(args.output, 'wb') if args.output else None
+            with ArchiveWriter(out or sys.stdout.buffer, args.keyframe) as w:
+                for ts, typ, data in dumps:
+                    w.append(ts, typ, data)
+        except FileNotFoundError as err:
+            print("ERROR: %s" % err, file=sys.stderr)
+            return 19   # ENODEV
+        except ValueError as err:
+            print("ERROR: %s" % err, file=sys.stderr)
+            return 22
+        except OSError as err:
+            print("ERROR: Cannot read/write. (%s)" % err, file=sys.stderr)
+            return 5
+        finally:
+            for f in (source, out):
+                if f is not None:
+                    f.close()
+        return 22 if errors else 0
+
+    #---------------------
+    if args.command in ("export", "decompress"):
+        from adva_sdcard import smart as smarttool
+        try:
+            t_from = None if args.t_from is None else _time_parse(args.t_from)
+            t_to = None if args.t_to is None else _time_parse(args.t_to)
+        except ValueError as err:
+            print("ERROR: Invalid time. (%s)" % err, file=sys.stderr)
+            return 2
+        try:
+            if args.command == "export":
+                path = args.card if os.path.isfile(args.card) else os.path.join(args.directory, args.card + ".hist")
+                source = History(path)
+                dumps = source.range(t_from, t_to)
+            elif args.archive:
+                source = Archive(args.archive)
+                dumps = source.range(t_from, t_to)
+            else:   # stream: sequential
+                source = None
+                dumps = ((ts, typ, data) for ts, typ, data in archive_read(sys.stdin.buffer)
+                         if (t_from is None or ts >= t_from) and (t_to is None or ts < t_to))
+            try:
+                for ts, typ, data in dumps:
+                    if args.raw:
+                        print("%.3f %s-%s" % (ts, typ, data.hex()))
+                    else:
+                        smart = smarttool.smart_decode(typ, data)
+                        smart["time"] = ts
+                        print(json.dumps(smart))
+            finally:
+                if source is not None:
+                    source.close()
+        except FileNotFoundError as err:
+            print("ERROR: %s" % err, file=sys.stderr)
+            return 19   # ENODEV
+        except ValueError as err:
+            print("ERROR: %s" % err, file=sys.stderr)
+            return 22
+        except OSError as err:
+            print("ERROR: Cannot read history. (%s)" % err, file=sys.stderr)
+            return 5
+        return 0
+
+#=========================================
+if __name__ == '__main__':
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        print("\nAborted.")
+        sys.exit(130)   # ECONNABORTED
+
+#=========================================
@@ -0,0 +1,501 @@
+#!/usr/bin/env python3
+"""SD-card: Fleet inventory of CID/CSD/SMART-records.
+
+Indexed inventory (SQLite) of the cards of many hosts, e.g. collected
+via `adva-sdcard-info -A` / `-j` and `adva-sdcard-smart -a -j`:
+
+- cards are identified by their CID (manfid, oemid, serial, date),
+  so a card can be followed when it moves between hosts
+- every record with SMART-data is stored as sample (endurance,
+  erase-counts, bad blocks, ...); samples are unique per card and time,
+  so ingesting the same records again (e.g. re-collected files) does
+  not duplicate them
+- the latest state of every card (host, endurance, bad blocks) is kept
+  in the card-table, and changes (bad blocks grew, card moved to another
+  host) are stored as events, so the common reports only need index-lookups
+
+Ingested records (JSON, one per line), see inventory_records():
+
+- output of `adva-sdcard-info -A` ({"devices": [...]})
+- output of `adva-sdcard-info -j` (CID only)
+- {"cid": CID-info or CID as hex string, "smart": SMART-info (optional),
+  "host": ..., "time": ..., "device": ...}
+
+Records without host/time get them from the commandline (--host, --time,
+default: hostname, now).
+
+:Usage:
+    see --help
+
+:Exit code:
+    0:   success
+    2:   invalid commandline-parameters
+    5:   cannot read/write the inventory (EIO)
+    22:  invalid records (EINVAL)
+    130: aborted (e.g. via Ctrl-C) (ECONNABORTED)
+
+:Author:    Advamation / Roland Freikamp <support@advamation.de>
+:Version:   2026-10-17
+:Copyright: Advamation <info@advamation.de>
+:License:   MIT
+"""
+
+__version__ = "1.2.0"
+__author__ = "Advamation <support@advamation.de>"
+
+import os
+import sys
+import time
+import datetime
+import argparse
+import json
+import sqlite3
+
+# find package adva_sdcard: next to this script (source-tree, build/) or in ../lib/adva-sdcard (installed)
+_dir = os.path.dirname(os.path.realpath(__file__))
+for _path in (_dir, os.path.join(_dir, "..", "lib", "adva-sdcard")):
+    if os.path.isfile(os.path.join(_path, "adva_sdcard", "__init__.py")):
+        if _path not in sys.path:
+            sys.path.insert(0, _path)
+        break
+
+#=========================================
+
+INVENTORY_DB = "/var/lib/adva-sdcard/inventory.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cards (
+    id          INTEGER PRIMARY KEY,
+    manfid      INTEGER NOT NULL,
+    oemid       TEXT NOT NULL,
+    serial      INTEGER NOT NULL,
+    date        TEXT NOT NULL,
+    name        TEXT,
+    rev         TEXT,
+    cid         TEXT,
+    first_seen  REAL,
+    last_seen   REAL,
+    host        TEXT,
+    device      TEXT,
+    endurance   REAL,
+    blocks_bad  INTEGER,
+    UNIQUE (manfid, oemid, serial, date)
+);
+CREATE INDEX IF NOT EXISTS cards_name ON cards (name, manfid);
+CREATE INDEX IF NOT EXISTS cards_endurance ON cards (endurance);
+CREATE INDEX IF NOT EXISTS cards_host ON cards (host);
+
+CREATE TABLE IF NOT EXISTS samples (
+    card        INTEGER NOT NULL REFERENCES cards (id),
+    time        REAL NOT NULL,
+    host        TEXT,
+    endurance   REAL,
+    erase_count_avg INTEGER,
+    erase_count_max INTEGER,
+    blocks_bad  INTEGER,
+    power_on_count INTEGER,
+    power_off_abnormal_count INTEGER,
+    UNIQUE (card, time)
+);
+
+CREATE TABLE IF NOT EXISTS events (
+    card        INTEGER NOT NULL REFERENCES cards (id),
+    time        REAL NOT NULL,
+    kind        TEXT NOT NULL,
+    old,
+    new,
+    host        TEXT
+);
+CREATE INDEX IF NOT EXISTS events_kind_time ON events (kind, time);
+"""
+
+# SMART-fields stored per sample
+SAMPLE_FIELDS = ("endurance", "erase_count_avg", "erase_count_max", "blocks_bad",
+                 "power_on_count", "power_off_abnormal_count")
+
+# CID-fields identifying a card, and their types
+CID_FIELDS = (("manfid", int), ("oemid", str), ("serial", int), ("date", str))
+
+# card-columns shown in reports
+CARD_COLUMNS = ("id", "manfid", "oemid", "name", "rev", "serial", "date", "cid",
+                "first_seen", "last_seen", "host", "device", "endurance", "blocks_bad")
+
+def inventory_records(rec, host=None, ts=None):
+    """Split an ingested record into (cid, smart, host, time, device).
+
+    :Parameters:
+        - rec:  record (dict, see module docstring)
+        - host: default host
+        - ts:   default time
+    :Returns:
+        list of (cid, smart, host, time, device), cid as parsed CID-info
+        (see cid_parse()), smart as SMART-info or None
+    :Raises:
+        ValueError for invalid records.
+    """
+    if not isinstance(rec, dict):
+        raise ValueError("record is not a JSON-object")
+    host = rec.get("host", host)
+    ts = rec.get("time", ts)
+    if host is not None and not isinstance(host, str):
+        raise ValueError("host is not a string")
+    if ts is not None and not _is_number(ts):
+        raise ValueError("time is not a number")
+    if "devices" in rec:                            # adva-sdcard-info -A
+        devices = rec["devices"]
+        if not isinstance(devices, list) or not all(isinstance(dev, dict) for dev in devices):
+            raise ValueError("devices is not a list of JSON-objects")
+        parts = [(dev["cid"], dev.get("smart"), host, ts, dev.get("device"))
+                 for dev in devices if dev.get("cid")]
+    elif "manfid" in rec and "serial" in rec:       # adva-sdcard-info -j
+        parts = [(rec, None, host, ts, rec.get("device"))]
+    else:
+        cid = rec.get("cid")
+        if isinstance(cid, str):
+            from adva_sdcard.info import cid_parse
+            cid = cid_parse(cid)
+        if not isinstance(cid, dict):
+            raise ValueError("no CID")
+        parts = [(cid, rec.get("smart"), host, ts, rec.get("device"))]
+    for cid, smart, _, _, device in parts:
+        if not isinstance(cid, dict) or not all(isinstance(cid.get(name), typ) for name, typ in CID_FIELDS) or \
+           not all(isinstance(cid.get(name), (str, type(None))) for name in ("name", "rev")) or \
+           not isinstance(cid.get("cid"), (int, str, type(None))):
+            raise ValueError("invalid CID")
+        if smart is not None:
+            if not isinstance(smart, dict):
+                raise ValueError("SMART-data is not a JSON-object")
+            if not all(smart.get(name) is None or _is_number(smart[name]) for name in SAMPLE_FIELDS):
+                raise ValueError("SMART-value is not a number")
+        if device is not None and not isinstance(device, str):
+            raise ValueError("device is not a string")
+    return parts
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def card_key(card):
+    """Get short card-key (MANFID-SERIAL, like adva-sdcard-history)."""
+    return "%02x-%08x" % (card["manfid"], card["serial"])
+
+class Inventory:
+    """Fleet inventory (SQLite)."""
+    def __init__(self, path=INVENTORY_DB):
+        """Open (or create) inventory.
+
+        :Raises:
+            sqlite3.Error
+        """
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")     # WAL: durable except on power-loss
+        self.db.executescript(SCHEMA)
+        self._cards = None
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    #---------------------
+    # ingest
+
+    def _cards_load(self):
+        """Load latest state of all cards: key -> [id, last_seen, host, device, endurance, blocks_bad, dirty]."""
+        self._cards = {}
+        for row in self.db.execute("SELECT manfid, oemid, serial, date, id, last_seen, host, device, endurance, blocks_bad FROM cards"):
+            self._cards[row[:4]] = list(row[4:]) + [False]
+
+    def ingest(self, records, host=None, ts=None, batch=50000, errors=None):
+        """Ingest records, in batches (one transaction per batch).
+
+        :Parameters:
+            - records: iterable of records (dicts, see inventory_records())
+            - host:    default host
+            - ts:      default time
+            - batch:   number of records per transaction
+            - errors:  callback(index, error-message) for invalid records
+                       (default: raise ValueError)
+        :Returns:
+            number of stored (card, sample)-records
+        """
+        if self._cards is None:
+            self._cards_load()
+        cards = self._cards
+        samples, events = [], []
+        count = 0
+        db = self.db
+        def flush():
+            with db:
+                db.executemany("INSERT OR IGNORE INTO samples VALUES (?,?,?,?,?,?,?,?,?)", samples)
+                db.executemany("INSERT INTO events VALUES (?,?,?,?,?,?)", events)
+                db.executemany("UPDATE cards SET last_seen=?, host=?, device=?, endurance=?, blocks_bad=? WHERE id=?",
+                               [(c[1], c[2], c[3], c[4], c[5], c[0]) for c in cards.values() if c[6]])
+            for c in cards.values():
+                c[6] = False
+            del samples[:], events[:]
+
+        for i, rec in enumerate(records):
+            try:
+                parts = inventory_records(rec, host, ts)
+            except (ValueError, KeyError, TypeError) as err:
+                if errors is None:
+                    raise ValueError("record %d: %s" % (i, err)) from None
+                errors(i, str(err))
+                continue
+            for cid, smart, rhost, rts, device in parts:
+                key = (cid["manfid"], cid["oemid"], cid["serial"], cid["date"])
+                if rts is None:
+                    rts = time.time()
+                c = cards.get(key)
+                if c is None:
+                    cur = db.execute("INSERT INTO cards (manfid, oemid, serial, date, name, rev, cid, first_seen, last_seen, host, device) "
+                                     "VALUES (?,?,?,?,?,?,?,?,?,?,?)",
+                                     key + (cid.get("name"), cid.get("rev"),
+                                            "%032x" % cid["cid"] if isinstance(cid.get("cid"), int) else cid.get("cid"),
+                                            rts, rts, rhost, device))
+                    c = cards[key] = [cur.lastrowid, rts, rhost, device, None, None, True]
+                newest = rts >= c[1]
+                if newest:
+                    if rhost != c[2] and c[2] is not None and rhost is not None:
+                        events.append((c[0], rts, "host", c[2], rhost, rhost))
+                    c[1], c[2], c[3], c[6] = rts, rhost, device, True
+                if smart:
+                    values = [smart.get(name) for name in SAMPLE_FIELDS]
+                    samples.append((c[0], rts, rhost, *values))
+                    if newest:
+                        bad = smart.get("blocks_bad")
+                        if bad is not None and c[5] is not None and bad > c[5]:
+                            events.append((c[0], rts, "blocks_bad", c[5], bad, rhost))
+                        c[4], c[5] = smart.get("endurance"), bad
+                count += 1
+            if len(samples) >= batch:
+                flush()
+        flush()
+        return count
+
+    #---------------------
+    # queries
+
+    def _cards_query(self, where, params=()):
+        cur = self.db.execute("SELECT %s FROM cards WHERE %s" % (", ".join(CARD_COLUMNS), where), params)
+        return [dict(zip(CARD_COLUMNS, row)) for row in cur]
+
+    def endurance_below(self, percent):
+        """Cards whose latest endurance is below percent (lowest first)."""
+        return self._cards_query("endurance < ? ORDER BY endurance", (percent,))
+
+    def product(self, name, manfid=None):
+        """All cards of a product (CID-name, optionally manufacturer)."""
+        if manfid is None:
+            return self._cards_query("name = ? ORDER BY manfid, serial", (name,))
+        return self._cards_query("name = ? AND manfid = ? ORDER BY serial", (name, manfid))
+
+    def host(self, host):
+        """All cards (last seen) in a host."""
+        return self._cards_query("host = ? ORDER BY device", (host,))
+
+    def events(self, kind, since):
+        """Cards with events of kind ("blocks_bad", "host") since a time.
+
+        :Returns:
+            list of card-dicts (see CARD_COLUMNS) with "events": list of
+            (time, old, new, host)
+        """
+        result = {}
+        for card, ts, old, new, host in self.db.execute(
+                "SELECT card, time, old, new, host FROM events WHERE kind = ? AND time >= ? ORDER BY time", (kind, since)):
+            result.setdefault(card, []).append((ts, old, new, host))
+        cards = self._cards_query("id IN (%s)" % ",".join("?" * len(result)), tuple(result)) if result else []
+        for card in cards:
+            card["events"] = result[card["id"]]
+        return cards
+
+    def history(self, key):
+        """Samples of a card.
+
+        :Parameters:
+            - key: card-key (MANFID-SERIAL) or CID as hex string
+        :Returns:
+            (card, samples) or (None, [])
+        """
+        if "-" in key:
+            manfid, serial = key.split("-", 1)
+            cards = self._cards_query("manfid = ? AND serial = ?", (int(manfid, 16), int(serial, 16)))
+        else:
+            cards = self._cards_query("cid = ?", (key.lower(),))
+        if not cards:
+            return None, []
+        columns = ("time", "host") + SAMPLE_FIELDS
+        cur = self.db.execute("SELECT %s FROM samples WHERE card = ? ORDER BY time" % ", ".join(columns), (cards[0]["id"],))
+        return cards[0], [dict(zip(columns, row)) for row in cur]
+
+#=========================================
+
+def _time_parse(s):
+    """Parse time as UNIX timestamp, ISO-date/-time (local time),
+    or relative to now (e.g. 7d, 24h, 30m)."""
+    units = {"d": 86400, "h": 3600, "m": 60}
+    if s and s[-1] in units:
+        return time.time() - float(s[:-1]) * units[s[-1]]
+    try:
+        return float(s)
+    except ValueError:
+        return datetime.datetime.fromisoformat(s).timestamp()
+
+def cards_print(cards):
+    """Print cards as table."""
+    print("%-12s %-6s %-5s %-16s %-16s %9s %7s  %s" % ("CARD", "OEMID", "NAME", "HOST", "DEVICE", "ENDURANCE", "BAD", "LAST SEEN"))
+    for c in cards:
+        print("%-12s %-6s %-5s %-16s %-16s %9s %7s  %s" % (card_key(c), c["oemid"], c["name"], c["host"] or "-", c["device"] or "-",
+              "-" if c["endurance"] is None else "%.2f" % c["endurance"], "-" if c["blocks_bad"] is None else c["blocks_bad"],
+              time.strftime("%Y-%m-%d %H:%M", time.localtime(c["last_seen"]))))
+        for ts, old, new, host in c.get("events", ()):
+            print("    %s  %s -> %s  (%s)" % (time.strftime("%Y-%m-%d %H:%M", time.localtime(ts)), old, new, host))
+
+def main(arglist=None):
+    """Ingest records into / query the inventory.
+
+    See module docstring for exit codes.
+    """
+    # parse arguments
+    parser = argparse.ArgumentParser(
+        description="""Fleet inventory of industrial microSD-/SD-cards (CID/SMART).
+Version %s by %s.""" % (__version__, __author__),
+        formatter_class=argparse.RawDescriptionHelpFormatter,   # for keeping newlines in description
+        epilog="""
+Examples:
+    adva-sdcard-info -A | adva-sdcard-inventory ingest --host pi-042
+    adva-sdcard-inventory ingest collected/*.ndjson
+    adva-sdcard-inventory endurance --below 20
+    adva-sdcard-inventory badblocks --since 7d
+    adva-sdcard-inventory product USDU1
+    adva-sdcard-inventory history 74-30065689
+Note that this does not work with USB-cardreaders.\n""")
+    parser.add_argument("-f", "--database", action='store', default=INVENTORY_DB, help="inventory database, default: %s" % INVENTORY_DB)
+    parser.add_argument("-j", "--json", action='store_true', help="Print output in JSON format.")
+    parser.add_argument("--version", action='version', version="%(prog)s " + __version__)
+    sub = parser.add_subparsers(dest="command", metavar="COMMAND")
+    sub.required = True
+
+    p = sub.add_parser("ingest", help="Ingest records (JSON, one per line).")
+    p.add_argument("--host", action='store', default=os.uname().nodename, help="host of records without host, default: this host")
+    p.add_argument("--time", action='store', help="time of records without time (UNIX time or ISO-date), default: now")
+    p.add_argument("records", nargs='*', type=argparse.FileType('r'), help="files containing records, default: stdin")
+
+    p = sub.add_parser("endurance", help="Cards with low endurance.")
+    p.add_argument("--below", action='store', type=float, default=20.0, help="endurance limit in percent, default: 20")
+
+    p = sub.add_parser("badblocks", help="Cards whose bad blocks grew.")
+    p.add_argument("--since", action='store', default="7d", help="time (UNIX time, ISO-date or relative, e.g. 7d), default: 7d")
+
+    p = sub.add_parser("moved", help="Cards which moved to another host.")
+    p.add_argument("--since", action='store', default="7d", help="time (UNIX time, ISO-date or relative, e.g. 7d), default: 7d")
+
+    p = sub.add_parser("product", help="All cards of a product.")
+    p.add_argument("--manfid", action='store', type=lambda s: int(s, 0), help="manufacturer ID, e.g. 0x74")
+    p.add_argument("name", help="product name (from CID, e.g. USDU1)")
+
+    p = sub.add_parser("host", help="All cards last seen in a host.")
+    p.add_argument("host", help="host")
+
+    p = sub.add_parser("history", help="SMART-samples of a card.")
+    p.add_argument("card", help="card-key (MANFID-SERIAL) or CID as hex string")
+
+    args = parser.parse_args(arglist)
+
+    try:
+        db_dir = os.path.dirname(args.database)
+        if args.command == "ingest" and db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        inventory = Inventory(args.database)
+    except (OSError, sqlite3.Error) as err:
+        print("ERROR: Cannot open inventory '%s'. (%s)" % (args.database, err), file=sys.stderr)
+        return 5    # EIO
+
+    with inventory:
+        #---------------------
+        if args.command == "ingest":
+            try:
+                ts = None if args.time is None else _time_parse(args.time)
+            except ValueError as err:
+                print("ERROR: Invalid time. (%s)" % err, file=sys.stderr)
+                return 2
+            nerrors = 0
+            for f in args.records or [sys.stdin]:
+                lines = []
+                def records():
+                    for lineno, line in enumerate(f, 1):
+                        line = line.strip()
+                        if line:
+                            lines.append(lineno)
+                            try:
+                                yield json.loads(line)
+                            except ValueError:
+                                yield None
+                def error(i, msg):
+                    nonlocal nerrors
+                    nerrors += 1
+                    print("ERROR: %s:%d: Invalid record. (%s)" % (f.name, lines[i], msg), file=sys.stderr)
+                try:
+                    n = inventory.ingest(records(), args.host, ts, errors=error)
+                except sqlite3.Error as err:
+                    print("ERROR: Cannot write inventory. (%s)" % err, file=sys.stderr)
+                    return 5    # EIO
+                if not args.json:
+                    print("%s: %d records" % (f.name, n))
+            return 22 if nerrors else 0
+
+        #---------------------
+        if args.command == "history":
+            try:
+                card, samples = inventory.history(args.card)
+            except ValueError:
+                print("ERROR: Invalid arguments, invalid card '%s'." % args.card, file=sys.stderr)
+                return 2
+            if card is None:
+                print("ERROR: Card '%s' not found." % args.card, file=sys.stderr)
+                return 22
+            if args.json:
+                print(json.dumps({"card": card, "samples": samples}))
+            else:
+                cards_print([card])
+                for s in samples:
+                    print("    %s  %-16s %s" % (time.strftime("%Y-%m-%d %H:%M", time.localtime(s["time"])), s["host"] or "-",
+                          " ".join("%s=%s" % (name, s[name]) for name in SAMPLE_FIELDS)))
+            return 0
+
+        #---------------------
+        try:
+            if args.command == "endurance":
+                cards = inventory.endurance_below(args.below)
+            elif args.command == "badblocks":
+                cards = inventory.events("blocks_bad", _time_parse(args.since))
+            elif args.command == "moved":
+                cards = inventory.events("host", _time_parse(args.since))
+            elif args.command == "product":
+                cards = inventory.product(args.name, args.manfid)
+            else:
+                cards = inventory.host(args.host)
+        except ValueError as err:
+            print("ERROR: Invalid time. (%s)" % err, file=sys.stderr)
+            return 2
+        if args.json:
+            print(json.dumps(cards))
+        else:
+            cards_print(cards)
+        return 0
+
+#=========================================
+if __name__ == '__main__':
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        print("\nAborted.")
+        sys.exit(130)   # ECONNABORTED
+
+#=========================================
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""SD-card: Monitor SMART-information.
+
+Long-running monitor for (industrial) SD-/microSD-cards:
+Periodically read CID and SMART-information of one or more devices,
+keep the recent samples in a ring-buffer per device, and write them
+as node_exporter textfile (Prometheus text format).
+
+Compared to running adva-sdcard-smart from cron, this avoids starting
+the interpreter, parsing arguments and (if run as root) the subprocess
+for each sample.
+
+Optionally, each sample is checked against health-rules (see
+adva_sdcard.rules, --rule/--rules); alerts are written as JSON-lines
+(--events) and exported as metric adva_sdcard_rule_firing.
+
+:Usage:
+    see --help
+
+:Exit code:
+    0:   success / terminated via SIGTERM
+    2:   invalid commandline-parameters
+    19:  no device found (ENODEV)
+    5:   cannot write textfile / events (EIO)
+    130: aborted (e.g. via Ctrl-C) (ECONNABORTED)
+
+:Author:    Advamation / Roland Freikamp <support@advamation.de>
+:Version:   2026-10-17
+:Copyright: Advamation <info@advamation.de>
+:License:   MIT
+"""
+
+__version__ = "1.2.0"
+__author__ = "Advamation <support@advamation.de>"
+
+import os
+import sys
+import time
+import signal
+import select
+import argparse
+import json
+from collections import deque
+
+# find package adva_sdcard: next to this script (source-tree, build/) or in ../lib/adva-sdcard (installed)
+_dir = os.path.dirname(os.path.realpath(__file__))
+for _path in (_dir, os.path.join(_dir, "..", "lib", "adva-sdcard")):
+    if os.path.isfile(os.path.join(_path, "adva_sdcard", "__init__.py")):
+        if _path not in sys.path:
+            sys.path.insert(0, _path)
+        break
+
+#=========================================
+
+# exported metrics of the SMART-reads: (name, field of sample["read"], help)
+READ_METRICS = (
+    ("adva_sdcard_smart_read_delay_seconds",    "wait",     "Delay of the last SMART-read (waiting for an idle window)."),
+    ("adva_sdcard_smart_read_duration_seconds", "duration", "Duration of the last SMART-read (card busy)."),
+    ("adva_sdcard_smart_read_io_wait_seconds",  "io_wait",  "Foreground I/O-time during the last SMART-read (time_in_queue)."),
+    ("adva_sdcard_smart_read_idle",             "idle",     "Whether the last SMART-read was in an idle window (0: forced after --max-delay)."),
+)
+
+# exported quantiles of the stage-durations (--timings)
+TIMING_QUANTILES = (0.5, 0.95, 0.99)
+
+# exported metrics: (name, SMART-field, help)
+METRICS = (
+    ("adva_sdcard_endurance_percent",          "endurance",                "Remaining endurance (in percent)."),
+    ("adva_sdcard_erase_count_min",            "erase_count_min",          "Minimum erase count."),
+    ("adva_sdcard_erase_count_avg",            "erase_count_avg",          "Average erase count."),
+    ("adva_sdcard_erase_count_max",            "erase_count_max",          "Maximum erase count."),
+    ("adva_sdcard_erase_count_total",          "erase_count_total",        "Total erase count."),
+    ("adva_sdcard_blocks_bad",                 "blocks_bad",               "Number of bad blocks (Apacer: later bad blocks)."),
+    ("adva_sdcard_blocks_bad_initial",         "blocks_bad_initial",       "Number of initial bad blocks."),
+    ("adva_sdcard_power_on_count",             "power_on_count",           "Power on count."),
+    ("adva_sdcard_power_off_abnormal_count",   "power_off_abnormal_count", "Abnormal power off count."),
+)
+
+def sample_get(dev, infotool, smarttool, scheduler):
+    """Get one sample (CID + SMART) of a (micro)SD-card.
+
+    :Parameters:
+        - scheduler: SmartScheduler of adva-sdcard-smart (idle-window,
+                     backend)
+    :Returns:
+        dict with:
+        - time   (UNIX timestamp)
+        - device
+        - cid    (see cid_parse(), or None)
+        - smart  (see smart_parse(), or None)
+        - error  (error-message, or None)
+        - read   (wait, duration, io_wait, idle, io_rate of the SMART-read,
+                  see SmartScheduler.read(), or None)
+    """
+    sample = {"time": time.time(), "device": dev, "cid": None, "smart": None, "error": None, "read": None}
+    try:
+        sample["cid"] = infotool.cid_parse(infotool.cid_get(dev))
+        sample["smart"] = smarttool.smart_decode(*scheduler.read(dev))
+    except Exception as err:
+        sample["error"] = (getattr(err, "stderr", None) or str(err)).strip()
+    if dev in scheduler.stats:
+        sample["read"] = scheduler.stats[dev].pop("last", None)
+    return sample
+
+def _labels(sample, extra=()):
+    """Prometheus-labels of a sample (plus extra (key, value)-labels)."""
+    labels = [("device", sample["device"])]
+    cid = sample["cid"]
+    if cid is not None:
+        labels += [("manfid", "0x%02x" % cid["manfid"]), ("oemid", cid["oemid"]),
+                   ("name", cid["name"]), ("serial", "0x%08x" % cid["serial"])]
+    labels += extra
+    return "{%s}" % ",".join('%s="%s"' % (key, val.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+                             for key, val in labels)
+
+def metrics_format(history, timings=None, engine=None):
+    """Format the latest samples in Prometheus text format.
+
+    :Parameters:
+        - history: dict device -> ring-buffer (deque) of samples
+        - timings: TimingStats (see adva_sdcard.timing) of all samples,
+                   exported as summaries per stage and device, or None
+        - engine:  RuleEngine (see adva_sdcard.rules) fed with the
+                   samples (see sample_rules()), exported as 0/1 per rule
+                   and card, or None
+    :Returns:
+        metrics as string
+    """
+    latest = [buf[-1] for buf in history.values() if buf]
+    lines = [
+        "# HELP adva_sdcard_smart_up Whether the last SMART-read succeeded.",
+        "# TYPE adva_sdcard_smart_up gauge",
+    ]
+    lines += ["adva_sdcard_smart_up{device=\"%s\"} %d" % (s["device"], s["smart"] is not None) for s in latest]
+    lines += [
+        "# HELP adva_sdcard_smart_timestamp_seconds Time of the last SMART-read.",
+        "# TYPE adva_sdcard_smart_timestamp_seconds gauge",
+    ]
+    lines += ["adva_sdcard_smart_timestamp_seconds{device=\"%s\"} %.3f" % (s["device"], s["time"]) for s in latest]
+    for name, field, text in METRICS:
+        values = [(_labels(s), s["smart"][field]) for s in latest
+                  if s["smart"] is not None and s["smart"].get(field) is not None]
+        if not values:
+            continue
+        lines.append("# HELP %s %s" % (name, text))
+        lines.append("# TYPE %s gauge" % name)
+        lines += ["%s%s %s" % (name, labels, val) for labels, val in values]
+    for name, field, text in READ_METRICS:
+        values = [(s["device"], s["read"][field]) for s in latest
+                  if s["read"] is not None and s["read"][field] is not None]
+        if not values:
+            continue
+        lines.append("# HELP %s %s" % (name, text))
+        lines.append("# TYPE %s gauge" % name)
+        lines += ["%s{device=\"%s\"} %.6g" % (name, dev, val) for dev, val in values]
+    summary = timings.summary(TIMING_QUANTILES) if timings is not None else []
+    if summary:
+        name = "adva_sdcard_stage_duration_seconds"
+        lines.append("# HELP %s Duration of the stages of the SMART-/CID-reads (see --timings)." % name)
+        lines.append("# TYPE %s summary" % name)
+        for entry in summary:
+            labels = 'device="%s",stage="%s"' % (entry["device"], entry["stage"])
+            lines += ['%s{%s,quantile="%g"} %.6g' % (name, labels, q, entry["p%g" % (q * 100)]) for q in TIMING_QUANTILES]
+            lines.append("%s_sum{%s} %.6g" % (name, labels, entry["sum"]))
+            lines.append("%s_count{%s} %d" % (name, labels, entry["count"]))
+    if engine is not None and engine.rules:
+        from adva_sdcard.rules import sample_card
+        name = "adva_sdcard_rule_firing"
+        lines.append("# HELP %s Whether a health-rule fires for the card (see --rule)." % name)
+        lines.append("# TYPE %s gauge" % name)
+        for s in latest:
+            if s["cid"] is None:
+                continue
+            firing = engine.firing(sample_card(s["cid"]))
+            lines += ["%s%s %d" % (name, _labels(s, [("rule", rule.name)]), rule.name in firing) for rule in engine.rules]
+    return "\n".join(lines) + "\n"
+
+def sample_rules(engine, sample):
+    """Check a sample against the health-rules.
+
+    :Parameters:
+        - engine: RuleEngine (see adva_sdcard.rules)
+        - sample: see sample_get()
+    :Returns:
+        list of events (see adva_sdcard.rules)
+    """
+    from adva_sdcard.rules import sample_card
+    if sample["smart"] is None or sample["cid"] is None:
+        return []
+    return engine.feed(sample["smart"], sample_card(sample["cid"]), sample["time"], sample["device"])
+
+def textfile_write(path, text):
+    """Write textfile atomically (via temporary file + rename).
+
+    :Raises:
+        OSError if the file cannot be written.
+    """
+    tmp = "%s.%d.tmp" % (path, os.getpid())
+    try:
+        with open(tmp, 'w', encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+#=========================================
+
+def main(arglist=None):
+    """Monitor SMART-data and write node_exporter textfile.
+
+    See module docstring for exit codes.
+    """
+    # parse arguments
+    parser = argparse.ArgumentParser(
+        description="""Monitor SMART-information of industrial microSD-/SD-cards.
+Version %s by %s.""" % (__version__, __author__),
+        formatter_class=argparse.RawDescriptionHelpFormatter,   # for keeping newlines in description
+        epilog="""
+Examples:
+    adva-sdcard-monitor -o /var/lib/node_exporter/textfile/adva_sdcard.prom
+    adva-sdcard-monitor -i 3600 -o adva_sdcard.prom /dev/mmcblk0
+    adva-sdcard-monitor -i 3600 --idle 2 --max-delay 900 -o adva_sdcard.prom
+    adva-sdcard-monitor -r "endurance < 20" -r "blocks_bad grew by > 5 in 24h" --events alerts.ndjson -o adva_sdcard.prom
+Send SIGUSR1 to print the ring-buffers as JSON-lines to stdout.
+Note that this does not work with USB-cardreaders.\n""")
+
+    parser.add_argument("-i", "--interval", action='store', type=float, default=300.0, help="Poll interval in seconds, default: 300")
+    parser.add_argument("-n", "--samples", action='store', type=int, default=288, help="Number of samples kept in the ring-buffer per device, default: 288")
+    parser.add_argument("-o", "--output", action='store', help="node_exporter textfile (written atomically), default: stdout")
+    parser.add_argument("-b", "--backend", choices=("auto", "ioctl", "helper", "serve"), default="auto",
+        help="How to retrieve raw SMART-data: ioctl (in-process, needs root), helper (via adva-sdcard-smart-get), "
+             "serve (via a persistent adva-sdcard-smart-get --serve) or auto (ioctl, falling back to "
+             "adva-sdcard-smart-get without permissions), default: auto")
+    parser.add_argument("--idle", action='store', type=float, default=0.0, help="Read SMART only after the device was idle for this many seconds (see /sys/block/*/stat), default: 0 (immediately)")
+    parser.add_argument("--max-delay", action='store', type=float, help="With --idle: maximum delay of a read in seconds (then it is forced), default: interval/2")
+    parser.add_argument("--once", action='store_true', help="Poll only once and exit.")
+    parser.add_argument("--timings", action='store_true', help="Measure the duration of each stage of the reads (sysfs, CMD56, helper, ...), and export p50/p95/p99 per stage and device (adva_sdcard_stage_duration_seconds).")
+    parser.add_argument("-r", "--rule", action='append', default=[], help="Health-rule (repeatable), e.g. 'endurance < 20', 'blocks_bad grew by > 5 in 24h', 'power_off_abnormal_count delta > 0' (see python3 -m adva_sdcard.rules --help).")
+    parser.add_argument("--rules", action='append', default=[], help="File with health-rules, one per line (repeatable).")
+    parser.add_argument("--events", action='store', help="With --rule/--rules: append the alerts (rule firing/resolved) as JSON-lines to this file, default: stderr")
+    parser.add_argument("device", nargs='*', help="devices, default: all /dev/mmcblk*")
+    parser.add_argument("--version", action='version', version="%(prog)s " + __version__)
+    args = parser.parse_args(arglist)
+    if args.interval <= 0 or args.samples < 1 or args.idle < 0 or (args.max_delay is not None and args.max_delay < 0):
+        print("ERROR: Invalid arguments, interval and samples must be positive, idle and max-delay not negative.", file=sys.stderr)
+        return 2
+
+    from adva_sdcard import info as infotool
+    from adva_sdcard import smart as smarttool
+    engine = None
+    if args.rule or args.rules:
+        from adva_sdcard.rules import Rule, RuleEngine, rules_load
+        try:
+            rules = [Rule.parse(rule) for rule in args.rule]
+            for name in args.rules:
+                with open(name, 'r', encoding="utf-8") as f:
+                    rules += rules_load(f)
+        except ValueError as err:
+            print("ERROR: Invalid rule. (%s)" % err, file=sys.stderr)
+            return 2
+        except OSError as err:
+            print("ERROR: Cannot read rules. (%s)" % err, file=sys.stderr)
+            return 2
+        engine = RuleEngine(rules)
+
+    devices = args.device or infotool.devices_list()
+    if not devices:
+        print("ERROR: No mmc-device found.", file=sys.stderr)
+        return 19   # ENODEV
+
+    history = {dev: deque(maxlen=args.samples) for dev in devices}
+    timings = None
+    if args.timings:
+        from adva_sdcard import timing
+        timings = timing.TimingStats()
+        timing.hook_add(timings)
+    scheduler = smarttool.SmartScheduler(idle=args.idle, backend=args.backend,
+                                         max_delay=args.interval / 2 if args.max_delay is None else args.max_delay)
+
+    # SIGUSR1 only sets a flag: the dump is written in the poll-loop, since the
+    # handler may interrupt a write to stdout; the wakeup-fd interrupts the sleep
+    dump = False
+    def history_dump_request(*_):
+        nonlocal dump
+        dump = True
+    def history_dump():
+        for buf in history.values():
+            for sample in buf:
+                print(json.dumps(sample))
+        sys.stdout.flush()
+    wakeup, wakeup_w = os.pipe()
+    os.set_blocking(wakeup, False)
+    os.set_blocking(wakeup_w, False)
+    signal.set_wakeup_fd(wakeup_w)
+    signal.signal(signal.SIGUSR1, history_dump_request)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    # poll
+    t_next = time.monotonic()
+    while True:
+        for dev in devices:
+            sample = sample_get(dev, infotool, smarttool, scheduler)
+            history[dev].append(sample)
+            if engine is not None:
+                events = sample_rules(engine, sample)
+                if events:
+                    text = "".join(json.dumps(event) + "\n" for event in events)
+                    try:
+                        if args.events:
+                            with open(args.events, 'a', encoding="utf-8") as f:
+                                f.write(text)
+                        else:
+                            sys.stderr.write(text)
+                            sys.stderr.flush()
+                    except OSError as err:
+                        print("ERROR: Cannot write '%s'. (%s)" % (args.events, err), file=sys.stderr)
+                        return 5    # EIO
+        text = metrics_format(history, timings, engine)
+        if args.output:
+            try:
+                textfile_write(args.output, text)
+            except OSError as err:
+                print("ERROR: Cannot write '%s'. (%s)" % (args.output, err), file=sys.stderr)
+                return 5    # EIO
+        else:
+            sys.stdout.write(text)
+            sys.stdout.flush()
+        if args.once:
+            return 0
+
+        t_next += args.interval
+        if t_next <= time.monotonic():  # too slow: skip missed intervals
+            t_next = time.monotonic()
+        while True:
+            if dump:
+                dump = False
+                history_dump()
+            delay = t_next - time.monotonic()
+            if delay <= 0:
+                break
+            if select.select([wakeup], [], [], delay)[0]:
+                try:
+                    os.read(wakeup, 4096)
+                except BlockingIOError:
+                    pass
+
+#=========================================
+if __name__ == '__main__':
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        print("\nAborted.")
+        sys.exit(130)   # ECONNABORTED
+
+#=========================================
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""SD-card: Simulate (micro)SD-cards with SMART.
+
+Commandline-wrapper of adva_sdcard.sim (see there and --help).
+
+:Author:    Advamation / Roland Freikamp <support@advamation.de>
+:Version:   2026-10-17
+:Copyright: Advamation <info@advamation.de>
+:License:   MIT
+"""
+
+import os
+import sys
+
+# find package adva_sdcard: next to this script (source-tree, build/) or in ../lib/adva-sdcard (installed)
+_dir = os.path.dirname(os.path.realpath(__file__))
+for _path in (_dir, os.path.join(_dir, "..", "lib", "adva-sdcard")):
+    if os.path.isfile(os.path.join(_path, "adva_sdcard", "__init__.py")):
+        if _path not in sys.path:
+            sys.path.insert(0, _path)
+        break
+
+from adva_sdcard.sim import *
+from adva_sdcard.sim import __version__, __author__, main
+
+#=========================================
+if __name__ == '__main__':
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        print("\nAborted.")
+        sys.exit(130)   # ECONNABORTED
+
+#=========================================
@@ -39,8 +39,17 @@ prints:
     - to stdout: SMART-information as TYPE + '-' + 512 hexadecimal bytes on success
     - to stderr: usage-information and/or error-message on error
 
+With --serve, requests (one DEVICE per line) are read from stdin,
+and one response-line per request is written to stdout (see serve()).
+
+With --binary, the output is a binary frame instead of hex (see
+frame_write()); with --serve, one frame per request.
+
+With --timings, the duration of each stage is printed to stderr
+(see timing()).
+
 :Author:    Advamation / Roland Freikamp <support@advamation.de>
-:Version:   2025-03-17
+:Version:   2026-10-17
 :Copyright: Advamation <info@advamation.de>
 :License:   MIT
 ***/
@@ -53,6 +62,7 @@ prints:
 #include <sys/types.h>
 #include <sys/stat.h>
 #include <sys/ioctl.h>
+#include <time.h>
 
 #include <linux/mmc/ioctl.h>    // for struct mmc_ioc_cmd
 #include <linux/major.h>        // for MMC_IOC_CMD
@@ -76,12 +86,36 @@ prints:
 //----------------------------------------
 #define SECTOR_SIZE 512
 
+/****
+Supported cards: manfid -> SMART-type and CMD56-sequence.
+
+The last command reads the SMART-data.
+(see SMART_VENDORS in adva_sdcard/smart.py)
+***/
+struct smart_cmd {
+    int write_flag;
+    unsigned int arg;
+};
+struct smart_vendor {
+    unsigned int manfid;
+    char type;
+    int ncmds;
+    struct smart_cmd cmds[2];
+};
+static const struct smart_vendor SMART_VENDORS[] = {
+    // Apacer: "Pre-Load SMART Command Information", "GetSMART Command Information"
+    {0x27, 'A', 2, {{1, 0x10}, {0, 0x21}}},
+    // Transcend
+    {0x74, 'T', 1, {{0, 0x110005F9}}},
+};
+#define SMART_VENDORS_COUNT (sizeof(SMART_VENDORS) / sizeof(SMART_VENDORS[0]))
+
 /****
 Get SMART-information.
 
 :Parameters:
     - fd: filedescriptor of opened device
-    - type: 'A' for Apacer, 'T' for Transcend
+    - type: 'A' for Apacer, 'T' for Transcend (see SMART_VENDORS)
     - smart: output, length SECTOR_SIZE
 :Returns:
     0:  success
@@ -92,47 +126,24 @@ Get SMART-information.
 int smart_get(int fd, char* type, unsigned char *smart)
 {
     int ret;
+    size_t v;
+    int c;
     struct mmc_ioc_cmd idata;
 
     memset(smart, 0, SECTOR_SIZE);
 
-    //----------------------------------------
-    // Apacer
-    if(type[0] == 'A') {
-        // 1st command: "Pre-Load SMART Command Information"
-        memset(&idata, 0, sizeof(idata));
-        idata.write_flag = 1;
-        idata.opcode = 56;
-        idata.arg = 0x10;
-        idata.flags = MMC_RSP_SPI_R1 | MMC_RSP_R1 | MMC_CMD_ADTC;
-        idata.blksz = SECTOR_SIZE;
-        idata.blocks = 1;
-        mmc_ioc_cmd_set_data(idata, smart);
-        ret = ioctl(fd, MMC_IOC_CMD, &idata);
-        if(ret < 0)
-            return -1;
-
-        // 2nd command: "GetSMART Command Information"
-        memset(&idata, 0, sizeof(idata));
-        idata.write_flag = 0;
-        idata.opcode = 56;
-        idata.arg = 0x21;
-        idata.flags = MMC_RSP_SPI_R1 | MMC_RSP_R1 | MMC_CMD_ADTC;
-        idata.blksz = SECTOR_SIZE;
-        idata.blocks = 1;
-        mmc_ioc_cmd_set_data(idata, smart);
-        ret = ioctl(fd, MMC_IOC_CMD, &idata);
-        if(ret < 0)
-            return -1;
+    for(v=0; v<SMART_VENDORS_COUNT; v++) {
+        if(SMART_VENDORS[v].type == type[0])
+            break;
     }
-    
-    //----------------------------------------
-    // Transcend
-    else if(type[0] == 'T') {
+    if(v >= SMART_VENDORS_COUNT) {
+        return -2;
+    }
+    for(c=0; c<SMART_VENDORS[v].ncmds; c++) {
         memset(&idata, 0, sizeof(idata));
-        idata.write_flag = 0;
+        idata.write_flag = SMART_VENDORS[v].cmds[c].write_flag;
         idata.opcode = 56;
-        idata.arg = 0x110005F9;
+        idata.arg = SMART_VENDORS[v].cmds[c].arg;
         idata.flags = MMC_RSP_SPI_R1 | MMC_RSP_R1 | MMC_CMD_ADTC;
         idata.blksz = SECTOR_SIZE;
         idata.blocks = 1;
@@ -141,11 +152,7 @@ int smart_get(int fd, char* type, unsigned char *smart)
         if(ret < 0)
             return -1;
     }
-    //----------------------------------------
-    // unknown card
-    else {
-        return -2;
-    }
+
     //----------------------------------------
     // check
     int i;
@@ -160,131 +167,472 @@ int smart_get(int fd, char* type, unsigned char *smart)
 }
 
 //========================================
-const char *USAGE="\
-usage: adva-sdcard-smart-get DEVICE\n\
-\n\
-Get raw SMART-information from industrial microSD-/SD-card.\n\
-Version 1.2.0 by Advamation <support@advamation.de>.\n\
-\n\
-Example: adva-sdcard-smart-get /dev/mmcblk0\n\
-Note that this does not work with USB-cardreaders.\n\
-Supported cards:\n\
-    - Transcend 240I\n\
-    - Transcend 230I\n\
-    - Apacer CH110-MSD / AK6.118*\n\
-    - Apacer CV110-MSD / AK6.112*\n\
-    - Apacer H2-SL / AP-*-2RTM\n\
-    - Apacer H1-SL / AP-*-2HTM\n\
-    - Apacer H2-M  / AP-*-1RTM\n\
-    - Apacer H1-M  / AP-*-1HTM\n\
-";
+#define ERRMSG_SIZE 256
+char errmsg[ERRMSG_SIZE];   // error-message of the last error
 
-int main(int argc, char *argv[])
+/****
+Check DEVICE and get its SMART-type (via manfid).
+
+:Parameters:
+    - device: device, must be /dev/mmcblk*
+    - type: output, 'A' for Apacer, 'T' for Transcend, length >= 2
+:Returns:
+    0:     success
+    -1:    invalid device-name
+    errno: error (see errmsg)
+***/
+int device_type_get(const char *device, char *type)
 {
-    char *device;
-    char type[10];
     struct stat st;
-    int fd, ret, i;
+    char manfid_path[64];
+    unsigned int manfid;
+    size_t v;
+    int ret, err;
     FILE *f;
 
-    // Usage
-    if(argc == 1 || strcmp(argv[1], "--help") == 0 || strcmp(argv[1], "-h") == 0) {
-        fprintf(stderr, "%s", USAGE);
-        return 0;
-    }
-    if(argc != 2) {
-        fprintf(stderr, "ERROR: Invalid arguments.\n");
-        fprintf(stderr, "%s", USAGE);
-        return -1;
-    }
-    device = argv[1];
-
     // restrict DEVICE to /dev/mmcblk* (for SUID security)
     // TODO: also allow /dev/disk/... or /dev/sd* ?
     if(strncmp(device, "/dev/mmcblk", 11) != 0 || strchr(device+5, '/') != 0) {
-        fprintf(stderr, "ERROR: Only devices /dev/mmcblk* allowed.\n");
+        snprintf(errmsg, ERRMSG_SIZE, "ERROR: Only devices /dev/mmcblk* allowed.");
         return -1;
     }
 
     // restrict to block-devices
     if(stat(device, &st) == 0 && !(st.st_mode & S_IFBLK)) {
-        fprintf(stderr, "ERROR: Invalid device '%s', must be a block-device.\n", device);
+        snprintf(errmsg, ERRMSG_SIZE, "ERROR: Invalid device '%s', must be a block-device.", device);
         return ENOTBLK;
     }
 
     // get TYPE
-    char manfid_path[64];
-    unsigned int manfid;
     ret = snprintf(manfid_path, 64, "/sys/block/%s/device/manfid", device+5);
     if(ret >= 64) {
-        fprintf(stderr, "ERROR: Invalid arguments: DEVICE too long.\n");
+        snprintf(errmsg, ERRMSG_SIZE, "ERROR: Invalid arguments: DEVICE too long.");
         return -1;
     }
     f = fopen(manfid_path, "r");
     if(f == NULL) {
         // check errno
-        if(errno == ENOENT || errno == ENODEV || errno == ENXIO) {
-            fprintf(stderr, "ERROR: File '%s' does not exist.\n", manfid_path);
+        err = errno;
+        if(err == ENOENT || err == ENODEV || err == ENXIO) {
+            snprintf(errmsg, ERRMSG_SIZE, "ERROR: File '%s' does not exist.", manfid_path);
         }
-        if(errno == EACCES || errno == EROFS) {
-            fprintf(stderr, "ERROR: Permission denied for '%s'.\n", manfid_path);
+        else if(err == EACCES || err == EROFS) {
+            snprintf(errmsg, ERRMSG_SIZE, "ERROR: Permission denied for '%s'.", manfid_path);
         }
         else {
-            fprintf(stderr, "ERROR: %s for '%s'. (%d)\n", strerror(errno), manfid_path, errno);
+            snprintf(errmsg, ERRMSG_SIZE, "ERROR: %s for '%s'. (%d)", strerror(err), manfid_path, err);
         }
-        return errno;
+        return err;
     }
     ret = fscanf(f, "%x", &manfid);
     fclose(f);
     if(ret != 1) {
-        fprintf(stderr, "ERROR: Unexpected '%s' contents.\n", manfid_path);
+        snprintf(errmsg, ERRMSG_SIZE, "ERROR: Unexpected '%s' contents.", manfid_path);
         return ENOTSUP;
     }
-    if(     manfid == 0x27) type[0] = 'A';
-    else if(manfid == 0x74) type[0] = 'T';
-    else {
-        fprintf(stderr, "ERROR: Device not supported.\n");
+    for(v=0; v<SMART_VENDORS_COUNT; v++) {
+        if(SMART_VENDORS[v].manfid == manfid)
+            break;
+    }
+    if(v >= SMART_VENDORS_COUNT) {
+        snprintf(errmsg, ERRMSG_SIZE, "ERROR: Device not supported.");
         return ENOTSUP;
     }
+    type[0] = SMART_VENDORS[v].type;
     type[1] = '\0';
+    return 0;
+}
+
+//----------------------------------------
+int timings = 0;            // --timings: print the duration of each stage
+
+/****
+Current time of the monotonic clock, in seconds.
+***/
+double clock_now(void)
+{
+    struct timespec ts;
+
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return ts.tv_sec + ts.tv_nsec * 1e-9;
+}
+
+/****
+Print the duration of a stage (since t0) to stderr, if --timings.
+
+Format: "timing: STAGE DEVICE MILLISECONDS ms"
+(like adva-sdcard-smart --timings, see adva_sdcard/timing.py)
+
+:Returns:
+    clock_now() after printing, i.e. the start of the next stage
+***/
+double timing(const char *stage, const char *device, double t0)
+{
+    if(!timings)
+        return t0;
+    fprintf(stderr, "timing: %s %s %.3f ms\n", stage, device, (clock_now() - t0) * 1000.0);
+    return clock_now();
+}
+
+/****
+Open DEVICE.
+
+:Returns:
+    >=0: filedescriptor
+    -1:  error, see errno and errmsg
+***/
+int device_open(const char *device)
+{
+    int fd, err;
 
-    // try to open the device
     fd = open(device, O_RDWR);
     if(fd < 0) {
         // check errno
-        if(errno == ENOENT || errno == ENODEV || errno == ENXIO) {
-            fprintf(stderr, "ERROR: Device '%s' does not exist.\n", device);
+        err = errno;
+        if(err == ENOENT || err == ENODEV || err == ENXIO) {
+            snprintf(errmsg, ERRMSG_SIZE, "ERROR: Device '%s' does not exist.", device);
         }
-        if(errno == EACCES || errno == EROFS) {
-            fprintf(stderr, "ERROR: Permission denied.\n");
+        else if(err == EACCES || err == EROFS) {
+            snprintf(errmsg, ERRMSG_SIZE, "ERROR: Permission denied.");
         }
         else {
-            fprintf(stderr, "ERROR: %s. (%d)\n", strerror(errno), errno);
+            snprintf(errmsg, ERRMSG_SIZE, "ERROR: %s. (%d)", strerror(err), err);
         }
-        return errno;
+        errno = err;
     }
+    return fd;
+}
+
+/****
+Get SMART-information, with error-messages.
+
+:Returns:
+    0:     success
+    errno: error (see errmsg)
+***/
+int device_smart_get(int fd, char *type, unsigned char *smart)
+{
+    int ret, err;
 
-    // get smart-information
-    unsigned char smart[SECTOR_SIZE];
     ret = smart_get(fd, type, smart);
-    close(fd);
     if(ret == -2) {
-        fprintf(stderr, "ERROR: Device not supported. (type: %s)\n", type);
+        snprintf(errmsg, ERRMSG_SIZE, "ERROR: Device not supported. (type: %s)", type);
         return ENOTSUP;
     }
     if(ret == -3) {
-        fprintf(stderr, "ERROR: Device not supported. (ff..ff)\n");
+        snprintf(errmsg, ERRMSG_SIZE, "ERROR: Device not supported. (ff..ff)");
         return ENOTSUP;
     }
     if(ret) {
-        fprintf(stderr, "ERROR: Failed. (%s, %d)\n", strerror(errno), errno);
+        err = errno;
+        snprintf(errmsg, ERRMSG_SIZE, "ERROR: Failed. (%s, %d)", strerror(err), err);
+        return err;
+    }
+    return 0;
+}
+
+/****
+Print SMART-information as TYPE + '-' + hex + '\n' (with a single write).
+***/
+void smart_print_hex(FILE *out, const char *type, const unsigned char *smart)
+{
+    static const char HEX[] = "0123456789abcdef";
+    char buf[2 + 2*SECTOR_SIZE + 1];
+    int i;
+
+    buf[0] = type[0];
+    buf[1] = '-';
+    for(i=0; i<SECTOR_SIZE; i++) {
+        buf[2+2*i]   = HEX[smart[i] >> 4];
+        buf[2+2*i+1] = HEX[smart[i] & 0x0F];
+    }
+    buf[2 + 2*SECTOR_SIZE] = '\n';
+    fwrite(buf, 1, sizeof(buf), out);
+}
+
+/****
+Write binary frame to stdout (with a single write, if possible).
+
+Frame:
+    - 1 byte:  type ('A', 'T'; 'E' for errors)
+    - 2 bytes: length of data (big-endian)
+    - data: SMART-information (SECTOR_SIZE bytes), or error-message
+      "ERRNO ERROR: ..." for type 'E'
+
+:Returns:
+    0 on success, -1 on error (see errno)
+***/
+int frame_write(char type, const void *data, size_t len)
+{
+    unsigned char buf[3 + SECTOR_SIZE];
+    size_t pos = 0;
+    ssize_t n;
+
+    if(len > SECTOR_SIZE)
+        len = SECTOR_SIZE;
+    buf[0] = type;
+    buf[1] = (len >> 8) & 0xFF;
+    buf[2] = len & 0xFF;
+    memcpy(buf+3, data, len);
+    while(pos < 3 + len) {
+        n = write(STDOUT_FILENO, buf + pos, 3 + len - pos);
+        if(n < 0) {
+            if(errno == EINTR)
+                continue;
+            return -1;
+        }
+        pos += n;
+    }
+    return 0;
+}
+
+/****
+Write error-frame "ERRNO message" (see frame_write()).
+***/
+int frame_write_error(int err, const char *msg)
+{
+    char buf[ERRMSG_SIZE + 16];
+    int len;
+
+    len = snprintf(buf, sizeof(buf), "%d %s", err, msg);
+    if(len < 0)
+        return -1;
+    if((size_t)len >= sizeof(buf))
+        len = sizeof(buf) - 1;
+    return frame_write('E', buf, len);
+}
+
+//----------------------------------------
+#define SERVE_CACHE_SIZE 16
+#define SERVE_LINE_SIZE  64
+
+struct serve_entry {
+    char device[SERVE_LINE_SIZE];
+    char type[2];
+    int fd;             // -1: unused
+};
+
+/****
+Serve SMART-requests from stdin.
+
+Reads one DEVICE per line from stdin, and writes one response-line
+per request to stdout:
+
+- "0 TYPE-HEX" on success
+- "ERRNO ERROR: message" on error
+
+or, if binary, one frame per request (see frame_write()).
+
+Opened devices and their type are cached; an entry is dropped
+(and the device re-checked on the next request) after an error.
+
+:Returns:
+    0 at end of input
+***/
+int serve(int binary)
+{
+    struct serve_entry cache[SERVE_CACHE_SIZE];
+    unsigned char smart[SECTOR_SIZE];
+    char line[SERVE_LINE_SIZE];
+    struct serve_entry *e;
+    int i, ret, c, next = 0;
+    size_t len;
+    double t;
+
+    for(i=0; i<SERVE_CACHE_SIZE; i++)
+        cache[i].fd = -1;
+
+    while(fgets(line, SERVE_LINE_SIZE, stdin) != NULL) {
+        len = strlen(line);
+        if(len > 0 && line[len-1] == '\n') {
+            line[--len] = '\0';
+        }
+        else if(!feof(stdin)) {
+            // line too long: skip rest of line
+            while((c = getchar()) != EOF && c != '\n')
+                ;
+            if(binary) {
+                frame_write_error(EINVAL, "ERROR: Invalid arguments: DEVICE too long.");
+            }
+            else {
+                printf("%d ERROR: Invalid arguments: DEVICE too long.\n", EINVAL);
+                fflush(stdout);
+            }
+            continue;
+        }
+        if(len == 0)
+            continue;
+        t = timings ? clock_now() : 0.0;
+
+        // lookup / open device
+        e = NULL;
+        for(i=0; i<SERVE_CACHE_SIZE; i++) {
+            if(cache[i].fd >= 0 && strcmp(cache[i].device, line) == 0) {
+                e = &cache[i];
+                break;
+            }
+        }
+        ret = 0;
+        if(e == NULL) {
+            e = &cache[next];
+            next = (next + 1) % SERVE_CACHE_SIZE;
+            if(e->fd >= 0) {
+                close(e->fd);
+                e->fd = -1;
+            }
+            ret = device_type_get(line, e->type);
+            if(ret == -1)
+                ret = EINVAL;
+            if(ret == 0) {
+                t = timing("manfid", line, t);
+                e->fd = device_open(line);
+                if(e->fd < 0)
+                    ret = errno;
+                else
+                    strcpy(e->device, line);
+            }
+            if(ret == 0)
+                t = timing("open", line, t);
+        }
+
+        // get smart-information
+        if(ret == 0) {
+            ret = device_smart_get(e->fd, e->type, smart);
+            if(ret) {
+                close(e->fd);
+                e->fd = -1;
+            }
+            else {
+                t = timing("cmd56", line, t);
+            }
+        }
+        if(binary) {
+            if(ret == 0)
+                frame_write(e->type[0], smart, SECTOR_SIZE);
+            else
+                frame_write_error(ret, errmsg);
+        }
+        else {
+            if(ret == 0) {
+                printf("0 ");
+                smart_print_hex(stdout, e->type, smart);
+            }
+            else {
+                printf("%d %s\n", ret, errmsg);
+            }
+            fflush(stdout);
+        }
+        if(ret == 0)
+            timing("output", line, t);
+    }
+
+    for(i=0; i<SERVE_CACHE_SIZE; i++) {
+        if(cache[i].fd >= 0)
+            close(cache[i].fd);
+    }
+    return 0;
+}
+
+//========================================
+const char *USAGE="\
+usage: adva-sdcard-smart-get [--binary] [--timings] DEVICE\n\
+       adva-sdcard-smart-get [--binary] [--timings] --serve\n\
+\n\
+Get raw SMART-information from industrial microSD-/SD-card.\n\
+Version 1.2.0 by Advamation <support@advamation.de>.\n\
+\n\
+--serve:  read one DEVICE per line from stdin, and write one\n\
+          response per line to stdout: '0 TYPE-HEX' or 'ERRNO ERROR: ...'\n\
+--binary: write binary frames instead of hex: TYPE (1 byte),\n\
+          LENGTH (2 bytes, big-endian), DATA (LENGTH bytes);\n\
+          with --serve, errors as TYPE 'E' with DATA 'ERRNO ERROR: ...'\n\
+--timings: print the duration of each stage (manfid, open, cmd56,\n\
+          output) to stderr: 'timing: STAGE DEVICE MILLISECONDS ms'\n\
+\n\
+Example: adva-sdcard-smart-get /dev/mmcblk0\n\
+Note that this does not work with USB-cardreaders.\n\
+Supported cards:\n\
+    - Transcend 240I\n\
+    - Transcend 230I\n\
+    - Apacer CH110-MSD / AK6.118*\n\
+    - Apacer CV110-MSD / AK6.112*\n\
+    - Apacer H2-SL / AP-*-2RTM\n\
+    - Apacer H1-SL / AP-*-2HTM\n\
+    - Apacer H2-M  / AP-*-1RTM\n\
+    - Apacer H1-M  / AP-*-1HTM\n\
+";
+
+int main(int argc, char *argv[])
+{
+    char *device;
+    char type[10];
+    int fd, ret;
+    int binary = 0;
+    double t;
+
+    // Usage
+    if(argc == 1 || strcmp(argv[1], "--help") == 0 || strcmp(argv[1], "-h") == 0) {
+        fprintf(stderr, "%s", USAGE);
+        return 0;
+    }
+    while(argc > 2) {
+        if(strcmp(argv[1], "--binary") == 0)
+            binary = 1;
+        else if(strcmp(argv[1], "--timings") == 0)
+            timings = 1;
+        else
+            break;
+        argv++;
+        argc--;
+    }
+    if(argc != 2) {
+        fprintf(stderr, "ERROR: Invalid arguments.\n");
+        fprintf(stderr, "%s", USAGE);
+        return -1;
+    }
+    if(strcmp(argv[1], "--serve") == 0) {
+        return serve(binary);
+    }
+    device = argv[1];
+    t = timings ? clock_now() : 0.0;
+
+    // check DEVICE, get TYPE
+    ret = device_type_get(device, type);
+    if(ret) {
+        fprintf(stderr, "%s\n", errmsg);
+        return ret;
+    }
+    t = timing("manfid", device, t);
+
+    // try to open the device
+    fd = device_open(device);
+    if(fd < 0) {
+        fprintf(stderr, "%s\n", errmsg);
         return errno;
     }
+    t = timing("open", device, t);
+
+    // get smart-information
+    unsigned char smart[SECTOR_SIZE];
+    ret = device_smart_get(fd, type, smart);
+    close(fd);
+    if(ret) {
+        fprintf(stderr, "%s\n", errmsg);
+        return ret;
+    }
+    t = timing("cmd56", device, t);
     // print smart-information-data
-    printf("%s-", type);
-    for(i=0; i<SECTOR_SIZE; i++)
-        printf("%02x", smart[i]);
-    printf("\n");
+    if(binary) {
+        if(frame_write(type[0], smart, SECTOR_SIZE) < 0) {
+            fprintf(stderr, "ERROR: Failed to write. (%s, %d)\n", strerror(errno), errno);
+            return errno;
+        }
+    }
+    else {
+        smart_print_hex(stdout, type, smart);
+        fflush(stdout);
+    }
+    timing("output", device, t);
 
     return 0;
 }
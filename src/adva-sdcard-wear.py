@@ -0,0 +1,957 @@
+#!/usr/bin/env python3
+"""SD-card: Write-amplification and wear-rate analytics.
+
+Combine the SMART erase-counts/endurance of (industrial) SD-/microSD-cards
+with the host-writes of the block-layer (/sys/block/mmcblk*/stat), to
+see how fast a card wears out, and whether a change (e.g. of logging)
+made it faster:
+
+- record: periodically sample both, and append the samples as
+  JSON-lines to a file
+- analyze: compute per device from recorded samples (offline):
+
+  - host bytes written, and (estimated) NAND bytes written
+  - write amplification factor (WAF) = NAND bytes / host bytes
+  - wear rate (endurance-decrease in %/day) and projected end-of-life,
+    via incremental linear regression (constant memory, so even long
+    recordings can be analyzed as stream)
+- procs: find the processes which wear out the card: scan the written
+  bytes of all processes (/proc/PID/io write_bytes) at intervals,
+  and rank processes and cgroups by bytes written to the card between
+  two SMART-samples, with the erase-count growth attributed
+  proportionally (see ProcWriteScanner)
+- bench: sequential/random read/write benchmark (O_DIRECT, queue-depth,
+  p50/p99 latency) of a block-device or file, compared with the limits
+  declared in the CSD (see csd_timing()) and the current endurance,
+  to track how the performance degrades with the wear
+
+NAND bytes written are estimated from the erase-counts:
+(delta erase_count_total) * erase-block-size if the erase-block-size is
+given (-E) and the card reports a total erase count, otherwise
+(delta erase_count_avg) * card-size.
+
+The host-writes-counter of the block-layer is reset at boot; this is
+detected (counter decreases) and the writes since the boot are counted.
+
+:Usage:
+    see --help
+
+:Exit code:
+    0:   success
+    2:   invalid commandline-parameters
+    19:  no device found (ENODEV)
+    5:   cannot read from device / write samples (EIO)
+    22:  invalid samples (EINVAL)
+    130: aborted (e.g. via Ctrl-C) (ECONNABORTED)
+
+:Author:    Advamation / Roland Freikamp <support@advamation.de>
+:Version:   2026-10-17
+:Copyright: Advamation <info@advamation.de>
+:License:   MIT
+"""
+
+__version__ = "1.2.0"
+__author__ = "Advamation <support@advamation.de>"
+
+import os
+import sys
+import time
+import errno
+import argparse
+import json
+
+# find package adva_sdcard: next to this script (source-tree, build/) or in ../lib/adva-sdcard (installed)
+_dir = os.path.dirname(os.path.realpath(__file__))
+for _path in (_dir, os.path.join(_dir, "..", "lib", "adva-sdcard")):
+    if os.path.isfile(os.path.join(_path, "adva_sdcard", "__init__.py")):
+        if _path not in sys.path:
+            sys.path.insert(0, _path)
+        break
+
+#=========================================
+# sampling
+
+SECTOR_SIZE = 512   # unit of /sys/block/*/stat and /sys/block/*/size
+BACKEND_HELP = ("How to retrieve raw SMART-data: ioctl (in-process, needs root), helper (via adva-sdcard-smart-get), "
+                "serve (via a persistent adva-sdcard-smart-get --serve) or auto (ioctl, falling back to "
+                "adva-sdcard-smart-get without permissions), default: auto")
+
+def blockstat_get(dev="/dev/mmcblk0", sysblock="/sys/block"):
+    """Get host-writes and size of a block-device from sysfs.
+
+    :Returns:
+        dict with:
+        - sectors_written (since boot, in 512-byte sectors)
+        - size (in bytes)
+    :Raises:
+        FileNotFoundError if the device does not exist,
+        ValueError for invalid sysfs-contents.
+    """
+    path = os.path.join(sysblock, os.path.basename(dev))
+    with open(os.path.join(path, "stat"), 'r', encoding="ascii") as f:
+        fields = f.read().split()
+    with open(os.path.join(path, "size"), 'r', encoding="ascii") as f:
+        size = int(f.read()) * SECTOR_SIZE
+    if len(fields) < 7:
+        raise ValueError("Invalid '%s' contents." % os.path.join(path, "stat"))
+    return {"sectors_written": int(fields[6]), "size": size}
+
+def sample_get(dev, smarttool, backend="auto", sysblock="/sys/block"):
+    """Get one sample (host-writes + erase-counts) of a (micro)SD-card.
+
+    :Returns:
+        dict with:
+        - time, device
+        - sectors_written, size (see blockstat_get())
+        - erase_count_avg, erase_count_total (None if not available),
+          endurance (see smart_parse())
+    :Raises:
+        see blockstat_get() and smart_get_any()
+    """
+    ts = time.time()
+    sample = {"time": ts, "device": dev}
+    sample.update(blockstat_get(dev, sysblock))
+    smart = smarttool.SmartRecord(*smarttool.smart_get_any(dev, backend))
+    for name in ("erase_count_avg", "erase_count_total", "endurance"):
+        sample[name] = smart.get(name)
+    return sample
+
+def samples_read(lines):
+    """Read samples (JSON-lines, see sample_get()).
+
+    :Returns:
+        generator of (lineno, sample, error)
+    """
+    for lineno, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            sample = json.loads(line)
+            if not isinstance(sample, dict):
+                raise ValueError("sample is not a JSON-object")
+            for name in ("time", "device", "sectors_written", "size", "erase_count_avg", "endurance"):
+                if sample.get(name) is None:
+                    raise ValueError("missing '%s'" % name)
+            for name in ("time", "sectors_written", "size", "erase_count_avg", "erase_count_total", "endurance"):
+                value = sample.get(name)
+                if value is not None and (not isinstance(value, (int, float)) or isinstance(value, bool)):
+                    raise ValueError("'%s' is not a number" % name)
+            if not isinstance(sample["device"], str):
+                raise ValueError("'device' is not a string")
+            yield lineno, sample, None
+        except ValueError as err:
+            yield lineno, None, str(err)
+
+#=========================================
+# analytics
+
+class Regression:
+    """Incremental simple linear regression (least squares), constant memory.
+
+    Uses Welford-like updates of means and co-moments, so it is
+    numerically stable for many samples.
+    """
+    def __init__(self):
+        self.n = 0
+        self.mean_x = 0.0
+        self.mean_y = 0.0
+        self._sxx = 0.0
+        self._sxy = 0.0
+
+    def add(self, x, y):
+        """Add point (x, y)."""
+        self.n += 1
+        dx = x - self.mean_x
+        self.mean_x += dx / self.n
+        self.mean_y += (y - self.mean_y) / self.n
+        self._sxx += dx * (x - self.mean_x)
+        self._sxy += dx * (y - self.mean_y)
+
+    def slope(self):
+        """:Returns: slope, or None if less than 2 distinct x-values"""
+        if self.n < 2 or self._sxx <= 0.0:
+            return None
+        return self._sxy / self._sxx
+
+    def intercept(self):
+        """:Returns: y at x=0, or None (see slope())"""
+        slope = self.slope()
+        return None if slope is None else self.mean_y - slope * self.mean_x
+
+class WearAnalyzer:
+    """Write-amplification / wear-rate of one device, from samples (in time-order).
+
+    Only the first/last/previous sample and a Regression are kept.
+    """
+    def __init__(self, erase_block=None):
+        """
+        :Parameters:
+            - erase_block: erase-block-size in bytes (for erase_count_total),
+                           or None (use erase_count_avg * size)
+        """
+        self.erase_block = erase_block
+        self.first = None
+        self.last = None
+        self.host_sectors = 0
+        self.endurance = Regression()
+
+    def add(self, sample):
+        """Add sample (see sample_get()).
+
+        :Returns:
+            True, or False if the sample was skipped (not newer than the last one)
+        """
+        if self.last is not None:
+            if sample["time"] <= self.last["time"]:
+                return False
+            delta = sample["sectors_written"] - self.last["sectors_written"]
+            # counter reset at boot: count the writes since boot
+            self.host_sectors += delta if delta >= 0 else sample["sectors_written"]
+        else:
+            self.first = sample
+        self.last = sample
+        self.endurance.add((sample["time"] - self.first["time"]) / 86400.0, sample["endurance"])
+        return True
+
+    def nand_bytes(self):
+        """Estimated NAND bytes written (see module docstring), or None."""
+        if self.first is None:
+            return None
+        if self.erase_block and self.first.get("erase_count_total") is not None \
+                and self.last.get("erase_count_total") is not None:
+            return (self.last["erase_count_total"] - self.first["erase_count_total"]) * self.erase_block
+        return (self.last["erase_count_avg"] - self.first["erase_count_avg"]) * self.last["size"]
+
+    def summary(self):
+        """Summary.
+
+        :Returns:
+            dict with:
+            - device, samples, first, last (UNIX timestamps), days
+            - host_bytes, nand_bytes
+            - waf (None without host-writes)
+            - endurance (last)
+            - wear_rate (decrease of endurance in %/day, None with < 2 samples)
+            - eol (projected end-of-life as UNIX timestamp, None if the
+              endurance does not decrease)
+        """
+        if self.first is None:
+            return None
+        host_bytes = self.host_sectors * SECTOR_SIZE
+        nand_bytes = self.nand_bytes()
+        slope = self.endurance.slope()
+        eol = None
+        if slope is not None and slope < 0:
+            eol = self.first["time"] + (-self.endurance.intercept() / slope) * 86400.0
+        return {
+            "device":     self.last["device"],
+            "samples":    self.endurance.n,
+            "first":      self.first["time"],
+            "last":       self.last["time"],
+            "days":       (self.last["time"] - self.first["time"]) / 86400.0,
+            "host_bytes": host_bytes,
+            "nand_bytes": nand_bytes,
+            "waf":        nand_bytes / host_bytes if host_bytes else None,
+            "endurance":  self.last["endurance"],
+            "wear_rate":  None if slope is None else -slope,
+            "eol":        eol,
+        }
+
+def analyze(samples, erase_block=None):
+    """Analyze samples of several devices.
+
+    :Parameters:
+        - samples:     iterable of samples (see sample_get()), in time-order
+        - erase_block: see WearAnalyzer
+    :Returns:
+        dict device -> WearAnalyzer
+    """
+    analyzers = {}
+    for sample in samples:
+        dev = sample["device"]
+        if dev not in analyzers:
+            analyzers[dev] = WearAnalyzer(erase_block)
+        analyzers[dev].add(sample)
+    return analyzers
+
+def summary_print(s):
+    """Print summary (see WearAnalyzer.summary()) in human-readable form."""
+    def size(n):
+        return "-" if n is None else "%.1f MiB" % (n / 1048576.0)
+    print("Device:                   %s" % s["device"])
+    print("Samples:                  %d (%.1f days)" % (s["samples"], s["days"]))
+    print("Host written:             %s" % size(s["host_bytes"]))
+    print("NAND written (estimated): %s" % size(s["nand_bytes"]))
+    print("Write amplification:      %s" % ("-" if s["waf"] is None else "%.2f" % s["waf"]))
+    print("Endurance:                %.2f %%" % s["endurance"])
+    print("Wear rate:                %s" % ("-" if s["wear_rate"] is None else "%.4f %%/day" % s["wear_rate"]))
+    print("End of life (projected):  %s" % ("-" if s["eol"] is None else time.strftime("%Y-%m-%d", time.localtime(s["eol"]))))
+
+#=========================================
+# per-process write attribution
+
+MMC_BLOCK_MAJOR = 179
+
+def _unescape(path):
+    """Unescape path from /proc/*/mountinfo (octal escapes, e.g. \\040)."""
+    if "\\" not in path:
+        return path
+    import re
+    return re.sub(r"\\([0-7]{3})", lambda m: chr(int(m.group(1), 8)), path)
+
+def mounts_read(proc="/proc"):
+    """Read mount-table.
+
+    :Returns:
+        list of (mountpoint, (major, minor), source), sorted by mountpoint
+        length (longest first)
+    :Raises:
+        OSError if the mount-table cannot be read.
+    """
+    mounts = []
+    with open(os.path.join(proc, "self", "mountinfo"), 'r', encoding="utf-8", errors="replace") as f:
+        for line in f:
+            fields = line.split()
+            try:
+                sep = fields.index("-", 6)
+                major, minor = fields[2].split(":")
+                mounts.append((_unescape(fields[4]), (int(major), int(minor)), fields[sep+2]))
+            except (ValueError, IndexError):
+                continue
+    mounts.sort(key=lambda m: len(m[0]), reverse=True)
+    return mounts
+
+def device_numbers(dev="/dev/mmcblk0", sysblock="/sys/block"):
+    """Get device-numbers of a block-device and its partitions.
+
+    :Returns:
+        set of (major, minor), or None if unknown (no sysfs)
+    """
+    name = os.path.basename(dev)
+    path = os.path.join(sysblock, name)
+    numbers = set()
+    try:
+        for sub in [""] + [n for n in os.listdir(path) if n.startswith(name)]:
+            with open(os.path.join(path, sub, "dev"), 'r', encoding="ascii") as f:
+                major, minor = f.read().strip().split(":")
+                numbers.add((int(major), int(minor)))
+    except (OSError, ValueError):
+        return None
+    return numbers
+
+def _nofile_raise():
+    """Raise the soft RLIMIT_NOFILE to the hard limit (if finite).
+
+    :Returns:
+        soft limit of file-descriptors (1024 if unknown)
+    """
+    try:
+        import resource
+    except ImportError:
+        return 1024
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft != hard and hard != resource.RLIM_INFINITY:
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+            soft = hard
+        except (ValueError, OSError):
+            pass
+    return soft if soft != resource.RLIM_INFINITY else 1 << 20
+
+class ProcWriteScanner:
+    """Incremental scanner of the bytes written by all processes.
+
+    Reads /proc/PID/io (write_bytes) of all processes at every scan()
+    and accumulates the deltas per process. The io-files stay open
+    between scans (re-read via pread), so a scan is one listdir of /proc
+    and one read per process. Processes started after the first scan
+    are counted from 0; writes of processes after their last scan
+    before they exit are lost.
+
+    The soft RLIMIT_NOFILE is raised to the hard limit; beyond it (minus
+    FD_RESERVE), or on EMFILE/ENFILE, the io-files of further processes
+    are read via open/read/close in every scan. Processes which cannot
+    be read at all for lack of file-descriptors are counted in `unread`.
+
+    /proc/PID/io does not say to which device a process writes, so:
+
+    - if the card is the only block-device with mounted filesystems,
+      all writes are attributed to the card
+    - otherwise, only writes of processes with open files on the card
+      (checked via /proc/PID/fd, only for processes with new writes);
+      i.e. nothing, if no filesystem of the card is mounted
+
+    Needs root to read the io-files of other users' processes.
+    """
+    FD_RESERVE = 64     # file-descriptors left for everything else
+
+    def __init__(self, dev="/dev/mmcblk0", proc="/proc", sysblock="/sys/block"):
+        self.proc = proc
+        self.mounts = mounts_read(proc)
+        numbers = device_numbers(dev, sysblock)
+        if numbers is None:     # no sysfs: all mmc-devices
+            self._on_card = lambda number: number[0] == MMC_BLOCK_MAJOR
+        else:
+            self._on_card = lambda number: number in numbers
+        self.card_mounts = [m for m in self.mounts if self._on_card(m[1])]
+        # card mounted, and all block-backed filesystems (major != 0) on the card?
+        self.card_only = bool(self.card_mounts) and all(self._on_card(m[1]) for m in self.mounts if m[1][0] != 0)
+        self._procs = {}        # pid -> [fd (or None), write_bytes, key, on_card]
+        self._nfds = 0          # open io-files
+        self.fd_max = max(0, _nofile_raise() - self.FD_RESERVE)
+        self.written = {}       # (pid, comm, cgroup) -> bytes written to the card
+        self.scans = 0
+        self.unread = 0         # process-reads failed for lack of file-descriptors
+
+    def close(self):
+        """Close all io-files."""
+        for entry in self._procs.values():
+            self._close(entry)
+        self._procs = {}
+
+    def _close(self, entry):
+        if entry[0] is not None:
+            os.close(entry[0])
+            entry[0] = None
+            self._nfds -= 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _read(self, pid, name):
+        try:
+            with open(os.path.join(self.proc, pid, name), 'r', encoding="utf-8", errors="replace") as f:
+                return f.read()
+        except OSError:
+            return ""
+
+    def _files_on_card(self, pid):
+        """Check whether process pid has files (or cwd) on the card."""
+        path = os.path.join(self.proc, pid, "fd")
+        try:
+            targets = [os.readlink(os.path.join(path, fd)) for fd in os.listdir(path)]
+        except OSError:
+            return False
+        for target in targets:
+            if not target.startswith("/"):
+                continue
+            if target.endswith(" (deleted)"):
+                target = target[:-10]
+            for mountpoint, number, _ in self.mounts:
+                if target == mountpoint or target.startswith(mountpoint.rstrip("/") + "/"):
+                    if self._on_card(number):
+                        return True
+                    break
+        return False
+
+    def _io_open(self, pid):
+        """Open /proc/PID/io to keep it open, or None (open/read/close per scan).
+
+        :Raises:
+            OSError if the process exited / no permissions
+        """
+        if self._nfds >= self.fd_max:
+            return None
+        try:
+            fd = os.open(os.path.join(self.proc, pid, "io"), os.O_RDONLY)
+        except OSError as err:
+            if err.errno not in (errno.EMFILE, errno.ENFILE):
+                raise
+            self.fd_max = self._nfds    # out of file-descriptors: keep no more open
+            return None
+        self._nfds += 1
+        return fd
+
+    def _io_read(self, pid, fd):
+        """Read /proc/PID/io via the open fd, or (fd None) via open/read/close."""
+        if fd is not None:
+            return os.pread(fd, 4096, 0)
+        fd = os.open(os.path.join(self.proc, pid, "io"), os.O_RDONLY)
+        try:
+            return os.read(fd, 4096)
+        finally:
+            os.close(fd)
+
+    @staticmethod
+    def _write_bytes(data):
+        i = data.find(b"write_bytes:")
+        if i < 0:
+            raise ValueError("no write_bytes")
+        return int(data[i+12:data.index(b"\n", i)])
+
+    def scan(self):
+        """Scan all processes once, and accumulate their writes.
+
+        :Returns:
+            bytes written to the card since the last scan
+        """
+        total = 0
+        first = self.scans == 0
+        self.scans += 1
+        pids = [name for name in os.listdir(self.proc) if name.isdigit()]
+        seen = set(pids)
+        for pid in list(self._procs):
+            if pid not in seen:
+                self._close(self._procs.pop(pid))
+        for pid in pids:
+            entry = self._procs.get(pid)
+            if entry is not None:
+                try:
+                    wb = self._write_bytes(self._io_read(pid, entry[0]))
+                except (OSError, ValueError) as err:
+                    if getattr(err, "errno", None) in (errno.EMFILE, errno.ENFILE):
+                        self.unread += 1    # keep entry, retry in the next scan
+                        continue
+                    self._close(self._procs.pop(pid))   # exited (or pid reused)
+                    entry = None
+            if entry is None:
+                fd = None
+                try:
+                    fd = self._io_open(pid)
+                    wb = self._write_bytes(self._io_read(pid, fd))
+                except (OSError, ValueError) as err:   # exited / no permissions / no fds
+                    if getattr(err, "errno", None) in (errno.EMFILE, errno.ENFILE):
+                        self.unread += 1
+                    if fd is not None:
+                        os.close(fd)
+                        self._nfds -= 1
+                    continue
+                comm = self._read(pid, "comm").strip()
+                cgroup = self._read(pid, "cgroup").strip().split("\n")[-1].split(":", 2)[-1]
+                entry = self._procs[pid] = [fd, 0 if not first else wb, (int(pid), comm, cgroup), None]
+            delta = wb - entry[1]
+            entry[1] = wb
+            if delta <= 0:
+                continue
+            if not self.card_only and not entry[3]:
+                entry[3] = self._files_on_card(pid)
+            if self.card_only or entry[3]:
+                self.written[entry[2]] = self.written.get(entry[2], 0) + delta
+                total += delta
+        return total
+
+    def ranking(self, erase_delta=None):
+        """Rank processes and cgroups by bytes written to the card.
+
+        :Parameters:
+            - erase_delta: growth of the erase-count, which is attributed
+                           proportionally to the written bytes (or None)
+        :Returns:
+            (processes, cgroups): lists of dicts, sorted by bytes written,
+            with pid, comm, cgroup (resp. only cgroup), write_bytes, share
+            (0..1), erase_count (attributed erase-count-growth, or None)
+        """
+        total = sum(self.written.values())
+        def entry(d, nbytes):
+            d["write_bytes"] = nbytes
+            d["share"] = nbytes / total if total else 0.0
+            d["erase_count"] = None if erase_delta is None else d["share"] * erase_delta
+            return d
+        cgroups = {}
+        for (pid, comm, cgroup), nbytes in self.written.items():
+            cgroups[cgroup] = cgroups.get(cgroup, 0) + nbytes
+        procs = [entry({"pid": pid, "comm": comm, "cgroup": cgroup}, nbytes)
+                 for (pid, comm, cgroup), nbytes in self.written.items()]
+        cgroups = [entry({"cgroup": cgroup}, nbytes) for cgroup, nbytes in cgroups.items()]
+        procs.sort(key=lambda d: d["write_bytes"], reverse=True)
+        cgroups.sort(key=lambda d: d["write_bytes"], reverse=True)
+        return procs, cgroups
+
+#=========================================
+# I/O benchmark
+
+def io_open(path, write=False, size=None):
+    """Open block-device or file for the benchmark, with O_DIRECT if possible.
+
+    :Parameters:
+        - path:  block-device or file
+        - write: open for writing
+        - size:  create file with this size (bytes), if it does not exist
+    :Returns:
+        (fd, size, direct)
+    :Raises:
+        OSError
+    """
+    flags = os.O_RDWR if write else os.O_RDONLY
+    if size and not os.path.exists(path):
+        with open(path, 'wb') as f:
+            for _ in range(size // 1048576):
+                f.write(os.urandom(1048576))
+            f.write(os.urandom(size % 1048576))
+    try:
+        fd = os.open(path, flags | getattr(os, "O_DIRECT", 0))
+        direct = hasattr(os, "O_DIRECT")
+    except OSError as err:
+        if err.errno != errno.EINVAL:   # e.g. tmpfs: no O_DIRECT
+            raise
+        fd = os.open(path, flags)
+        direct = False
+    size = os.lseek(fd, 0, os.SEEK_END)
+    return fd, size, direct
+
+def io_bench(fd, size, write=False, random=False, bs=4096, qd=1, seconds=5.0, seed=0):
+    """Run one I/O-benchmark (read/write, sequential/random).
+
+    Uses qd threads with one outstanding I/O each (queue-depth),
+    and page-aligned buffers (for O_DIRECT). The latencies are collected
+    in histograms (see adva_sdcard.timing.Histogram), one per thread.
+
+    :Parameters:
+        - fd:      file descriptor (see io_open())
+        - size:    size of the tested region (bytes, from offset 0)
+        - write:   write instead of read (overwrites the data!)
+        - random:  random instead of sequential offsets
+        - bs:      block size (bytes, multiple of 4096 for O_DIRECT)
+        - qd:      queue-depth (number of threads)
+        - seconds: duration
+    :Returns:
+        dict with ios, bytes, seconds, mbyte_s, iops, p50_us, p99_us
+    :Raises:
+        ValueError for invalid arguments,
+        OSError for I/O-errors.
+    """
+    import mmap
+    import random as _random
+    import threading
+    import itertools
+    from adva_sdcard.timing import Histogram
+    blocks = size // bs
+    if blocks < 1 or qd < 1:
+        raise ValueError("Invalid arguments, size smaller than bs or qd < 1.")
+    counter = itertools.count()     # next() is atomic (GIL)
+    results = []
+    errors = []
+    deadline = time.monotonic() + seconds
+
+    def worker(i):
+        buf = mmap.mmap(-1, bs)     # page-aligned
+        if write:
+            buf.write(os.urandom(bs))
+        rnd = _random.Random(seed * 1000 + i)
+        hist = Histogram()
+        ios = 0
+        try:
+            while time.monotonic() < deadline:
+                block = rnd.randrange(blocks) if random else next(counter) % blocks
+                t0 = time.perf_counter()
+                if write:
+                    n = os.pwrite(fd, buf, block * bs)
+                else:
+                    n = os.preadv(fd, [buf], block * bs)
+                hist.add(time.perf_counter() - t0)
+                if n != bs:
+                    raise OSError(errno.EIO, "short %s" % ("write" if write else "read"))
+                ios += 1
+        except OSError as err:
+            errors.append(err)
+        finally:
+            buf.close()
+        results.append((ios, hist))
+
+    t_start = time.monotonic()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(qd)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - t_start
+    if errors:
+        raise errors[0]
+    hist = Histogram()
+    ios = 0
+    for n, h in results:
+        ios += n
+        hist.merge(h)
+    p50, p99 = hist.quantile(0.5), hist.quantile(0.99)
+    return {
+        "ios":     ios,
+        "bytes":   ios * bs,
+        "seconds": elapsed,
+        "mbyte_s": ios * bs / elapsed / 1e6,
+        "iops":    ios / elapsed,
+        "p50_us":  None if p50 is None else p50 * 1e6,
+        "p99_us":  None if p99 is None else p99 * 1e6,
+    }
+
+BENCH_TESTS = (
+    # name, write, random, block size option
+    ("seq_read",   False, False, "seq_bs"),
+    ("rand_read",  False, True,  "rand_bs"),
+    ("seq_write",  True,  False, "seq_bs"),
+    ("rand_write", True,  True,  "rand_bs"),
+)
+
+def bench_compare(results, timing):
+    """Compare benchmark-results with CSD-limits (see csd_timing()).
+
+    :Returns:
+        dict with ratios measured/declared:
+        - seq_read_bus:   seq. read-throughput / bus_mbyte_s
+        - rand_read_access: rand. read p50-latency / read_access_ns
+        - rand_write_access: rand. write p50-latency / write_access_ns
+    """
+    def ratio(test, field, limit, scale=1.0):
+        r = results.get(test)
+        if r is None or r.get(field) is None or not limit:
+            return None
+        return r[field] * scale / limit
+    return {
+        "seq_read_bus":      ratio("seq_read", "mbyte_s", timing["bus_mbyte_s"]),
+        "rand_read_access":  ratio("rand_read", "p50_us", timing["read_access_ns"], 1000.0),
+        "rand_write_access": ratio("rand_write", "p50_us", timing["write_access_ns"], 1000.0),
+    }
+
+#=========================================
+
+def _size(s):
+    """Parse size with optional suffix k/M/G (powers of 1024)."""
+    units = {"k": 1 << 10, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+    if s and s[-1] in units:
+        return int(s[:-1]) * units[s[-1]]
+    return int(s)
+
+def main(arglist=None):
+    """Record samples / analyze write-amplification and wear-rate.
+
+    See module docstring for exit codes.
+    """
+    # parse arguments
+    parser = argparse.ArgumentParser(
+        description="""Write-amplification and wear-rate of industrial microSD-/SD-cards.
+Version %s by %s.""" % (__version__, __author__),
+        formatter_class=argparse.RawDescriptionHelpFormatter,   # for keeping newlines in description
+        epilog="""
+Examples:
+    adva-sdcard-wear record -i 3600 -o /var/lib/adva-sdcard/wear.ndjson
+    adva-sdcard-wear analyze /var/lib/adva-sdcard/wear.ndjson
+    adva-sdcard-wear analyze -E 4194304 -j wear.ndjson
+    adva-sdcard-wear procs -i 5 -t 600 /dev/mmcblk0
+    adva-sdcard-wear bench /dev/mmcblk0
+    adva-sdcard-wear bench --write --size 64M -d /dev/mmcblk0 /tmp/bench.img
+Note that this does not work with USB-cardreaders.\n""")
+    parser.add_argument("--version", action='version', version="%(prog)s " + __version__)
+    sub = parser.add_subparsers(dest="command", metavar="COMMAND")
+    sub.required = True
+
+    p = sub.add_parser("record", help="Record samples (JSON-lines).")
+    p.add_argument("-i", "--interval", action='store', type=float, default=3600.0, help="sample interval in seconds, default: 3600")
+    p.add_argument("-n", "--count", action='store', type=int, help="number of samples, default: unlimited")
+    p.add_argument("-o", "--output", action='store', help="append samples to this file, default: stdout")
+    p.add_argument("-b", "--backend", choices=("auto", "ioctl", "helper", "serve"), default="auto", help=BACKEND_HELP)
+    p.add_argument("device", nargs='*', help="devices, default: all /dev/mmcblk*")
+
+    p = sub.add_parser("analyze", help="Analyze recorded samples.")
+    p.add_argument("-E", "--erase-block", action='store', type=int, help="erase-block-size in bytes (use erase_count_total instead of erase_count_avg * size)")
+    p.add_argument("-j", "--json", action='store_true', help="Print output in JSON format.")
+    p.add_argument("samples", nargs='*', type=argparse.FileType('r'), help="files containing samples (JSON-lines), default: stdin")
+
+    p = sub.add_parser("procs", help="Rank processes/cgroups by bytes written to the card.")
+    p.add_argument("-i", "--interval", action='store', type=float, default=5.0, help="scan interval in seconds, default: 5")
+    p.add_argument("-t", "--time", action='store', type=float, default=300.0, help="duration in seconds (between the two SMART-samples), default: 300")
+    p.add_argument("-n", "--top", action='store', type=int, default=10, help="number of processes/cgroups shown, default: 10")
+    p.add_argument("-b", "--backend", choices=("auto", "ioctl", "helper", "serve"), default="auto", help=BACKEND_HELP)
+    p.add_argument("-j", "--json", action='store_true', help="Print output in JSON format.")
+    p.add_argument("--proc", action='store', default="/proc", help=argparse.SUPPRESS)
+    p.add_argument("--sysblock", action='store', default="/sys/block", help=argparse.SUPPRESS)
+    p.add_argument("device", nargs='?', default="/dev/mmcblk0", help="device, default: /dev/mmcblk0")
+
+    p = sub.add_parser("bench", help="I/O-benchmark, compared with CSD-limits and endurance.")
+    p.add_argument("-d", "--device", action='store', help="mmc-device for CSD and SMART, default: target if /dev/mmcblk*")
+    p.add_argument("-w", "--write", action='store_true', help="Run write-benchmarks too (OVERWRITES the target!).")
+    p.add_argument("-t", "--time", action='store', type=float, default=5.0, help="duration per test in seconds, default: 5")
+    p.add_argument("-q", "--queue-depth", action='store', type=int, default=1, help="queue-depth (concurrent I/Os), default: 1")
+    p.add_argument("--seq-bs", action='store', type=_size, default=1048576, help="block size for sequential tests, default: 1M")
+    p.add_argument("--rand-bs", action='store', type=_size, default=4096, help="block size for random tests, default: 4k")
+    p.add_argument("--size", action='store', type=_size, help="size of the tested region (default: whole target); creates target-file with this size if it does not exist")
+    p.add_argument("-b", "--backend", choices=("auto", "ioctl", "helper", "serve"), default="auto", help=BACKEND_HELP)
+    p.add_argument("-j", "--json", action='store_true', help="Print output in JSON format.")
+    p.add_argument("target", help="block-device or file")
+
+    args = parser.parse_args(arglist)
+
+    #---------------------
+    if args.command == "record":
+        if args.interval <= 0 or (args.count is not None and args.count < 1):
+            print("ERROR: Invalid arguments, interval and count must be positive.", file=sys.stderr)
+            return 2
+        from adva_sdcard import smart as smarttool
+        from adva_sdcard.info import devices_list
+        devices = args.device or devices_list()
+        if not devices:
+            print("ERROR: No mmc-device found.", file=sys.stderr)
+            return 19   # ENODEV
+        try:
+            out = open(args.output, 'a', encoding="utf-8") if args.output else sys.stdout
+        except OSError as err:
+            print("ERROR: Cannot open '%s'. (%s)" % (args.output, err), file=sys.stderr)
+            return 5    # EIO
+        n = 0
+        t_next = time.monotonic()
+        while True:
+            for dev in devices:
+                try:
+                    sample = sample_get(dev, smarttool, args.backend)
+                except Exception as err:
+                    print("ERROR: %s: %s" % (dev, (getattr(err, "stderr", None) or str(err)).strip()), file=sys.stderr)
+                    continue
+                out.write(json.dumps(sample) + "\n")
+            out.flush()
+            n += 1
+            if args.count is not None and n >= args.count:
+                return 0
+            t_next += args.interval
+            delay = t_next - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:   # too slow: skip missed intervals
+                t_next = time.monotonic()
+
+    #---------------------
+    if args.command == "analyze":
+        errors = 0
+        def samples():
+            nonlocal errors
+            for f in args.samples or [sys.stdin]:
+                for lineno, sample, error in samples_read(f):
+                    if error is not None:
+                        print("ERROR: %s:%d: Invalid sample. (%s)" % (f.name, lineno, error), file=sys.stderr)
+                        errors += 1
+                    else:
+                        yield sample
+        summaries = [a.summary() for a in analyze(samples(), args.erase_block).values()]
+        if args.json:
+            print(json.dumps(summaries))
+        else:
+            for i, s in enumerate(summaries):
+                if i:
+                    print()
+                summary_print(s)
+        return 22 if errors else 0
+
+    #---------------------
+    if args.command == "procs":
+        if args.interval <= 0 or args.time < 0 or args.top < 1:
+            print("ERROR: Invalid arguments, interval, time and top must be positive.", file=sys.stderr)
+            return 2
+        from adva_sdcard import smart as smarttool
+        def erase_count():
+            try:
+                smart = smarttool.SmartRecord(*smarttool.smart_get_any(args.device, args.backend))
+            except Exception as err:
+                print("WARNING: Cannot get SMART-data, no erase-count attribution. (%s)"
+                      % (getattr(err, "stderr", None) or str(err)).strip(), file=sys.stderr)
+                return None
+            total = smart.get("erase_count_total")
+            return total if total is not None else smart.get("erase_count_avg")
+        try:
+            scanner = ProcWriteScanner(args.device, args.proc, args.sysblock)
+        except OSError as err:
+            print("ERROR: Cannot read mount-table. (%s)" % err, file=sys.stderr)
+            return 5    # EIO
+        with scanner:
+            erase_start = erase_count()
+            t_start = time.monotonic()
+            scanner.scan()
+            while time.monotonic() - t_start < args.time:
+                time.sleep(max(0.0, min(args.interval, args.time - (time.monotonic() - t_start))))
+                scanner.scan()
+            erase_end = erase_count() if erase_start is not None else None
+        if scanner.unread:
+            print("WARNING: %d reads of /proc/PID/io failed for lack of file-descriptors, writes may be missing."
+                  % scanner.unread, file=sys.stderr)
+        erase_delta = None if erase_start is None or erase_end is None else erase_end - erase_start
+        procs, cgroups = scanner.ranking(erase_delta)
+        if args.json:
+            print(json.dumps({"device": args.device, "seconds": args.time, "erase_count_delta": erase_delta,
+                              "processes": procs[:args.top], "cgroups": cgroups[:args.top]}))
+            return 0
+        print("Device: %s, %.0f s, erase-count growth: %s%s" % (args.device, args.time,
+              "-" if erase_delta is None else erase_delta,
+              "" if scanner.card_only else " (only processes with open files on the card)"))
+        print()
+        print("%8s %-16s %12s %6s %8s  %s" % ("PID", "COMMAND", "WRITTEN", "SHARE", "ERASES", "CGROUP"))
+        for d in procs[:args.top]:
+            print("%8d %-16s %12d %5.1f%% %8s  %s" % (d["pid"], d["comm"][:16], d["write_bytes"], d["share"]*100,
+                  "-" if d["erase_count"] is None else "%.2f" % d["erase_count"], d["cgroup"]))
+        print()
+        print("%12s %6s %8s  %s" % ("WRITTEN", "SHARE", "ERASES", "CGROUP"))
+        for d in cgroups[:args.top]:
+            print("%12d %5.1f%% %8s  %s" % (d["write_bytes"], d["share"]*100,
+                  "-" if d["erase_count"] is None else "%.2f" % d["erase_count"], d["cgroup"]))
+        return 0
+
+    #---------------------
+    if args.command == "bench":
+        if args.time <= 0 or args.queue_depth < 1:
+            print("ERROR: Invalid arguments, time and queue-depth must be positive.", file=sys.stderr)
+            return 2
+        device = args.device or (args.target if args.target.startswith("/dev/mmcblk") else None)
+        report = {"time": time.time(), "target": args.target, "device": device, "queue_depth": args.queue_depth,
+                  "csd": None, "endurance": None, "results": {}, "compare": None}
+        # CSD-limits and endurance
+        if device:
+            from adva_sdcard import info as infotool
+            try:
+                report["csd"] = infotool.csd_timing(infotool.csd_parse(infotool.sysfs_get(device, "csd")))
+            except Exception as err:
+                print("WARNING: Cannot get CSD. (%s)" % err, file=sys.stderr)
+            try:
+                from adva_sdcard import smart as smarttool
+                report["endurance"] = smarttool.SmartRecord(*smarttool.smart_get_any(device, args.backend)).get("endurance")
+            except Exception as err:
+                print("WARNING: Cannot get SMART-data. (%s)" % (getattr(err, "stderr", None) or str(err)).strip(), file=sys.stderr)
+        # benchmark
+        try:
+            fd, size, direct = io_open(args.target, args.write, args.size)
+        except OSError as err:
+            print("ERROR: Cannot open '%s'. (%s)" % (args.target, err), file=sys.stderr)
+            return 19 if err.errno == errno.ENOENT else 5
+        report["direct"] = direct
+        if not direct:
+            print("WARNING: O_DIRECT not supported, results include the page-cache.", file=sys.stderr)
+        try:
+            for name, write, random, bs in BENCH_TESTS:
+                if write and not args.write:
+                    continue
+                report["results"][name] = io_bench(fd, min(size, args.size or size), write, random,
+                                                   getattr(args, bs), args.queue_depth, args.time)
+        except ValueError as err:
+            print("ERROR: %s" % err, file=sys.stderr)
+            return 2
+        except OSError as err:
+            print("ERROR: I/O-error. (%s)" % err, file=sys.stderr)
+            return 5    # EIO
+        finally:
+            os.close(fd)
+        if report["csd"] is not None:
+            report["compare"] = bench_compare(report["results"], report["csd"])
+
+        if args.json:
+            print(json.dumps(report))
+            return 0
+        print("Target:    %s (%s, queue-depth %d)" % (args.target, "O_DIRECT" if direct else "buffered", args.queue_depth))
+        if report["endurance"] is not None:
+            print("Endurance: %.2f %%" % report["endurance"])
+        for name, r in report["results"].items():
+            print("%-10s %9.2f MB/s %9.0f IOPS  p50 %9.1f us  p99 %9.1f us" % (name, r["mbyte_s"], r["iops"], r["p50_us"] or 0, r["p99_us"] or 0))
+        if report["csd"] is not None:
+            csd, cmp = report["csd"], report["compare"]
+            fmt = lambda v: "-" if v is None else "%.2f" % v
+            print("CSD:       bus %.1f MB/s (measured/declared: %s), read access %.1f us (%s), write access %.1f us (%s)" % (
+                csd["bus_mbyte_s"], fmt(cmp["seq_read_bus"]), csd["read_access_ns"] / 1000.0, fmt(cmp["rand_read_access"]),
+                csd["write_access_ns"] / 1000.0, fmt(cmp["rand_write_access"])))
+        return 0
+
+#=========================================
+if __name__ == '__main__':
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        print("\nAborted.")
+        sys.exit(130)   # ECONNABORTED
+
+#=========================================
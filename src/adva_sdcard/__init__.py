@@ -0,0 +1,63 @@
+"""SD-card: Information (CID, CSD) and SMART of industrial (micro)SD-cards.
+
+Library of the adva-sdcard-* tools; the commandline-tools are thin
+wrappers around its modules:
+
+- adva_sdcard.info:    CID/CSD (sysfs, parsing, validation), device-scan
+                       (adva-sdcard-info)
+- adva_sdcard.smart:   SMART-data (acquisition via ioctl / helper,
+                       parsing, validation) (adva-sdcard-smart)
+- adva_sdcard.records: compact, immutable record types for parsed CID,
+                       CSD and SMART-data (Cid, Csd, Smart*)
+- adva_sdcard.sim:     simulated cards (adva-sdcard-sim)
+- adva_sdcard.export:  streaming writers (CSV, NDJSON, MessagePack) with
+                       one field schema per record kind
+- adva_sdcard.timing:  per-stage timings of the acquisition (hooks,
+                       latency-histograms, --timings)
+- adva_sdcard.rules:   health-rules over SMART-streams, evaluated
+                       incrementally per card (alerts as events)
+
+The most important functions and types are available directly from
+the package, e.g. `adva_sdcard.cid_parse()`, `adva_sdcard.Smart`; the
+modules are only imported on first use (startup-time of the tools).
+
+Example::
+
+    import adva_sdcard
+    smart = adva_sdcard.Smart.decode(*adva_sdcard.smart_get("/dev/mmcblk0"))
+    print(smart.endurance, smart.erase_count_avg)
+
+:Author:    Advamation / Roland Freikamp <support@advamation.de>
+:Version:   2026-10-17
+:Copyright: Advamation <info@advamation.de>
+:License:   MIT
+"""
+
+__version__ = "1.2.0"
+__author__ = "Advamation <support@advamation.de>"
+
+# exported names -> module (imported on first use, see __getattr__())
+_EXPORTS = {
+    "cid_get": "info", "cid_parse": "info", "cid_validate": "info",
+    "csd_parse": "info", "csd_timing": "info", "csd_validate": "info",
+    "crc7": "info", "devices_list": "info", "devices_scan": "info",
+    "smart_get": "smart", "smart_get_any": "smart", "smart_parse": "smart",
+    "smart_decode": "smart", "smart_validate": "smart", "SmartRecord": "smart",
+    "SmartScheduler": "smart",
+    "Record": "records", "Cid": "records", "Csd": "records", "Smart": "records",
+    "CsvWriter": "export", "NdjsonWriter": "export", "MsgpackWriter": "export",
+    "TimingStats": "timing",
+    "Rule": "rules", "RuleEngine": "rules",
+}
+
+__all__ = sorted(_EXPORTS)
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError("module '%s' has no attribute '%s'" % (__name__, name))
+    import importlib
+    return getattr(importlib.import_module("." + module, __name__), name)
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
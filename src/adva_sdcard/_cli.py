@@ -0,0 +1,42 @@
+"""SD-card: Commandline-helpers of the adva-sdcard-* tools.
+
+:Author:    Advamation / Roland Freikamp <support@advamation.de>
+:Version:   2026-10-17
+:Copyright: Advamation <info@advamation.de>
+:License:   MIT
+"""
+
+class Args:
+    """Parsed commandline-arguments (like argparse.Namespace)."""
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+def args_fast(argv, flags, options, defaults):
+    """Parse simple commandlines without argparse (fast path).
+
+    Only separate options are supported (no positional arguments,
+    combined short options, --opt=value, ...).
+
+    :Parameters:
+        - argv:     commandline-arguments
+        - flags:    dict option -> name, for boolean options
+        - options:  dict option -> name, for options with value
+        - defaults: dict name -> default value
+    :Returns:
+        Args, or None if argv must be parsed by argparse
+    """
+    if not argv:
+        return None
+    args = dict(defaults)
+    argv = iter(argv)
+    for arg in argv:
+        if arg in flags:
+            args[flags[arg]] = True
+        elif arg in options:
+            val = next(argv, None)
+            if val is None or val.startswith("-"):
+                return None
+            args[options[arg]] = val
+        else:
+            return None
+    return Args(**args)
@@ -0,0 +1,454 @@
+"""SD-card: Streaming export of CID, CSD and SMART-records.
+
+Writers for many records at once, with one field schema per record
+kind, derived from the parsers (see SCHEMAS):
+
+- csv:     header + one row per record; per-die lists (Apacer) are
+           flattened into one column per die (NAME_0 ... NAME_31)
+- ndjson:  one JSON-object per line
+- msgpack: one MessagePack-map per record (no external module needed)
+
+Every record has all fields of the schema (in schema order), missing
+fields (e.g. of another SMART-layout) are empty / null; only NDJSON
+omits them (like json.dumps() of the parsed dicts). Records may
+be dicts (cid_parse(), smart_decode()), SmartRecords (only the exported
+fields are decoded) or record types (adva_sdcard.records).
+
+The output is collected in a buffer and written in large blocks to a
+binary file; the per-record code (rows, keys, headers) is generated
+once per schema.
+
+Example::
+
+    import sys
+    from adva_sdcard.export import SCHEMAS, WRITERS
+    with WRITERS["csv"](sys.stdout.buffer, SCHEMAS["smart"]) as writer:
+        writer.write_many(records)
+
+:Author:    Advamation / Roland Freikamp <support@advamation.de>
+:Version:   2026-10-17
+:Copyright: Advamation <info@advamation.de>
+:License:   MIT
+"""
+
+import struct
+from array import array
+
+from .info import CID_FIELDS, CSD_FIELDS
+from .smart import SMART_FIELD_NAMES, SMART_LAYOUT_TABLE
+
+#=========================================
+# schema
+
+class Schema:
+    """Fields of a record kind.
+
+    :Variables:
+        - name:    record kind, e.g. "smart"
+        - fields:  field names, in output order
+        - widths:  dict field -> number of values, for per-die lists
+        - columns: flattened column names (CSV), NAME_i for per-die lists
+    """
+    def __init__(self, name, fields, widths=None):
+        self.name = name
+        self.fields = tuple(fields)
+        self.widths = {field: width for field, width in (widths or {}).items() if field in self.fields}
+        columns = []
+        for field in self.fields:
+            if field in self.widths:
+                columns += ["%s_%d" % (field, i) for i in range(self.widths[field])]
+            else:
+                columns.append(field)
+        self.columns = tuple(columns)
+
+    def select(self, names):
+        """Schema with only some fields.
+
+        :Parameters:
+            - names: field names, in output order
+        :Raises:
+            ValueError for unknown fields
+        """
+        unknown = [name for name in names if name not in self.fields]
+        if unknown:
+            raise ValueError("unknown field '%s'" % unknown[0])
+        return Schema(self.name, names, self.widths)
+
+    def __repr__(self):
+        return "<Schema %s: %d fields, %d columns>" % (self.name, len(self.fields), len(self.columns))
+
+def _smart_widths():
+    """Lengths of the per-die lists of all SMART-layouts."""
+    widths = {}
+    for typ, signature, fields in SMART_LAYOUT_TABLE.values():
+        for name, kind, words, arg in fields:
+            if kind == "bytes":
+                widths[name] = max(widths.get(name, 0), words[1])
+    return widths
+
+# schema per record kind
+SCHEMAS = {
+    "cid":   Schema("cid", CID_FIELDS),
+    "csd":   Schema("csd", CSD_FIELDS),
+    "smart": Schema("smart", SMART_FIELD_NAMES, _smart_widths()),
+}
+
+def _row_function(schema, flat, attr):
+    """Generate a function record -> tuple of the values of schema.
+
+    :Parameters:
+        - flat: flatten the per-die lists (CSV)
+        - attr: for record types (attributes) instead of mappings
+    """
+    namespace = {}
+    items = []
+    for name in schema.fields:
+        get = "getattr(r, %r, None)" % name if attr else "g(%r)" % name
+        width = schema.widths.get(name)
+        if flat and width:
+            namespace["_none%d" % width] = (None,) * width
+            items.append("*(%s or _none%d)" % (get, width))
+        else:
+            items.append(get)
+    source = "def row(r):\n"
+    if not attr:
+        source += "    g = r.get\n"
+    source += "    return (%s)\n" % "".join(item + ", " for item in items)
+    exec(compile(source, "<export %s>" % schema.name, "exec"), namespace)
+    return namespace["row"]
+
+#----------------------
+# NDJSON
+
+def _json_encoder():
+    """Compact JSON-encoder, value -> str (arrays as lists).
+
+    Uses the C-encoder of the json-module directly (created once), since
+    JSONEncoder.encode() creates it again for every value.
+    """
+    import json
+    from json import encoder
+    if encoder.c_make_encoder is None:
+        return json.JSONEncoder(separators=(",", ":"), default=list).encode
+    encode = encoder.c_make_encoder(None, list, encoder.encode_basestring_ascii, None, ":", ",", False, False, True)
+    return lambda val: "".join(encode(val, 0))
+
+#=========================================
+# writers
+
+# size of the output buffer, in bytes
+BUFFER_SIZE = 1 << 16
+
+class Writer:
+    """Base of the streaming writers.
+
+    Usable as context-manager (flushes at the end).
+    """
+    def __init__(self, f, schema, buffer_size=BUFFER_SIZE):
+        """
+        :Parameters:
+            - f:           binary file, e.g. sys.stdout.buffer
+            - schema:      Schema, e.g. SCHEMAS["smart"]
+            - buffer_size: flush after this many bytes
+        """
+        self.f = f
+        self.schema = schema
+        self.buffer_size = buffer_size
+        self.count = 0
+
+    def _rows(self, flat):
+        """Row functions for mappings and record types (see _row_function())."""
+        row_map = _row_function(self.schema, flat, False)
+        row_attr = _row_function(self.schema, flat, True)
+        return lambda r: row_attr(r) if isinstance(r, tuple) else row_map(r)
+
+    def write(self, record):
+        """Write one record."""
+        self.write_many((record,))
+
+    def write_many(self, records):
+        """Write many records (iterable).
+
+        :Returns:
+            number of written records
+        """
+        raise NotImplementedError
+
+    def flush(self):
+        """Write the buffer to the file."""
+        raise NotImplementedError
+
+    def close(self):
+        """Flush (the file is not closed)."""
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class CsvWriter(Writer):
+    """CSV (RFC 4180, header-row), per-die lists in one column per die."""
+    def __init__(self, f, schema, buffer_size=BUFFER_SIZE, header=True):
+        """
+        :Parameters:
+            - header: write a header-row with the column names
+        """
+        import io
+        import csv
+        super().__init__(f, schema, buffer_size)
+        self._buf = io.StringIO()
+        self._csv = csv.writer(self._buf, lineterminator="\n")
+        self._row = self._rows(True)
+        if header:
+            self._csv.writerow(schema.columns)
+
+    def write_many(self, records):
+        n = 0
+        writerow, row, buf = self._csv.writerow, self._row, self._buf
+        for record in records:
+            writerow(row(record))
+            n += 1
+            if buf.tell() >= self.buffer_size:
+                self.flush()
+        self.count += n
+        return n
+
+    def flush(self):
+        if self._buf.tell():
+            self.f.write(self._buf.getvalue().encode("utf-8"))
+            self._buf.seek(0)
+            self._buf.truncate()
+        self.f.flush()
+
+class NdjsonWriter(Writer):
+    """Newline-delimited JSON, one object per record (compact, without null-fields).
+
+    Dicts whose keys are schema-fields in schema order (e.g. of
+    smart_decode()) are encoded as they are, without building a new dict.
+    """
+    # maximum number of cached key-orders of dicts
+    PLAIN_MAX = 1024
+
+    def __init__(self, f, schema, buffer_size=BUFFER_SIZE):
+        super().__init__(f, schema, buffer_size)
+        self._encode = _json_encoder()
+        self._row = self._rows(False)
+        self._pos = {field: i for i, field in enumerate(schema.fields)}
+        self._plain = {}        # keys of a dict -> in schema order?
+        self._parts = []
+        self._size = 0
+
+    def _plain_check(self, keys):
+        """Check if keys are schema-fields in schema order (cached)."""
+        pos = [self._pos.get(key) for key in keys]
+        plain = None not in pos and pos == sorted(pos)
+        if len(self._plain) < self.PLAIN_MAX:
+            self._plain[keys] = plain
+        return plain
+
+    def write_many(self, records):
+        n = 0
+        encode, row, fields, parts, plain = self._encode, self._row, self.schema.fields, self._parts, self._plain
+        for record in records:
+            line = None
+            if type(record) is dict:
+                keys = tuple(record)
+                ok = plain.get(keys)
+                if ok is None:
+                    ok = self._plain_check(keys)
+                if ok and None not in record.values():
+                    line = encode(record)
+            if line is None:
+                line = encode({key: val for key, val in zip(fields, row(record)) if val is not None})
+            parts.append(line)
+            self._size += len(line) + 1
+            n += 1
+            if self._size >= self.buffer_size:
+                self.flush()
+        self.count += n
+        return n
+
+    def flush(self):
+        if self._parts:
+            self._parts.append("")
+            self.f.write("\n".join(self._parts).encode("utf-8"))
+            self._parts.clear()
+            self._size = 0
+        self.f.flush()
+
+#----------------------
+# MessagePack (https://msgpack.org/, subset: nil, bool, int, float 64,
+# str, bin, array, map); integers beyond 64 bit (e.g. flash_id of
+# Apacer-cards) are written as hex-string "0x..."
+
+_B = struct.Struct(">BB").pack
+_H = struct.Struct(">BH").pack
+_I = struct.Struct(">BI").pack
+_Q = struct.Struct(">BQ").pack
+_b = struct.Struct(">Bb").pack
+_h = struct.Struct(">Bh").pack
+_i = struct.Struct(">Bi").pack
+_q = struct.Struct(">Bq").pack
+_d = struct.Struct(">Bd").pack
+
+def _pack_int(val, out):
+    if 0 <= val < 0x80:
+        out.append(val)
+    elif -0x20 <= val < 0:
+        out.append(val & 0xff)
+    elif val >= 0:
+        if val < 0x100:
+            out += _B(0xcc, val)
+        elif val < 0x10000:
+            out += _H(0xcd, val)
+        elif val < 0x100000000:
+            out += _I(0xce, val)
+        elif val < 0x10000000000000000:
+            out += _Q(0xcf, val)
+        else:
+            _pack_str("0x%x" % val, out)
+    elif val >= -0x80:
+        out += _b(0xd0, val)
+    elif val >= -0x8000:
+        out += _h(0xd1, val)
+    elif val >= -0x80000000:
+        out += _i(0xd2, val)
+    elif val >= -0x8000000000000000:
+        out += _q(0xd3, val)
+    else:
+        _pack_str("-0x%x" % -val, out)
+
+def _pack_str(val, out):
+    data = val.encode("utf-8")
+    n = len(data)
+    if n < 0x20:
+        out.append(0xa0 | n)
+    elif n < 0x100:
+        out += _B(0xd9, n)
+    elif n < 0x10000:
+        out += _H(0xda, n)
+    else:
+        out += _I(0xdb, n)
+    out += data
+
+def _pack_bin(val, out):
+    n = len(val)
+    if n < 0x100:
+        out += _B(0xc4, n)
+    elif n < 0x10000:
+        out += _H(0xc5, n)
+    else:
+        out += _I(0xc6, n)
+    out += val
+
+def _pack_array_header(n, out):
+    if n < 0x10:
+        out.append(0x90 | n)
+    elif n < 0x10000:
+        out += _H(0xdc, n)
+    else:
+        out += _I(0xdd, n)
+
+def _pack_map_header(n, out):
+    if n < 0x10:
+        out.append(0x80 | n)
+    elif n < 0x10000:
+        out += _H(0xde, n)
+    else:
+        out += _I(0xdf, n)
+
+def _pack_list(val, out):
+    _pack_array_header(len(val), out)
+    for item in val:
+        _PACK[type(item)](item, out)
+
+def _pack_array(val, out):
+    if val.typecode == 'B' and (not val or max(val) < 0x80):
+        _pack_array_header(len(val), out)     # positive fixints: the bytes themselves
+        out += val.tobytes()
+    else:
+        _pack_list(val, out)
+
+def _pack_dict(val, out):
+    _pack_map_header(len(val), out)
+    for key, item in val.items():
+        _PACK[type(key)](key, out)
+        _PACK[type(item)](item, out)
+
+# packer per type
+_PACK = {
+    type(None): lambda val, out: out.append(0xc0),
+    bool:       lambda val, out: out.append(0xc3 if val else 0xc2),
+    int:        _pack_int,
+    float:      lambda val, out: out.extend(_d(0xcb, val)),
+    str:        _pack_str,
+    bytes:      _pack_bin,
+    list:       _pack_list,
+    tuple:      _pack_list,
+    array:      _pack_array,
+    dict:       _pack_dict,
+}
+
+def msgpack_pack(val, out=None):
+    """Encode a value as MessagePack.
+
+    :Parameters:
+        - val: None, bool, int, float, str, bytes, list/tuple/array, dict
+        - out: bytearray to append to, default: new bytearray
+    :Returns:
+        out
+    :Raises:
+        TypeError for other types
+    """
+    if out is None:
+        out = bytearray()
+    try:
+        _PACK[type(val)](val, out)
+    except KeyError:
+        raise TypeError("cannot encode %s as MessagePack" % type(val).__name__) from None
+    return out
+
+class MsgpackWriter(Writer):
+    """MessagePack, one map per record (keys pre-encoded per schema)."""
+    def __init__(self, f, schema, buffer_size=BUFFER_SIZE):
+        super().__init__(f, schema, buffer_size)
+        self._buf = bytearray()
+        self._row = self._rows(False)
+        header = bytearray()
+        _pack_map_header(len(schema.fields), header)
+        self._header = bytes(header)
+        self._keys = tuple(bytes(msgpack_pack(name)) for name in schema.fields)
+
+    def write_many(self, records):
+        n = 0
+        buf, row, header, keys, pack = self._buf, self._row, self._header, self._keys, _PACK
+        for record in records:
+            buf += header
+            for key, val in zip(keys, row(record)):
+                buf += key
+                try:
+                    pack[type(val)](val, buf)
+                except KeyError:
+                    raise TypeError("cannot encode %s as MessagePack" % type(val).__name__) from None
+            n += 1
+            if len(buf) >= self.buffer_size:
+                self.flush()
+        self.count += n
+        return n
+
+    def flush(self):
+        if self._buf:
+            self.f.write(self._buf)
+            self._buf.clear()
+        self.f.flush()
+
+# writer per format
+WRITERS = {
+    "csv":     CsvWriter,
+    "ndjson":  NdjsonWriter,
+    "msgpack": MsgpackWriter,
+}
+
+#=========================================
@@ -0,0 +1,704 @@
+"""SD-card: Get card information.
+
+Get/parse SD-card information from CID/CSD.
+
+:Usage:
+    see --help
+
+:Exit code:
+    0:   success
+    2:   invalid commandline-parameters
+    19:  device not found (ENODEV)
+    5:   cannot read from device (EIO)
+    22:  invalid CID data (EINVAL)
+         (--batch: at least one line contained invalid data)
+    130: aborted (e.g. via Ctrl-C) (ECONNABORTED)
+
+:Author:    Advamation / Roland Freikamp <support@advamation.de>
+:Version:   2026-10-17
+:Copyright: Advamation <info@advamation.de>
+:License:   MIT
+"""
+
+__version__ = "1.2.0"
+__author__ = "Advamation <support@advamation.de>"
+
+import os
+import sys
+import errno
+# re, argparse, json: imported when needed (startup-time, see main())
+
+from ._cli import args_fast as _args_fast
+from . import timing as _timing
+
+#=========================================
+
+# root-directory of /dev and /sys; set for simulated cards (see adva_sdcard.sim)
+ROOT = ""
+
+def sysfs_get(dev="/dev/mmcblk0", name="cid"):
+    """Get information of (micro)SD-card from /sys/block/*/device/NAME.
+
+    This currently only works for devices with mmc_host,
+    esp. Raspberry Pi. It does not work with USB-cardreaders.
+
+    :Returns:
+        The contents as (stripped) string.
+    :Raises:
+        ValueError for invalid arguments,
+        FileNotFoundError if device cannot be found,
+        IOError if device cannot be opened/read.
+    """
+    if not dev.startswith("/dev/"):
+        raise ValueError("'dev' must start with '/dev/'")
+    t = _timing.clock() if _timing.HOOKS else None
+    if not os.path.exists(ROOT + dev):
+        raise FileNotFoundError("'%s' does not exist." % dev)
+    dev = os.path.realpath(ROOT + dev)[len(ROOT):]
+    if not dev.startswith("/dev/") or "/" in dev[5:]:
+        raise ValueError("'dev' link destination must be '/dev/...'")
+    path = ROOT + "/sys/block/%s/device/%s" % (dev[5:], name)
+    if not os.path.exists(path):
+        raise FileNotFoundError("'%s' does not exist." % path)
+
+    with open(path, 'r', encoding="utf-8") as f:
+        val = f.read(100).strip()
+    if t is not None:
+        _timing.record("sysfs." + name, dev, t)
+    return val
+
+def cid_get(dev="/dev/mmcblk0/"):
+    """Get CID from (micro)SD-card.
+
+    This currently only works for devices with mmc_host,
+    esp. Raspberry Pi. It does not work with USB-cardreaders.
+
+    :Returns:
+        The CID as hexadecimal string.
+    :Raises:
+        see sysfs_get()
+    """
+    return sysfs_get(dev, "cid")
+
+def cid_parse(cid):
+    """Parse CID-information.
+
+    :Parameters:
+        - cid: CID-data as hexadecimal string
+    :Returns:
+        SD-card info dict, with:
+        - cid
+        - manfid (MID, Manufacturer ID)
+        - oemid  (OID, OEM/Application ID)
+        - name   (PNM, Product Name)
+        - rev    (PRV, Product Revision)
+        - serial (PSN, Serial Number)
+        - date   (MDT, Manufacture Date)
+        - crc    (CRC, checksum)
+    """
+    return dict(zip(CID_FIELDS, _cid_values(cid)))
+
+# fields of cid_parse() (and records.Cid), in order
+CID_FIELDS = ("cid", "manfid", "oemid", "name", "rev", "serial", "date", "crc")
+
+def _cid_values(cid):
+    """Decode CID (hexadecimal string) into a tuple of the CID_FIELDS."""
+    i = int(cid, 16)
+    return (
+        i,
+         (i>>120) & 0xFF,                                           # manfid
+        ((i>>104) & 0xFFFF).to_bytes(2, "big").decode("latin-1"),  # oemid
+        ((i>> 64) & 0xFFFFFFFFFF).to_bytes(5, "big").decode("latin-1"), # name
+        "%d.%d" % ((i >> 60)&0xF, (i>>56)&0xF),                     # rev
+         (i>> 24) & 0xFFFFFFFF,                                     # serial
+        "%04d-%02d" % (2000+((i>>12)&0xFF), (i>>8)&0xF),            # date
+         (i>>  1) & 0x7F,                                           # crc, see cid_validate()
+    )
+
+def cid_print(info):
+    """Print parsed CID-information.
+
+    :Parameters:
+        - info: CID-info, parsed by cid_parse()
+    """
+    print("CID:                   %032x" % info["cid"])
+    print("Manufacturer ID:       0x%02x" % info["manfid"])
+    print("OEM/Application ID:    %s" % info["oemid"])
+    print("Product name:          %s" % info["name"])
+    print("Product revision:      %s" % info["rev"])
+    print("Product serial number: 0x%08x" % info["serial"])
+    print("Manufacturing date:    %s" % info["date"])
+    print("Checksum:              0x%02x" % info["crc"])
+
+def cid_parse_lines(lines, strict=False):
+    """Parse CIDs line by line.
+
+    :Parameters:
+        - lines:  iterable of CIDs as hexadecimal strings, e.g. a file;
+                  empty lines are skipped
+        - strict: treat CIDs with invalid checksum as malformed
+    :Returns:
+        generator of (lineno, info, error): CID-info (see cid_parse())
+        and None, or None and an error-message for malformed lines
+    """
+    for lineno, cid in enumerate(lines, 1):
+        cid = cid.strip()
+        if not cid:
+            continue
+        if len(cid) != 32:
+            yield lineno, None, "CID must be a 16-byte hex string"
+            continue
+        if strict:
+            errors = cid_validate(cid)
+            if errors:
+                yield lineno, None, ", ".join(errors)
+                continue
+        try:
+            yield lineno, cid_parse(cid), None
+        except ValueError as err:
+            yield lineno, None, str(err)
+
+#----------------------
+def csd_parse(csd):
+    """Parse CSD-information.
+
+    :Parameters:
+        - csd: CSD-data as hexadecimal string
+    :Returns:
+        SD-card info dict, with:
+        - csd
+        - CSD_STRUCTURE
+        - TAAC
+        - NSAC
+        - TRAN_SPEED
+        - CCC
+        - READ_BL_LEN
+        - READ_BL_PARTIAL
+        - WRITE_BLK_MISALIGN
+        - READ_BLK_MISALIGN
+        - DSR_IMP
+        - C_SIZE
+        - ERASE_BLK_EN
+        - SECTOR_SIZE
+        - WP_GRP_SIZE
+        - WP_GRP_ENABLE
+        - R2W_FACTOR
+        - WRITE_BL_LEN
+        - WRITE_BL_PARTIAL
+        - FILE_FORMAT_GRP
+        - COPY
+        - PERM_WRITE_PROTECT
+        - TMP_WRITE_PROTECT
+        - FILE_FORMAT
+        - CRC
+    """
+    return dict(zip(CSD_FIELDS, _csd_values(csd)))
+
+# fields of csd_parse() (and records.Csd), in order
+CSD_FIELDS = (
+    "csd", "CSD_STRUCTURE", "TAAC", "NSAC", "TRAN_SPEED", "CCC", "READ_BL_LEN",
+    "READ_BL_PARTIAL", "WRITE_BLK_MISALIGN", "READ_BLK_MISALIGN", "DSR_IMP", "C_SIZE",
+    "ERASE_BLK_EN", "SECTOR_SIZE", "WP_GRP_SIZE", "WP_GRP_ENABLE", "R2W_FACTOR",
+    "WRITE_BL_LEN", "WRITE_BL_PARTIAL", "FILE_FORMAT_GRP", "COPY", "PERM_WRITE_PROTECT",
+    "TMP_WRITE_PROTECT", "FILE_FORMAT", "CRC",
+)
+
+def _csd_values(csd):
+    """Decode CSD (hexadecimal string) into a tuple of the CSD_FIELDS."""
+    i = int(csd, 16)
+    structure = (i>>126) & 0x03
+    return (
+        i,
+        structure,              # CSD_STRUCTURE
+        (i>>112) & 0xFF,        # TAAC
+        (i>>104) & 0xFF,        # NSAC
+        (i>> 96) & 0xFF,        # TRAN_SPEED
+        (i>> 84) & 0x7FF,       # CCC
+        (i>> 80) & 0x0F,        # READ_BL_LEN
+        (i>> 79) & 0x01,        # READ_BL_PARTIAL
+        (i>> 78) & 0x01,        # WRITE_BLK_MISALIGN
+        (i>> 77) & 0x01,        # READ_BLK_MISALIGN
+        (i>> 76) & 0x01,        # DSR_IMP
+        # C_SIZE (CSD 1.0: VDD_*_CURR_*, C_SIZE_MULT not decoded)
+        (i>> 62) & 0x7FF if structure == 0 else (i>> 48) & 0x3FFFFF,
+        (i>> 46) & 0x01,        # ERASE_BLK_EN
+        (i>> 39) & 0x7F,        # SECTOR_SIZE
+        (i>> 32) & 0x7F,        # WP_GRP_SIZE
+        (i>> 31) & 0x01,        # WP_GRP_ENABLE
+        (i>> 26) & 0x07,        # R2W_FACTOR
+        (i>> 22) & 0x0F,        # WRITE_BL_LEN
+        (i>> 21) & 0x01,        # WRITE_BL_PARTIAL
+        (i>> 15) & 0x01,        # FILE_FORMAT_GRP
+        (i>> 14) & 0x01,        # COPY
+        (i>> 13) & 0x01,        # PERM_WRITE_PROTECT
+        (i>> 12) & 0x01,        # TMP_WRITE_PROTECT
+        (i>> 10) & 0x03,        # FILE_FORMAT
+        (i>>  1) & 0x7F,        # CRC, see csd_validate()
+    )
+
+# TAAC / TRAN_SPEED: time/rate value (bits 6..3) and unit (bits 2..0)
+CSD_TIME_VALUES = (0.0, 1.0, 1.2, 1.3, 1.5, 2.0, 2.5, 3.0, 3.5, 4.0, 4.5, 5.0, 5.5, 6.0, 7.0, 8.0)
+CSD_TAAC_UNITS_NS = (1, 10, 100, 1000, 10000, 100000, 1000000, 10000000)
+CSD_TRAN_SPEED_UNITS_KBIT = (100, 1000, 10000, 100000)
+
+def csd_timing(info):
+    """Decode the timing-fields of parsed CSD-information.
+
+    Note that for SDHC/SDXC (CSD_STRUCTURE 1), TAAC/NSAC are fixed
+    values and not meaningful.
+
+    :Parameters:
+        - info: CSD-information, see csd_parse()
+    :Returns:
+        dict with:
+        - taac_ns:         asynchronous part of the read access time (ns)
+        - nsac_cycles:     clock-dependent part of the read access time (clock cycles)
+        - read_access_ns:  read access time (TAAC + NSAC at the maximum clock, ns)
+        - write_access_ns: write access time (read_access_ns * R2W-factor, ns)
+        - r2w_factor:      write/read access time factor
+        - tran_speed_mbit: maximum transfer rate per data line (Mbit/s)
+        - bus_mbyte_s:     maximum transfer rate with 4-bit bus (MB/s)
+        - read_block_bytes: maximum read block length (bytes)
+    :Raises:
+        ValueError for reserved values.
+    """
+    taac, speed = info["TAAC"], info["TRAN_SPEED"]
+    if (taac >> 3) & 0x0F == 0 or (speed >> 3) & 0x0F == 0 or speed & 0x07 >= len(CSD_TRAN_SPEED_UNITS_KBIT):
+        raise ValueError("reserved TAAC/TRAN_SPEED value")
+    taac_ns = CSD_TIME_VALUES[(taac >> 3) & 0x0F] * CSD_TAAC_UNITS_NS[taac & 0x07]
+    tran_speed_mbit = CSD_TIME_VALUES[(speed >> 3) & 0x0F] * CSD_TRAN_SPEED_UNITS_KBIT[speed & 0x07] / 1000.0
+    nsac_cycles = info["NSAC"] * 100
+    read_access_ns = taac_ns + nsac_cycles * 1000.0 / tran_speed_mbit
+    r2w_factor = 1 << info["R2W_FACTOR"]
+    return {
+        "taac_ns":          taac_ns,
+        "nsac_cycles":      nsac_cycles,
+        "read_access_ns":   read_access_ns,
+        "write_access_ns":  read_access_ns * r2w_factor,
+        "r2w_factor":       r2w_factor,
+        "tran_speed_mbit":  tran_speed_mbit,
+        "bus_mbyte_s":      tran_speed_mbit * 4 / 8,
+        "read_block_bytes": 1 << info["READ_BL_LEN"],
+    }
+
+#----------------------
+# validation (CRC7)
+
+def _crc7_table():
+    """Precompute CRC7-table (polynomial x^7 + x^3 + 1).
+
+    The table works on the CRC shifted left by 1 bit (like the last
+    byte of CID/CSD: CRC7 << 1 | 1).
+    """
+    table = []
+    for i in range(256):
+        c = i
+        for _ in range(8):
+            c = ((c << 1) ^ 0x12) & 0xFF if c & 0x80 else (c << 1) & 0xFF
+        table.append(c)
+    return bytes(table)
+
+CRC7_TABLE = _crc7_table()
+
+def crc7(data):
+    """Calculate CRC7 (as used for CID and CSD).
+
+    :Parameters:
+        - data: bytes
+    :Returns:
+        CRC7 (0..0x7F)
+    """
+    crc = 0
+    table = CRC7_TABLE
+    for byte in data:
+        crc = table[crc ^ byte]
+    return crc >> 1
+
+def _register_validate(reg, name):
+    """Validate 16-byte register (CID/CSD) as hex string.
+
+    :Returns:
+        list of error-messages (empty if valid)
+    """
+    if len(reg) != 32:
+        return ["%s must be a 16-byte hex string" % name]
+    try:
+        b = bytes.fromhex(reg)
+    except ValueError:
+        return ["%s must be a 16-byte hex string" % name]
+    errors = []
+    if b[15] & 0x01 != 1:
+        errors.append("%s end bit is not 1" % name)
+    crc = crc7(b[:15])
+    if b[15] >> 1 != crc:
+        errors.append("%s checksum mismatch (0x%02x, expected 0x%02x)" % (name, b[15] >> 1, crc))
+    return errors
+
+def cid_validate(cid):
+    """Validate CID (length, CRC7, end bit).
+
+    :Parameters:
+        - cid: CID-data as hexadecimal string
+    :Returns:
+        list of error-messages (empty if valid)
+    """
+    return _register_validate(cid, "CID")
+
+def csd_validate(csd):
+    """Validate CSD (length, CRC7, end bit).
+
+    :Parameters:
+        - csd: CSD-data as hexadecimal string
+    :Returns:
+        list of error-messages (empty if valid)
+    """
+    return _register_validate(csd, "CSD")
+
+def cid_validate_lines(lines, validate=cid_validate):
+    """Validate many CIDs (or CSDs), without parsing them.
+
+    :Parameters:
+        - lines:    iterable of CIDs as hexadecimal strings, e.g. a file;
+                    empty lines are skipped
+        - validate: cid_validate or csd_validate
+    :Returns:
+        generator of (lineno, errors) for all invalid lines
+    """
+    for lineno, reg in enumerate(lines, 1):
+        reg = reg.strip()
+        if reg:
+            errors = validate(reg)
+            if errors:
+                yield lineno, errors
+
+#----------------------
+def devices_list(sysblock=None):
+    """List all mmc-block-devices.
+
+    Hardware-partitions (mmcblk*boot*, mmcblk*rpmb) and partitions
+    are skipped.
+
+    :Parameters:
+        - sysblock: sysfs-directory, default: /sys/block
+
+    :Returns:
+        sorted list of devices, e.g. ["/dev/mmcblk0", "/dev/mmcblk1"]
+    """
+    try:
+        names = os.listdir(sysblock or ROOT + "/sys/block")
+    except FileNotFoundError:
+        return []
+    import re
+    names = [n for n in names if re.fullmatch(r"mmcblk[0-9]+", n)]
+    return ["/dev/%s" % n for n in sorted(names, key=lambda n: int(n[6:]))]
+
+def _error(err):
+    """Convert exception into error-dict {"errno": ..., "message": ...}."""
+    if hasattr(err, "returncode"):     # subprocess.CalledProcessError
+        return {"errno": err.returncode, "message": (err.stderr or "").strip()}
+    if isinstance(err, OSError) and err.errno:
+        return {"errno": err.errno, "message": err.strerror or str(err)}
+    if isinstance(err, FileNotFoundError):
+        return {"errno": errno.ENODEV, "message": str(err)}
+    if isinstance(err, ValueError):
+        return {"errno": errno.EINVAL, "message": str(err)}
+    return {"errno": errno.EIO, "message": str(err)}
+
+def device_scan(dev, smarttool=None, smart_backend="auto", strict=False):
+    """Get CID, CSD, manfid and SMART of a (micro)SD-card.
+
+    Errors are recorded per item instead of being raised.
+
+    :Parameters:
+        - dev:           device, e.g. /dev/mmcblk0
+        - smarttool:     adva-sdcard-smart module, or exception if it
+                         cannot be imported (-> SMART-error)
+        - smart_backend: backend for smarttool.smart_get_any()
+        - strict:        reject invalid CID, CSD and SMART (see cid_validate(),
+                         csd_validate(), smart_validate() in adva-sdcard-smart)
+    :Returns:
+        dict with:
+        - device
+        - cid    (see cid_parse(), or None)
+        - csd    (see csd_parse(), or None)
+        - manfid (or None)
+        - smart  (see smart_parse() in adva-sdcard-smart, or None)
+        - errors (dict with "errno" and "message" for each failed item)
+    """
+    t = _timing.clock() if _timing.HOOKS else None
+    result = {"device": dev, "cid": None, "csd": None, "manfid": None, "smart": None, "errors": {}}
+    cid = None
+    try:
+        cid = _checked(cid_get(dev), cid_validate, strict)
+        result["cid"] = cid_parse(cid)
+    except Exception as err:
+        result["errors"]["cid"] = _error(err)
+    for key, func in (("csd", lambda: csd_parse(_checked(sysfs_get(dev, "csd"), csd_validate, strict))),
+                      ("manfid", lambda: int(sysfs_get(dev, "manfid"), 16))):
+        try:
+            result[key] = func()
+        except Exception as err:
+            result["errors"][key] = _error(err)
+    try:
+        if isinstance(smarttool, Exception):
+            raise smarttool
+        typ, data = smarttool.smart_get_any(dev, smart_backend)
+        if strict:
+            errors = smarttool.smart_validate(typ, data, cid)
+            if errors:
+                raise ValueError("Invalid SMART data. (%s)" % ", ".join(errors))
+        result["smart"] = smarttool.smart_decode(typ, data)
+    except Exception as err:
+        result["errors"]["smart"] = _error(err)
+    if t is not None:
+        _timing.record("scan", dev, t)
+    return result
+
+def _checked(reg, validate, strict):
+    """Return reg, if it is valid or not strict; raise ValueError otherwise."""
+    if strict:
+        errors = validate(reg)
+        if errors:
+            raise ValueError(", ".join(errors))
+    return reg
+
+def devices_scan(devices=None, jobs=4, smart_backend="auto", strict=False):
+    """Scan several (micro)SD-cards concurrently.
+
+    All devices are read in a thread-pool with at most `jobs` threads,
+    so the total time depends on the slowest card.
+
+    :Parameters:
+        - devices:       list of devices, default: devices_list()
+        - jobs:          maximum number of concurrent threads
+        - smart_backend: see device_scan()
+        - strict:        see device_scan()
+    :Returns:
+        list of device_scan()-results, in order of devices
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    if devices is None:
+        devices = devices_list()
+    if not devices:
+        return []
+    try:
+        from . import smart as smarttool
+    except Exception as err:
+        smarttool = err
+    with ThreadPoolExecutor(max_workers=max(1, min(jobs, len(devices)))) as pool:
+        return list(pool.map(lambda dev: device_scan(dev, smarttool, smart_backend, strict), devices))
+
+#=========================================
+
+# fast path for frequent invocations, e.g. "-j -d DEVICE" (see main())
+MAIN_FAST_FLAGS = {
+    "-p": "parsable", "--parsable": "parsable", "-j": "json", "--json": "json",
+    "-s": "strict", "--strict": "strict", "--timings": "timings",
+}
+MAIN_FAST_OPTIONS = {"-d": "device", "--device": "device", "-F": "format", "--format": "format"}
+MAIN_FAST_DEFAULTS = {
+    "parsable": False, "json": False, "device": None, "all_devices": False,
+    "jobs": 4, "batch": None, "strict": False, "cid": None, "timings": False, "format": None,
+}
+
+def _parser():
+    """Create commandline-parser for main()."""
+    import argparse
+    parser = argparse.ArgumentParser(
+        description="""Get/parse microSD-/SD-card-information from mmc-device.
+Version %s by %s.""" % (__version__, __author__),
+        formatter_class=argparse.RawDescriptionHelpFormatter,   # for keeping newlines in description
+        epilog="""
+Examples:
+    adva-sdcard-info 275048415...
+    adva-sdcard-info -d /dev/mmcblk0
+    adva-sdcard-info --all-devices
+Note that this does not work with USB-cardreaders.\n""")
+
+    group = parser.add_mutually_exclusive_group(required=False)
+    group.add_argument("-p", "--parsable", action='store_true', help="Print output in parsable format.")
+    group.add_argument("-j", "--json",     action='store_true', help="Print output in JSON format.")
+    group.add_argument("-F", "--format",   choices=("csv", "ndjson", "msgpack"), help="Print output as CSV (header + rows), NDJSON or MessagePack (see adva_sdcard.export).")
+
+    parser.add_argument("-d", "--device", action='store', help="Retrieve CID directly from SD-card.")
+    parser.add_argument("-A", "--all-devices", action='store_true', help="Scan all mmc-devices concurrently (CID, CSD, manfid, SMART), and print the result as JSON.")
+    parser.add_argument("--jobs", action='store', type=int, default=4, help="Maximum number of devices scanned concurrently with --all-devices, default: 4")
+    parser.add_argument("-B", "--batch", nargs='*', type=argparse.FileType('r'), metavar="FILE", help="Parse many CIDs (one per line) from FILEs (default: stdin), print JSON-lines.")
+    parser.add_argument("-s", "--strict", action='store_true', help="Reject invalid data (CRC7 of CID/CSD, SMART-checks).")
+    parser.add_argument("--timings", action='store_true', help="Print the duration of each stage (sysfs-reads, parse, output, ...) to stderr, as 'timing: STAGE DEVICE MS ms' (see python3 -m adva_sdcard.timing).")
+    parser.add_argument("cid", nargs='?', type=str, help='CID as hex string or file containing the CID, or - for stdin')
+    parser.add_argument("--version", action='version', version="%(prog)s " + __version__)
+    return parser
+
+def main(arglist=None):
+    """Get/parse CID and print result.
+
+    Frequent invocations (e.g. "-d DEVICE") are parsed without argparse,
+    and json is only imported if needed, since the startup-time dominates
+    the runtime (see bench/bench-startup.py).
+
+    See module docsting for exit codes.
+    """
+    t0 = _timing.clock()
+    # parse arguments
+    args = _args_fast(sys.argv[1:] if arglist is None else arglist,
+                      MAIN_FAST_FLAGS, MAIN_FAST_OPTIONS, MAIN_FAST_DEFAULTS)
+    if args is not None and (args.parsable + args.json + (args.format is not None) > 1 or
+                             args.format not in (None, "csv", "ndjson", "msgpack")):
+        args = None     # invalid: let argparse report the error
+    if args is None:
+        parser = _parser()
+        if arglist is None  and  len(sys.argv) <= 1:
+            parser.print_help(sys.stderr)
+            return 0
+        args = parser.parse_args(arglist)
+
+    if not args.timings:
+        return _main(args, None)
+    _timing.hook_add(_timing.stderr_hook)
+    try:
+        return _main(args, _timing.record("args", args.device, t0))
+    finally:
+        _timing.hook_remove(_timing.stderr_hook)
+
+def _writer(args, f=None):
+    """Writer of adva_sdcard.export for --format.
+
+    :Parameters:
+        - f: binary file, default: stdout
+    """
+    from .export import SCHEMAS, WRITERS
+    return WRITERS[args.format](f or sys.stdout.buffer, SCHEMAS["cid"])
+
+def _main(args, t):
+    """Process the parsed arguments of main().
+
+    :Parameters:
+        - args: parsed commandline-arguments
+        - t:    start of the next stage for --timings (see
+                adva_sdcard.timing), or None
+    :Returns:
+        exit code
+    """
+    # batch: parse + print line by line
+    if args.batch is not None:
+        if args.device or args.cid or args.all_devices or args.parsable:
+            print("ERROR: Invalid arguments, --batch cannot be combined with DEVICE, CID, --all-devices or -p.", file=sys.stderr)
+            return 2
+        errors = 0
+        write = sys.stdout.write
+        import json
+        encode = json.JSONEncoder().encode
+        writer = _writer(args) if args.format else None
+        for f in args.batch or [sys.stdin]:
+            for lineno, info, error in cid_parse_lines(f, args.strict):
+                if error is not None:
+                    print("ERROR: %s:%d: Invalid CID data. (%s)" % (f.name, lineno, error), file=sys.stderr)
+                    errors += 1
+                elif writer is not None:
+                    writer.write(info)
+                else:
+                    write(encode(info) + "\n")
+        if writer is not None:
+            writer.close()
+        return 22 if errors else 0
+
+    # scan all devices
+    if args.all_devices:
+        if args.device or args.cid or args.format:
+            print("ERROR: Invalid arguments, --all-devices cannot be combined with DEVICE, CID or --format.", file=sys.stderr)
+            return 2
+        import json
+        devices = devices_scan(jobs=args.jobs, strict=args.strict)
+        if t is not None:
+            t = _timing.record("scan", None, t)
+        print(json.dumps({"devices": devices}))
+        if t is not None:
+            sys.stdout.flush()
+            _timing.record("output", None, t)
+        return 0 if devices else 19     # ENODEV
+
+    # retrieve CID
+    cid = None
+    if args.device:
+        try:
+            cid = cid_get(args.device)
+        except ValueError as err:
+            print("ERROR: %s" % str(err).replace("'dev'", 'DEVICE'))
+            return 2
+        except FileNotFoundError as err:
+            print("ERROR: %s" % str(err))
+            return 19   # ENODEV
+        except IOError as err:
+            print("ERROR: %s" % str(err))
+            return 5    # EIO
+    elif args.cid and args.cid != "-":
+        if len(args.cid) == 32:
+            try:
+                int(args.cid, 16)
+                cid = args.cid
+            except ValueError:
+                pass
+        if not cid:
+            if not os.path.isfile(args.cid):
+                print("ERROR: Invalid arguments, 'cid' must be a 16-byte hex string or a regular file. (%s)" % args.cid)
+                return 2
+            try:
+                with open(args.cid, 'r', encoding="utf-8") as f:
+                    cid = f.read(100).strip()
+            except IOError as err:
+                print("ERROR: Cannot open '%s' (%s)." % (args.cid, err), file=sys.stderr)
+                return 5    # EIO
+    else:
+        cid = sys.stdin.read(100).strip()
+    if t is not None:
+        t = _timing.record("read", args.device, t)
+
+    # check CID
+    if args.strict:
+        errors = cid_validate(cid)
+        if errors:
+            print("ERROR: Invalid CID data. (%s)" % ", ".join(errors), file=sys.stderr)
+            return 22   # EINVAL
+        if t is not None:
+            t = _timing.record("validate", args.device, t)
+
+    # parse CID
+    try:
+        info = cid_parse(cid)
+    except ValueError as err:
+        print("ERROR: Invalid CID data. (%s)" % err, file=sys.stderr)
+        return 22   # EINVAL
+    if t is not None:
+        t = _timing.record("parse", args.device, t)
+
+    # print CID-data
+    if   args.format:
+        with _writer(args) as writer:
+            writer.write(info)
+    elif args.json:
+        import json
+        print(json.dumps(info))
+    elif args.parsable:
+        for key,val in info.items():
+            if isinstance(val, int):
+                print("%s: 0x%x" % (key, val))
+            else:
+                print("%s: %s" % (key, val))
+    else:
+        cid_print(info)
+    if t is not None:
+        sys.stdout.flush()
+        _timing.record("output", args.device, t)
+
+    return 0
+
+#=========================================
+if __name__ == '__main__':
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        print("\nAborted.")
+        sys.exit(130)   # ECONNABORTED
+
+#=========================================
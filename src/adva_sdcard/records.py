@@ -0,0 +1,163 @@
+"""SD-card: Compact, immutable record types for CID, CSD and SMART-data.
+
+The parse/decode-functions of adva_sdcard.info and adva_sdcard.smart
+return dicts, which is convenient for printing and JSON, but costs
+~1 KiB per SMART-record. For keeping many records in memory (e.g.
+fleet-inventories, histories), these record types store the same
+fields as slotted, immutable tuples (attribute-access, like
+namedtuples):
+
+- Cid:   fields of info.cid_parse()
+- Csd:   fields of info.csd_parse()
+- Smart: base of the SMART-records; one type per layout with the fields
+         of smart.smart_decode() (SmartA, SmartT2GB4GB, SmartT8GB)
+
+Differences to the dicts:
+
+- per-die counts (Apacer) are array('B') instead of lists
+- strings (versions, names, dates, ...) are interned, so records of the
+  same card-types share them
+
+`to_dict()` returns exactly the dicts of the parse/decode-functions.
+
+Example::
+
+    from adva_sdcard.records import Cid, Smart
+    cid = Cid.parse(open("/sys/block/mmcblk0/device/cid").read())
+    smart = Smart.parse("A-...")
+    print(cid.name, smart.endurance, smart.blocks_bad_later_per_die)
+
+:Author:    Advamation / Roland Freikamp <support@advamation.de>
+:Version:   2026-10-17
+:Copyright: Advamation <info@advamation.de>
+:License:   MIT
+"""
+
+from array import array
+from collections import namedtuple
+from sys import intern
+
+from .info import CID_FIELDS, CSD_FIELDS, _cid_values, _csd_values
+from .smart import SMART_FIELDS, SMART_STR_KINDS, smart_layout
+
+#=========================================
+
+class Record:
+    """Base of the record types (mixin for namedtuples)."""
+    __slots__ = ()
+
+    def to_dict(self):
+        """Convert into a dict (like the parse/decode-functions).
+
+        :Returns:
+            dict field -> value, arrays converted to lists
+        """
+        return {name: list(val) if type(val) is array else val
+                for name, val in zip(self._fields, self)}
+
+class Cid(Record, namedtuple("Cid", CID_FIELDS)):
+    """Parsed CID, fields see info.cid_parse()."""
+    __slots__ = ()
+
+    @classmethod
+    def parse(cls, cid):
+        """Parse CID.
+
+        :Parameters:
+            - cid: CID as hexadecimal string
+        :Raises:
+            ValueError for invalid hexadecimal strings
+        """
+        v = _cid_values(cid)
+        return tuple.__new__(cls, (v[0], v[1], intern(v[2]), intern(v[3]), intern(v[4]), v[5], intern(v[6]), v[7]))
+
+class Csd(Record, namedtuple("Csd", CSD_FIELDS)):
+    """Parsed CSD, fields see info.csd_parse()."""
+    __slots__ = ()
+
+    @classmethod
+    def parse(cls, csd):
+        """Parse CSD.
+
+        :Parameters:
+            - csd: CSD as hexadecimal string
+        :Raises:
+            ValueError for invalid hexadecimal strings
+        """
+        return tuple.__new__(cls, _csd_values(csd))
+
+#=========================================
+
+class Smart(Record):
+    """Base of the SMART-records (one subclass per layout).
+
+    :Variables:
+        - layout: layout of the subclass, see smart.SMART_LAYOUTS
+    """
+    __slots__ = ()
+    layout = None
+
+    @classmethod
+    def decode(cls, typ, b):
+        """Decode raw SMART-data (like smart.smart_decode()).
+
+        :Parameters:
+            - typ: SMART-type ('A' for Apacer, 'T' for Transcend)
+            - b:   raw SMART-data as bytes
+        :Returns:
+            SMART-record of the layout (e.g. SmartA), or None for unknown
+            types
+        """
+        record = SMART_RECORDS.get(smart_layout(typ, b))
+        if record is None:
+            return None
+        values = record._layout.decode_tuple(b)
+        if not record._fixups:
+            return tuple.__new__(record, values)
+        values = list(values)
+        for i, convert in record._fixups:
+            values[i] = convert(values[i])
+        return tuple.__new__(record, values)
+
+    @classmethod
+    def parse(cls, raw):
+        """Parse raw SMART-data (like smart.smart_parse()).
+
+        :Parameters:
+            - raw: raw SMART-data as string TYPE-HEX
+        :Returns:
+            see decode()
+        """
+        typ, data = raw.split("-", 1)
+        return cls.decode(typ, bytes.fromhex(data))
+
+def _record_fixups(layout):
+    """Conversions of the values of layout.decode_tuple() for the records.
+
+    :Returns:
+        list of (index, convert): array('B') for bytes (per die),
+        interned strings
+    """
+    fixups = []
+    for i, (name, kind, words, arg) in enumerate(layout.fields):
+        if kind == "bytes":
+            fixups.append((i, lambda val: array('B', val)))
+        elif kind in SMART_STR_KINDS or kind == "version":
+            fixups.append((i, intern))
+    return fixups
+
+# record types per layout (see SMART_LAYOUTS)
+SMART_RECORDS = {}
+for _layout in SMART_FIELDS.values():
+    _name = "Smart" + _layout.name.replace("_", "")
+    SMART_RECORDS[_layout.name] = globals()[_name] = type(_name, (Smart, namedtuple(_name, _layout.names)), {
+        "__slots__": (),
+        "__doc__":   "Decoded SMART-data of layout %s, fields see smart.smart_decode()." % _layout.name,
+        "__module__": __name__,
+        "layout":    _layout.name,
+        "_layout":   _layout,
+        "_fixups":   tuple(_record_fixups(_layout)),
+    })
+del _layout, _name
+
+#=========================================
@@ -0,0 +1,541 @@
+"""SD-card: Health-rules over SMART-streams.
+
+Rules on the SMART-fields (see smart_parse()) and their changes, one
+rule per line:
+
+    [NAME:] FIELD OP VALUE                          value of the sample
+    [NAME:] FIELD delta OP VALUE                    change since the previous
+                                                    sample of the card
+    [NAME:] FIELD grew by OP VALUE in DURATION      increase within DURATION
+                                                    (value - minimum)
+    [NAME:] FIELD dropped by OP VALUE in DURATION   decrease within DURATION
+                                                    (maximum - value)
+
+- FIELD:    numeric SMART-field (see RULE_FIELDS), e.g. endurance
+- OP:       <, <=, >, >=, ==, !=
+- DURATION: seconds, or number with unit s, m, h, d (e.g. 24h)
+- NAME:     name of the rule in the events, default: the rule itself
+
+Examples::
+
+    endurance < 20
+    blocks_bad grew by > 5 in 24h
+    power_off_abnormal_count delta > 0
+
+A set of rules is compiled once into one evaluator (generated code;
+each field is read once per sample, windows are monotonic deques), and
+applied incrementally to the samples of each card (state per card), so
+streams of millions of samples are checked in one pass. The samples of
+a card must be in time order; samples without a field (e.g. of another
+SMART-layout) leave its rules unchanged.
+
+Events (dicts, JSON-lines on the commandline) are emitted when a rule
+of a card starts firing and when it is resolved (or, with `every`, for
+every sample which matches):
+
+    {"time", "host", "card", "device", "rule", "state" ("firing" or
+     "resolved"), "field", "value", "change" (delta/grew/dropped, else
+     null), "since" (start of firing)}
+
+Cards are identified by MANFID-SERIAL of the CID (like
+adva-sdcard-history / -inventory), else by device.
+
+The commandline-filter (see --help) reads JSON-lines (samples of
+adva-sdcard-monitor / -collector, adva-sdcard-history export,
+adva-sdcard-info -A) and raw SMART-lines (`[TIMESTAMP] TYPE-HEX`, e.g.
+adva-sdcard-history export -r, adva-sdcard-smart-get, with optional
+`device=`, `cid=`, `host=`, `time=` like the collector):
+
+    adva-sdcard-history export -r 74-30065689 | python3 -m adva_sdcard.rules -r "blocks_bad grew by > 5 in 24h"
+    python3 -m adva_sdcard.rules -f health.rules collected/*.ndjson
+
+Example::
+
+    from adva_sdcard.rules import RuleEngine
+    engine = RuleEngine(["endurance < 20", "blocks_bad grew by > 5 in 24h"])
+    for event in engine.feed(smart, card="74-30065689", t=time.time()):
+        print(event)
+
+:Usage:
+    see --help
+
+:Exit code:
+    0:   success
+    2:   invalid commandline-parameters / rules
+    5:   cannot read file (EIO)
+    22:  invalid samples (EINVAL)
+    130: aborted (e.g. via Ctrl-C) (ECONNABORTED)
+
+:Author:    Advamation / Roland Freikamp <support@advamation.de>
+:Version:   2026-10-17
+:Copyright: Advamation <info@advamation.de>
+:License:   MIT
+"""
+
+__version__ = "1.2.0"
+__author__ = "Advamation <support@advamation.de>"
+
+import re
+import sys
+from collections import deque
+
+from .smart import SMART_LAYOUT_TABLE
+
+#=========================================
+# rules
+
+def _rule_fields():
+    """Fields of SMART_LAYOUT_TABLE which are numeric in all layouts."""
+    kinds = {}
+    for _, _, fields in SMART_LAYOUT_TABLE.values():
+        for name, kind, _, _ in fields:
+            kinds.setdefault(name, set()).add(kind)
+    return tuple(name for name, kind in kinds.items() if kind <= {"uint", "scaled", "sum"})
+
+# fields usable in rules
+RULE_FIELDS = _rule_fields()
+
+# comparison operators
+RULE_OPS = ("<", "<=", ">", ">=", "==", "!=")
+
+# rule kinds: kind -> description of `change`
+RULE_KINDS = {
+    "value":   None,
+    "delta":   "change since the previous sample",
+    "grew":    "value - minimum within the window",
+    "dropped": "maximum within the window - value",
+}
+
+_RULE_RE = re.compile(r"""
+    ^\s*(?:(?P<name>[^:]*\S)\s*:\s*)?
+    (?P<field>\w+)
+    (?:\s+(?P<delta>delta)|\s+(?P<change>grew|dropped)\s+by)?
+    \s*(?P<op><=|>=|==|!=|<|>)\s*
+    (?P<limit>[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)
+    (?:\s+in\s+(?P<window>\S+))?
+    \s*$""", re.X)
+
+_DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+def duration_parse(s):
+    """Parse a duration (seconds, or with unit s, m, h, d, e.g. 24h).
+
+    :Returns:
+        seconds (float)
+    :Raises:
+        ValueError for invalid/negative durations
+    """
+    unit = _DURATION_UNITS.get(s[-1:], None)
+    try:
+        seconds = float(s[:-1] if unit else s) * (unit or 1)
+    except ValueError:
+        seconds = None
+    if seconds is None or not seconds >= 0:
+        raise ValueError("invalid duration '%s'" % s)
+    return seconds
+
+class Rule:
+    """Parsed rule (see module docstring).
+
+    :Variables:
+        - text:   rule (normalized, without name)
+        - name:   name of the rule (default: text)
+        - field:  SMART-field
+        - kind:   "value", "delta", "grew" or "dropped" (see RULE_KINDS)
+        - op:     comparison operator (see RULE_OPS)
+        - limit:  value compared with (float)
+        - window: for grew/dropped: duration in seconds, else None
+    """
+    __slots__ = ("text", "name", "field", "kind", "op", "limit", "window")
+
+    def __init__(self, field, kind, op, limit, window=None, name=None, text=None):
+        """
+        :Parameters:
+            - see :Variables:
+            - text: rule as written (default: generated)
+        :Raises:
+            ValueError for invalid rules
+        """
+        if field not in RULE_FIELDS:
+            raise ValueError("unknown or non-numeric field '%s'" % field)
+        if kind not in RULE_KINDS or op not in RULE_OPS:
+            raise ValueError("invalid rule kind/operator '%s' '%s'" % (kind, op))
+        if (window is not None) != (kind in ("grew", "dropped")):
+            raise ValueError("'in DURATION' is needed for (only) 'grew by'/'dropped by'")
+        self.field, self.kind, self.op, self.limit, self.window = field, kind, op, float(limit), window
+        if text is None:
+            text = "%s %s%s %g" % (field, {"value": "", "delta": "delta ", "grew": "grew by ", "dropped": "dropped by "}[kind], op, limit)
+            if window is not None:
+                text += " in %gs" % window
+        self.text = text
+        self.name = name or self.text
+
+    @classmethod
+    def parse(cls, text):
+        """Parse a rule, e.g. "blocks_bad grew by > 5 in 24h".
+
+        :Raises:
+            ValueError for invalid rules
+        """
+        m = _RULE_RE.match(text)
+        if m is None:
+            raise ValueError("invalid rule '%s'" % text.strip())
+        kind = "delta" if m.group("delta") else m.group("change") or "value"
+        window = m.group("window")
+        return cls(m.group("field"), kind, m.group("op"), float(m.group("limit")),
+                   None if window is None else duration_parse(window), m.group("name"),
+                   " ".join(text[m.start("field"):].split()))
+
+    def __repr__(self):
+        return "<Rule %s>" % (self.text if self.name == self.text else "%s: %s" % (self.name, self.text))
+
+def rules_load(lines):
+    """Parse rules, one per line; empty lines and #-comments are skipped.
+
+    :Parameters:
+        - lines: iterable of strings, e.g. a file
+    :Returns:
+        list of Rules
+    :Raises:
+        ValueError for invalid rules (with line number)
+    """
+    rules = []
+    for lineno, line in enumerate(lines, 1):
+        line = line.split("#", 1)[0].strip()
+        if line:
+            try:
+                rules.append(Rule.parse(line))
+            except ValueError as err:
+                raise ValueError("line %d: %s" % (lineno, err)) from None
+    return rules
+
+def _rules_compile(rules, every):
+    """Generate the evaluator of a set of rules.
+
+    State per card: list with the firing-start (or None) of every rule,
+    followed by the previous value (delta) / window-deque (grew, dropped)
+    of the rules which need them.
+
+    :Returns:
+        (evaluate(g, t, st, ev), state()): evaluate one sample (g: field
+        getter, t: time, st: state of the card) and append the events as
+        (rule-index, firing, value, change, since) to ev; state(): new
+        state
+    """
+    lines = ["def evaluate(g, t, st, ev):"]
+    init = ["None"] * len(rules)
+    fields = {}
+    for i, rule in enumerate(rules):
+        if rule.field not in fields:
+            fields[rule.field] = "v%d" % len(fields)
+            lines.append("    %s = g(%r)" % (fields[rule.field], rule.field))
+        v = fields[rule.field]
+        lines.append("    if %s is not None:" % v)
+        if rule.kind == "value":
+            change = "None"
+            lines.append("        f = %s %s %r" % (v, rule.op, rule.limit))
+        elif rule.kind == "delta":
+            j = len(init)
+            init.append("None")
+            change = "c"
+            lines += ["        p = st[%d]" % j,
+                      "        st[%d] = %s" % (j, v),
+                      "        if p is not None:",
+                      "            c = %s - p" % v,
+                      "            f = c %s %r" % (rule.op, rule.limit)]
+        else:   # grew / dropped: window of candidates for the minimum / maximum, in time order
+            j = len(init)
+            init.append("deque()")
+            change = "c"
+            lines += ["        w = st[%d]" % j,
+                      "        while w and w[-1][1] %s %s:" % (">=" if rule.kind == "grew" else "<=", v),
+                      "            w.pop()",
+                      "        w.append((t, %s))" % v,
+                      "        while w[0][0] < t - %r:" % rule.window,
+                      "            w.popleft()",
+                      "        c = %s" % ("%s - w[0][1]" % v if rule.kind == "grew" else "w[0][1] - %s" % v),
+                      "        f = c %s %r" % (rule.op, rule.limit)]
+        event = "ev.append((%d, %%s, %s, %s, st[%d]))" % (i, v, change, i)
+        indent = "    " * (3 if rule.kind == "delta" else 2)     # delta: in the else-branch
+        lines += [indent + "if f:",
+                  indent + "    if st[%d] is None:" % i,
+                  indent + "        st[%d] = t" % i,
+                  indent + ("    " if every else "        ") + event % "True",
+                  indent + "elif st[%d] is not None:" % i,
+                  indent + "    " + event % "False",
+                  indent + "    st[%d] = None" % i]
+    lines += ["def state():",
+              "    return [%s]" % ", ".join(init)]
+    namespace = {"deque": deque}
+    exec(compile("\n".join(lines) + "\n", "<rules>", "exec"), namespace)
+    return namespace["evaluate"], namespace["state"]
+
+#=========================================
+# engine
+
+class RuleEngine:
+    """Incremental evaluation of rules over the samples of many cards.
+
+    :Variables:
+        - rules: Rules
+        - cards: dict card -> state (see _rules_compile())
+        - count: number of fed samples
+    """
+    def __init__(self, rules, every=False):
+        """
+        :Parameters:
+            - rules: Rules or rule-strings
+            - every: emit a "firing"-event for every matching sample,
+                     default: only when a rule starts firing
+        :Raises:
+            ValueError for invalid rules
+        """
+        self.rules = tuple(rule if isinstance(rule, Rule) else Rule.parse(rule) for rule in rules)
+        self.every = every
+        self.cards = {}
+        self.count = 0
+        self._evaluate, self._state = _rules_compile(self.rules, every)
+
+    def feed(self, smart, card, t, device=None, host=None):
+        """Evaluate the rules for one sample of a card.
+
+        :Parameters:
+            - smart:  SMART-information: dict (smart_parse()), SmartRecord
+                      (only the fields of the rules are decoded) or
+                      record (adva_sdcard.records)
+            - card:   card-key (see sample_card())
+            - t:      time of the sample (UNIX timestamp)
+            - device: device (for the events)
+            - host:   host (for the events)
+        :Returns:
+            list of events (see module docstring), usually empty
+        """
+        st = self.cards.get(card)
+        if st is None:
+            st = self.cards[card] = self._state()
+        self.count += 1
+        ev = []     # per call: no events of other calls (e.g. after an exception)
+        self._evaluate((lambda name: getattr(smart, name, None)) if isinstance(smart, tuple) else smart.get, t, st, ev)
+        if not ev:
+            return []
+        events = []
+        for i, firing, value, change, since in ev:
+            rule = self.rules[i]
+            events.append({"time": t, "host": host, "card": card, "device": device, "rule": rule.name,
+                           "state": "firing" if firing else "resolved", "field": rule.field,
+                           "value": value, "change": change, "since": since})
+        return events
+
+    def feed_many(self, samples):
+        """Evaluate the rules for many samples.
+
+        :Parameters:
+            - samples: iterable of (smart, card, t, device, host)
+        :Returns:
+            generator of events
+        """
+        feed = self.feed
+        for smart, card, t, device, host in samples:
+            events = feed(smart, card, t, device, host)
+            if events:
+                yield from events
+
+    def firing(self, card):
+        """Currently firing rules of a card.
+
+        :Returns:
+            dict rule-name -> start of firing (time)
+        """
+        st = self.cards.get(card)
+        if st is None:
+            return {}
+        return {rule.name: st[i] for i, rule in enumerate(self.rules) if st[i] is not None}
+
+    def forget(self, card):
+        """Drop the state of a card (e.g. removed card)."""
+        self.cards.pop(card, None)
+
+    def __repr__(self):
+        return "<RuleEngine: %d rules, %d cards>" % (len(self.rules), len(self.cards))
+
+#=========================================
+# samples
+
+def sample_card(cid, device=None, host=None):
+    """Card-key of a sample.
+
+    :Parameters:
+        - cid: parsed CID (dict, see cid_parse()), CID as hex-string or
+               None
+    :Returns:
+        MANFID-SERIAL (like adva-sdcard-history), else [HOST:]DEVICE,
+        else None
+    """
+    if isinstance(cid, str):
+        from .info import cid_parse
+        cid = cid_parse(cid)
+    if cid is not None:
+        return "%02x-%08x" % (cid["manfid"], cid["serial"])
+    if device is not None:
+        return device if host is None else "%s:%s" % (host, device)
+    return None
+
+def samples_parse_lines(lines, card=None, t=None):
+    """Parse samples (JSON-lines or raw SMART-lines, see module docstring).
+
+    Raw SMART-data is decoded lazily (SmartRecord), i.e. only the fields
+    used by the rules.
+
+    :Parameters:
+        - lines: iterable of strings, e.g. a file
+        - card:  card-key of samples without CID and device
+        - t:     time of samples without time
+    :Returns:
+        generator of (lineno, samples, error): list of samples (smart,
+        card, t, device, host) (see RuleEngine.feed_many()) and None, or
+        None and an error-message for malformed lines; samples without
+        SMART-data (e.g. read-errors) are skipped
+    """
+    import json
+    from .smart import SmartRecord, smart_check
+    for lineno, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            if line[0] == "{":
+                rec = json.loads(line)
+                host, ts = rec.get("host"), rec.get("time", t)
+                if "devices" in rec:            # adva-sdcard-info -A
+                    recs = rec["devices"]
+                elif "smart" in rec:            # adva-sdcard-monitor, -collector
+                    recs = (rec,)
+                else:                           # adva-sdcard-history export
+                    recs = ({"smart": rec, "device": None, "cid": None},)
+                samples = []
+                for dev in recs:
+                    smart = dev.get("smart")
+                    if smart and not isinstance(smart, dict):
+                        raise ValueError("SMART-data is not a JSON-object")
+                    if smart:
+                        device = dev.get("device")
+                        samples.append((smart, sample_card(dev.get("cid"), device, host) or card,
+                                        float(dev.get("time", ts)), device, host))
+                yield lineno, samples, None
+            else:                               # [key=val ...] [TIMESTAMP] TYPE-HEX
+                fields = line.split()
+                keys = {}
+                ts = t
+                for field in fields[:-1]:
+                    key, sep, val = field.partition("=")
+                    if sep:
+                        keys[key] = val
+                    else:
+                        ts = field
+                ts = keys.get("time", ts)
+                raw = smart_check(fields[-1])
+                device, host = keys.get("device"), keys.get("host")
+                yield lineno, [(SmartRecord(raw[0], bytes.fromhex(raw[2:])), sample_card(keys.get("cid"), device, host) or card,
+                                float(ts), device, host)], None
+        except (ValueError, TypeError, KeyError, AttributeError) as err:
+            yield lineno, None, str(err) or "invalid sample"
+
+#=========================================
+
+def main(arglist=None):
+    """Apply rules to samples and print the events as JSON-lines.
+
+    See module docstring for exit codes.
+    """
+    import argparse
+    import json
+    import time
+    parser = argparse.ArgumentParser(
+        prog="python3 -m adva_sdcard.rules",
+        description="""Check SMART-samples against health-rules, and print alerts as JSON-lines.
+Version %s by %s.""" % (__version__, __author__),
+        formatter_class=argparse.RawDescriptionHelpFormatter,   # for keeping newlines in description
+        epilog="""
+Rules:
+    [NAME:] FIELD OP VALUE
+    [NAME:] FIELD delta OP VALUE
+    [NAME:] FIELD grew by OP VALUE in DURATION
+    [NAME:] FIELD dropped by OP VALUE in DURATION
+    OP: < <= > >= == !=, DURATION: e.g. 3600, 30m, 24h, 7d
+    FIELD: %s
+
+Examples:
+    python3 -m adva_sdcard.rules -r "endurance < 20" -r "power_off_abnormal_count delta > 0" samples.ndjson
+    adva-sdcard-history export -r 74-30065689 | python3 -m adva_sdcard.rules -r "blocks_bad grew by > 5 in 24h"
+    python3 -m adva_sdcard.rules -f health.rules --firing collected/*.ndjson
+\n""" % ", ".join(RULE_FIELDS))
+    parser.add_argument("-r", "--rule", action='append', default=[], help="rule (repeatable)")
+    parser.add_argument("-f", "--rules", action='append', default=[], help="file with rules, one per line (repeatable)")
+    parser.add_argument("--every", action='store_true', help="Emit an event for every matching sample, default: only when a rule starts firing / is resolved.")
+    parser.add_argument("--firing", action='store_true', help="Only print the rules still firing at the end (per card), instead of the events.")
+    parser.add_argument("--card", action='store', help="card of samples without CID and device, default: the file name")
+    parser.add_argument("--time", action='store', type=float, help="time of samples without time (UNIX time), default: now")
+    parser.add_argument("file", nargs='*', help="files with samples (JSON-lines or raw SMART-lines), in time order, default: stdin")
+    parser.add_argument("--version", action='version', version="%(prog)s " + __version__)
+    args = parser.parse_args(arglist)
+
+    rules = []
+    try:
+        for line in args.rule:
+            rules.append(Rule.parse(line))
+        for name in args.rules:
+            with open(name, 'r', encoding="utf-8") as f:
+                rules += rules_load(f)
+    except ValueError as err:
+        print("ERROR: Invalid rule. (%s)" % err, file=sys.stderr)
+        return 2
+    except OSError as err:
+        print("ERROR: Cannot open '%s'. (%s)" % (name, err), file=sys.stderr)
+        return 5    # EIO
+    if not rules:
+        print("ERROR: Invalid arguments, no rules (use -r or -f).", file=sys.stderr)
+        return 2
+
+    engine = RuleEngine(rules, every=args.every)
+    ts = time.time() if args.time is None else args.time
+    encode = json.JSONEncoder(separators=(",", ":")).encode
+    out = sys.stdout
+    nerrors = 0
+    for name in args.file or ["-"]:
+        try:
+            f = sys.stdin if name == "-" else open(name, 'r', encoding="latin-1")
+        except OSError as err:
+            print("ERROR: Cannot open '%s'. (%s)" % (name, err), file=sys.stderr)
+            return 5    # EIO
+        with f:
+            feed = engine.feed
+            for lineno, samples, error in samples_parse_lines(f, args.card or name, ts):
+                if error is not None:
+                    nerrors += 1
+                    print("ERROR: %s:%d: Invalid sample. (%s)" % (name, lineno, error), file=sys.stderr)
+                    continue
+                for sample in samples:
+                    try:
+                        events = feed(*sample)
+                    except TypeError as err:    # e.g. non-numeric values
+                        nerrors += 1
+                        print("ERROR: %s:%d: Invalid sample. (%s)" % (name, lineno, err), file=sys.stderr)
+                        continue
+                    if events and not args.firing:
+                        out.write("".join(encode(event) + "\n" for event in events))
+    if args.firing:
+        for card in engine.cards:
+            for rule, since in engine.firing(card).items():
+                out.write(encode({"card": card, "rule": rule, "since": since}) + "\n")
+    out.flush()
+    return 22 if nerrors else 0
+
+#=========================================
+if __name__ == '__main__':
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        print("\nAborted.")
+        sys.exit(130)   # ECONNABORTED
+
+#=========================================
@@ -0,0 +1,404 @@
+"""SD-card: Simulate (micro)SD-cards with SMART.
+
+Simulation of many mmc-devices (Apacer, Transcend 2GB/4GB, Transcend
+>=8GB), e.g. for load-tests of scan, monitor and collector without
+hardware:
+
+- a fake /dev and /sys tree in a directory: /dev/mmcblkN (regular
+  files), /sys/block/mmcblkN/{size,stat} and
+  /sys/block/mmcblkN/device/{cid,csd,manfid,oemid,name,serial,date,type}
+- CMD56 (see smart_get() in adva-sdcard-smart): the sequences of the
+  real cards are answered (Apacer: write 0x10 "Pre-Load" + read 0x21,
+  Transcend: read 0x110005F9; anything else is answered with ff..ff)
+  with plausible SMART-sectors, which evolve with the (simulated) time:
+  erase-counts grow, endurance decreases, bad blocks appear
+- injected faults: latency (+ jitter) per command, errors (ETIMEDOUT,
+  EILSEQ, EIO) and ff..ff-sectors with a probability per command,
+  and unsupported cards (other manufacturer)
+
+All cards are derived from a seed, so the simulation has no per-card
+state; its configuration is stored in DIR/sim.json.
+
+The simulation is only used if it is installed explicitly into
+adva_sdcard.info and adva_sdcard.smart (see install()): `run` does this
+and then runs a tool (e.g. adva-sdcard-monitor, adva-sdcard-collector
+push, adva-sdcard-info -A) in-process; only SMART-reads with the backend
+"ioctl" / "auto" are simulated, not adva-sdcard-smart-get.
+
+:Usage:
+    see --help
+
+:Exit code:
+    0:   success
+    2:   invalid commandline-parameters
+    5:   cannot create / load the simulation (EIO)
+    130: aborted (e.g. via Ctrl-C) (ECONNABORTED)
+    otherwise: exit code of COMMAND (run)
+
+:Author:    Advamation / Roland Freikamp <support@advamation.de>
+:Version:   2026-10-17
+:Copyright: Advamation <info@advamation.de>
+:License:   MIT
+"""
+
+__version__ = "1.2.0"
+__author__ = "Advamation <support@advamation.de>"
+
+import os
+import sys
+import time
+import errno
+import random
+import json
+import stat
+
+from .info import crc7
+
+#=========================================
+
+SIM_CONFIG = "sim.json"
+
+SIM_DEFAULTS = {
+    "cards":       16,
+    "seed":        0,
+    "created":     None,    # UNIX time, set by sim_create()
+    "speed":       1.0,     # simulated seconds per second
+    "latency":     0.0,     # per CMD56, in ms
+    "jitter":      0.0,     # +-, in ms
+    "error_rate":  0.0,     # probability per CMD56
+    "ff_rate":     0.0,     # probability per SMART-sector
+    "unsupported": 0.0,     # fraction of cards of other manufacturers
+    "layouts":     ["A", "T_2GB_4GB", "T_8GB"],
+}
+
+# CMD56-arguments of smart_get()
+CMD56_APACER_PRELOAD = 0x10
+CMD56_APACER_GET = 0x21
+CMD56_TRANSCEND_GET = 0x110005F9
+
+# injected errors (like the mmc-driver: command timeout, CRC error, I/O error)
+SIM_ERRNOS = (errno.ETIMEDOUT, errno.EILSEQ, errno.EIO)
+
+# per layout: manfid, oemid, names, capacities in GiB, P/E-cycles
+SIM_CARDS = {
+    "A":         (0x27, "PH", ("APUSD", "AP-MS", "APH2S"), (8, 16, 32), 3000),
+    "T_2GB_4GB": (0x74, "J`", ("USD  ", "USDU1"), (2, 4), 3000),
+    "T_8GB":     (0x74, "J`", ("USDU1", "TS8GU", "TS32G"), (8, 16, 32), 3000),
+}
+SIM_UNSUPPORTED = (0x03, "SD", ("SL16G", "SC32G"), (16, 32), 1000)
+
+def _register(i):
+    """Complete 128-bit register (CID/CSD) with CRC7 and end-bit, as bytes."""
+    b = bytearray(i.to_bytes(16, "big"))
+    b[15] = (crc7(b[:15]) << 1) | 1
+    return bytes(b)
+
+class SimCard:
+    """One simulated card; all values are derived from (seed, index)."""
+    def __init__(self, seed, index, layouts, unsupported):
+        rnd = random.Random("%d-%d" % (seed, index))
+        if rnd.random() < unsupported:
+            self.layout = None
+            manfid, oemid, names, sizes, pe = SIM_UNSUPPORTED
+        else:
+            self.layout = layouts[rnd.randrange(len(layouts))]
+            manfid, oemid, names, sizes, pe = SIM_CARDS[self.layout]
+        self.manfid, self.oemid, self.name = manfid, oemid, rnd.choice(names)
+        self.size = rnd.choice(sizes) * 2**30
+        self.serial = rnd.getrandbits(32)
+        self.year, self.month = rnd.randrange(2016, 2026), rnd.randrange(1, 13)
+        self.cid = _register(manfid << 120 | int.from_bytes(oemid.encode("latin-1"), "big") << 104 |
+                             int.from_bytes(self.name.encode("latin-1"), "big") << 64 | 0x20 << 56 |
+                             self.serial << 24 | (self.year - 2000) << 12 | self.month << 8)
+        c_size = self.size // (512 * 1024) - 1
+        self.csd = _register(1 << 126 | 0x0e << 112 | 0x32 << 96 | 0x5b5 << 84 | 9 << 80 |
+                             c_size << 48 | 1 << 46 | 0x7f << 39 | 2 << 26 | 9 << 22)
+        # wear: P/E-cycles, erase-count at creation and per day, bad blocks per day
+        self.pe = pe
+        self.dies = rnd.choice((1, 2, 4))
+        self.blocks = self.size // (4 * 2**20)
+        self.erase_base = rnd.uniform(0.0, 0.6) * pe
+        self.erase_per_day = rnd.uniform(0.05, 5.0)
+        self.bad_initial = [rnd.randrange(8) for _ in range(self.dies)]
+        self.bad_per_day = rnd.uniform(0.0, 0.02)
+        self.power_on_base = rnd.randrange(10, 5000)
+        self.power_on_per_day = rnd.uniform(0.1, 3.0)
+        self.flash_id = rnd.getrandbits(72) if self.layout != "T_8GB" else rnd.getrandbits(48)
+
+    def smart(self, days):
+        """SMART-sector after `days` (simulated) days, as bytes."""
+        b = bytearray(512)
+        avg = int(self.erase_base + self.erase_per_day * days)
+        emin, emax = int(avg * 0.8), int(avg * 1.3) + 5
+        endurance = max(0.0, 100.0 * (1.0 - avg / self.pe))
+        bad = int(self.bad_per_day * days)
+        power_on = int(self.power_on_base + self.power_on_per_day * days)
+        abnormal = power_on // 50
+        if self.layout == "T_8GB":
+            b[0:16] = b"Transcend" + bytes(7)
+            b[26] = min(bad, 255)
+            b[28:32] = abnormal.to_bytes(4, "big")
+            b[32:36] = emin.to_bytes(4, "big")
+            b[36:40] = emax.to_bytes(4, "big")
+            b[44:48] = avg.to_bytes(4, "big")
+            b[70] = int(endurance)
+            b[76:80] = power_on.to_bytes(4, "big")
+            b[80:86] = self.flash_id.to_bytes(6, "big")
+            b[88:96] = b"SM2707  "
+            b[128:134] = b"R0918B"
+            return bytes(b)
+        b[0:9] = self.flash_id.to_bytes(9, "big")
+        b[9:13] = bytes((1, 2, 3, 14))
+        b[14] = self.dies
+        b[80:84] = min(avg * self.blocks, 0xFFFFFFFF).to_bytes(4, "big")
+        b[96:98] = int(endurance * 100).to_bytes(2, "big")
+        b[104:106], b[98:100] = avg.to_bytes(4, "big")[:2], avg.to_bytes(4, "big")[2:]
+        b[106:108], b[100:102] = emin.to_bytes(4, "big")[:2], emin.to_bytes(4, "big")[2:]
+        b[108:110], b[102:104] = emax.to_bytes(4, "big")[:2], emax.to_bytes(4, "big")[2:]
+        b[112:116] = power_on.to_bytes(4, "big")
+        b[128:130] = min(abnormal, 0xFFFF).to_bytes(2, "big")
+        if self.layout == "A":
+            b[16:18] = (self.blocks // 50).to_bytes(2, "big")
+            b[32:32+self.dies] = bytes(self.bad_initial)
+            b[64:66] = max(0, 10000 - bad * 10).to_bytes(2, "big")
+            b[160:162] = min(avg // 10, 0xFFFF).to_bytes(2, "big")
+            b[176:184] = (0x4150000000000000 | self.dies).to_bytes(8, "big")
+            for die in range(self.dies):
+                b[184+die] = min(bad // self.dies + (die < bad % self.dies), 255)
+            b[496:512] = self.cid
+        else:
+            b[32:36] = bad.to_bytes(4, "big")
+            b[64:66] = max(0, 10000 - bad * 10).to_bytes(2, "big")
+            b[176:185] = (b"TS%dGUSD" % (self.size // 2**30)).ljust(9)
+        return bytes(b)
+
+class Simulation:
+    """Simulated cards in a directory (see sim_create())."""
+    def __init__(self, root):
+        """Load simulation.
+
+        :Raises:
+            OSError, ValueError if the configuration cannot be read.
+        """
+        self.root = os.path.realpath(root)
+        with open(os.path.join(self.root, SIM_CONFIG), 'r', encoding="utf-8") as f:
+            self.config = dict(SIM_DEFAULTS, **json.load(f))
+        self._cards = {}
+        self._preloaded = set()
+        self._random = random.Random()
+
+    def card(self, index):
+        """Get card (cached)."""
+        card = self._cards.get(index)
+        if card is None:
+            c = self.config
+            card = self._cards[index] = SimCard(c["seed"], index, c["layouts"], c["unsupported"])
+        return card
+
+    def days(self):
+        """Simulated days since the creation of the simulation."""
+        return (time.time() - self.config["created"]) * self.config["speed"] / 86400.0
+
+    def isblk(self, path):
+        """Check if path is a simulated device (replaces _isblk() in adva_sdcard.smart).
+
+        Simulated devices are regular files DIR/dev/mmcblkN.
+
+        :Raises:
+            OSError if path cannot be stat'ed
+        """
+        mode = os.stat(path).st_mode
+        name = os.path.basename(path)
+        return stat.S_ISREG(mode) and os.path.dirname(path) == os.path.join(self.root, "dev") and \
+               name.startswith("mmcblk") and name[6:].isdigit()
+
+    def cmd56(self, fd, arg, buf, write=False):
+        """Answer CMD56 like a card (replaces _cmd56() in adva-sdcard-smart).
+
+        :Raises:
+            OSError for injected errors, or if fd is no simulated device.
+        """
+        c = self.config
+        if c["latency"] or c["jitter"]:
+            time.sleep(max(0.0, c["latency"] + self._random.uniform(-c["jitter"], c["jitter"])) / 1000.0)
+        if c["error_rate"] and self._random.random() < c["error_rate"]:
+            err = self._random.choice(SIM_ERRNOS)
+            raise OSError(err, os.strerror(err))
+        name = os.path.basename(os.readlink("/proc/self/fd/%d" % fd))
+        if not name.startswith("mmcblk") or not name[6:].isdigit():
+            raise OSError(errno.ENOTTY, os.strerror(errno.ENOTTY))
+        card = self.card(int(name[6:]))
+        if write:
+            if card.layout == "A" and arg == CMD56_APACER_PRELOAD:
+                self._preloaded.add(fd)
+            return
+        data = b"\xff" * 512
+        if (card.layout == "A" and arg == CMD56_APACER_GET and fd in self._preloaded) or \
+           (card.layout in ("T_2GB_4GB", "T_8GB") and arg == CMD56_TRANSCEND_GET):
+            if not (c["ff_rate"] and self._random.random() < c["ff_rate"]):
+                data = card.smart(self.days())
+        self._preloaded.discard(fd)
+        memoryview(buf)[:512] = data
+
+def sim_create(root, **config):
+    """Create simulation: configuration and /dev, /sys tree.
+
+    :Parameters:
+        - root:   directory (created if needed)
+        - config: see SIM_DEFAULTS
+    :Returns:
+        Simulation
+    :Raises:
+        OSError
+    """
+    config = dict(SIM_DEFAULTS, **config)
+    if config["created"] is None:
+        config["created"] = time.time()
+    os.makedirs(os.path.join(root, "dev"), exist_ok=True)
+    with open(os.path.join(root, SIM_CONFIG), 'w', encoding="utf-8") as f:
+        json.dump(config, f, indent=1)
+    sim = Simulation(root)
+    for index in range(config["cards"]):
+        card = sim.card(index)
+        name = "mmcblk%d" % index
+        open(os.path.join(root, "dev", name), 'a').close()
+        block = os.path.join(root, "sys", "block", name)
+        os.makedirs(os.path.join(block, "device"), exist_ok=True)
+        files = {
+            "size": "%d" % (card.size // 512),
+            "stat": "%8d %8d %8d %8d %8d %8d %8d %8d %8d %8d %8d" % (0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0),
+            "device/cid": card.cid.hex(),
+            "device/csd": card.csd.hex(),
+            "device/manfid": "0x%06x" % card.manfid,
+            "device/oemid": "0x%04x" % int.from_bytes(card.oemid.encode("latin-1"), "big"),
+            "device/name": card.name,
+            "device/serial": "0x%08x" % card.serial,
+            "device/date": "%02d/%04d" % (card.month, card.year),
+            "device/type": "SD",
+        }
+        for path, text in files.items():
+            with open(os.path.join(block, path), 'w', encoding="utf-8") as f:
+                f.write(text + "\n")
+    return sim
+
+def install(root, namespaces=None):
+    """Redirect /dev, /sys and CMD56 of the tools to a simulation.
+
+    This affects the whole process (all users of the modules).
+
+    :Parameters:
+        - root:       simulation directory
+        - namespaces: globals() of the modules, default: adva_sdcard.info
+                      and adva_sdcard.smart
+    :Returns:
+        Simulation
+    :Raises:
+        OSError, ValueError if the simulation cannot be loaded.
+    """
+    sim = Simulation(root)
+    if namespaces is None:
+        from . import info, smart
+        namespaces = (vars(info), vars(smart))
+    for namespace in namespaces:
+        namespace["ROOT"] = sim.root
+        if "_isblk" in namespace:
+            namespace["_isblk"] = sim.isblk
+        if "_cmd56" in namespace:
+            namespace["_cmd56"] = sim.cmd56
+    return sim
+
+#=========================================
+
+def main(arglist=None):
+    """Create simulation / run command with simulation.
+
+    See module docstring for exit codes.
+    """
+    import argparse
+    parser = argparse.ArgumentParser(
+        description="""Simulate industrial microSD-/SD-cards (sysfs, CMD56/SMART).
+Version %s by %s.""" % (__version__, __author__),
+        formatter_class=argparse.RawDescriptionHelpFormatter,   # for keeping newlines in description
+        epilog="""
+Examples:
+    adva-sdcard-sim create -n 1000 --speed 86400 --latency 2 /tmp/sim
+    adva-sdcard-sim run /tmp/sim adva-sdcard-info -A
+    adva-sdcard-sim run /tmp/sim adva-sdcard-monitor --once
+\n""")
+    parser.add_argument("--version", action='version', version="%(prog)s " + __version__)
+    sub = parser.add_subparsers(dest="command", metavar="COMMAND")
+    sub.required = True
+
+    p = sub.add_parser("create", help="Create simulation.")
+    p.add_argument("-n", "--cards", action='store', type=int, default=SIM_DEFAULTS["cards"], help="number of cards, default: %d" % SIM_DEFAULTS["cards"])
+    p.add_argument("--seed", action='store', type=int, default=0, help="random seed, default: 0")
+    p.add_argument("--speed", action='store', type=float, default=1.0, help="simulated seconds per second (wear), default: 1")
+    p.add_argument("--latency", action='store', type=float, default=0.0, help="latency per CMD56 in ms, default: 0")
+    p.add_argument("--jitter", action='store', type=float, default=0.0, help="latency-jitter (+-) in ms, default: 0")
+    p.add_argument("--error-rate", action='store', type=float, default=0.0, help="probability of errors per CMD56, default: 0")
+    p.add_argument("--ff-rate", action='store', type=float, default=0.0, help="probability of ff..ff SMART-sectors, default: 0")
+    p.add_argument("--unsupported", action='store', type=float, default=0.0, help="fraction of cards of other manufacturers, default: 0")
+    p.add_argument("--layouts", action='store', default="A,T_2GB_4GB,T_8GB", help="simulated SMART-layouts, default: A,T_2GB_4GB,T_8GB")
+    p.add_argument("directory", help="simulation directory")
+
+    p = sub.add_parser("run", help="Run tool (Python) in-process with simulation.")
+    p.add_argument("directory", help="simulation directory")
+    p.add_argument("cmd", nargs=argparse.REMAINDER, metavar="COMMAND", help="tool (name or path) and arguments")
+
+    args = parser.parse_args(arglist)
+
+    if args.command == "create":
+        layouts = args.layouts.split(",")
+        if args.cards < 1 or not set(layouts) <= set(SIM_CARDS) or \
+           not all(0.0 <= r <= 1.0 for r in (args.error_rate, args.ff_rate, args.unsupported)):
+            print("ERROR: Invalid arguments, cards, layouts or rates.", file=sys.stderr)
+            return 2
+        try:
+            sim_create(args.directory, cards=args.cards, seed=args.seed, speed=args.speed,
+                       latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                       ff_rate=args.ff_rate, unsupported=args.unsupported, layouts=layouts)
+        except OSError as err:
+            print("ERROR: Cannot create simulation. (%s)" % err, file=sys.stderr)
+            return 5    # EIO
+        return 0
+
+    if not args.cmd:
+        print("ERROR: Invalid arguments, missing command.", file=sys.stderr)
+        return 2
+    if not os.path.isfile(os.path.join(args.directory, SIM_CONFIG)):
+        print("ERROR: '%s' is no simulation." % args.directory, file=sys.stderr)
+        return 2
+    import shutil
+    path = args.cmd[0] if os.sep in args.cmd[0] else shutil.which(args.cmd[0])
+    try:
+        if path is None:
+            raise FileNotFoundError(errno.ENOENT, "Not found in PATH")
+        with open(path, 'rb') as f:
+            head = f.readline(200)
+    except OSError as err:
+        print("ERROR: Cannot run '%s'. (%s)" % (args.cmd[0], err), file=sys.stderr)
+        return 2
+    if not path.endswith(".py") and not (head.startswith(b"#!") and b"python" in head):
+        print("ERROR: Cannot run '%s', no Python-tool." % args.cmd[0], file=sys.stderr)
+        return 2
+    try:
+        install(args.directory)
+    except (OSError, ValueError) as err:
+        print("ERROR: Cannot load simulation. (%s)" % err, file=sys.stderr)
+        return 5    # EIO
+
+    # run the tool like its own __main__ (exit code via SystemExit)
+    import runpy
+    sys.argv = [path] + args.cmd[1:]
+    runpy.run_path(path, run_name="__main__")
+    return 0
+
+#=========================================
+if __name__ == '__main__':
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        print("\nAborted.")
+        sys.exit(130)   # ECONNABORTED
+
+#=========================================
@@ -0,0 +1,1699 @@
+"""SD-card: Parse SMART-information.
+
+Parse raw SMART-information from (industrial) SD-/microSD-card.
+
+Getting SMART-information is split into two parts:
+
+- A minimal program, to get the raw SMART-information and output it
+  in hexadecimal (or as binary frame, see smart_read_frames());
+  this needs access to the device or must be run as root / SUID.
+- A program to parse/interpret the raw information.
+  (this part)
+
+Alternatively, the raw SMART-information can be read in-process
+(see smart_get()), if the process has the necessary permissions.
+
+Supported cards:
+
+- Transcend 240I
+- Transcend 230I
+- Apacer CH110-MSD / AK6.118* (not yet tested)
+- Apacer CV110-MSD / AK6.112* (not yet tested)
+- Apacer H2-SL / AP-*-2RTM (only microSD tested)
+- Apacer H1-SL / AP-*-2HTM (only microSD tested)
+- Apacer H2-M  / AP-*-1RTM (only microSD tested)
+- Apacer H1-M  / AP-*-1HTM (only microSD tested)
+- maybe more Apacer AP-*-* (not tested)
+
+Works on Raspberry Pi with /dev/mmcblk*,
+does not work with USB-cardreaders.
+
+:Usage:
+    see --help
+
+:Exit code:
+    0:   success
+    2:   invalid commandline-parameters
+    5:   cannot read from device / write state (EIO)
+    22:  invalid CID data (EINVAL)
+         (--batch: at least one line contained invalid data)
+    130: aborted (e.g. via Ctrl-C) (ECONNABORTED)
+    errno: from adva-sdcard-smart-get or smart_get()
+
+:Author:    Advamation / Roland Freikamp <support@advamation.de>
+:Version:   2026-10-17
+:Copyright: Advamation <info@advamation.de>
+:License:   MIT
+"""
+
+__version__ = "1.2.0"
+__author__ = "Advamation <support@advamation.de>"
+
+import os
+import sys
+import errno
+import stat
+import struct
+# array, argparse, json, subprocess: imported when needed (startup-time, see main())
+
+from ._cli import args_fast as _args_fast
+from . import timing as _timing
+
+#=========================================
+# get raw SMART-data in-process
+#
+# This sends the same CMD56-sequences as smart_get() in
+# adva-sdcard-smart-get.c, via the MMC_IOC_CMD-ioctl.
+
+SECTOR_SIZE = 512
+
+# root-directory of /dev and /sys; set for simulated cards (see adva_sdcard.sim)
+ROOT = ""
+
+# from linux/mmc/core.h
+MMC_RSP_PRESENT = 1 << 0
+MMC_RSP_CRC     = 1 << 2
+MMC_RSP_OPCODE  = 1 << 4
+MMC_CMD_ADTC    = 1 << 5
+MMC_RSP_SPI_S1  = 1 << 7
+MMC_RSP_SPI_R1  = MMC_RSP_SPI_S1
+MMC_RSP_R1      = MMC_RSP_PRESENT | MMC_RSP_CRC | MMC_RSP_OPCODE
+
+# struct mmc_ioc_cmd from linux/mmc/ioctl.h:
+#   write_flag, is_acmd, opcode, arg, response[4], flags, blksz, blocks,
+#   postsleep_min_us, postsleep_max_us, data_timeout_ns, cmd_timeout_ms,
+#   __pad, data_ptr
+MMC_IOC_CMD_STRUCT = struct.Struct("@iiII4I7IQ")
+MMC_BLOCK_MAJOR = 179
+# _IOWR(MMC_BLOCK_MAJOR, 0, struct mmc_ioc_cmd)
+MMC_IOC_CMD = (3 << 30) | (MMC_IOC_CMD_STRUCT.size << 16) | (MMC_BLOCK_MAJOR << 8) | 0
+
+# supported cards: manufacturer ID -> (SMART-type, CMD56-sequence (write, arg));
+# the last command reads the SMART-data (see SMART_VENDORS in adva-sdcard-smart-get.c)
+SMART_VENDORS = {
+    0x27: ('A', ((True, 0x10), (False, 0x21))),     # Apacer: "Pre-Load SMART Command Information", "GetSMART Command Information"
+    0x74: ('T', ((False, 0x110005F9),)),            # Transcend
+}
+
+# SMART-type by manufacturer ID
+SMART_TYPES = {manfid: vendor[0] for manfid, vendor in SMART_VENDORS.items()}
+
+# errno of smart_get(), for which smart_get_any() falls back to adva-sdcard-smart-get
+SMART_GET_FALLBACK_ERRNOS = (errno.EPERM, errno.EACCES, errno.ENOSYS)
+
+# binary frame of adva-sdcard-smart-get --binary: type, length, data
+SMART_FRAME_HEAD = struct.Struct(">cH")
+
+def _cmd56(fd, arg, buf, write=False):
+    """Send CMD56 with 1 data-block via MMC_IOC_CMD.
+
+    :Parameters:
+        - fd:    filedescriptor of opened device
+        - arg:   CMD56-argument
+        - buf:   data-buffer (array('B') with SECTOR_SIZE bytes)
+        - write: True for a write-, False for a read-command
+    :Raises:
+        OSError if the ioctl fails or is not available
+    """
+    try:
+        import fcntl
+    except ImportError:
+        raise OSError(errno.ENOSYS, "ioctl not available") from None
+    idata = bytearray(MMC_IOC_CMD_STRUCT.pack(
+        1 if write else 0, 0, 56, arg,
+        0, 0, 0, 0,
+        MMC_RSP_SPI_R1 | MMC_RSP_R1 | MMC_CMD_ADTC, SECTOR_SIZE, 1,
+        0, 0, 0, 0, 0,
+        buf.buffer_info()[0]))
+    fcntl.ioctl(fd, MMC_IOC_CMD, idata)
+
+def _isblk(path):
+    """Check if path is a block-device.
+
+    :Raises:
+        OSError if path cannot be stat'ed
+    """
+    return stat.S_ISBLK(os.stat(path).st_mode)
+
+def smart_get(dev="/dev/mmcblk0"):
+    """Get raw SMART-data from (micro)SD-card in-process.
+
+    Same as adva-sdcard-smart-get, but without fork/exec and hex-encoding.
+    This needs read/write-access to the device and CAP_SYS_RAWIO
+    (i.e. usually root).
+
+    :Returns:
+        (type, data): type 'A' for Apacer, 'T' for Transcend,
+        data: raw SMART-data as bytes (SECTOR_SIZE)
+    :Raises:
+        ValueError for invalid arguments,
+        PermissionError if the process lacks permissions,
+        OSError for other errors (errno ENOTSUP if the card is not supported).
+    """
+    # restrict to /dev/mmcblk*, like adva-sdcard-smart-get
+    if not dev.startswith("/dev/mmcblk") or "/" in dev[5:]:
+        raise ValueError("Only devices /dev/mmcblk* allowed.")
+    t = _timing.clock() if _timing.HOOKS else None
+    try:
+        if not _isblk(ROOT + dev):
+            raise OSError(errno.ENOTBLK, "Invalid device '%s', must be a block-device" % dev)
+    except FileNotFoundError:
+        pass
+
+    # get type
+    path = ROOT + "/sys/block/%s/device/manfid" % dev[5:]
+    with open(path, 'r', encoding="utf-8") as f:
+        try:
+            manfid = int(f.read(100).strip(), 16)
+        except ValueError:
+            raise OSError(errno.ENOTSUP, "Unexpected '%s' contents" % path) from None
+    if manfid not in SMART_VENDORS:
+        raise OSError(errno.ENOTSUP, "Device not supported")
+    typ, cmds = SMART_VENDORS[manfid]
+    if t is not None:
+        t = _timing.record("manfid", dev, t)
+
+    # get SMART-data
+    import array
+    buf = array.array('B', bytes(SECTOR_SIZE))
+    fd = os.open(ROOT + dev, os.O_RDWR)
+    if t is not None:
+        t = _timing.record("open", dev, t)
+    try:
+        for write, arg in cmds:
+            _cmd56(fd, arg, buf, write=write)
+    finally:
+        os.close(fd)
+    data = buf.tobytes()
+    if t is not None:
+        _timing.record("cmd56", dev, t)
+
+    # check
+    if len(data) - len(data.lstrip(b'\xff')) >= 500:
+        raise OSError(errno.ENOTSUP, "Device not supported (ff..ff)")
+    return typ, data
+
+def smart_get_helper(dev="/dev/mmcblk0", binary=False):
+    """Get raw SMART-data from (micro)SD-card via adva-sdcard-smart-get.
+
+    :Parameters:
+        - dev:    device
+        - binary: use adva-sdcard-smart-get --binary (no hex-conversion)
+    :Returns:
+        raw SMART-data as string TYPE-HEX,
+        or (type, data) if binary (see smart_get())
+    :Raises:
+        OSError if adva-sdcard-smart-get cannot be run,
+        subprocess.CalledProcessError if adva-sdcard-smart-get fails,
+        ValueError for invalid output of adva-sdcard-smart-get.
+    """
+    import subprocess
+    t = _timing.clock() if _timing.HOOKS else None
+    cmd = ["adva-sdcard-smart-get"] + (["--binary"] if binary else []) + (["--timings"] if t is not None else []) + [dev]
+    p = subprocess.run(cmd, capture_output=True)
+    stderr = p.stderr.decode("utf-8", "replace")
+    if t is not None:
+        _timing.record("helper", dev, t)
+        stderr = _helper_timings(stderr)
+    if p.returncode != 0:
+        raise subprocess.CalledProcessError(p.returncode, p.args, p.stdout if binary else p.stdout.decode("utf-8"), stderr)
+    if not binary:
+        return p.stdout.decode("utf-8").strip()
+    typ, data = _frame_split(p.stdout)
+    if len(p.stdout) != SMART_FRAME_HEAD.size + len(data):
+        raise ValueError("invalid frame length")
+    return typ, data
+
+def _helper_timings(stderr):
+    """Pass the timings of adva-sdcard-smart-get --timings to the hooks.
+
+    :Parameters:
+        - stderr: stderr-output of adva-sdcard-smart-get
+    :Returns:
+        stderr without the timing-lines
+    """
+    lines = stderr.splitlines(True)
+    for stage, device, seconds in _timing.timing_parse_lines(lines):
+        for hook in _timing.HOOKS:
+            hook("helper." + stage, device, seconds)
+    return "".join(line for line in lines if not line.startswith("timing: "))
+
+class SmartServer:
+    """Client for a persistent `adva-sdcard-smart-get --binary --serve`.
+
+    The helper is started on the first request (and restarted if it
+    terminated), and keeps the devices open between requests.
+    Thread-safe.
+    """
+    def __init__(self, cmd=("adva-sdcard-smart-get", "--binary", "--serve")):
+        import threading
+        self.cmd = cmd
+        self._proc = None
+        self._lock = threading.Lock()
+
+    def get(self, dev="/dev/mmcblk0"):
+        """Get raw SMART-data from (micro)SD-card.
+
+        :Returns:
+            (type, data), see smart_get()
+        :Raises:
+            ValueError for invalid arguments,
+            OSError if the helper cannot be run or reports an error
+            (errno from adva-sdcard-smart-get).
+        """
+        if "\n" in dev:
+            raise ValueError("Invalid device.")
+        import subprocess
+        t = _timing.clock() if _timing.HOOKS else None
+        with self._lock:
+            if self._proc is None or self._proc.poll() is not None:
+                self._proc = subprocess.Popen(self.cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+            self._proc.stdin.write(dev.encode("utf-8") + b"\n")
+            self._proc.stdin.flush()
+            try:
+                frame = next(smart_read_frames(self._proc.stdout), None)
+            except ValueError:
+                frame = None
+        if t is not None:
+            _timing.record("serve", dev, t)
+        if frame is None:
+            self.close()
+            raise OSError(errno.EIO, "adva-sdcard-smart-get --serve terminated")
+        typ, data = frame
+        if typ == "E":
+            code, msg = data.decode("utf-8", "replace").split(" ", 1)
+            raise OSError(int(code), msg)
+        return typ, data
+
+    def close(self):
+        """Terminate the helper."""
+        with self._lock:
+            if self._proc is not None:
+                self._proc.stdin.close()
+                self._proc.wait()
+                self._proc.stdout.close()
+                self._proc = None
+
+_smart_server = None
+
+def smart_get_any(dev="/dev/mmcblk0", backend="auto"):
+    """Get raw SMART-data from (micro)SD-card, in-process or via helper.
+
+    :Parameters:
+        - dev:     device
+        - backend: "ioctl" (smart_get()), "helper" (smart_get_helper()),
+                   "serve" (persistent helper, see SmartServer)
+                   or "auto" (ioctl, falling back to helper without permissions)
+    :Returns:
+        (type, data), see smart_get()
+    :Raises:
+        see smart_get(), smart_get_helper() and SmartServer.get(),
+        ValueError for invalid output of adva-sdcard-smart-get.
+    """
+    global _smart_server
+    if backend == "serve":
+        if _smart_server is None:
+            _smart_server = SmartServer()
+        return _smart_server.get(dev)
+    if backend != "helper":
+        try:
+            return smart_get(dev)
+        except OSError as err:
+            if backend == "ioctl" or err.errno not in SMART_GET_FALLBACK_ERRNOS:
+                raise
+    return smart_get_helper(dev, binary=True)
+
+#----------------------
+# idle-aware scheduling
+#
+# The CMD56-sequence blocks the command-queue of the card, so foreground
+# I/O issued meanwhile is delayed (latency spikes). SmartScheduler waits
+# for idle windows, using /sys/block/DEV/stat (Documentation/block/stat.rst):
+#
+# ========= =======================================
+# field     /sys/block/DEV/stat
+# ========= =======================================
+# 0, 4      read / write I/Os completed
+# 8         I/Os currently in flight
+# 9         io_ticks (ms the device was busy)
+# 10        time_in_queue (ms, sum over all I/Os)
+# ========= =======================================
+#
+# The CMD56-ioctls are passthrough-requests, which are not counted there.
+
+def blockstat_read(dev="/dev/mmcblk0"):
+    """Read I/O-statistics of a block-device.
+
+    :Returns:
+        (ios, in_flight, io_ticks, time_in_queue): completed read+write
+        I/Os, I/Os in flight, busy-time and total queue-time in ms
+    :Raises:
+        OSError if the statistics cannot be read,
+        ValueError for invalid contents.
+    """
+    path = ROOT + "/sys/block/%s/stat" % os.path.basename(dev)
+    with open(path, 'r', encoding="ascii") as f:
+        fields = f.read(200).split()
+    if len(fields) < 11:
+        raise ValueError("Invalid '%s' contents." % path)
+    return int(fields[0]) + int(fields[4]), int(fields[8]), int(fields[9]), int(fields[10])
+
+class SmartScheduler:
+    """Schedule SMART-reads into idle windows of the devices.
+
+    read() waits until the device was idle (no I/O in flight and none
+    completed) for `idle` seconds, but at most `max_delay` seconds (the
+    maximum staleness), and records per read how long it waited, how
+    long the read blocked the card, and how much foreground I/O-time
+    (time_in_queue) elapsed meanwhile -- i.e. the latency it added.
+    """
+    def __init__(self, idle=1.0, max_delay=60.0, poll=0.05, backend="auto"):
+        """
+        :Parameters:
+            - idle:      required idle-time before a read in seconds,
+                         0 to read immediately (only record the latency)
+            - max_delay: maximum delay of a read in seconds (then the
+                         read is forced, even if the device is busy)
+            - poll:      poll-interval of /sys/block/DEV/stat in seconds
+            - backend:   see smart_get_any()
+        """
+        self.idle = idle
+        self.max_delay = max_delay
+        self.poll = poll
+        self.backend = backend
+        self.stats = {}     # device -> dict, see read()
+
+    def idle_wait(self, dev, max_delay=None):
+        """Wait for an idle window of a device.
+
+        :Returns:
+            (waited, idle, io_rate): waited seconds, True if idle (False
+            if max_delay expired, None if the statistics are not available),
+            completed I/Os per second while waiting (or None)
+        """
+        import time
+        max_delay = self.max_delay if max_delay is None else max_delay
+        t_start = t_now = time.monotonic()
+        try:
+            first = stat = blockstat_read(dev)
+        except (OSError, ValueError):
+            return 0.0, None, None
+        if self.idle <= 0:
+            return 0.0, stat[1] == 0, None
+        t_quiet = t_start if stat[1] == 0 else None
+        while True:
+            if t_quiet is not None and t_now - t_quiet >= self.idle:
+                idle = True
+                break
+            if t_now - t_start >= max_delay:
+                idle = False
+                break
+            time.sleep(max(0.0, min(self.poll, t_start + max_delay - t_now)))
+            t_now = time.monotonic()
+            try:
+                new = blockstat_read(dev)
+            except (OSError, ValueError):
+                return t_now - t_start, None, None
+            if new[1] != 0:
+                t_quiet = None
+            elif new[0] != stat[0] or t_quiet is None:
+                t_quiet = t_now
+            stat = new
+        waited = t_now - t_start
+        return waited, idle, (stat[0] - first[0]) / waited if waited > 0 else None
+
+    def read(self, dev, max_delay=None):
+        """Get raw SMART-data in an idle window of the device.
+
+        Updates self.stats[dev] (dict) with the number of "reads" and
+        "forced" reads (while busy), the total seconds of "wait" (before
+        the reads), "duration" (of the reads) and "io_wait" (foreground
+        I/O-time during the reads), and the "last" read (dict with wait,
+        duration, io_wait, idle and io_rate, see idle_wait()).
+
+        :Returns:
+            (type, data), see smart_get()
+        :Raises:
+            see smart_get_any()
+        """
+        import time
+        waited, idle, io_rate = self.idle_wait(dev, max_delay)
+        try:
+            before = blockstat_read(dev)
+        except (OSError, ValueError):
+            before = None
+        t0 = time.perf_counter()
+        try:
+            return smart_get_any(dev, self.backend)
+        finally:
+            duration = time.perf_counter() - t0
+            io_wait = None
+            if before is not None:
+                try:
+                    io_wait = (blockstat_read(dev)[3] - before[3]) / 1000.0
+                except (OSError, ValueError):
+                    pass
+            stats = self.stats.setdefault(dev, {"reads": 0, "forced": 0, "wait": 0.0, "duration": 0.0, "io_wait": 0.0})
+            stats["reads"] += 1
+            stats["forced"] += idle is False
+            stats["wait"] += waited
+            stats["duration"] += duration
+            stats["io_wait"] += io_wait or 0.0
+            stats["last"] = {"wait": waited, "duration": duration, "io_wait": io_wait, "idle": idle, "io_rate": io_rate}
+
+#----------------------
+# binary frames
+
+def _frame_split(buf):
+    """Split binary frame (see smart_read_frames()) into (type, data).
+
+    :Raises:
+        ValueError for truncated frames.
+    """
+    if len(buf) < SMART_FRAME_HEAD.size:
+        raise ValueError("truncated frame")
+    typ, length = SMART_FRAME_HEAD.unpack_from(buf)
+    data = buf[SMART_FRAME_HEAD.size:SMART_FRAME_HEAD.size+length]
+    if len(data) != length:
+        raise ValueError("truncated frame")
+    return typ.decode("latin-1"), bytes(data)
+
+def smart_read_frames(f):
+    """Read binary frames, as written by adva-sdcard-smart-get --binary.
+
+    Frame:
+
+    - type (1 byte): 'A', 'T', or 'E' for errors
+    - length (2 bytes, big-endian)
+    - data (length bytes): raw SMART-data (512 bytes),
+      or "ERRNO ERROR: message" for type 'E'
+
+    :Parameters:
+        - f: binary file, containing any number of frames
+    :Returns:
+        generator of (type, data)
+    :Raises:
+        ValueError for truncated frames.
+    """
+    read = f.read
+    while True:
+        head = read(SMART_FRAME_HEAD.size)
+        if not head:
+            return
+        if len(head) != SMART_FRAME_HEAD.size:
+            raise ValueError("truncated frame")
+        typ, length = SMART_FRAME_HEAD.unpack(head)
+        data = read(length)
+        if len(data) != length:
+            raise ValueError("truncated frame")
+        yield typ.decode("latin-1"), data
+
+#=========================================
+
+# raw SMART data consists of 512 bytes:
+#
+# Apacer:
+# ========= =======================================
+# byte      contents
+# ========= =======================================
+# 0..8      Flash ID
+# 9..10     IC version
+# 11..12    FW version
+# 14        CE number
+# 16..17    bad block replace maximum
+# 32..63    bad block count per die
+# 64..65    good block rate (%) (TODO: overall or spare block rate?)
+# 80..83    total erase count
+# 96..97    endurance (remain life) (%)
+# 98..99    average erase count L
+# 100..101  minimum erase count L
+# 102..103  maximum erase count L
+# 104..105  average erase count H
+# 106..107  minimum erase count H
+# 108..109  maximum erase count H
+# 112..115  power up count
+# 128..129  abnormal power off count
+# 160..161  total refresh count
+# 176..183  product "marker"
+# 184..215  bad block count per die
+# --------- ---------------------------------------
+# TODO
+# 15        10
+# 19        02
+# 86        0b b8
+# 144       2a 1f
+# 164       01
+# 216       01 01 10 10
+# 284       02
+# 297       01 05
+# 496..510  CID[:-1]
+# 511       chksum? (probably CID-CRC7, see smart_validate())
+# ========= =======================================
+
+# Transcend 2GB/4GB:
+# ========= =======================================
+# byte      contents
+# ========= =======================================
+# 0..8      Flash ID
+# 9..10     IC version
+# 11..12    Firmware version
+# 14        CE number
+# 32..35    total bad block count
+# 64..65    spare block rate = (total_spare_block - new_bad_block)/total_spare_block)
+# 80..83    total erase count
+# 96..97    health status = (flash_endurance - avg_erase_count) / flash_endurance
+# 98..99    avg. erase count, low byte
+# 100..101  min. erase-count, low byte
+# 102..103  max. erase-count, low byte
+# 104..105  avg. erase-count, high byte
+# 106..107  min. erase-count, high byte
+# 108..109  max. erase-count, high byte
+# 112..115  power off/on count
+# 128..129  suddenly power off count
+# 176..184  "Transcend"
+# ========= =======================================
+
+# Transcend >=8GB:
+# ========= =======================================
+# byte      contents
+# ========= =======================================
+# 0..15     "Transcend"
+# (17)      in/not in secured mode
+# (18)      speed class
+# (19)      UHS speed class
+# 26        new bad block count
+# 28..31    abnormal power loss when reading/writing data
+# 32..35    min. erase count
+# 36..39    max. erase count
+# 44..47    avg. erase count
+# 70        remaining card life = (flash_endurance - avg_erase_count) / flash_endurance
+# (72..75)  total write CRC count
+# 76..79    power on/off count
+# 80..85    NAND Flash ID
+# 88..95    IC version (TODO: format?)
+# (111)     sd card speed mode
+# 128..133  firmware version
+# ========= =======================================
+
+def smart_check(raw):
+    """Check (stripped) raw SMART-data string.
+
+    Raw SMART-data without type (1024 hex characters) is treated as
+    Apacer, for backwards compatibility.
+
+    :Returns:
+        raw SMART-data as string TYPE-HEX
+    :Raises:
+        ValueError for invalid raw SMART-data.
+    """
+    if len(raw) == 1024:    # for backwards compatibility
+        raw = "A-" + raw
+    if len(raw) != 1026 or raw[1] != '-':
+        raise ValueError("invalid length or format")
+    return raw
+
+def smart_parse(raw):
+    """Parse raw SMART-data.
+
+    :Parameters:
+        - raw: raw smart-data as string TYPE-HEX
+    :Returns:
+        smart-information: empty dict, or dict with:
+        - type (A for Apacer, T for Transcend)
+        - flash_id
+        - ic_version
+        - fw_version
+        - ce_number (only Apacer, Transcend 2/4GB)
+        - product_marker
+
+        - power_on_count
+        - power_off_abnormal_count
+        - endurance (0.0..100.0, in %)
+
+        - erase_count_min
+        - erase_count_avg
+        - erase_count_max
+        - erase_count_total (only Apacer, Transcend 2/4GB)
+        - refresh_count_total (only Apacer)
+
+        - blocks_bad
+        - blocks_good_rate   (only Apacer)
+        - blocks_spare       (only Apacer)
+        - blocks_spare_rate  (only Transcend 2/4GB)
+        - blocks_bad_later_per_die (only Apacer)
+        - blocks_bad_initial_per_die (only Apacer)
+        - blocks_bad_initial (only Apacer)
+    """
+    typ, data = raw.split("-", 1)
+    return smart_decode(typ, bytes.fromhex(data))
+
+#----------------------
+# SMART-layouts
+#
+# Every layout is a table of fields (data, no code), which is compiled
+# once (on first use) into one struct.Struct for the whole record plus
+# generated decoders, so that a record is decoded with a single
+# unpack_from(). Fields wider than 8 bytes and split-words are unpacked
+# as several words and combined.
+#
+# New card-families only need a new entry in SMART_VENDORS (if the
+# manufacturer is new) and in SMART_LAYOUT_TABLE.
+
+# SMART-layouts: name -> (SMART-type, signature, fields)
+#
+# - signature: (offset, bytes) which the raw data must contain, or None;
+#   layouts with signature are tried first
+# - fields, in output-order: (name, kind, words, arg)
+#   - words: (offset, length) in bytes, or tuple of them (high to low)
+#   - kind:
+#     - const:     arg
+#     - uint:      unsigned big-endian integer
+#     - scaled:    uint / arg (float)
+#     - version:   2 bytes as "%02d.%02d"
+#     - str:       latin-1 string; str_strip: stripped, str_cstr: without trailing NULs
+#     - bytes:     list of the bytes (e.g. per die)
+#     - sum:       sum of the bytes
+SMART_LAYOUT_TABLE = {
+    # Apacer
+    "A": ('A', None, (
+        ("type",                       "const",   None,                   'A'),
+        ("flash_id",                   "uint",    (0, 9),                 None),
+        ("ic_version",                 "version", (9, 2),                 None),
+        ("fw_version",                 "version", (11, 2),                None),
+        ("ce_number",                  "uint",    (14, 1),                None),
+        ("product_marker",             "uint",    (176, 8),               None),
+        ("power_on_count",             "uint",    (112, 4),               None),
+        ("power_off_abnormal_count",   "uint",    (128, 2),               None),
+        ("endurance",                  "scaled",  (96, 2),                100.0),
+        ("erase_count_min",            "uint",    ((106, 2), (100, 2)),   None),
+        ("erase_count_avg",            "uint",    ((104, 2), (98, 2)),    None),
+        ("erase_count_max",            "uint",    ((108, 2), (102, 2)),   None),
+        ("erase_count_total",          "uint",    (80, 4),                None),
+        ("refresh_count_total",        "uint",    (160, 2),               None),
+        ("blocks_bad",                 "sum",     (184, 32),              None),
+        ("blocks_good_rate",           "scaled",  (64, 2),                100.0),
+        ("blocks_spare",               "uint",    (16, 2),                None),
+        ("blocks_bad_later_per_die",   "bytes",   (184, 32),              None),
+        ("blocks_bad_initial_per_die", "bytes",   (32, 32),               None),
+        ("blocks_bad_initial",         "sum",     (32, 32),               None),
+    )),
+    # Transcend 2GB/4GB
+    "T_2GB_4GB": ('T', None, (
+        ("type",                       "const",   None,                   'T'),
+        ("flash_id",                   "uint",    (0, 9),                 None),
+        ("ic_version",                 "version", (9, 2),                 None),
+        ("fw_version",                 "version", (11, 2),                None),
+        ("ce_number",                  "uint",    (14, 1),                None),
+        ("product_marker",             "str",     (176, 9),               None),
+        ("power_on_count",             "uint",    (112, 4),               None),
+        ("power_off_abnormal_count",   "uint",    (128, 2),               None),
+        ("endurance",                  "scaled",  (96, 2),                100.0),
+        ("erase_count_min",            "uint",    ((106, 2), (100, 2)),   None),
+        ("erase_count_avg",            "uint",    ((104, 2), (98, 2)),    None),
+        ("erase_count_max",            "uint",    ((108, 2), (102, 2)),   None),
+        ("erase_count_total",          "uint",    (80, 4),                None),
+        ("blocks_bad",                 "uint",    (32, 4),                None),
+        ("blocks_spare_rate",          "scaled",  (64, 2),                100.0),
+    )),
+    # Transcend >=8GB
+    "T_8GB": ('T', (0, b"Transcend"), (
+        ("type",                       "const",   None,                   'T'),
+        ("flash_id",                   "uint",    (80, 6),                None),
+        ("ic_version",                 "str_strip", (88, 8),              None),
+        ("fw_version",                 "str_strip", (128, 6),             None),
+        ("product_marker",             "str_cstr", (0, 16),               None),
+        ("power_on_count",             "uint",    (76, 4),                None),
+        ("power_off_abnormal_count",   "uint",    (28, 4),                None),
+        ("endurance",                  "uint",    (70, 1),                None),
+        ("erase_count_min",            "uint",    (32, 4),                None),
+        ("erase_count_avg",            "uint",    (44, 4),                None),
+        ("erase_count_max",            "uint",    (36, 4),                None),
+        ("blocks_bad",                 "uint",    (26, 1),                None),
+    )),
+}
+
+# struct-codes of unsigned big-endian words
+_SMART_UINT_CODES = {1: "B", 2: "H", 4: "I", 8: "Q"}
+
+# conversion of str-fields (bytes -> str)
+SMART_STR_KINDS = {
+    "str":       lambda s: s.decode("latin-1"),
+    "str_strip": lambda s: s.decode("latin-1").strip(),
+    "str_cstr":  lambda s: s.decode("latin-1").rstrip('\x00'),
+}
+_SMART_STR_EXPR = {
+    "str":       "%s.decode('latin-1')",
+    "str_strip": "%s.decode('latin-1').strip()",
+    "str_cstr":  "%s.decode('latin-1').rstrip('\\x00')",
+}
+
+def _smart_words(kind, words):
+    """Split the words of a field into struct-words.
+
+    :Returns:
+        list of (offset, length, code, shift): shift in bits (for
+        combining uint-words), code None for bytes
+    :Raises:
+        ValueError for invalid fields.
+    """
+    if kind == "const":
+        return []
+    if isinstance(words[0], int):
+        words = (words,)
+    if kind in ("uint", "scaled"):
+        parts = []
+        for offset, length in words:
+            while length:   # e.g. 9 bytes -> 8 + 1, 6 bytes -> 4 + 2
+                size = max(s for s in _SMART_UINT_CODES if s <= length)
+                parts.append([offset, size, _SMART_UINT_CODES[size], 0])
+                offset, length = offset + size, length - size
+        shift = 0
+        for part in reversed(parts):
+            part[3] = shift
+            shift += 8 * part[1]
+        return [tuple(part) for part in parts]
+    if kind == "version" and len(words) == 1 and words[0][1] == 2:
+        offset = words[0][0]
+        return [(offset, 1, "B", 0), (offset + 1, 1, "B", 0)]
+    if kind in SMART_STR_KINDS or kind in ("bytes", "sum"):
+        if len(words) == 1:
+            return [(words[0][0], words[0][1], None, 0)]
+    raise ValueError("invalid field kind/words: %s %r" % (kind, words))
+
+def _smart_expr(kind, words, arg, index):
+    """Python-expression of a field (for the generated decoders).
+
+    :Parameters:
+        - words: struct-words of the field, see _smart_words()
+        - index: dict (offset, code) -> index in the unpacked tuple `v`
+    """
+    v = ["v[%d]" % index[offset, code] for offset, _, code, _ in words]
+    if kind == "const":
+        return repr(arg)
+    if kind in ("uint", "scaled"):
+        expr = " | ".join("%s << %d" % (val, shift) if shift else val for val, (_, _, _, shift) in zip(v, words))
+        if len(v) > 1:
+            expr = "(%s)" % expr
+        return expr if kind == "uint" else "%s / %r" % (expr, arg)
+    if kind == "version":
+        return "'%%02d.%%02d' %% (%s, %s)" % (v[0], v[1])
+    if kind == "bytes":
+        return "list(%s)" % v[0]
+    if kind == "sum":
+        return "sum(%s)" % v[0]
+    return _SMART_STR_EXPR[kind] % v[0]
+
+def _smart_struct(fields):
+    """Compile the words of fields into one struct.Struct.
+
+    :Parameters:
+        - fields: list of (name, kind, words, arg), words see _smart_words()
+    :Returns:
+        (struct.Struct, index): index: dict (offset, code) -> index in the
+        unpacked tuple
+    :Raises:
+        ValueError for overlapping words or words beyond the sector.
+    """
+    words = sorted({(offset, length, code) for _, _, field_words, _ in fields
+                    for offset, length, code, _ in field_words}, key=lambda word: word[:2])
+    fmt, index, end = [">"], {}, 0
+    for offset, length, code in words:
+        if offset < end or offset + length > SECTOR_SIZE:
+            raise ValueError("overlapping SMART-fields or beyond the sector at byte %d" % offset)
+        if offset > end:
+            fmt.append("%dx" % (offset - end))
+        fmt.append(code or "%ds" % length)
+        index[offset, code] = len(index)
+        end = offset + length
+    return struct.Struct("".join(fmt)), index
+
+class SmartLayout:
+    """Compiled SMART-layout (see SMART_LAYOUT_TABLE).
+
+    Read-only mapping (dict-like) field-name -> decoder(b), plus
+    decode(b) / decode_tuple(b) for whole records. The decoders are
+    generated on first use: decode() and decode_tuple() unpack the record
+    with a single struct.Struct, the per-field decoders (e.g. for
+    SmartRecord) only unpack the words of their field.
+    """
+    def __init__(self, name, typ, signature, fields):
+        """
+        :Parameters:
+            - see SMART_LAYOUT_TABLE
+        :Raises:
+            ValueError for invalid fields.
+        """
+        self.name, self.type, self.signature = name, typ, signature
+        self.fields = tuple((fname, kind, _smart_words(kind, words), arg) for fname, kind, words, arg in fields)
+        self.names = tuple(field[0] for field in self.fields)
+        self._decoders = {}
+
+    def _generate(self, fields, source):
+        """Compile generated functions for some fields.
+
+        :Parameters:
+            - fields: fields (of self.fields), unpacked by one struct.Struct
+            - source: source of the functions, with `_unpack` (unpack_from
+                      of the struct) and placeholders %(dict)s, %(tuple)s
+                      and %(expr)s for the field-expressions of `v`
+                      (the unpacked words)
+        :Returns:
+            namespace with the functions
+        """
+        st, index = _smart_struct(fields)
+        exprs = [_smart_expr(kind, words, arg, index) for _, kind, words, arg in fields]
+        source = source % {
+            "dict":  "{%s}" % ", ".join("%r: %s" % (field[0], expr) for field, expr in zip(fields, exprs)),
+            "tuple": "(%s,)" % ", ".join(exprs),
+            "expr":  exprs[0],
+        }
+        namespace = {"_unpack": st.unpack_from}
+        exec(compile(source, "<SMART-layout %s>" % self.name, "exec"), namespace)
+        return namespace
+
+    def decode(self, b):
+        """Decode raw SMART-data (SECTOR_SIZE bytes) into a dict."""
+        namespace = self._generate(self.fields,
+            "def decode(b):\n"
+            "    v = _unpack(b)\n"
+            "    return %(dict)s\n"
+            "def decode_tuple(b):\n"
+            "    v = _unpack(b)\n"
+            "    return %(tuple)s\n")
+        self.decode, self.decode_tuple = namespace["decode"], namespace["decode_tuple"]
+        return self.decode(b)
+
+    def decode_tuple(self, b):
+        """Decode raw SMART-data into a tuple (in the order of `names`)."""
+        self.decode(b)
+        return self.decode_tuple(b)
+
+    def __getitem__(self, name):
+        try:
+            return self._decoders[name]
+        except KeyError:
+            if name not in self.names:
+                raise
+        decoder = self._decoders[name] = self._generate([self.fields[self.names.index(name)]],
+            "def decoder(b):\n"
+            "    v = _unpack(b)\n"
+            "    return %(expr)s\n")["decoder"]
+        return decoder
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.names
+
+    def keys(self):
+        return self.names
+
+    def values(self):
+        return [self[name] for name in self.names]
+
+    def items(self):
+        return [(name, self[name]) for name in self.names]
+
+    def get(self, name, default=None):
+        return self[name] if name in self.names else default
+
+    def __repr__(self):
+        return "<SmartLayout %s>" % self.name
+
+# compiled layouts: name -> SmartLayout (mapping field-name -> decoder(b), in output-order)
+SMART_FIELDS = {name: SmartLayout(name, *spec) for name, spec in SMART_LAYOUT_TABLE.items()}
+SMART_LAYOUTS = tuple(SMART_FIELDS)
+SMART_FIELD_NAMES = tuple(dict.fromkeys(name for layout in SMART_FIELDS.values() for name in layout.names))
+
+# layouts per SMART-type, in match-order (with signature first):
+# type -> [(start, end, signature or None, SmartLayout)]
+_SMART_MATCH = {}
+for _layout in sorted(SMART_FIELDS.values(), key=lambda layout: layout.signature is None):
+    _start, _signature = _layout.signature or (0, None)
+    _SMART_MATCH.setdefault(_layout.type, []).append((_start, _start + len(_signature or b""), _signature, _layout))
+del _layout, _start, _signature
+
+def smart_layout(typ, b):
+    """Get layout of raw SMART-data.
+
+    :Returns:
+        layout (see SMART_LAYOUTS), or None for unknown types
+    """
+    for start, end, signature, layout in _SMART_MATCH.get(typ, ()):
+        if signature is None or b[start:end] == signature:
+            return layout.name
+    return None
+
+def smart_decode(typ, b):
+    """Decode raw SMART-data.
+
+    :Parameters:
+        - typ: SMART-type ('A' for Apacer, 'T' for Transcend)
+        - b:   raw SMART-data as bytes (SECTOR_SIZE)
+    :Returns:
+        smart-information, see smart_parse()
+    """
+    for start, end, signature, layout in _SMART_MATCH.get(typ, ()):
+        if signature is None or b[start:end] == signature:
+            return layout.decode(b)
+    return {}
+
+class SmartRecord:
+    """Lazily decoded SMART-data.
+
+    Read-only mapping (dict-like) with the same fields as smart_decode(),
+    but every field is only decoded on first access (and then memoized),
+    e.g. for reading a single field.
+    """
+    def __init__(self, typ, b):
+        """
+        :Parameters:
+            - typ: SMART-type ('A' for Apacer, 'T' for Transcend)
+            - b:   raw SMART-data as bytes
+        """
+        self._b = b
+        self._fields = SMART_FIELDS.get(smart_layout(typ, b), {})
+        self._cache = {}
+
+    def __getitem__(self, name):
+        try:
+            return self._cache[name]
+        except KeyError:
+            val = self._cache[name] = self._fields[name](self._b)
+            return val
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __contains__(self, name):
+        return name in self._fields
+
+    def keys(self):
+        return self._fields.keys()
+
+    def values(self):
+        return [self[name] for name in self._fields]
+
+    def items(self):
+        return [(name, self[name]) for name in self._fields]
+
+    def get(self, name, default=None):
+        return self[name] if name in self._fields else default
+
+    def select(self, names):
+        """Decode only some fields.
+
+        :Returns:
+            dict name -> value, in the order of `names`
+        :Raises:
+            KeyError if a field does not exist for this layout.
+        """
+        return {name: self[name] for name in names}
+
+def smart_parse_lines(lines, strict=False, decode=smart_decode):
+    """Parse raw SMART-data line by line.
+
+    :Parameters:
+        - lines:  iterable of raw SMART-data strings (TYPE-HEX), e.g. a
+                  file; empty lines are skipped
+        - strict: treat data failing smart_validate() as malformed
+        - decode: decoder, e.g. smart_decode or SmartRecord (lazy)
+    :Returns:
+        generator of (lineno, smart, error): smart-information (see
+        smart_parse()) and None, or None and an error-message for
+        malformed lines
+    """
+    for lineno, raw in enumerate(lines, 1):
+        raw = raw.strip()
+        if not raw:
+            continue
+        try:
+            raw = smart_check(raw)
+            typ, b = raw[0], bytes.fromhex(raw[2:])
+            if strict:
+                errors = smart_validate(typ, b)
+                if errors:
+                    raise ValueError(", ".join(errors))
+            yield lineno, decode(typ, b), None
+        except ValueError as err:
+            yield lineno, None, str(err)
+
+def smart_parse_frames(f, strict=False, decode=smart_decode):
+    """Parse binary frames (see smart_read_frames()) frame by frame.
+
+    :Parameters:
+        - f:      binary file, containing any number of frames
+        - strict: treat data failing smart_validate() as malformed
+        - decode: decoder, e.g. smart_decode or SmartRecord (lazy)
+    :Returns:
+        generator of (frameno, smart, error), see smart_parse_lines();
+        error-frames are returned as error-message;
+        a truncated frame ends the stream with an error
+    """
+    frames = smart_read_frames(f)
+    frameno = 0
+    while True:
+        frameno += 1
+        try:
+            frame = next(frames, None)
+        except ValueError as err:
+            yield frameno, None, str(err)
+            return
+        if frame is None:
+            return
+        typ, b = frame
+        try:
+            if typ == "E":
+                raise ValueError(b.decode("utf-8", "replace"))
+            if typ not in SMART_TYPES.values() or len(b) != SECTOR_SIZE:
+                raise ValueError("invalid type or length")
+            if strict:
+                errors = smart_validate(typ, b)
+                if errors:
+                    raise ValueError(", ".join(errors))
+            yield frameno, decode(typ, b), None
+        except ValueError as err:
+            yield frameno, None, str(err)
+
+#----------------------
+# validation
+
+def smart_validate(typ, b, cid=None):
+    """Validate raw SMART-data.
+
+    Checks:
+
+    - length, type
+    - not "ff..ff" (like adva-sdcard-smart-get)
+    - plausible endurance (and good block rate)
+    - Apacer: bytes 496..511 contain the CID of the card (incl. CRC7);
+      checked against `cid` if given
+
+    The SMART-data itself has no known checksum.
+
+    :Parameters:
+        - typ: SMART-type ('A' or 'T')
+        - b:   raw SMART-data as bytes
+        - cid: CID of the card as hexadecimal string, or None
+    :Returns:
+        list of error-messages (empty if valid)
+    """
+    if typ not in ('A', 'T'):
+        return ["unknown type '%s'" % typ]
+    if len(b) != SECTOR_SIZE:
+        return ["invalid length %d" % len(b)]
+    if len(b) - len(b.lstrip(b'\xff')) >= 500:
+        return ["no SMART-data (ff..ff)"]
+    errors = []
+    if typ == 'T' and b[0:9] == b'Transcend':
+        if b[70] > 100:
+            errors.append("endurance > 100%")
+    else:
+        if int.from_bytes(b[96:98], "big") > 10000:
+            errors.append("endurance > 100%")
+        if typ == 'A' and int.from_bytes(b[64:66], "big") > 10000:
+            errors.append("good block rate > 100%")
+    if typ == 'A' and any(b[496:512]):
+        from .info import crc7
+        if b[511] != (crc7(b[496:511]) << 1) | 1:
+            errors.append("CID (bytes 496..511) checksum mismatch")
+        if cid is not None and b[496:511] != bytes.fromhex(cid)[:15]:
+            errors.append("CID (bytes 496..510) does not match the card")
+    return errors
+
+def smart_validate_lines(lines):
+    """Validate many raw SMART-data, without parsing them.
+
+    :Parameters:
+        - lines: iterable of raw SMART-data strings (TYPE-HEX), e.g. a
+                 file; empty lines are skipped
+    :Returns:
+        generator of (lineno, errors) for all invalid lines
+    """
+    for lineno, raw in enumerate(lines, 1):
+        raw = raw.strip()
+        if not raw:
+            continue
+        try:
+            raw = smart_check(raw)
+            errors = smart_validate(raw[0], bytes.fromhex(raw[2:]))
+        except ValueError as err:
+            errors = [str(err)]
+        if errors:
+            yield lineno, errors
+
+#----------------------
+# batch-decoding with NumPy (optional)
+
+def smart_batch_load(lines):
+    """Load raw SMART-data (TYPE-HEX-strings) into arrays for smart_decode_batch().
+
+    :Parameters:
+        - lines: iterable of raw SMART-data as string TYPE-HEX
+    :Returns:
+        (types, data): NumPy-arrays with dtype 'U1' (N) and uint8 (N x 512)
+    :Raises:
+        ImportError if NumPy is not installed,
+        ValueError for invalid data.
+    """
+    import numpy as np
+    types = []
+    data = bytearray()
+    for raw in lines:
+        typ, hexdata = raw.strip().split("-", 1)
+        b = bytes.fromhex(hexdata)
+        if len(b) != SECTOR_SIZE:
+            raise ValueError("Invalid SMART raw data length.")
+        types.append(typ)
+        data += b
+    return np.array(types, dtype='U1'), np.frombuffer(bytes(data), dtype=np.uint8).reshape(-1, SECTOR_SIZE)
+
+def _be(rows, start, stop):
+    """Decode big-endian unsigned integers rows[:, start:stop] (max. 8 bytes)."""
+    import numpy as np
+    col = np.zeros(len(rows), dtype=np.uint64)
+    for i in range(start, stop):
+        col = (col << np.uint64(8)) | rows[:, i]
+    return col
+
+def _strings(rows, start, stop, func):
+    """Decode fields rows[:, start:stop] with func (e.g. strings) as object-array.
+
+    Every distinct value is only decoded once.
+    """
+    import numpy as np
+    raw = np.ascontiguousarray(rows[:, start:stop]).view("V%d" % (stop - start)).ravel()
+    uniq, inverse = np.unique(raw, return_inverse=True)
+    return np.array([func(u.tobytes()) for u in uniq], dtype=object)[inverse.ravel()]
+
+def smart_decode_batch(types, data):
+    """Decode many raw SMART-data at once, as NumPy-columns.
+
+    The rows are grouped by layout (see SMART_LAYOUTS: Apacer, Transcend
+    2/4GB, Transcend >=8GB), and every field is decoded for all rows of
+    a layout at once. The values are identical to smart_decode().
+
+    :Parameters:
+        - types: SMART-type per row ('A' or 'T'), sequence or array (N)
+        - data:  raw SMART-data, uint8-array (N x 512)
+    :Returns:
+        dict layout -> dict with columns (NumPy-arrays) for all rows of
+        this layout:
+        - index: row-indices in `data`
+        - the fields of smart_decode(); per-die-lists as (n x 32)-arrays;
+          flash_id (A, T_2GB_4GB) and strings as object-arrays
+        Rows with other types are skipped (like smart_decode() returns {}).
+    :Raises:
+        ImportError if NumPy is not installed.
+    """
+    import numpy as np
+    types = np.asarray(types)
+    data = np.asarray(data, dtype=np.uint8)
+    version = lambda s: "%02d.%02d" % (s[0], s[1])
+    masks = {}
+    for typ, layouts in _SMART_MATCH.items():
+        rest = types == typ
+        for _, _, _, layout in layouts:
+            if layout.signature is None:
+                masks[layout.name] = rest
+                break
+            offset, signature = layout.signature
+            match = (data[:, offset:offset+len(signature)] == np.frombuffer(signature, dtype=np.uint8)).all(axis=1)
+            masks[layout.name] = rest & match
+            rest = rest & ~match
+    batch = {}
+    for layout in SMART_FIELDS.values():
+        index = np.flatnonzero(masks.get(layout.name, False))
+        if len(index) == 0:
+            continue
+        b = data[index]
+        c = {"index": index}
+        for name, kind, words, arg in layout.fields:
+            if kind == "const":
+                c[name] = np.full(len(index), arg)
+            elif kind in ("uint", "scaled"):
+                if len(words) == 1 and words[0][1] == 1:
+                    col = b[:, words[0][0]]
+                elif words[0][3] + 8 * words[0][1] > 64:    # > 64 bit (e.g. flash_id), contiguous
+                    col = _strings(b, words[0][0], words[-1][0] + words[-1][1], lambda s: int.from_bytes(s, "big"))
+                else:
+                    col = _be(b, words[-1][0], words[-1][0] + words[-1][1])
+                    for offset, length, _, shift in words[:-1]:
+                        col = col | (_be(b, offset, offset + length) << np.uint64(shift))
+                c[name] = col if kind == "uint" else col / arg
+            elif kind == "version":
+                c[name] = _strings(b, words[0][0], words[0][0] + 2, version)
+            elif kind == "bytes":
+                c[name] = b[:, words[0][0]:words[0][0]+words[0][1]]
+            elif kind == "sum":
+                c[name] = b[:, words[0][0]:words[0][0]+words[0][1]].sum(axis=1, dtype=np.uint64)
+            else:
+                c[name] = _strings(b, words[0][0], words[0][0] + words[0][1], SMART_STR_KINDS[kind])
+        batch[layout.name] = c
+    return batch
+
+def smart_print(smart):
+    """Print SMART-information.
+    """
+    print("Type:                     %s" % smart["type"])
+    print("Flash ID:                 0x%018x" % smart["flash_id"])
+    print("IC version:               %s" % smart["ic_version"])
+    print("FW version:               %s" % smart["fw_version"])
+    if "ce_number" in smart:
+        print("CE number:                %d" % smart["ce_number"])
+    if isinstance(smart["product_marker"], int):
+        print("Product marker:           0x%016x" % smart["product_marker"])
+    else:
+        print("Product marker:           %s" % smart["product_marker"])
+
+    print("Power on count:           %d" % smart["power_on_count"])
+    print("Power off abnormal count: %d" % smart["power_off_abnormal_count"])
+    print("Endurance:                %.2f %%" % smart["endurance"])
+
+    print("Erase count min.:         %d" % smart["erase_count_min"])
+    print("Erase count avg.:         %d" % smart["erase_count_avg"])
+    print("Erase count max.:         %d" % smart["erase_count_max"])
+    if "erase_count_total" in smart:
+        print("Erase count total:        %d" % smart["erase_count_total"])
+    if "refresh_count_total" in smart:
+        print("Refresh count total:      %d" % smart["refresh_count_total"])
+
+    print("Blocks, bad:              %d" % smart["blocks_bad"])
+    if smart["type"] == "A":
+        print("Blocks, good rate:        %05.02f %%" % smart["blocks_good_rate"])
+        print("Blocks, spare count:      %d" % smart["blocks_spare"])
+        print("Blocks, bad, initial:     %d (%s)" % (smart["blocks_bad_initial"], smart["blocks_bad_initial_per_die"]))
+        print("Blocks, bad, later:       %d (%s)" % (smart["blocks_bad"], smart["blocks_bad_later_per_die"]))
+    if "blocks_spare_rate" in smart:
+        print("Blocks, spare rate:       %.2f %%" % smart["blocks_spare_rate"])
+
+#=========================================
+# change-detection (--on-change)
+#
+# Most polls return the same raw SMART-data as the previous one. A small
+# state file per device holds the digest of the last emitted raw data,
+# so unchanged data can be skipped before parsing. The default
+# directory is on tmpfs, so the state does not wear the card itself.
+#
+# ========= =======================================
+# bytes     state file
+# ========= =======================================
+# 0..7      magic "ADVASDS1"
+# 8..23     digest (BLAKE2b-128 of type + raw data)
+# 24..27    number of unchanged polls since the last output (uint32 LE)
+# 28        type ('A'/'T')
+# (29..540) last emitted raw data (only with --changed-only)
+# ========= =======================================
+
+STATE_DIR = "/run/adva-sdcard"
+SMART_STATE_MAGIC = b"ADVASDS1"
+SMART_STATE = struct.Struct("<8s16sIc")
+
+def smart_digest(typ, b):
+    """Digest of raw SMART-data (for change-detection)."""
+    try:
+        from _blake2 import blake2b     # without hashlib/OpenSSL (startup-time)
+    except ImportError:
+        from hashlib import blake2b
+    return blake2b(typ.encode("ascii") + b, digest_size=16).digest()
+
+def smart_state_path(directory, device):
+    """Path of the state file of a device (or input-file) in directory."""
+    name = os.path.basename(device).strip("<>") or "stdin"
+    return os.path.join(directory, name + ".state")
+
+def smart_state_load(path):
+    """Load state file.
+
+    :Returns:
+        (digest, unchanged, typ, b), where b is None if the raw data is
+        not stored, or None if the state file is missing or invalid
+    """
+    try:
+        with open(path, 'rb') as f:
+            data = f.read(SMART_STATE.size + SECTOR_SIZE + 1)
+    except OSError:
+        return None
+    if len(data) not in (SMART_STATE.size, SMART_STATE.size + SECTOR_SIZE):
+        return None
+    magic, digest, unchanged, typ = SMART_STATE.unpack_from(data)
+    if magic != SMART_STATE_MAGIC:
+        return None
+    return digest, unchanged, typ.decode("latin-1"), data[SMART_STATE.size:] or None
+
+def smart_state_save(path, digest, unchanged, typ, b=None):
+    """Write state file atomically (via temporary file + rename).
+
+    :Parameters:
+        - digest, unchanged, typ: see smart_state_load()
+        - b: raw data to store (for --changed-only), or None
+    :Raises:
+        OSError if the file cannot be written.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = "%s.%d.tmp" % (path, os.getpid())
+    try:
+        with open(tmp, 'wb') as f:
+            f.write(SMART_STATE.pack(SMART_STATE_MAGIC, digest, unchanged, typ.encode("latin-1")) + (b or b""))
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+#=========================================
+
+# fast path for frequent invocations, e.g. "-e -d DEVICE" (see main())
+MAIN_FAST_FLAGS = {
+    "-a": "all", "--all": "all", "-e": "endurance", "--endurance": "endurance",
+    "-p": "parsable", "--parsable": "parsable", "-j": "json", "--json": "json",
+    "-s": "strict", "--strict": "strict", "-R": "binary", "--binary": "binary",
+    "--on-change": "on_change", "--changed-only": "changed_only", "--timings": "timings",
+}
+MAIN_FAST_OPTIONS = {"-f": "field", "--field": "field", "-d": "device", "--device": "device", "-b": "backend", "--backend": "backend",
+                     "--heartbeat": "heartbeat", "--state": "state", "-F": "format", "--format": "format"}
+MAIN_FAST_DEFAULTS = {
+    "all": False, "endurance": False, "field": None, "parsable": False, "json": False,
+    "device": None, "backend": "auto", "strict": False, "batch": None, "binary": False,
+    "on_change": False, "heartbeat": "0", "changed_only": False, "state": STATE_DIR,
+    "timings": False, "format": None, "smartdata": sys.stdin,
+}
+
+def _parser():
+    """Create commandline-parser for main()."""
+    import argparse
+    parser = argparse.ArgumentParser(
+        description="""Parse raw SMART-information from industrial microSD-/SD-card.
+Version %s by %s.""" % (__version__, __author__),
+        formatter_class=argparse.RawDescriptionHelpFormatter,   # for keeping newlines in description
+        epilog="""
+Note that this does not work with USB-cardreaders.\n\
+Supported cards:\n\
+    - Transcend 240I\n\
+    - Transcend 230I\n\
+    - Apacer CH110-MSD / AK6.118*\n\
+    - Apacer CV110-MSD / AK6.112*\n\
+    - Apacer H2-SL / AP-*-2RTM\n\
+    - Apacer H1-SL / AP-*-2HTM\n\
+    - Apacer H2-M  / AP-*-1RTM\n\
+    - Apacer H1-M  / AP-*-1HTM\n\
+""")
+
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("-a", "--all",  action='store_true', help="Show all SMART-data.")
+    group.add_argument("-e", "--endurance", action='store_true', help="Show only remaining endurance (as integer in percent).")
+    group.add_argument("-f", "--field", action='store', metavar="NAME[,NAME...]", help="Show only these fields (one value per line, or with -p/-j as name: value / JSON); only these are decoded.")
+
+    group = parser.add_mutually_exclusive_group(required=False)
+    group.add_argument("-p", "--parsable", action='store_true', help="Print output in parsable format.")
+    group.add_argument("-j", "--json",     action='store_true', help="Print output in JSON format.")
+    group.add_argument("-F", "--format",   choices=("csv", "ndjson", "msgpack"), help="Print output as CSV (header + rows, one column per die), NDJSON or MessagePack, with all fields of all layouts (see adva_sdcard.export).")
+
+    parser.add_argument("-d", "--device", action='store', help="Retrieve raw SMART-data directly from SD-card (instead of 'smartdata').")
+    parser.add_argument("-b", "--backend", choices=("auto", "ioctl", "helper"), default="auto",
+        help="How to retrieve raw SMART-data with -d: in-process via ioctl, via adva-sdcard-smart-get, "
+             "or auto (ioctl, falling back to adva-sdcard-smart-get without permissions), default: auto")
+    parser.add_argument("-s", "--strict", action='store_true', help="Reject invalid SMART-data (see smart_validate()).")
+    parser.add_argument("-B", "--batch", nargs='*', type=argparse.FileType('r'), metavar="FILE", help="Parse many raw SMART-data (one per line) from FILEs (default: stdin), print JSON-lines (-a) or endurances (-e).")
+    parser.add_argument("-R", "--binary", action='store_true', help="Read 'smartdata' / --batch FILEs as binary frames (see adva-sdcard-smart-get --binary) instead of hex.")
+    parser.add_argument("--on-change", action='store_true', help="Print only if the raw SMART-data changed since the last output (digest in a state file per device, checked before parsing).")
+    parser.add_argument("--heartbeat", action='store', type=int, default=0, metavar="N", help="With --on-change: print anyway every N polls, default: 0 (never).")
+    parser.add_argument("--changed-only", action='store_true', help="With --on-change and -a/-f, -p/-j: print only the fields which changed.")
+    parser.add_argument("--state", action='store', default=STATE_DIR, metavar="DIRECTORY", help="State directory for --on-change, default: %s" % STATE_DIR)
+    parser.add_argument("--timings", action='store_true', help="Print the duration of each stage (read, CMD56, hex, decode, output, ...) to stderr, as 'timing: STAGE DEVICE MS ms' (see python3 -m adva_sdcard.timing).")
+    parser.add_argument("smartdata", nargs='?', type=argparse.FileType('r'), default=sys.stdin, help='file containing raw SMART-data, default: stdin')
+    parser.add_argument("--version", action='version', version="%(prog)s " + __version__)
+    return parser
+
+def main(arglist=None):
+    """Parse raw smart data and print result.
+
+    Frequent invocations (e.g. "-e -d DEVICE") are parsed without
+    argparse, and json/subprocess are only imported if needed, since
+    the startup-time dominates the runtime (see bench/bench-startup.py).
+
+    See module doctring for exit codes.
+    """
+    t0 = _timing.clock()
+    # parse arguments
+    args = _args_fast(sys.argv[1:] if arglist is None else arglist,
+                      MAIN_FAST_FLAGS, MAIN_FAST_OPTIONS, MAIN_FAST_DEFAULTS)
+    if args is not None and (args.all + args.endurance + (args.field is not None) != 1 or
+                             args.parsable + args.json + (args.format is not None) > 1 or
+                             args.format not in (None, "csv", "ndjson", "msgpack") or
+                             args.backend not in ("auto", "ioctl", "helper") or not args.heartbeat.isdigit()):
+        args = None     # invalid: let argparse report the error
+    if args is None:
+        parser = _parser()
+        if arglist is None  and  len(sys.argv) <= 1:
+            parser.print_help(sys.stderr)
+            return 0
+        args = parser.parse_args(arglist)
+    if args.field is not None:
+        args.field = args.field.split(",")
+        unknown = [name for name in args.field if name not in SMART_FIELD_NAMES]
+        if unknown:
+            print("ERROR: Invalid arguments, unknown field '%s'. (valid: %s)" % (unknown[0], ", ".join(SMART_FIELD_NAMES)), file=sys.stderr)
+            return 2
+    args.heartbeat = int(args.heartbeat)
+    if (args.heartbeat or args.changed_only) and not args.on_change or args.heartbeat < 0:
+        print("ERROR: Invalid arguments, --heartbeat/--changed-only need --on-change, N >= 0.", file=sys.stderr)
+        return 2
+    if args.changed_only and not ((args.all or args.field) and (args.parsable or args.json)):
+        print("ERROR: Invalid arguments, --changed-only needs -a or -f, and -p or -j.", file=sys.stderr)
+        return 2
+
+    if not args.timings:
+        return _main(args, None)
+    _timing.hook_add(_timing.stderr_hook)
+    try:
+        return _main(args, _timing.record("args", args.device, t0))
+    finally:
+        _timing.hook_remove(_timing.stderr_hook)
+
+def _writer(args, f=None):
+    """Writer of adva_sdcard.export for --format (fields of -a, -f or -e).
+
+    :Parameters:
+        - f: binary file, default: stdout
+    """
+    from .export import SCHEMAS, WRITERS
+    schema = SCHEMAS["smart"]
+    if not args.all:
+        schema = schema.select(args.field or ["endurance"])
+    return WRITERS[args.format](f or sys.stdout.buffer, schema)
+
+def _main(args, t):
+    """Process the parsed arguments of main().
+
+    :Parameters:
+        - args: parsed commandline-arguments
+        - t:    start of the next stage for --timings (see
+                adva_sdcard.timing), or None
+    :Returns:
+        exit code
+    """
+    # batch: parse + print line by line
+    if args.batch is not None:
+        if args.device or args.parsable or args.on_change:
+            print("ERROR: Invalid arguments, --batch cannot be combined with -d, -p or --on-change.", file=sys.stderr)
+            return 2
+        errors = 0
+        write = sys.stdout.write
+        import json
+        encode = json.JSONEncoder().encode
+        decode = smart_decode if args.all else SmartRecord
+        writer = _writer(args) if args.format else None
+        for f in args.batch or [sys.stdin]:
+            if args.binary:
+                records = smart_parse_frames(getattr(f, "buffer", f), args.strict, decode)
+            else:
+                records = smart_parse_lines(f, args.strict, decode)
+            for lineno, smart, error in records:
+                if error is None and args.field and writer is None:
+                    try:
+                        smart = smart.select(args.field)
+                    except KeyError as err:
+                        error = "field %s not available" % err
+                if error is not None:
+                    print("ERROR: %s:%d: Invalid SMART raw data. (%s)" % (f.name, lineno, error), file=sys.stderr)
+                    errors += 1
+                elif writer is not None:
+                    writer.write(smart)
+                elif args.all:
+                    write(encode(smart) + "\n")
+                elif args.field:
+                    write(encode(smart) + "\n")
+                else:
+                    write("%d\n" % smart["endurance"])
+        if writer is not None:
+            writer.close()
+        return 22 if errors else 0
+
+    # retrieve raw SMART-data
+    raw = None
+    if args.device and args.backend != "helper":
+        try:
+            raw = smart_get(args.device)
+        except ValueError as err:
+            print("ERROR: %s" % err, file=sys.stderr)
+            return 2
+        except OSError as err:
+            # no permissions (or no ioctl): fall back to SUID-helper
+            if args.backend == "ioctl" or err.errno not in SMART_GET_FALLBACK_ERRNOS:
+                print("ERROR: %s. (%s, %d)" % (err.strerror, args.device, err.errno), file=sys.stderr)
+                return err.errno
+    if args.device and raw is None:
+        try:
+            import subprocess
+            raw = smart_get_helper(args.device, binary=True)
+        except subprocess.CalledProcessError as err:
+            print(err.stderr)
+            return err.returncode
+        except Exception as err:
+            print("ERROR: Cannot get SMART-data from device. (%s)" % (err,), file=sys.stderr)
+            return 5
+    elif raw is None and args.binary:
+        try:
+            raw = next(smart_read_frames(getattr(args.smartdata, "buffer", args.smartdata)), None)
+        except ValueError as err:
+            print("ERROR: Invalid SMART raw data. (%s)" % err, file=sys.stderr)
+            return 22
+        if raw is None:
+            print("ERROR: Invalid SMART raw data. (no frame)", file=sys.stderr)
+            return 22
+        if raw[0] == "E":
+            print(raw[1].decode("utf-8", "replace"), file=sys.stderr)
+            return 5
+        if raw[0] not in SMART_TYPES.values() or len(raw[1]) != SECTOR_SIZE:
+            print("ERROR: Invalid SMART raw data. (invalid type or length)", file=sys.stderr)
+            return 22
+    elif raw is None:
+        raw = args.smartdata.read(1500).strip()
+    if t is not None:
+        t = _timing.record("read", args.device, t)
+
+    if not isinstance(raw, tuple):
+        # check raw SMART-data
+        try:
+            raw = smart_check(raw)
+        except ValueError:
+            print("ERROR: Invalid SMART raw data.", file=sys.stderr)
+            return 22
+        try:
+            raw = (raw[0], bytes.fromhex(raw[2:]))
+        except ValueError as err:
+            print("ERROR: Invalid SMART raw data. (%s)" % err, file=sys.stderr)
+            return 22
+        if t is not None:
+            t = _timing.record("hex", args.device, t)
+    # --on-change: skip unchanged raw SMART-data before parsing
+    state = prev = None
+    if args.on_change:
+        state_path = smart_state_path(args.state, args.device or args.smartdata.name)
+        digest = smart_digest(*raw)
+        state = smart_state_load(state_path)
+        if state is not None and state[0] == digest and state[2] == raw[0]:
+            unchanged = state[1] + 1
+            if not args.heartbeat or unchanged < args.heartbeat:
+                if args.heartbeat:
+                    try:
+                        smart_state_save(state_path, digest, unchanged, raw[0], state[3])
+                    except OSError as err:
+                        print("ERROR: Cannot write state. (%s)" % err, file=sys.stderr)
+                        return 5
+                return 0
+        elif args.changed_only and state is not None and state[3] is not None:
+            prev = SmartRecord(state[2], state[3])
+        if t is not None:
+            t = _timing.record("state", args.device, t)
+
+    if args.strict:
+        cid = None
+        if args.device:
+            try:
+                from .info import cid_get
+                cid = cid_get(args.device)
+            except Exception:
+                pass
+        errors = smart_validate(raw[0], raw[1], cid)
+        if errors:
+            print("ERROR: Invalid SMART raw data. (%s)" % ", ".join(errors), file=sys.stderr)
+            return 22
+        if t is not None:
+            t = _timing.record("validate", args.device, t)
+
+    # parse raw SMART-data (lazy, only the printed fields are decoded)
+    smart = SmartRecord(*raw)
+    fields = None
+    if args.format:
+        pass                # decoded by the writer (only the exported fields)
+    elif args.field:
+        try:
+            fields = smart.select(args.field)
+        except KeyError as err:
+            print("ERROR: Field %s not available for this card." % err, file=sys.stderr)
+            return 22
+    elif args.all and (args.json or args.parsable):
+        fields = dict(smart)
+    elif args.all:
+        smart.values()      # decode before printing (memoized)
+    else:
+        smart["endurance"]
+    if prev is not None:
+        fields = {key: val for key, val in fields.items() if key not in prev or prev[key] != val}
+    if t is not None:
+        t = _timing.record("decode", args.device, t)
+
+    # print SMART-data
+    if args.format:
+        with _writer(args) as writer:
+            writer.write(smart)
+    elif fields is not None:
+        if not fields and prev is not None:
+            pass                # --changed-only: no decoded field changed
+        elif args.json:
+            import json
+            print(json.dumps(fields))
+        elif args.parsable:
+            for key,val in fields.items():
+                print("%s: %s" % (key, val))
+        else:
+            for val in fields.values():
+                print(val)
+    elif args.all:
+        smart_print(smart)
+    elif args.endurance:
+        print("%d" % smart["endurance"])
+    if t is not None:
+        sys.stdout.flush()
+        t = _timing.record("output", args.device, t)
+
+    if args.on_change:
+        try:
+            smart_state_save(state_path, digest, 0, raw[0], raw[1] if args.changed_only else None)
+        except OSError as err:
+            print("ERROR: Cannot write state. (%s)" % err, file=sys.stderr)
+            return 5
+        if t is not None:
+            _timing.record("save", args.device, t)
+    return 0
+
+#=========================================
+if __name__ == '__main__':
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        print("\nAborted.")
+        sys.exit(130)
+
+#=========================================
@@ -0,0 +1,285 @@
+"""SD-card: Per-stage timings of the SMART-/CID-acquisition.
+
+The acquisition path (sysfs-reads, device open, CMD56-ioctls, helper,
+hex-decoding, parsing, output) records the duration of each stage
+(monotonic clock) and passes it to the registered hooks:
+
+    hook(stage, device, seconds)
+
+Without hooks, each stage costs only a check of `HOOKS` (see
+bench/bench-timings.py). The tools enable the hooks with `--timings`
+and print one line per stage to stderr (see stderr_hook()):
+
+    timing: STAGE DEVICE MILLISECONDS ms
+
+adva-sdcard-smart-get --timings prints the same lines. Repeated runs
+can be aggregated into latency-histograms per stage and device, either
+in-process (TimingStats, e.g. adva-sdcard-monitor --timings) or from
+collected stderr-output (see --help):
+
+    adva-sdcard-smart --timings -e -d /dev/mmcblk0 2>>timings.log
+    python3 -m adva_sdcard.timing timings.log
+
+Example::
+
+    from adva_sdcard import timing, smart
+    stats = timing.TimingStats()
+    timing.hook_add(stats)
+    smart.smart_get("/dev/mmcblk0")
+    print(stats.summary())
+
+:Usage:
+    see --help
+
+:Exit code:
+    0:   success
+    2:   invalid commandline-parameters
+    5:   cannot read file (EIO)
+    130: aborted (e.g. via Ctrl-C) (ECONNABORTED)
+
+:Author:    Advamation / Roland Freikamp <support@advamation.de>
+:Version:   2026-10-17
+:Copyright: Advamation <info@advamation.de>
+:License:   MIT
+"""
+
+__version__ = "1.2.0"
+__author__ = "Advamation <support@advamation.de>"
+
+import sys
+import math
+from time import perf_counter as clock
+
+#=========================================
+# hooks
+#
+# Usage in the acquisition path:
+#
+#     t = clock() if HOOKS else None
+#     ...
+#     if t is not None:
+#         t = record("stage", dev, t)
+
+# registered hooks: hook(stage, device, seconds)
+HOOKS = []
+
+def hook_add(hook):
+    """Register a hook, called with (stage, device, seconds) per stage."""
+    HOOKS.append(hook)
+
+def hook_remove(hook):
+    """Unregister a hook.
+
+    :Raises:
+        ValueError if the hook is not registered
+    """
+    HOOKS.remove(hook)
+
+def record(stage, device, t0):
+    """Pass the duration of a stage (since t0) to all hooks.
+
+    :Parameters:
+        - stage:  name of the stage, e.g. "cmd56"
+        - device: device, e.g. "/dev/mmcblk0" (None: "-")
+        - t0:     start of the stage (clock())
+    :Returns:
+        clock() after the hooks, i.e. the start of the next stage
+        (the time of the hooks is not part of any stage)
+    """
+    seconds = clock() - t0
+    device = device or "-"
+    for hook in HOOKS:
+        hook(stage, device, seconds)
+    return clock()
+
+def stderr_hook(stage, device, seconds):
+    """Hook: print the duration to stderr (see timing_parse_lines())."""
+    sys.stderr.write("timing: %s %s %.3f ms\n" % (stage, device, seconds * 1000.0))     # 1 write: no interleaving of threads
+
+#=========================================
+# aggregation
+
+class Histogram:
+    """Latency-histogram with logarithmic buckets.
+
+    The buckets are HISTOGRAM_BUCKETS per decade (relative error of
+    quantiles < 6%), starting at HISTOGRAM_MIN seconds; memory does not
+    grow with the number of samples.
+    """
+    __slots__ = ("buckets", "count", "sum", "min", "max")
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, seconds):
+        """Add a duration (in seconds)."""
+        i = int(math.log10(seconds / HISTOGRAM_MIN) * HISTOGRAM_BUCKETS) if seconds > HISTOGRAM_MIN else 0
+        self.buckets[i] = self.buckets.get(i, 0) + 1
+        self.count += 1
+        self.sum += seconds
+        if self.min is None or seconds < self.min:
+            self.min = seconds
+        if self.max is None or seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other):
+        """Add the samples of another histogram (e.g. of another thread)."""
+        for i, n in other.buckets.items():
+            self.buckets[i] = self.buckets.get(i, 0) + n
+        self.count += other.count
+        self.sum += other.sum
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+
+    def quantile(self, q):
+        """Estimate a quantile (e.g. 0.95 for p95) in seconds.
+
+        :Returns:
+            geometric center of the bucket of the quantile (limited to
+            min/max), or None without samples
+        """
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(q * self.count))
+        n = 0
+        for i in sorted(self.buckets):
+            n += self.buckets[i]
+            if n >= rank:
+                break
+        val = HISTOGRAM_MIN * 10.0 ** ((i + 0.5) / HISTOGRAM_BUCKETS)
+        return min(max(val, self.min), self.max)
+
+HISTOGRAM_MIN = 1e-7
+HISTOGRAM_BUCKETS = 20
+
+# reported quantiles
+QUANTILES = (0.5, 0.95, 0.99)
+
+class TimingStats:
+    """Histograms per (stage, device); usable as hook (see hook_add()).
+
+    Thread-safe (e.g. for devices_scan()).
+    """
+    def __init__(self):
+        import threading
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, stage, device, seconds):
+        self.add(stage, device, seconds)
+
+    def add(self, stage, device, seconds):
+        """Add the duration of a stage."""
+        with self._lock:
+            hist = self.histograms.get((stage, device))
+            if hist is None:
+                hist = self.histograms[(stage, device)] = Histogram()
+            hist.add(seconds)
+
+    def summary(self, quantiles=QUANTILES):
+        """Summarize the histograms.
+
+        :Returns:
+            list of dicts (stage, device, count, sum, min, max, p50, p95,
+            p99; in seconds), sorted by device and stage (in order of
+            the first sample)
+        """
+        with self._lock:
+            items = list(self.histograms.items())
+        result = []
+        for (stage, device), hist in sorted(items, key=lambda item: item[0][1]):
+            entry = {"stage": stage, "device": device, "count": hist.count, "sum": hist.sum,
+                     "min": hist.min, "max": hist.max}
+            for q in quantiles:
+                entry["p%g" % (q * 100)] = hist.quantile(q)
+            result.append(entry)
+        return result
+
+def timing_parse_lines(lines):
+    """Parse timing-lines (see stderr_hook()), ignore other lines.
+
+    :Returns:
+        iterator of (stage, device, seconds)
+    """
+    for line in lines:
+        if not line.startswith("timing: "):
+            continue
+        fields = line.split()
+        if len(fields) != 5 or fields[4] != "ms":
+            continue
+        try:
+            seconds = float(fields[3]) / 1000.0
+        except ValueError:
+            continue
+        yield fields[1], fields[2], seconds
+
+def summary_print(summary):
+    """Print summary (see TimingStats.summary()) as table, in ms."""
+    print("%-16s %-16s %8s %10s %10s %10s %10s" % ("STAGE", "DEVICE", "COUNT", "P50", "P95", "P99", "MAX"))
+    for entry in summary:
+        print("%-16s %-16s %8d %10.3f %10.3f %10.3f %10.3f" % (
+              entry["stage"], entry["device"], entry["count"],
+              entry["p50"] * 1000.0, entry["p95"] * 1000.0, entry["p99"] * 1000.0, entry["max"] * 1000.0))
+
+#=========================================
+
+def main(arglist=None):
+    """Aggregate timing-lines and print p50/p95/p99 per stage and device.
+
+    See module docstring for exit codes.
+    """
+    import argparse
+    parser = argparse.ArgumentParser(
+        prog="python3 -m adva_sdcard.timing",
+        description="""Aggregate the --timings-output of the adva-sdcard-* tools into latency-histograms.
+Version %s by %s.""" % (__version__, __author__),
+        formatter_class=argparse.RawDescriptionHelpFormatter,   # for keeping newlines in description
+        epilog="""
+Examples:
+    adva-sdcard-smart --timings -e -d /dev/mmcblk0 2>>timings.log
+    python3 -m adva_sdcard.timing timings.log
+    python3 -m adva_sdcard.timing -j --device /dev/mmcblk0 timings.log
+\n""")
+    parser.add_argument("-j", "--json", action='store_true', help="Print output in JSON format (seconds).")
+    parser.add_argument("--device", action='store', help="Only this device.")
+    parser.add_argument("--all-devices", action='store_true', help="Aggregate all devices (device '*').")
+    parser.add_argument("file", nargs='*', help="files with timing-lines (e.g. stderr of --timings), default: stdin")
+    parser.add_argument("--version", action='version', version="%(prog)s " + __version__)
+    args = parser.parse_args(arglist)
+
+    stats = TimingStats()
+    for name in args.file or ["-"]:
+        try:
+            f = sys.stdin if name == "-" else open(name, 'r', encoding="utf-8", errors="replace")
+        except OSError as err:
+            print("ERROR: Cannot open '%s'. (%s)" % (name, err), file=sys.stderr)
+            return 5    # EIO
+        with f:
+            for stage, device, seconds in timing_parse_lines(f):
+                if args.device and device != args.device:
+                    continue
+                stats.add(stage, "*" if args.all_devices else device, seconds)
+
+    summary = stats.summary()
+    if args.json:
+        import json
+        print(json.dumps({"timings": summary}))
+    else:
+        summary_print(summary)
+    return 0
+
+#=========================================
+if __name__ == '__main__':
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        print("\nAborted.")
+        sys.exit(130)   # ECONNABORTED
+
+#=========================================